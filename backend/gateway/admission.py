@@ -0,0 +1,258 @@
+"""Admission control for the expensive endpoints (/forge, /simulate).
+
+A request is admitted in two steps:
+
+1. Token buckets: one per (route, client) and optionally one per route across
+   all clients. An empty bucket sheds the request straight away, with the
+   time until the next token as Retry-After.
+2. A concurrency gate shared by all guarded routes: up to max_concurrent
+   requests run at once, up to max_queue more wait in FIFO order, and none
+   waits longer than max_wait. A full queue or an expired wait is shed, with
+   a Retry-After estimated from recent service times.
+
+Buckets live in process memory by default. RedisBuckets keeps them in a
+shared Redis so several uvicorn workers enforce one limit; the concurrency
+gate stays per worker, since what it protects is that worker's event loop.
+
+Neither step bounds simulators: a cold /simulate only starts Webots and
+returns, so its gate slot is held for milliseconds while the process runs
+for the whole mission. ProcessLimit counts the simulator processes a worker
+has started and are still alive, and refuses a launch once limit of them
+are; the warm pool is bounded by its own max_size.
+"""
+import asyncio
+import collections
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+@dataclass(frozen=True)
+class RoutePolicy:
+    client_per_min: Optional[float] = None   # None: no per-client limit
+    client_burst: int = 1
+    route_per_min: Optional[float] = None    # None: no limit across clients
+    route_burst: int = 1
+
+class Shed(Exception):
+    """The request is not admitted; reason is one of Shed.REASONS."""
+    REASONS = ("client_rate", "route_rate", "queue_full", "wait_timeout", "simulators_busy")
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+class MemoryBuckets:
+    """Token buckets in a dict; idle, refilled buckets are pruned as it grows."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, prune_at: int = 10_000):
+        self.clock = clock
+        self.prune_at = prune_at
+        self._state: Dict[str, tuple] = {}   # key -> (tokens, updated, full_at)
+
+    async def take(self, key: str, per_min: float, burst: int) -> float:
+        """Take a token; returns 0 if granted, else seconds until one is available."""
+        now = self.clock()
+        rate = per_min / 60.0
+        tokens, updated, _ = self._state.get(key, (burst, now, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        if len(self._state) >= self.prune_at:
+            self._state = {k: v for k, v in self._state.items() if v[2] > now}
+        self._state[key] = (tokens, now, now + (burst - tokens) / rate)
+        return wait
+
+# Atomic refill-and-take on the Redis server's clock, so workers need not agree on time
+_TAKE_SCRIPT = """
+local burst = tonumber(ARGV[2])
+local rate = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + (now - updated) * rate)
+local wait = 0
+if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+class RedisBuckets:
+    """Token buckets shared by every worker through Redis (pip install redis)."""
+
+    def __init__(self, url: str, prefix: str = "simforge:admission:"):
+        import redis.asyncio
+
+        self.redis = redis.asyncio.from_url(url)
+        self.prefix = prefix
+        self._take = self.redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, per_min: float, burst: int) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[per_min / 60.0, burst]))
+
+class ConcurrencyGate:
+    """At most limit holders; up to max_queue waiters, each for at most max_wait seconds."""
+
+    def __init__(self, limit: int, max_queue: int, max_wait: float):
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self.peak_queue = 0
+        self._waiters: "collections.deque[asyncio.Future]" = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, retry_after: float):
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            raise Shed("queue_full", retry_after)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.peak_queue = max(self.peak_queue, len(self._waiters))
+        try:
+            await asyncio.wait_for(fut, self.max_wait)
+        except BaseException as e:
+            if fut.done() and not fut.cancelled():
+                # A slot was handed over just as we gave up: pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.TimeoutError):
+                raise Shed("wait_timeout", retry_after) from None
+            raise
+
+    def release(self):
+        # The slot goes straight to the oldest live waiter, so active is unchanged
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)
+                return
+        self.active -= 1
+
+class AdmissionController:
+    def __init__(self, policies: Dict[str, RoutePolicy], max_concurrent: int = 8, max_queue: int = 16,
+                 max_wait: float = 10.0, buckets=None):
+        self.policies = policies
+        self.gate = ConcurrencyGate(max_concurrent, max_queue, max_wait)
+        self.buckets = buckets or MemoryBuckets()
+        self.service_sec = 1.0          # EWMA of how long an admitted request holds its slot
+        self.admitted = collections.Counter()
+        self.shed = collections.Counter()
+        self.wait_total = collections.Counter()
+
+    def _queue_retry_after(self) -> float:
+        backlog = self.gate.queued + 1
+        return self.service_sec * backlog / max(self.gate.limit, 1)
+
+    async def admit(self, route: str, client: str) -> float:
+        """Wait for admission; returns the admission time for done(), or raises Shed."""
+        policy = self.policies.get(route, RoutePolicy())
+        try:
+            if policy.client_per_min:
+                wait = await self.buckets.take(f"{route}:{client}", policy.client_per_min, policy.client_burst)
+                if wait:
+                    raise Shed("client_rate", wait)
+            if policy.route_per_min:
+                wait = await self.buckets.take(route, policy.route_per_min, policy.route_burst)
+                if wait:
+                    raise Shed("route_rate", wait)
+            started = time.monotonic()
+            await self.gate.acquire(self._queue_retry_after())
+        except Shed as e:
+            self.shed[(route, e.reason)] += 1
+            raise
+        admitted = time.monotonic()
+        self.admitted[route] += 1
+        self.wait_total[route] += admitted - started
+        return admitted
+
+    def refused(self, route: str, shed: Shed):
+        """Count a request shed by a check outside admit(), such as a ProcessLimit."""
+        self.shed[(route, shed.reason)] += 1
+
+    def done(self, admitted: float):
+        self.service_sec += 0.2 * (time.monotonic() - admitted - self.service_sec)
+        self.gate.release()
+
+    def stats(self) -> dict:
+        routes = {}
+        for route in sorted(set(self.policies) | set(self.admitted) | {r for r, _ in self.shed}):
+            count = self.admitted[route]
+            routes[route] = {
+                "admitted": count,
+                "mean_wait_sec": round(self.wait_total[route] / count, 4) if count else None,
+                "shed": {reason: self.shed[(route, reason)] for reason in Shed.REASONS},
+            }
+        return {
+            "active": self.gate.active,
+            "max_concurrent": self.gate.limit,
+            "queued": self.gate.queued,
+            "peak_queued": self.gate.peak_queue,
+            "max_queue": self.gate.max_queue,
+            "service_sec_ewma": round(self.service_sec, 3),
+            "buckets": type(self.buckets).__name__,
+            "routes": routes,
+        }
+
+class ProcessLimit:
+    """At most limit child processes alive at once; exited ones are reaped on each check."""
+
+    def __init__(self, limit: int, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.clock = clock
+        self.run_sec = 60.0             # EWMA of how long a process lives
+        self.started = 0
+        self.refused = 0
+        self._live: Dict[object, tuple] = {}   # slot -> (started, process or None while launching)
+
+    def reap(self) -> int:
+        now = self.clock()
+        for slot, (started, process) in list(self._live.items()):
+            if process is not None and process.poll() is not None:
+                del self._live[slot]
+                self.run_sec += 0.2 * (now - started - self.run_sec)
+        return len(self._live)
+
+    def reserve(self) -> object:
+        """Hold a place for a process about to start, or raise Shed("simulators_busy")."""
+        if self.reap() >= self.limit:
+            self.refused += 1
+            oldest = min(started for started, _ in self._live.values())
+            raise Shed("simulators_busy", self.run_sec - (self.clock() - oldest))
+        slot = object()
+        self._live[slot] = (self.clock(), None)
+        return slot
+
+    def bind(self, slot: object, process):
+        """The process started for slot; the place is held until it exits."""
+        self._live[slot] = (self.clock(), process)
+        self.started += 1
+
+    def release(self, slot: object):
+        """Give back a place whose process never started."""
+        self._live.pop(slot, None)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.reap(),
+            "max_running": self.limit,
+            "started": self.started,
+            "refused": self.refused,
+            "run_sec_ewma": round(self.run_sec, 1),
+        }
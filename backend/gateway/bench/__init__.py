@@ -0,0 +1 @@
+"""Benchmarks for the gateway, run in-process against local stand-ins."""
@@ -0,0 +1,76 @@
+"""Seeded mission datasets shaped like what /forge and /telemetry write."""
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import List
+import random
+
+from bson import ObjectId
+
+from ..lap_estimator import course_difficulty
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    name: str
+    missions: int
+    scores_per_mission: int = 5     # typical missions
+    deep_missions: int = 10         # missions with a long scores history
+    deep_scores: int = 20_000
+    pilots: int = 500
+    gates: int = 8
+    seed: int = 0
+
+PRESETS = {
+    "1k": DatasetSpec("1k", missions=1_000),
+    "100k": DatasetSpec("100k", missions=100_000),
+}
+
+@dataclass
+class Dataset:
+    spec: DatasetSpec
+    ids: List[str] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    deep_ids: List[str] = field(default_factory=list)
+
+def _course(rng: random.Random, n: int) -> List[dict]:
+    return [{"x": round(rng.uniform(-40, 40), 2), "y": round(rng.uniform(-40, 40), 2),
+             "z": round(rng.uniform(1, 12), 2), "yaw": round(rng.uniform(-3.14, 3.14), 3)}
+            for _ in range(n)]
+
+def _scores(rng: random.Random, n: int, pilots: int) -> List[dict]:
+    return [{"pilot": f"pilot_{rng.randrange(pilots)}", "lap_time_sec": round(rng.uniform(20, 120), 3)}
+            for _ in range(n)]
+
+def mission_docs(rng: random.Random, spec: DatasetSpec, start: int, count: int) -> List[dict]:
+    """Missions start..start+count of spec, as they sit in db.missions."""
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    courses = [_course(rng, spec.gates) for _ in range(count)]
+    difficulty = course_difficulty(courses)
+    docs = []
+    for i, (gates, diff) in enumerate(zip(courses, difficulty)):
+        n = start + i
+        deep = n < spec.deep_missions
+        docs.append({
+            "_id": ObjectId(),
+            "mission_name": f"bench_{spec.name}_{n}",
+            "meta": {"terrain": "stadium", "threats": [], "wind_kts": rng.choice([0, 5, 10]),
+                     "laps": rng.randint(1, 3), "tags": ["bench"], "trl": 1, "urgency": "Low",
+                     "domain": "bench", "gates": gates, "difficulty": diff},
+            "created": (created + timedelta(minutes=n)).isoformat(timespec="microseconds"),
+            "scores": _scores(rng, spec.deep_scores if deep else spec.scores_per_mission, spec.pilots),
+            "upvotes": rng.randrange(50),
+        })
+    return docs
+
+async def seed(db, spec: DatasetSpec, batch: int = 5_000) -> Dataset:
+    """Drop and refill db.missions; returns the ids/names the benchmarks sample from."""
+    rng = random.Random(spec.seed)
+    await db.missions.delete_many({})
+    dataset = Dataset(spec)
+    for start in range(0, spec.missions, batch):
+        docs = mission_docs(rng, spec, start, min(batch, spec.missions - start))
+        await db.missions.insert_many(docs)
+        for doc in docs:
+            dataset.ids.append(str(doc["_id"]))
+            dataset.names.append(doc["mission_name"])
+    dataset.deep_ids = dataset.ids[:spec.deep_missions]
+    return dataset
@@ -0,0 +1,190 @@
+"""Latency and allocation benchmarks for the gateway's hot endpoints.
+
+    python -m backend.gateway.bench.gateway --dataset 1k --dataset 100k \\
+        --out bench_results/gateway.json --baseline bench_results/previous.json
+
+The FastAPI app runs in-process against an in-memory Mongo stand-in (or
+--mongo-url) and a stub LLM server. Each endpoint is timed for --requests
+calls or --max-seconds, whichever ends first; allocations are measured in a
+separate tracemalloc pass so they do not skew the latencies. Results are
+written as JSON, one row per (dataset, endpoint).
+
+The in-memory stand-in copies every document on find/aggregate, so its
+absolute numbers overstate database time on big collections; for the 100k
+preset point --mongo-url at a scratch mongod, or pick endpoints with
+--endpoint. Relative changes in the gateway's own work show up either way.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from .datasets import PRESETS, Dataset, DatasetSpec, seed
+from .stubs import StubLLM, gateway_client, memory_db
+
+MIN_REQUESTS = 5
+
+def _course(rng: random.Random) -> List[dict]:
+    return [{"x": rng.uniform(-30, 30), "y": rng.uniform(-30, 30), "z": rng.uniform(1, 10)} for _ in range(6)]
+
+# name -> (method, path and body for one request)
+CASES: Dict[str, Callable] = {
+    "forge": lambda ds, rng: ("POST", "/forge", {"thread_text": "Bench course", "meta": {"gates": _course(rng)}}),
+    "telemetry": lambda ds, rng: ("POST", "/telemetry", {
+        "mission": rng.choice(ds.ids), "pilot": f"pilot_{rng.randrange(500)}",
+        "lap_time_sec": round(rng.uniform(30, 120), 3)}),
+    "missions": lambda ds, rng: ("GET", "/missions", None),
+    "mission": lambda ds, rng: ("GET", f"/missions/{rng.choice(ds.ids)}", None),
+    "leaderboard": lambda ds, rng: ("GET", f"/missions/{rng.choice(ds.ids[len(ds.deep_ids):] or ds.ids)}/leaderboard", None),
+    "leaderboard_deep": lambda ds, rng: ("GET", f"/missions/{rng.choice(ds.deep_ids or ds.ids)}/leaderboard", None),
+    "upvote": lambda ds, rng: ("POST", f"/missions/{rng.choice(ds.names)}/upvote", None),
+    "upvotes": lambda ds, rng: ("GET", f"/missions/{rng.choice(ds.names)}/upvotes", None),
+}
+
+class BenchmarkError(RuntimeError):
+    pass
+
+async def _call(client, case, dataset, rng):
+    method, path, body = case(dataset, rng)
+    res = await client.request(method, path, json=body)
+    if res.status_code >= 400:
+        raise BenchmarkError(f"{method} {path} -> {res.status_code}: {res.text[:200]}")
+    return res
+
+async def measure(client, name: str, dataset: Dataset, requests: int = 200, max_seconds: float = 10.0,
+                  alloc_samples: int = 20, seed_value: int = 0) -> dict:
+    """Time one endpoint, then sample its per-request allocations."""
+    case = CASES[name]
+    rng = random.Random(seed_value)
+    await _call(client, case, dataset, rng)   # warm-up: imports, caches, first-use paths
+
+    latencies = []
+    started = time.perf_counter()
+    deadline = started + max_seconds
+    for _ in range(requests):
+        t0 = time.perf_counter()
+        await _call(client, case, dataset, rng)
+        latencies.append(time.perf_counter() - t0)
+        if len(latencies) >= MIN_REQUESTS and time.perf_counter() > deadline:
+            break
+    elapsed = time.perf_counter() - started
+
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(min(alloc_samples, len(latencies))):
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            await _call(client, case, dataset, rng)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "dataset": dataset.spec.name,
+        "endpoint": name,
+        "requests": len(latencies),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "alloc_peak_kb": round(float(np.median(peaks)) / 1024, 1) if peaks else None,
+        "alloc_retained_kb": round(float(np.mean(retained)) / 1024, 1) if retained else None,
+    }
+
+def environment(mongo_url: Optional[str]) -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "database": "mongo" if mongo_url else "mongomock",
+    }
+
+async def run_benchmarks(specs: List[DatasetSpec], endpoints: List[str], requests: int = 200,
+                         max_seconds: float = 10.0, alloc_samples: int = 20, llm_latency: float = 0.0,
+                         mongo_url: Optional[str] = None, log=print) -> dict:
+    """Seed each dataset and benchmark every endpoint against it."""
+    results = []
+    async with StubLLM(latency=llm_latency) as llm:
+        for spec in specs:
+            db = memory_db(mongo_url)
+            t0 = time.perf_counter()
+            dataset = await seed(db, spec)
+            log(f"[Bench] seeded {spec.name}: {spec.missions} missions in {time.perf_counter() - t0:.1f}s")
+            async with gateway_client(db, llm.url) as client:
+                for name in endpoints:
+                    row = await measure(client, name, dataset, requests, max_seconds, alloc_samples)
+                    log(f"[Bench] {spec.name:>5} {name:<17} p50 {row['p50_ms']:>9.2f} ms  "
+                        f"p95 {row['p95_ms']:>9.2f} ms  p99 {row['p99_ms']:>9.2f} ms  "
+                        f"alloc {row['alloc_peak_kb']} KB  ({row['requests']} req)")
+                    results.append(row)
+            await db.client.drop_database(db.name)
+    return {"environment": environment(mongo_url), "results": results}
+
+def compare(current: dict, baseline: dict) -> List[str]:
+    """p50/p95 change per (dataset, endpoint) present in both runs."""
+    old = {(r["dataset"], r["endpoint"]): r for r in baseline.get("results", [])}
+    lines = []
+    for row in current["results"]:
+        prev = old.get((row["dataset"], row["endpoint"]))
+        if not prev:
+            continue
+        parts = []
+        for key in ("p50_ms", "p95_ms"):
+            change = (row[key] - prev[key]) / prev[key] * 100 if prev[key] else 0.0
+            parts.append(f"{key[:3]} {prev[key]:.2f} -> {row[key]:.2f} ms ({change:+.0f}%)")
+        lines.append(f"{row['dataset']:>5} {row['endpoint']:<17} " + "  ".join(parts))
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark gateway endpoints in-process.")
+    parser.add_argument("--dataset", action="append", choices=sorted(PRESETS),
+                        help="dataset preset; repeat for several (default 1k)")
+    parser.add_argument("--endpoint", action="append", choices=sorted(CASES),
+                        help="endpoint to run; repeat for several (default all)")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="time budget per endpoint")
+    parser.add_argument("--alloc-samples", type=int, default=20, help="requests traced for allocations")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="stub LLM response delay, seconds")
+    parser.add_argument("--mongo-url", help="benchmark a real Mongo instead of the in-memory stand-in")
+    parser.add_argument("--out", type=Path, default=None, help="results JSON (default bench_results/gateway_<time>.json)")
+    parser.add_argument("--baseline", type=Path, help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    specs = [PRESETS[name] for name in (args.dataset or ["1k"])]
+    report = asyncio.run(run_benchmarks(
+        specs, args.endpoint or list(CASES), args.requests, args.max_seconds,
+        args.alloc_samples, args.llm_latency, args.mongo_url,
+    ))
+    out = args.out or Path("bench_results") / f"gateway_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"[Bench] results written to {out}")
+    if args.baseline:
+        for line in compare(report, json.loads(args.baseline.read_text())):
+            print(f"[Bench] {line}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""End-to-end load harness: virtual supervisors plus Socket.IO leaderboard viewers.
+
+    # spawn uvicorn with 4 workers against a scratch database and ramp load
+    python -m backend.gateway.bench.load --workers 4 --mongo-url mongodb://localhost:27018 \\
+        --stages 250,500,1000,2000 --viewers 2000 --stage-seconds 30 --out bench_results/load.json
+
+    # point at an already running gateway (missions are read from GET /missions)
+    python -m backend.gateway.bench.load --url http://localhost:8000 --stages 100,200
+
+Without --url or --mongo-url the gateway runs in this process on the
+in-memory Mongo stand-in, which is only good for smoke runs.
+
+Virtual supervisors fly missions the way mission_supervisor does: one
+telemetry POST per lap at a pace set by the course's lower-bound lap time
+(compressed by --time-scale), between /running and /complete, or /fail part
+way through for --fail-ratio of the runs. Supervisors share missions and
+never queue them through /simulate, so once a mission's first run ended the
+gateway refuses their status reports for it (409); those are counted as
+refused, not as errors, and the laps are still posted. Viewers connect over
+websocket and join mission rooms like useLeaderboard.ts; every score_update
+they receive is matched to the lap that caused it for lap-to-broadcast
+latency and delivery ratio.
+
+Each stage runs a fixed number of supervisors. A stage is saturated once
+the gateway absorbs less than --saturation-ratio of the offered lap rate or
+telemetry p95 exceeds --slo-ms; the report names the first saturated stage.
+With several workers, broadcasts only reach viewers on other workers when
+the gateway has SIO_MESSAGE_QUEUE set, which shows up as delivery < 1.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import random
+import socket
+import sys
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from .datasets import DatasetSpec, seed
+from .gateway import environment
+from .stubs import memory_db
+
+ROOT = Path(__file__).resolve().parents[3]
+LOAD_DB = "simforge_load"
+
+@dataclass
+class LoadConfig:
+    viewers: int = 100
+    stage_seconds: float = 20.0
+    time_scale: float = 20.0        # simulated seconds per wall-clock second
+    fail_ratio: float = 0.1
+    slo_ms: float = 250.0
+    saturation_ratio: float = 0.9
+    seed: int = 0
+
+@dataclass
+class Recorder:
+    """Everything one stage measured; shared by all virtual clients."""
+    sent: Dict[tuple, float] = field(default_factory=dict)
+    room_viewers: Counter = field(default_factory=Counter)
+    http_ms: Dict[str, list] = field(default_factory=lambda: defaultdict(list))
+    db_ms: Dict[str, list] = field(default_factory=lambda: defaultdict(list))
+    broadcast_ms: List[float] = field(default_factory=list)
+    schedule_lag_ms: List[float] = field(default_factory=list)
+    scheduled_laps: int = 0         # telemetry laps drawn by the supervisors ...
+    scheduled_seconds: float = 0.0  # ... and the wall time all drawn laps take
+    expected_deliveries: int = 0
+    errors: Counter = field(default_factory=Counter)
+    refused: Counter = field(default_factory=Counter)   # lifecycle transitions the gateway turned down
+
+    def deliver(self, data: dict):
+        sent = self.sent.get((data.get("mission"), data.get("pilot"), data.get("lap_time_sec")))
+        if sent is not None:
+            self.broadcast_ms.append((time.perf_counter() - sent) * 1000)
+
+def _percentiles(values) -> dict:
+    if not values:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"count": len(values), "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+            "p99_ms": round(float(p99), 2), "max_ms": round(float(max(values)), 2)}
+
+async def _timed(rec: Recorder, kind: str, request):
+    started = time.perf_counter()
+    try:
+        res = await request
+    except httpx.HTTPError as e:
+        rec.errors[f"{kind}:{type(e).__name__}"] += 1
+        return None
+    rec.http_ms[kind].append((time.perf_counter() - started) * 1000)
+    if res.status_code == 409 and kind in ("running", "complete", "fail"):
+        rec.refused[kind] += 1
+    elif res.status_code >= 400:
+        rec.errors[f"{kind}:{res.status_code}"] += 1
+    timing = res.headers.get("server-timing", "")
+    if timing.startswith("db;dur="):
+        rec.db_ms[kind].append(float(timing[7:]))
+    return res
+
+async def virtual_supervisor(n: int, client: httpx.AsyncClient, missions: List[dict], cfg: LoadConfig,
+                             rec: Recorder, stop: asyncio.Event):
+    """Fly random missions until stop is set: telemetry per lap, then complete or fail.
+
+    Laps are due on a fixed schedule (open loop): a slow response delays the
+    POST but not when the next lap is due, so the offered rate does not drop
+    as the gateway slows down.
+    """
+    rng = random.Random(cfg.seed * 100_003 + n)
+    pilot = f"vsup_{n}"
+    loop = asyncio.get_running_loop()
+    due = loop.time()
+    while not stop.is_set():
+        mission = rng.choice(missions)
+        mission_id = mission["id"]
+        fail_lap = rng.randrange(mission["laps"]) if rng.random() < cfg.fail_ratio else None
+        await _timed(rec, "running", client.post(f"/missions/{mission_id}/running"))
+        for lap in range(mission["laps"]):
+            lap_time = round(mission["bound"] * rng.uniform(1.2, 2.5), 3)
+            due += lap_time / cfg.time_scale
+            rec.scheduled_seconds += lap_time / cfg.time_scale
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stop.wait(), max(due - loop.time(), 0.0))
+            if stop.is_set():
+                return
+            if lap == fail_lap:
+                await _timed(rec, "fail", client.post(f"/missions/{mission_id}/fail",
+                                                      params={"reason": rng.choice(["crash", "stuck", "timeout"])}))
+                break
+            rec.scheduled_laps += 1
+            rec.schedule_lag_ms.append(max(loop.time() - due, 0.0) * 1000)
+            rec.expected_deliveries += rec.room_viewers[mission_id]
+            rec.sent[(mission_id, pilot, lap_time)] = time.perf_counter()
+            await _timed(rec, "telemetry", client.post("/telemetry", json={
+                "mission": mission_id, "pilot": pilot, "lap_time_sec": lap_time, "status": "running"}))
+        else:
+            await _timed(rec, "complete", client.post(f"/missions/{mission_id}/complete"))
+
+async def connect_viewers(url: str, missions: List[dict], count: int, recorders: list, seed_value: int = 0,
+                          concurrency: int = 100) -> list:
+    """Connect count Socket.IO viewers, most of them on a few popular missions."""
+    import socketio
+
+    rng = random.Random(seed_value)
+    weights = [1.0 / (rank + 1) for rank in range(len(missions))]
+    gate = asyncio.Semaphore(concurrency)
+    clients = []
+
+    async def one(mission_id):
+        client = socketio.AsyncClient(reconnection=False)
+
+        @client.on("score_update")
+        async def on_score(data):
+            recorders[-1].deliver(data)
+
+        async with gate:
+            await client.connect(url, transports=["websocket"])
+            await client.call("join_room", mission_id, timeout=30)
+        clients.append((client, mission_id))
+
+    picks = rng.choices([m["id"] for m in missions], weights=weights, k=count)
+    results = await asyncio.gather(*(one(m) for m in picks), return_exceptions=True)
+    failed = [r for r in results if isinstance(r, Exception)]
+    if failed:
+        print(f"[Load] {len(failed)} viewers failed to connect, e.g. {failed[0]!r}")
+    return clients
+
+async def run_stage(url: str, supervisors: int, missions: List[dict], cfg: LoadConfig,
+                    rec: Recorder, viewers: list) -> dict:
+    for _, mission_id in viewers:
+        rec.room_viewers[mission_id] += 1
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=min(supervisors, 1000), max_keepalive_connections=min(supervisors, 1000))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=30) as client:
+        tasks = [asyncio.create_task(virtual_supervisor(n, client, missions, cfg, rec, stop))
+                 for n in range(supervisors)]
+        started = time.perf_counter()
+        await asyncio.sleep(cfg.stage_seconds)
+        stop.set()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.5)   # let in-flight broadcasts land
+
+    # Offered rate from the drawn schedule, so a backlog does not hide it
+    offered_rate = supervisors * rec.scheduled_laps / rec.scheduled_seconds if rec.scheduled_seconds else 0.0
+    ingested = len(rec.http_ms["telemetry"])
+    telemetry = _percentiles(rec.http_ms["telemetry"])
+    ingest_rate = ingested / elapsed
+    saturated = (ingest_rate < cfg.saturation_ratio * offered_rate
+                 or telemetry.get("p95_ms", 0) > cfg.slo_ms)
+    return {
+        "supervisors": supervisors,
+        "viewers": len(viewers),
+        "seconds": round(elapsed, 2),
+        "offered_laps_per_sec": round(offered_rate, 1),
+        "ingest_laps_per_sec": round(ingest_rate, 1),
+        "telemetry": telemetry,
+        "schedule_lag": _percentiles(rec.schedule_lag_ms),
+        "complete": _percentiles(rec.http_ms["complete"]),
+        "fail": _percentiles(rec.http_ms["fail"]),
+        "db_write": _percentiles([v for values in rec.db_ms.values() for v in values]),
+        "broadcast": _percentiles(rec.broadcast_ms),
+        "delivery_ratio": round(len(rec.broadcast_ms) / rec.expected_deliveries, 4) if rec.expected_deliveries else None,
+        "errors": dict(rec.errors),
+        "refused": dict(rec.refused),
+        "saturated": saturated,
+    }
+
+async def mission_pool(url: str, db=None, count: int = 200, seed_value: int = 0) -> List[dict]:
+    """Missions for supervisors to fly: seeded into db when given, else read from the gateway."""
+    if db is not None:
+        await seed(db, DatasetSpec("load", missions=count, scores_per_mission=0, deep_missions=0, seed=seed_value))
+        docs = await db.missions.find({}, {"meta.laps": 1, "meta.difficulty": 1}).to_list(None)
+    else:
+        async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+            res = await client.get("/missions")
+            res.raise_for_status()
+            docs = res.json()[:count]
+    missions = []
+    for doc in docs:
+        meta = doc.get("meta", {})
+        bound = meta.get("difficulty", {}).get("min_lap_time_sec") or 30.0
+        missions.append({"id": str(doc["_id"]), "laps": int(meta.get("laps", 1) or 1), "bound": max(bound, 5.0)})
+    if not missions:
+        raise RuntimeError("No missions to fly; seed the database or forge a few first")
+    return missions
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+@contextlib.asynccontextmanager
+async def spawned_gateway(workers: int, mongo_url: str, extra_env: Optional[dict] = None):
+    """uvicorn with N workers on a free port, pointed at the load-test database."""
+    port = _free_port()
+    env = os.environ | {"MONGO_URL": mongo_url, "MONGO_DB": LOAD_DB} | (extra_env or {})
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "uvicorn", "backend.gateway.main:socket_app", "--host", "127.0.0.1",
+        "--port", str(port), "--workers", str(workers), "--log-level", "warning", cwd=ROOT, env=env)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        async with httpx.AsyncClient(base_url=url, timeout=2) as client:
+            for _ in range(120):
+                with contextlib.suppress(httpx.HTTPError):
+                    if (await client.get("/whitelisted-users")).status_code == 200:
+                        break
+                if proc.returncode is not None:
+                    raise RuntimeError(f"gateway exited with {proc.returncode}")
+                await asyncio.sleep(0.5)
+            else:
+                raise RuntimeError("gateway did not come up")
+        yield url
+    finally:
+        if proc.returncode is None:
+            proc.terminate()
+            await proc.wait()
+
+@contextlib.asynccontextmanager
+async def in_process_gateway(db):
+    """The gateway served by uvicorn on this event loop, against db."""
+    import uvicorn
+    from .. import main
+
+    saved = main.db
+    main.db = db
+    await main.init_db()
+    server = uvicorn.Server(uvicorn.Config(main.socket_app, host="127.0.0.1", port=_free_port(),
+                                           log_level="warning", lifespan="off", ws="wsproto"))
+    task = asyncio.create_task(server.serve())
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.05)
+        yield f"http://127.0.0.1:{server.config.port}"
+    finally:
+        server.should_exit = True
+        await task
+        main.db = saved
+
+async def run_load(stages: List[int], cfg: LoadConfig, url: Optional[str] = None, workers: int = 1,
+                   mongo_url: Optional[str] = None, missions: int = 200, log=print) -> dict:
+    async with contextlib.AsyncExitStack() as stack:
+        db = None
+        if url:
+            target = url
+        elif mongo_url:
+            db = memory_db(mongo_url, LOAD_DB)
+            target = await stack.enter_async_context(spawned_gateway(workers, mongo_url))
+        else:
+            db = memory_db()
+            target = await stack.enter_async_context(in_process_gateway(db))
+        pool = await mission_pool(target, db, missions, cfg.seed)
+        log(f"[Load] gateway {target}, {len(pool)} missions")
+
+        recorders = [Recorder()]
+        viewers = await connect_viewers(target, pool, cfg.viewers, recorders, cfg.seed)
+        log(f"[Load] {len(viewers)} viewers connected")
+
+        results = []
+        for supervisors in stages:
+            rec = Recorder()
+            recorders.append(rec)
+            stage = await run_stage(target, supervisors, pool, cfg, rec, viewers)
+            results.append(stage)
+            log(f"[Load] {supervisors:>5} supervisors: {stage['ingest_laps_per_sec']:>8.1f}/"
+                f"{stage['offered_laps_per_sec']:.1f} laps/s, telemetry p95 {stage['telemetry'].get('p95_ms')} ms, "
+                f"db p95 {stage['db_write'].get('p95_ms')} ms, broadcast p95 {stage['broadcast'].get('p95_ms')} ms, "
+                f"delivery {stage['delivery_ratio']}{'  SATURATED' if stage['saturated'] else ''}")
+
+        await asyncio.gather(*(client.disconnect() for client, _ in viewers), return_exceptions=True)
+        if db is not None and mongo_url:
+            await db.client.drop_database(LOAD_DB)
+
+    saturated = next((s for s in results if s["saturated"]), None)
+    sustained = [s for s in results if not s["saturated"]]
+    return {
+        "environment": environment(mongo_url) | {"workers": workers, "target": url or "spawned"},
+        "config": cfg.__dict__,
+        "stages": results,
+        "saturation": {
+            "first_saturated_supervisors": saturated["supervisors"] if saturated else None,
+            "max_sustained_laps_per_sec": max((s["ingest_laps_per_sec"] for s in sustained), default=None),
+        },
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the gateway with virtual supervisors and viewers.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="running gateway to load")
+    target.add_argument("--mongo-url", help="spawn the gateway against this Mongo (database simforge_load)")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the spawned gateway")
+    parser.add_argument("--stages", default="50,100,200,400", help="comma-separated supervisor counts")
+    parser.add_argument("--viewers", type=int, default=200)
+    parser.add_argument("--missions", type=int, default=200, help="missions seeded for the run")
+    parser.add_argument("--stage-seconds", type=float, default=20.0)
+    parser.add_argument("--time-scale", type=float, default=20.0, help="simulated seconds per wall second")
+    parser.add_argument("--fail-ratio", type=float, default=0.1)
+    parser.add_argument("--slo-ms", type=float, default=250.0, help="telemetry p95 above this counts as saturated")
+    parser.add_argument("--out", type=Path, default=None, help="results JSON (default bench_results/load_<time>.json)")
+    args = parser.parse_args(argv)
+
+    cfg = LoadConfig(viewers=args.viewers, stage_seconds=args.stage_seconds, time_scale=args.time_scale,
+                     fail_ratio=args.fail_ratio, slo_ms=args.slo_ms)
+    stages = [int(s) for s in args.stages.split(",")]
+    report = asyncio.run(run_load(stages, cfg, args.url, args.workers, args.mongo_url, args.missions))
+    out = args.out or Path("bench_results") / f"load_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"[Load] results written to {out}; saturation: {report['saturation']}")
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Response encoding benchmark: the old per-endpoint path against serialization.py.
+
+    python -m backend.gateway.bench.serialization --dataset 1k --dataset 100k \\
+        --out bench_results/serialization.json
+
+The old path is what the endpoints did before the shared response layer:
+str() each _id by hand, then FastAPI's jsonable_encoder and Starlette's
+json.dumps. The new path is MongoJSONResponse.render on the raw documents.
+Both encode the same payloads, built in memory from the benchmark datasets
+(no database involved), so the numbers isolate encoding cost:
+
+- missions:     every mission, as GET /missions returns them
+- mission_deep: one mission with a long scores history, as GET /missions/{id}
+- leaderboard:  top-10 rows, as GET /missions/{id}/leaderboard
+"""
+import argparse
+import copy
+import json
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi.encoders import jsonable_encoder
+
+from ..serialization import MongoJSONResponse
+from .datasets import PRESETS, DatasetSpec, mission_docs
+from .gateway import environment
+
+def legacy_render(content) -> bytes:
+    """Stringify _ids the way the endpoints used to, then jsonable_encoder + JSONResponse.render."""
+    docs = content if isinstance(content, list) else [content]
+    for doc in docs:
+        if "_id" in doc:
+            doc["_id"] = str(doc["_id"])
+    return json.dumps(jsonable_encoder(content), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+def fast_render(content) -> bytes:
+    return MongoJSONResponse(content).body
+
+def payloads(spec: DatasetSpec) -> Dict[str, object]:
+    rng = random.Random(spec.seed)
+    docs = mission_docs(rng, spec, spec.deep_missions, spec.missions - spec.deep_missions)
+    # Older documents carry completion_time as a BSON datetime rather than a string
+    finished = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i, doc in enumerate(docs[::3]):
+        doc["status"] = "completed"
+        doc["completion_time"] = finished + timedelta(minutes=i)
+    deep = mission_docs(rng, spec, 0, 1)[0]
+    board = sorted(({"pilot": s["pilot"], "fastest_lap_time_sec": s["lap_time_sec"]} for s in deep["scores"][:10]),
+                   key=lambda row: row["fastest_lap_time_sec"])
+    return {"missions": docs, "mission_deep": deep, "leaderboard": board}
+
+def measure(render: Callable, payload, repeats: int, max_seconds: float) -> dict:
+    # Each call gets its own copy since the legacy path rewrites _id in place
+    body = render(copy.deepcopy(payload))
+    times = []
+    deadline = time.perf_counter() + max_seconds
+    for _ in range(repeats):
+        content = copy.deepcopy(payload)
+        t0 = time.perf_counter()
+        render(content)
+        times.append(time.perf_counter() - t0)
+        if len(times) >= 3 and time.perf_counter() > deadline:
+            break
+    content = copy.deepcopy(payload)
+    tracemalloc.start()
+    try:
+        render(content)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    ms = np.array(times) * 1000
+    return {"p50_ms": round(float(np.median(ms)), 3), "min_ms": round(float(ms.min()), 3),
+            "alloc_peak_kb": round(peak / 1024, 1), "bytes": len(body), "runs": len(times)}
+
+def run(specs: List[DatasetSpec], repeats: int = 20, max_seconds: float = 10.0, log=print) -> dict:
+    results = []
+    for spec in specs:
+        for name, payload in payloads(spec).items():
+            legacy = measure(legacy_render, payload, repeats, max_seconds)
+            fast = measure(fast_render, payload, repeats, max_seconds)
+            row = {"dataset": spec.name, "payload": name, "legacy": legacy, "fast": fast,
+                   "speedup": round(legacy["p50_ms"] / fast["p50_ms"], 1) if fast["p50_ms"] else None}
+            log(f"[Bench] {spec.name:>5} {name:<13} {legacy['bytes'] / 1024:>9.0f} KB  "
+                f"legacy {legacy['p50_ms']:>9.2f} ms  fast {fast['p50_ms']:>8.2f} ms  x{row['speedup']}")
+            results.append(row)
+    return {"environment": environment(None) | {"database": None}, "results": results}
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Benchmark response encoding of Mongo documents.")
+    parser.add_argument("--dataset", action="append", choices=sorted(PRESETS),
+                        help="dataset preset; repeat for several (default 1k)")
+    parser.add_argument("--repeats", type=int, default=20, help="timed encodes per payload and path")
+    parser.add_argument("--max-seconds", type=float, default=10.0, help="time budget per payload and path")
+    parser.add_argument("--out", type=Path, default=None,
+                        help="results JSON (default bench_results/serialization_<time>.json)")
+    args = parser.parse_args(argv)
+
+    report = run([PRESETS[name] for name in (args.dataset or ["1k"])], args.repeats, args.max_seconds)
+    out = args.out or Path("bench_results") / f"serialization_{datetime.now():%Y%m%d_%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"[Bench] results written to {out}")
+
+if __name__ == "__main__":
+    sys.exit(main())
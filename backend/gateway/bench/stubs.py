@@ -0,0 +1,157 @@
+"""In-process stand-ins for the gateway's external services.
+
+- memory_db(): a mongomock-motor database with the same API the gateway uses
+  from motor (requirements-dev.txt), or a real server when a URL is given.
+- StubLLM: a tiny HTTP/1.1 server that answers every POST like OpenRouter's
+  chat completions endpoint, with a fixed mission JSON and optional latency.
+- ImageHost: the same kind of server answering GETs from a dict of files,
+  standing in for the sites forge reference images are linked from.
+- gateway_client(): the FastAPI app wired to both, driven through httpx's
+  ASGI transport so no sockets or uvicorn workers are involved.
+"""
+import asyncio
+import contextlib
+import json
+import tempfile
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import httpx
+
+from ..admission import AdmissionController, ProcessLimit
+from ..image_cache import ImageCache
+from ..uploads import DiskStore, GridFSStore
+from ..mission_cache import MissionCache
+
+MISSION_REPLY = {"terrain": "stadium", "threats": ["wind"], "wind_kts": 8, "laps": 2}
+
+def memory_db(url: Optional[str] = None, name: str = "simforge_bench"):
+    """Fresh database: in-memory by default, a real Mongo when url is set."""
+    if url:
+        import motor.motor_asyncio
+        return motor.motor_asyncio.AsyncIOMotorClient(url, serverSelectionTimeoutMS=5000)[name]
+    from mongomock_motor import AsyncMongoMockClient
+    return AsyncMongoMockClient()[name]
+
+class StubLLM:
+    """OpenRouter look-alike on 127.0.0.1; use as an async context manager."""
+
+    def __init__(self, reply: dict = MISSION_REPLY, latency: float = 0.0):
+        self.body = json.dumps({"choices": [{"message": {"content": json.dumps(reply)}}]}).encode()
+        self.latency = latency
+        self.requests = 0
+        self.last_request = None
+        self.url = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}/api/v1/chat/completions"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = 0
+                for line in head.split(b"\r\n"):
+                    name, _, value = line.partition(b":")
+                    if name.strip().lower() == b"content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                self.requests += 1
+                self.last_request = json.loads(body) if body else None
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: %d\r\n\r\n%s" % (len(self.body), self.body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+class ImageHost:
+    """Static file server on 127.0.0.1: files maps a path to (content type, body).
+
+    A "redirect" content type answers 302 with the body as Location.
+    """
+
+    def __init__(self, files: Dict[str, Tuple[str, bytes]]):
+        self.files = files
+        self.requests = 0
+        self.url = None
+        self._server = None
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.url = f"http://{host}:{port}"
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                path = head.split(b" ", 2)[1].decode()
+                self.requests += 1
+                extra = b""
+                if path in self.files:
+                    media_type, body = self.files[path]
+                    status = b"200 OK"
+                else:
+                    media_type, body, status = "text/plain", b"not found", b"404 Not Found"
+                if media_type == "redirect":
+                    media_type, extra, status = "text/plain", b"Location: %s\r\n" % body, b"302 Found"
+                writer.write(b"HTTP/1.1 %s\r\n%sContent-Type: %s\r\nContent-Length: %d\r\n\r\n%s"
+                             % (status, extra, media_type.encode(), len(body), body))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+@contextlib.asynccontextmanager
+async def gateway_client(db, llm_url: Optional[str] = None):
+    """httpx client bound to the gateway app, running against db and the stub LLM."""
+    from .. import main
+
+    saved = (main.db, main.OPENROUTER_ENDPOINT, main.mission_cache, main.admission, main.image_cache, main.upload_store,
+             main.sim_processes)
+    main.db = db
+    if llm_url:
+        main.OPENROUTER_ENDPOINT = llm_url
+    # Cached responses and their stats belong to the database in use
+    cache = main.mission_cache
+    main.mission_cache = MissionCache(cache.max_entries, cache.ttl, cache.max_bytes)
+    # Benchmarks call /forge back to back from one address: keep the concurrency
+    # gate but drop the per-client rate limits
+    gate = main.admission.gate
+    main.admission = AdmissionController({}, gate.limit, gate.max_queue, gate.max_wait)
+    main.sim_processes = ProcessLimit(main.sim_processes.limit)
+    # Reference images and uploaded videos go to a scratch directory, removed on exit;
+    # images come from an ImageHost on 127.0.0.1
+    images = main.image_cache
+    scratch = tempfile.TemporaryDirectory(prefix="simforge-scratch-")
+    main.image_cache = ImageCache(Path(scratch.name) / "images", images.max_bytes, images.max_edge,
+                                  max_source_bytes=images.max_source_bytes, allow_private=True)
+    main.upload_store = GridFSStore(db) if isinstance(main.upload_store, GridFSStore) else DiskStore(
+        Path(scratch.name) / "uploads")
+    try:
+        await main.init_db()
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            yield client
+    finally:
+        (main.db, main.OPENROUTER_ENDPOINT, main.mission_cache, main.admission, main.image_cache, main.upload_store,
+         main.sim_processes) = saved
+        scratch.cleanup()
@@ -0,0 +1,69 @@
+"""Mission comments stored in fixed-size buckets.
+
+Each mission's comments are spread over db.comment_buckets documents holding
+at most BUCKET_SIZE comments each, instead of one array inside the mission
+that grows forever and is read whole:
+
+    {"_id": ObjectId, "mission": "<mission id>", "count": n,
+     "first": ObjectId, "last": ObjectId, "comments": [{"_id", "author", "content", "created"}]}
+
+A comment is appended with a single upsert that pushes into the mission's
+open bucket (count < BUCKET_SIZE) or creates a new one. Comment ids are
+ObjectIds, so they sort by creation time: pages are served newest first,
+and the id of the last comment on a page is the cursor for the next one.
+"""
+from typing import Optional
+
+from bson import ObjectId
+
+from .serialization import utc_timestamp
+
+BUCKET_SIZE = 50
+MAX_PAGE = 100
+
+async def ensure_indexes(db):
+    # The open-bucket lookup on append, and newest-first paging
+    await db.comment_buckets.create_index([("mission", 1), ("count", 1)])
+    await db.comment_buckets.create_index([("mission", 1), ("last", -1)])
+
+async def add_comment(db, mission_id: str, author: str, content: str) -> dict:
+    comment = {"_id": ObjectId(), "author": author, "content": content, "created": utc_timestamp()}
+    await db.comment_buckets.update_one(
+        {"mission": mission_id, "count": {"$lt": BUCKET_SIZE}},
+        {
+            "$push": {"comments": comment},
+            "$inc": {"count": 1},
+            "$min": {"first": comment["_id"]},
+            "$max": {"last": comment["_id"]},
+        },
+        upsert=True,
+    )
+    return comment
+
+def parse_cursor(cursor: Optional[str]) -> Optional[ObjectId]:
+    if cursor is None:
+        return None
+    if not ObjectId.is_valid(cursor):
+        raise ValueError("Invalid comment cursor")
+    return ObjectId(cursor)
+
+async def comment_page(db, mission_id: str, limit: int = 20, before: Optional[ObjectId] = None) -> dict:
+    """Up to limit comments older than the before cursor, newest first, and the next cursor."""
+    query = {"mission": mission_id}
+    if before is not None:
+        query["first"] = {"$lt": before}
+    # Concurrent appends can leave two buckets open at once, so their id ranges
+    # may overlap: keep reading buckets until none can hold a newer comment
+    # than the oldest one the page (plus one, to know there is more) needs.
+    wanted = limit + 1
+    found = []
+    async for bucket in db.comment_buckets.find(query).sort("last", -1):
+        if len(found) >= wanted and bucket["last"] < found[wanted - 1]["_id"]:
+            break
+        found.extend(c for c in bucket["comments"] if before is None or c["_id"] < before)
+        found.sort(key=lambda c: c["_id"], reverse=True)
+    page = found[:limit]
+    return {
+        "comments": page,
+        "next": str(page[-1]["_id"]) if len(found) > limit else None,
+    }
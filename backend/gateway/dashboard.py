@@ -0,0 +1,194 @@
+"""Dashboard overview rollup, kept current by the write paths.
+
+Everything the dashboard shows lives in one document, db.dashboard
+{"_id": "summary"}, so a page view is a single small read:
+
+    {"missions": {"total", "terrain": {..: n}, "domain": {..: n}, "status": {..: n}},
+     "laps": {"total", "flagged"},
+     "top_upvoted": [{"mission", "mission_name", "upvotes"}],   # most upvoted first
+     "top_pilots": [{"pilot", "laps"}],                          # most laps first
+     "recent_laps": [{"mission", "mission_name", "pilot", "lap_time_sec", "at"}],  # newest first
+     "updated", "reconciled"}
+
+Forge, telemetry, upvote and lifecycle transitions apply $inc / $push updates as they
+write. The top lists are bounded with $push $sort/$slice; their counts only
+grow, so re-pushing an entry with its new count keeps them exact. Per-pilot
+lap counts, which the top list is ranked from, live in db.dashboard_pilots.
+
+The incremental updates are not transactional with the mission writes, so
+reconcile() periodically rebuilds the rollup from the missions collection and
+reports the drift it repaired.
+"""
+from typing import Optional
+
+from .lifecycle import FORGED
+from .serialization import utc_timestamp
+
+SUMMARY_ID = "summary"
+TOP_N = 10
+RECENT_N = 20
+OPEN = FORGED   # status counted for missions saved before they had one
+
+def count_key(value) -> str:
+    """Free-text values (terrain, domain) as safe field names."""
+    key = str(value).strip().replace(".", "_") if value not in (None, "") else "Unknown"
+    return key.lstrip("$") or "Unknown"
+
+def _top_push(field: str, entry: dict, by: str, n: int) -> dict:
+    return {"$push": {field: {"$each": [entry], "$sort": {by: -1}, "$slice": n}}}
+
+async def _top_reenter(db, field: str, key: str, entry: dict, by: str):
+    """Push back an entry just pulled from a top list, unless a racing write already did."""
+    pushed = await db.dashboard.update_one({"_id": SUMMARY_ID, f"{field}.{key}": {"$ne": entry[key]}}, {
+        "$set": {"updated": utc_timestamp()}, **_top_push(field, entry, by, TOP_N)})
+    if not pushed.matched_count:
+        # Counts only grow, so the larger one is current; reconcile() restores the order
+        await db.dashboard.update_one({"_id": SUMMARY_ID, f"{field}.{key}": entry[key]}, {
+            "$max": {f"{field}.$.{by}": entry[by]}, "$set": {"updated": utc_timestamp()}})
+
+async def mission_created(db, mission: dict):
+    meta = mission.get("meta", {})
+    entry = {"mission": str(mission["_id"]), "mission_name": mission["mission_name"],
+             "upvotes": mission.get("upvotes", 0)}
+    await db.dashboard.update_one({"_id": SUMMARY_ID}, {
+        "$inc": {
+            "missions.total": 1,
+            f"missions.terrain.{count_key(meta.get('terrain'))}": 1,
+            f"missions.domain.{count_key(meta.get('domain'))}": 1,
+            f"missions.status.{count_key(mission.get('status', OPEN))}": 1,
+        },
+        "$set": {"updated": utc_timestamp()},
+        **_top_push("top_upvoted", entry, "upvotes", TOP_N),
+    }, upsert=True)
+
+async def mission_upvoted(db, mission: dict):
+    entry = {"mission": str(mission["_id"]), "mission_name": mission["mission_name"],
+             "upvotes": mission.get("upvotes", 0)}
+    # A field cannot be pulled from and pushed to in one update
+    await db.dashboard.update_one({"_id": SUMMARY_ID}, {"$pull": {"top_upvoted": {"mission": entry["mission"]}}},
+                                  upsert=True)
+    await _top_reenter(db, "top_upvoted", "mission", entry, "upvotes")
+
+async def status_changed(db, before: Optional[str], after: str):
+    before = count_key(before or OPEN)
+    if before == count_key(after):
+        return
+    await db.dashboard.update_one({"_id": SUMMARY_ID}, {
+        "$inc": {f"missions.status.{before}": -1, f"missions.status.{count_key(after)}": 1},
+        "$set": {"updated": utc_timestamp()},
+    }, upsert=True)
+
+async def lap_recorded(db, mission: dict, score: dict):
+    """A telemetry lap; flagged laps are only counted, like everywhere else."""
+    if score.get("flagged"):
+        await db.dashboard.update_one({"_id": SUMMARY_ID}, {"$inc": {"laps.flagged": 1}}, upsert=True)
+        return
+    lap = {
+        "mission": str(mission["_id"]),
+        "mission_name": mission.get("mission_name"),
+        "pilot": score["pilot"],
+        "lap_time_sec": score["lap_time_sec"],
+        "at": score["at"],
+    }
+    pilot = await db.dashboard_pilots.find_one_and_update(
+        {"_id": score["pilot"]}, {"$inc": {"laps": 1}, "$set": {"last_lap": score["at"]}},
+        upsert=True, return_document=True)
+    await db.dashboard.update_one({"_id": SUMMARY_ID}, {
+        "$inc": {"laps.total": 1},
+        "$pull": {"top_pilots": {"pilot": score["pilot"]}},
+        "$push": {"recent_laps": {"$each": [lap], "$position": 0, "$slice": RECENT_N}},
+    }, upsert=True)
+    await _top_reenter(db, "top_pilots", "pilot", {"pilot": score["pilot"], "laps": pilot["laps"]}, "laps")
+
+def _rollup_view(doc: Optional[dict]) -> dict:
+    doc = doc or {}
+    missions = doc.get("missions", {})
+    return {
+        "missions": {
+            "total": missions.get("total", 0),
+            # Drop buckets emptied by status changes
+            **{group: {k: n for k, n in missions.get(group, {}).items() if n}
+               for group in ("terrain", "domain", "status")},
+        },
+        "laps": {"total": doc.get("laps", {}).get("total", 0), "flagged": doc.get("laps", {}).get("flagged", 0)},
+        "top_upvoted": doc.get("top_upvoted", []),
+        "top_pilots": doc.get("top_pilots", []),
+        "recent_laps": doc.get("recent_laps", []),
+        "updated": doc.get("updated"),
+        "reconciled": doc.get("reconciled"),
+    }
+
+def _comparable(value):
+    return sorted(map(repr, value)) if isinstance(value, list) else value
+
+async def summary(db) -> Optional[dict]:
+    """The dashboard overview, or None before the first reconcile or write."""
+    doc = await db.dashboard.find_one({"_id": SUMMARY_ID})
+    return _rollup_view(doc) if doc else None
+
+async def reconcile(db) -> dict:
+    """Rebuild the rollup from the missions collection; returns the fields that had drifted.
+
+    Increments landing while it runs may be overwritten; the next run puts them back.
+    """
+    def counts(field):
+        return [{"$group": {"_id": field, "n": {"$sum": 1}}}]
+
+    facets = await db.missions.aggregate([{"$facet": {
+        "terrain": counts("$meta.terrain"),
+        "domain": counts("$meta.domain"),
+        "status": counts({"$ifNull": ["$status", OPEN]}),
+        "top_upvoted": [
+            {"$sort": {"upvotes": -1, "_id": 1}}, {"$limit": TOP_N},
+            {"$project": {"mission_name": 1, "upvotes": {"$ifNull": ["$upvotes", 0]}}},
+        ],
+    }}]).to_list(None)
+    facets = facets[0] if facets else {}
+    group = {name: {} for name in ("terrain", "domain", "status")}
+    for name, rows in group.items():
+        for row in facets.get(name, []):
+            key = count_key(row["_id"])
+            rows[key] = rows.get(key, 0) + row["n"]
+
+    laps = db.missions.aggregate([
+        {"$unwind": "$scores"},
+        {"$group": {"_id": {"pilot": "$scores.pilot", "flagged": {"$ifNull": ["$scores.flagged", False]}},
+                    "laps": {"$sum": 1}, "last_lap": {"$max": "$scores.at"}}},
+    ])
+    pilots, lap_totals = {}, {"total": 0, "flagged": 0}
+    async for row in laps:
+        if row["_id"]["flagged"]:
+            lap_totals["flagged"] += row["laps"]
+            continue
+        lap_totals["total"] += row["laps"]
+        pilots[row["_id"]["pilot"]] = {"laps": row["laps"], "last_lap": row.get("last_lap")}
+
+    recent = await db.missions.aggregate([
+        {"$unwind": "$scores"},
+        {"$match": {"scores.at": {"$exists": True}, "scores.flagged": {"$ne": True}}},
+        {"$sort": {"scores.at": -1}},
+        {"$limit": RECENT_N},
+        {"$project": {"mission_name": 1, "pilot": "$scores.pilot", "lap_time_sec": "$scores.lap_time_sec",
+                      "at": "$scores.at"}},
+    ]).to_list(None)
+
+    rebuilt = {
+        "missions": {"total": sum(group["status"].values()), **group},
+        "laps": lap_totals,
+        "top_upvoted": [{"mission": str(m["_id"]), "mission_name": m.get("mission_name"), "upvotes": m["upvotes"]}
+                        for m in facets.get("top_upvoted", [])],
+        "top_pilots": [{"pilot": p, "laps": v["laps"]}
+                       for p, v in sorted(pilots.items(), key=lambda kv: (-kv[1]["laps"], kv[0]))[:TOP_N]],
+        "recent_laps": [{"mission": str(r["_id"]), "mission_name": r.get("mission_name"), "pilot": r["pilot"],
+                         "lap_time_sec": r["lap_time_sec"], "at": r["at"]} for r in recent],
+    }
+    before, after = _rollup_view(await db.dashboard.find_one({"_id": SUMMARY_ID})), _rollup_view(rebuilt)
+    # Top lists may order ties differently without having drifted
+    drifted = [key for key in rebuilt if _comparable(before[key]) != _comparable(after[key])]
+
+    now = utc_timestamp()
+    await db.dashboard.replace_one({"_id": SUMMARY_ID}, rebuilt | {"updated": now, "reconciled": now}, upsert=True)
+    await db.dashboard_pilots.delete_many({"_id": {"$nin": list(pilots)}})
+    for pilot, values in pilots.items():
+        await db.dashboard_pilots.replace_one({"_id": pilot}, values, upsert=True)
+    return {"drifted": drifted, "missions": rebuilt["missions"]["total"], "pilots": len(pilots), "reconciled": now}
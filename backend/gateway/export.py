@@ -0,0 +1,283 @@
+"""Streaming bulk export of missions, scores and challenges.
+
+    python -m backend.gateway.export scores --url http://localhost:8000 --user ops \\
+        --format csv --created-from 2025-01-01 --out exports/scores.csv.gz
+
+Exports are for whitelisted users only, named by --user (?user_id=). Challenge
+exports leave out author identity and moderation fields.
+
+GET /export/{kind} reads one server-side cursor in _id order, batch_size
+documents per round trip. Rows are written as NDJSON or CSV and gzipped
+while they stream, so the gateway only ever holds one batch and one
+compressed chunk, whatever the size of the export.
+
+The first field of every row is its resume key: the document _id, or
+mission_id for scores, since a mission's scores are exported together.
+Passing the last complete key as ?after= restarts the export right after it.
+The CLI does this by itself. It appends each flushed chunk to the output as
+a separate gzip member and records {after, size} in <out>.resume, so after a
+dropped connection or a killed run it truncates back to the last clean point
+and carries on. gzip, zcat and pandas read multi-member files as one stream.
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+import zlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Tuple
+
+import httpx
+import orjson
+from bson import ObjectId
+
+from .serialization import dumps
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "500"))
+FORMATS = ("ndjson", "csv")
+CHUNK_BYTES = 1 << 18
+
+def _mission_row(doc: dict) -> Iterable[dict]:
+    yield doc
+
+def _score_rows(doc: dict) -> Iterable[dict]:
+    for seq, score in enumerate(doc.get("scores") or ()):
+        yield {"mission_id": doc["_id"], "mission_name": doc.get("mission_name"), "seq": seq,
+               "pilot": score.get("pilot"), "lap_time_sec": score.get("lap_time_sec"),
+               "flagged": bool(score.get("flagged")), "splits_ms": score.get("splits_ms")}
+
+@dataclass(frozen=True)
+class ExportKind:
+    collection: str
+    state_field: str
+    projection: Optional[dict]
+    columns: Tuple[str, ...]      # CSV columns; the first one is the resume key
+    rows: Callable[[dict], Iterable[dict]]
+
+# Public challenge fields; author identity and moderation notes stay in the database
+CHALLENGE_FIELDS = ("title", "body_md", "tags", "trl", "urgency", "domain", "environment", "state", "created",
+                    "updated", "upvotes", "solution_count", "threats", "wind_kts", "laps")
+
+KINDS = {
+    # Scores are exported on their own, so mission rows leave the array out
+    "missions": ExportKind("missions", "status", {"scores": 0},
+                           ("_id", "mission_name", "created", "status", "upvotes", "meta"), _mission_row),
+    "scores": ExportKind("missions", "status", {"mission_name": 1, "scores": 1},
+                         ("mission_id", "mission_name", "seq", "pilot", "lap_time_sec", "flagged", "splits_ms"),
+                         _score_rows),
+    "challenges": ExportKind("challenges", "state", dict.fromkeys(CHALLENGE_FIELDS, 1),
+                             ("_id", "title", "state", "created", "upvotes", "domain", "urgency",
+                              "trl", "environment", "tags"), _mission_row),
+}
+
+def _bound(value: str) -> str:
+    """Normalize a created filter to the stored timestamp format; naive means UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+def export_query(kind: str, created_from: Optional[str] = None, created_to: Optional[str] = None,
+                 state: Optional[str] = None, after: Optional[str] = None) -> dict:
+    """Mongo filter for an export; raises ValueError on a bad date or token."""
+    spec = KINDS[kind]
+    query = {}
+    created = {}
+    if created_from:
+        created["$gte"] = _bound(created_from)
+    if created_to:
+        created["$lt"] = _bound(created_to)
+    if created:
+        query["created"] = created
+    if state:
+        query[spec.state_field] = state
+    if after:
+        if not ObjectId.is_valid(after):
+            raise ValueError(f"Invalid resume token: {after}")
+        query["_id"] = {"$gt": ObjectId(after)}
+    return query
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return dumps(value).decode()
+    return str(value)
+
+async def export_stream(db, kind: str, fmt: str = "ndjson", query: Optional[dict] = None,
+                        batch_size: int = EXPORT_BATCH_SIZE, level: int = 6):
+    """Yield the gzip-compressed export of kind matching query, in _id order."""
+    spec = KINDS[kind]
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)   # wbits 31: gzip container
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    parts, size = [], 0
+    if fmt == "csv":
+        writer.writerow(spec.columns)
+    cursor = db[spec.collection].find(query or {}, spec.projection).sort("_id", 1).batch_size(batch_size)
+    async for doc in cursor:
+        for row in spec.rows(doc):
+            if fmt == "csv":
+                writer.writerow([_cell(row.get(column)) for column in spec.columns])
+            else:
+                line = dumps(row)
+                parts.append(line)
+                parts.append(b"\n")
+                size += len(line) + 1
+        if fmt == "csv":
+            size = buffer.tell()
+        if size >= CHUNK_BYTES:
+            data = compressor.compress(_drain(parts, buffer))
+            size = 0
+            if data:
+                yield data
+    yield compressor.compress(_drain(parts, buffer)) + compressor.flush()
+
+def _drain(parts: list, buffer: io.StringIO) -> bytes:
+    data = b"".join(parts) + buffer.getvalue().encode()
+    parts.clear()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+def _split_rows(data: bytes, fmt: str) -> Tuple[list, bytes]:
+    """Complete rows in data, without their newlines, and the incomplete rest.
+
+    A CSV row ends at a newline outside quotes: quoted cells (a user-entered
+    name or title) may hold newlines of their own, and quotes inside a cell
+    are doubled, so a row is complete once it holds an even number of them.
+    """
+    *lines, rest = data.split(b"\n")
+    if fmt != "csv":
+        return lines, rest
+    rows, pending, quotes = [], [], 0
+    for line in lines:
+        pending.append(line)
+        quotes += line.count(b'"')
+        if quotes % 2 == 0:
+            rows.append(b"\n".join(pending))
+            pending, quotes = [], 0
+    return rows, b"\n".join([*pending, rest])
+
+def _row_key(row: bytes, fmt: str) -> str:
+    if fmt == "csv":
+        return next(csv.reader([row.decode()]))[0]
+    return next(iter(orjson.loads(row).values()))
+
+def _load_state(path: Path, params: dict) -> Optional[dict]:
+    try:
+        state = json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+    return state if state.get("params") == params else None
+
+async def export_to_file(client, kind: str, out: Path, fmt: str = "ndjson", created_from: Optional[str] = None,
+                         created_to: Optional[str] = None, state: Optional[str] = None, retries: int = 5,
+                         flush_bytes: int = 1 << 20, backoff: float = 1.0, log=print,
+                         user_id: Optional[str] = None) -> int:
+    """Download an export through client (an httpx.AsyncClient) to out, resuming a previous run.
+
+    Returns the number of rows written in this run.
+    """
+    params = {k: v for k, v in (("format", fmt), ("created_from", created_from),
+                                ("created_to", created_to), ("state", state)) if v}
+    job = dict(params, kind=kind)
+    resume_path = out.with_name(out.name + ".resume")
+    saved = _load_state(resume_path, job) if out.exists() else None
+    after = saved["after"] if saved else None
+    with open(out, "r+b" if saved else "wb") as f:
+        if saved:
+            f.truncate(saved["size"])
+            f.seek(saved["size"])
+            log(f"[Export] resuming {kind} after {after} ({saved['size']} bytes kept)")
+        elif fmt == "csv":
+            f.write(gzip.compress((",".join(KINDS[kind].columns) + "\n").encode()))
+        rows = 0
+        pending = []                  # complete lines awaiting a flush
+        group_key, group = None, []   # lines of the current resume key, maybe incomplete
+
+        def flush():
+            nonlocal pending
+            if pending:
+                f.write(gzip.compress(b"".join(pending)))
+                f.flush()
+                pending = []
+            resume_path.write_text(json.dumps({"params": job, "after": after, "size": f.tell()}))
+
+        attempt = 0
+        while True:
+            query = dict(params, **({"after": after} if after else {}), **({"user_id": user_id} if user_id else {}))
+            try:
+                async with client.stream("GET", f"/export/{kind}", params=query) as res:
+                    res.raise_for_status()
+                    inflater = zlib.decompressobj(31)
+                    tail = b""
+                    header = fmt == "csv"
+                    async for chunk in res.aiter_raw():
+                        lines, tail = _split_rows(tail + inflater.decompress(chunk), fmt)
+                        for line in lines:
+                            if header:
+                                header = False
+                                continue
+                            key = _row_key(line, fmt)
+                            if key != group_key:
+                                if group_key is not None:
+                                    pending += group
+                                    after = group_key
+                                group_key, group = key, []
+                            group.append(line + b"\n")
+                            rows += 1
+                        if sum(map(len, pending)) >= flush_bytes:
+                            flush()
+                    if not inflater.eof:
+                        raise OSError("export stream ended early")
+                pending += group
+                after = group_key or after
+                flush()
+                resume_path.unlink()
+                log(f"[Export] {rows} {kind} rows written to {out}")
+                return rows
+            except (httpx.HTTPError, OSError, zlib.error) as e:
+                client_error = isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500
+                attempt += 1
+                if client_error or attempt > retries:
+                    flush()
+                    raise
+                # Drop the incomplete group; the next request starts after the last complete key
+                rows -= len(group)
+                group_key, group = None, []
+                flush()
+                log(f"[Export] {e}; retrying after {after} ({attempt}/{retries})")
+                await asyncio.sleep(min(backoff * 2 ** (attempt - 1), 30))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export missions, scores or challenges from the gateway.")
+    parser.add_argument("kind", choices=sorted(KINDS))
+    parser.add_argument("--url", default=os.getenv("BACKEND_URL", "http://localhost:8000"))
+    parser.add_argument("--user", default=os.getenv("EXPORT_USER"), help="whitelisted user id")
+    parser.add_argument("--format", choices=FORMATS, default="ndjson")
+    parser.add_argument("--created-from", help="ISO date or time, inclusive (UTC unless an offset is given)")
+    parser.add_argument("--created-to", help="ISO date or time, exclusive")
+    parser.add_argument("--state", help="mission status or challenge state to keep")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--out", type=Path, help="output file (default exports/<kind>.<format>.gz)")
+    args = parser.parse_args(argv)
+
+    out = args.out or Path("exports") / f"{args.kind}.{args.format}.gz"
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    async def run():
+        async with httpx.AsyncClient(base_url=args.url, timeout=httpx.Timeout(30, read=300)) as client:
+            await export_to_file(client, args.kind, out, args.format, args.created_from,
+                                 args.created_to, args.state, args.retries, user_id=args.user)
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,251 @@
+"""Reference images for /forge, fetched or uploaded once and kept small.
+
+A source image is checked (byte size, an allowed format, pixel count) and
+normalized: EXIF orientation applied, metadata and alpha dropped, downscaled
+so its longest edge is at most max_edge, and re-encoded as JPEG. Results are
+stored on disk under the BLAKE2b digest of the source bytes, so a picture
+reused across threads is decoded once, and URLs already fetched are answered
+without a download. The directory is bounded by max_bytes and the least
+recently used images are evicted first.
+
+image_url is user input, so before every request, redirects included, its
+host is resolved and refused unless all of its addresses are public: the
+gateway must not become a way to reach localhost, the database hosts or a
+cloud metadata endpoint.
+
+Decoding runs in a worker thread with Pillow (requirements.txt).
+"""
+import asyncio
+import base64
+import collections
+import hashlib
+import io
+import ipaddress
+import os
+import re
+import socket
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import httpx
+from PIL import Image, ImageOps
+
+FORMATS = {"JPEG", "PNG", "WEBP", "GIF", "BMP"}
+MEDIA_TYPE = "image/jpeg"
+DIGEST_RE = re.compile(r"^[0-9a-f]{32}$")
+MAX_REDIRECTS = 5
+
+class ImageRejected(ValueError):
+    """Not an acceptable image; status is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+@dataclass(frozen=True)
+class StoredImage:
+    digest: str
+    width: int
+    height: int
+    size: int
+    path: Path
+
+    def data_url(self) -> str:
+        return f"data:{MEDIA_TYPE};base64," + base64.b64encode(self.path.read_bytes()).decode()
+
+    def info(self) -> dict:
+        return {"image_id": self.digest, "width": self.width, "height": self.height, "bytes": self.size,
+                "url": f"/images/{self.digest}"}
+
+class ImageCache:
+    def __init__(self, root: Path, max_bytes: int = 256 << 20, max_edge: int = 768, quality: int = 80,
+                 max_source_bytes: int = 10 << 20, max_pixels: int = 40_000_000, fetch_timeout: float = 10.0,
+                 max_urls: int = 4096, allow_private: bool = False):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_edge = max_edge
+        self.quality = quality
+        self.max_source_bytes = max_source_bytes
+        self.max_pixels = max_pixels
+        self.fetch_timeout = fetch_timeout
+        self.max_urls = max_urls
+        # Only for tests and local development against hosts on a private network
+        self.allow_private = allow_private
+        self.hits = self.misses = self.fetches = self.evictions = 0
+        self.total = 0
+        self._urls: "collections.OrderedDict[str, str]" = collections.OrderedDict()   # url -> digest
+        # digest -> (size, width, height), least recently used first; survives restarts via mtimes
+        self._files: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+        for path in sorted(self.root.glob("*.jpg"), key=lambda p: p.stat().st_mtime):
+            try:
+                with Image.open(path) as im:
+                    width, height = im.size
+            except OSError:
+                path.unlink(missing_ok=True)
+                continue
+            self._add(path.stem, path.stat().st_size, width, height)
+        self._evict()
+
+    def path(self, digest: str) -> Path:
+        return self.root / f"{digest}.jpg"
+
+    def get(self, digest: str) -> Optional[StoredImage]:
+        """A stored image by id, marking it recently used; None if unknown or evicted."""
+        entry = self._files.get(digest)
+        if entry is None:
+            return None
+        self._files.move_to_end(digest)
+        path = self.path(digest)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self._drop(digest)
+            return None
+        self.hits += 1
+        return StoredImage(digest, entry[1], entry[2], entry[0], path)
+
+    async def ingest(self, data: bytes) -> StoredImage:
+        """Normalize and store uploaded bytes, or return the copy already stored."""
+        if len(data) > self.max_source_bytes:
+            raise ImageRejected(f"image larger than {self.max_source_bytes} bytes", 413)
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        stored = self.get(digest)
+        if stored:
+            return stored
+        self.misses += 1
+        size, width, height = await asyncio.to_thread(self._normalize, data, self.path(digest))
+        self._add(digest, size, width, height)
+        self._evict(keep=digest)
+        return StoredImage(digest, width, height, size, self.path(digest))
+
+    async def fetch(self, url: str) -> StoredImage:
+        """Download url once; later calls are served from the cache."""
+        digest = self._urls.get(url)
+        stored = self.get(digest) if digest else None
+        if stored:
+            self._urls.move_to_end(url)
+            return stored
+        if not url.startswith(("http://", "https://")):
+            raise ImageRejected("image_url must be http(s)")
+        stored = await self.ingest(await self._download(url))
+        self._urls[url] = stored.digest
+        if len(self._urls) > self.max_urls:
+            self._urls.popitem(last=False)
+        return stored
+
+    async def _check_host(self, url: httpx.URL):
+        if url.scheme not in ("http", "https") or not url.host:
+            raise ImageRejected("image_url must be http(s)")
+        if self.allow_private:
+            return
+        port = url.port or (443 if url.scheme == "https" else 80)
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(url.host, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
+            raise ImageRejected(f"image_url host {url.host} does not resolve") from None
+        for info in infos:
+            address = ipaddress.ip_address(info[4][0].split("%")[0])
+            if isinstance(address, ipaddress.IPv6Address) and address.ipv4_mapped:
+                address = address.ipv4_mapped
+            if not address.is_global or address.is_multicast:
+                raise ImageRejected(f"image_url host {url.host} is not a public address", 403)
+
+    async def _download(self, url: str) -> bytes:
+        self.fetches += 1
+        target = httpx.URL(url)
+        try:
+            # Redirects are followed by hand so every hop's host is checked
+            async with httpx.AsyncClient(timeout=self.fetch_timeout) as client:
+                for _ in range(MAX_REDIRECTS + 1):
+                    await self._check_host(target)
+                    async with client.stream("GET", target) as res:
+                        if res.is_redirect and res.next_request is not None:
+                            target = res.next_request.url
+                            continue
+                        return await self._read(res)
+        except httpx.HTTPError as e:
+            raise ImageRejected(f"image fetch failed: {e}", 502) from None
+        raise ImageRejected("image_url redirected too many times", 502)
+
+    async def _read(self, res: httpx.Response) -> bytes:
+        if res.status_code != 200:
+            raise ImageRejected(f"image fetch returned HTTP {res.status_code}", 502)
+        media_type = res.headers.get("content-type", "").split(";")[0].strip().lower()
+        if media_type and not media_type.startswith("image/") and media_type != "application/octet-stream":
+            raise ImageRejected(f"image_url is {media_type}, not an image", 415)
+        if int(res.headers.get("content-length") or 0) > self.max_source_bytes:
+            raise ImageRejected(f"image larger than {self.max_source_bytes} bytes", 413)
+        chunks, size = [], 0
+        async for chunk in res.aiter_bytes():
+            size += len(chunk)
+            if size > self.max_source_bytes:
+                raise ImageRejected(f"image larger than {self.max_source_bytes} bytes", 413)
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _normalize(self, data: bytes, path: Path) -> tuple:
+        """Decode, bound, re-encode and write data to path; returns (bytes, width, height)."""
+        try:
+            with Image.open(io.BytesIO(data)) as source:
+                if source.format not in FORMATS:
+                    raise ImageRejected(f"unsupported image format {source.format}", 415)
+                if source.width * source.height > self.max_pixels:
+                    raise ImageRejected(f"image has more than {self.max_pixels} pixels", 413)
+                # JPEG sources decode straight at a reduced scale
+                source.draft("RGB", (self.max_edge, self.max_edge))
+                im = ImageOps.exif_transpose(source)
+                im.thumbnail((self.max_edge, self.max_edge), Image.Resampling.LANCZOS)
+                if "A" in im.getbands() or "transparency" in im.info:
+                    rgba = im.convert("RGBA")
+                    im = Image.new("RGB", rgba.size, (255, 255, 255))
+                    im.paste(rgba, mask=rgba.getchannel("A"))
+                elif im.mode not in ("RGB", "L"):
+                    im = im.convert("RGB")
+                out = io.BytesIO()
+                im.save(out, "JPEG", quality=self.quality, optimize=True)
+        except ImageRejected:
+            raise
+        except Image.DecompressionBombError as e:
+            raise ImageRejected(str(e), 413) from None
+        except (OSError, SyntaxError, ValueError):
+            raise ImageRejected("not a decodable image", 415) from None
+        body = out.getvalue()
+        # Concurrent ingests of one source write the same bytes; the rename keeps readers whole
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        return len(body), im.width, im.height
+
+    def _add(self, digest: str, size: int, width: int, height: int):
+        self._drop(digest)
+        self._files[digest] = (size, width, height)
+        self.total += size
+
+    def _drop(self, digest: str):
+        entry = self._files.pop(digest, None)
+        if entry:
+            self.total -= entry[0]
+
+    def _evict(self, keep: Optional[str] = None):
+        while self.total > self.max_bytes and self._files:
+            digest = next(iter(self._files))
+            if digest == keep:
+                break
+            self._drop(digest)
+            self.path(digest).unlink(missing_ok=True)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._files),
+            "bytes": self.total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "fetches": self.fetches,
+            "evictions": self.evictions,
+        }
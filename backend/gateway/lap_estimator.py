@@ -0,0 +1,160 @@
+"""Lower-bound lap time estimator for gate courses.
+
+The drone is treated as a point mass limited by top speed, acceleration and
+turn rate. For each course we compute the fastest pass through the gate
+sequence that this model allows, taking every corner on the widest arc that
+still enters the gate's trigger zone. All work is vectorized over a batch of
+courses so forge and ingest can score many courses per call.
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Sequence
+import math
+
+import numpy as np
+
+@dataclass(frozen=True)
+class DroneLimits:
+    max_speed: float     = 20.0               # m/s
+    max_accel: float     = 20.0               # m/s^2, also bounds lateral accel in turns
+    max_turn_rate: float = 2 * math.pi        # rad/s
+    # The supervisor registers a gate as soon as the drone enters a box of
+    # 0.25 m + 1.0 m margin per axis around it, so a pilot may cut each gate
+    # by up to the half-diagonal of that box.
+    trigger_radius: float = 1.25 * math.sqrt(3)
+
+DEFAULT_LIMITS = DroneLimits()
+
+# Bumped whenever the bound changes, so stored results can be recomputed
+MODEL_VERSION = 2
+
+# Keep the pairwise (B, N, N) distance matrix below ~32 MB per chunk
+_MAX_CHUNK_CELLS = 1 << 22
+
+def gate_points(gates: Sequence[dict]) -> np.ndarray:
+    """Return an (N, 3) float array from a list of gate dicts, missing axes as 0."""
+    return np.array(
+        [[float(g.get("x", 0) or 0), float(g.get("y", 0) or 0), float(g.get("z", 0) or 0)] for g in gates],
+        dtype=np.float64,
+    ).reshape(-1, 3)
+
+def _pack(courses: Iterable[Sequence[dict]]):
+    """Pad a batch of courses into a (B, N, 3) array plus per-course gate counts."""
+    points = [gate_points(c) for c in courses]
+    counts = np.array([len(p) for p in points], dtype=np.int64)
+    n_max = max(int(counts.max()) if len(counts) else 0, 1)
+    packed = np.zeros((len(points), n_max, 3))
+    for b, p in enumerate(points):
+        packed[b, :len(p)] = p
+    return packed, counts
+
+def _lap_times(P: np.ndarray, counts: np.ndarray, limits: DroneLimits, closed: bool):
+    """Core pass over one padded chunk. Returns (lap_time, path_length) per course."""
+    B, N, _ = P.shape
+    vmax, acc, r = limits.max_speed, limits.max_accel, limits.trigger_radius
+    idx = np.arange(N)[None, :]
+    n = np.maximum(counts, 1)[:, None]
+    node_ok = idx < counts[:, None]
+
+    # Segment i runs from gate i to gate i+1 (wrapping for closed loops)
+    nxt = (idx + 1) % n
+    prv = (idx - 1) % n
+    seg_ok = node_ok & ((idx < counts[:, None] - 1) | closed)
+    seg_ok &= counts[:, None] >= 2
+
+    rows = np.arange(B)[:, None]
+    vec_out = P[rows, nxt] - P
+    length = np.linalg.norm(vec_out, axis=-1)
+    length = np.where(seg_ok, length, 0.0)
+    eff = np.maximum(length - 2 * r, 0.0)
+
+    # Corner speed limit: the widest arc tangent to both legs that still
+    # passes within trigger_radius of the gate has its apex r from the gate,
+    # R = r / (sec(theta/2) - 1) for a deflection theta, capped so the
+    # tangent points stay on the legs. It is flown at the lesser of the
+    # lateral-accel and turn-rate limits.
+    vec_in = P - P[rows, prv]
+    len_in = np.linalg.norm(vec_in, axis=-1)
+    len_out = np.linalg.norm(vec_out, axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        u = vec_in / len_in[..., None]
+        w = vec_out / len_out[..., None]
+        cos = np.nan_to_num(np.einsum("bnk,bnk->bn", u, w), nan=1.0)
+        cos = np.clip(cos, -1.0, 1.0)
+        cos_half = np.sqrt((1 + cos) / 2)
+        tan_half = np.sqrt((1 - cos) / (1 + cos))
+        radius = np.minimum(r * cos_half / (1 - cos_half), np.minimum(len_in, len_out) / tan_half)
+        radius = np.where(cos < 1, np.nan_to_num(radius, nan=0.0), np.inf)
+    v_corner = np.minimum(vmax, np.minimum(np.sqrt(acc * radius), limits.max_turn_rate * radius))
+    has_corner = node_ok & (closed | ((idx > 0) & (idx < counts[:, None] - 1)))
+    v_corner = np.where(has_corner, v_corner, vmax)
+
+    # The forward/backward speed passes converge to
+    #   v_i^2 = min_j (v_corner_j^2 + 2 a d(i, j))
+    # where d is the along-path distance, so solve it in closed form.
+    s = np.cumsum(eff, axis=1) - eff
+    dist = np.abs(s[:, :, None] - s[:, None, :])
+    if closed:
+        total = eff.sum(axis=1)[:, None, None]
+        dist = np.minimum(dist, total - dist)
+    bound = v_corner[:, None, :] ** 2 + 2 * acc * dist
+    bound = np.where(node_ok[:, None, :], bound, np.inf)
+    v = np.sqrt(np.minimum(bound.min(axis=2), vmax ** 2))
+
+    # Trapezoidal profile per segment between the two node speeds
+    v0, v1 = v, v[rows, nxt]
+    vp = np.minimum(vmax, np.sqrt((2 * acc * eff + v0 ** 2 + v1 ** 2) / 2))
+    ramp = (2 * vp ** 2 - v0 ** 2 - v1 ** 2) / (2 * acc)
+    cruise = np.maximum(eff - ramp, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = (2 * vp - v0 - v1) / acc + np.where(vp > 0, cruise / vp, 0.0)
+    t = np.where(seg_ok, t, 0.0)
+    return t.sum(axis=1), length.sum(axis=1)
+
+def min_lap_times(courses: Iterable[Sequence[dict]], limits: DroneLimits = DEFAULT_LIMITS,
+                  closed: bool = True) -> np.ndarray:
+    """Lower-bound lap time in seconds for each course in the batch.
+
+    closed=True treats the course as a loop (last gate back to the first);
+    closed=False only covers the first-to-last gate path, which every lap
+    must fly regardless of where it started.
+    """
+    return course_metrics(courses, limits, closed)[0]
+
+def course_metrics(courses: Iterable[Sequence[dict]], limits: DroneLimits = DEFAULT_LIMITS,
+                   closed: bool = True):
+    """Return (min_lap_time_sec, path_length_m) arrays for a batch of courses."""
+    P, counts = _pack(courses)
+    B, N, _ = P.shape
+    times, lengths = np.zeros(B), np.zeros(B)
+    chunk = max(1, _MAX_CHUNK_CELLS // (N * N))
+    for start in range(0, B, chunk):
+        sl = slice(start, start + chunk)
+        times[sl], lengths[sl] = _lap_times(P[sl], counts[sl], limits, closed)
+    return times, lengths
+
+def course_difficulty(courses: Sequence[Sequence[dict]], limits: DroneLimits = DEFAULT_LIMITS) -> List[dict]:
+    """Score a batch of courses.
+
+    score is the closed-loop bound divided by the time the same distance
+    takes at top speed, so 1.0 is a flat-out oval and larger values mean the
+    course is dominated by braking and turning. min_lap_time_sec is the
+    open-path bound, safe to compare against any reported lap.
+    """
+    loop_times, lengths = course_metrics(courses, limits, closed=True)
+    path_times, _ = course_metrics(courses, limits, closed=False)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.where(lengths > 0, loop_times / (lengths / limits.max_speed), 1.0)
+    return [
+        {
+            "score": round(float(s), 4),
+            "min_lap_time_sec": round(float(t), 4),
+            "course_length_m": round(float(l), 3),
+            "model": MODEL_VERSION,
+        }
+        for s, t, l in zip(scores, path_times, lengths)
+    ]
+
+def rank_courses(courses: Sequence[Sequence[dict]], limits: DroneLimits = DEFAULT_LIMITS) -> List[int]:
+    """Indices of courses ordered hardest first."""
+    scores = [d["score"] for d in course_difficulty(courses, limits)]
+    return sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
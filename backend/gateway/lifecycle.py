@@ -0,0 +1,124 @@
+"""Mission lifecycle: forged -> queued -> running -> completed | failed.
+
+Every status change is one conditional find_one_and_update: the filter only
+matches a mission in a status the target may be reached from, so a failed
+mission cannot later be completed and two racing requests cannot both move
+the same mission. A finished mission is flown again only by queueing it anew
+through /simulate, and a run that went silent for longer than the stale
+timeout may be queued over. A supervisor started by hand rather than through
+/simulate may report running for a mission that was never queued, but not for
+one that already finished.
+
+Each change is appended to db.mission_events,
+
+    {"_id": ObjectId, "mission": "<mission id>", "from": status, "to": status, "at", **details}
+
+which is never updated. Viewers learn about changes from watch_events(), a
+change stream on that collection (MongoDB replica sets only) that hands each
+new event to a callback; the gateway pushes them into the mission's Socket.IO
+room so clients no longer poll GET /missions/{id}.
+"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from bson import ObjectId
+from pymongo.errors import OperationFailure, PyMongoError
+
+from .serialization import utc_timestamp
+
+FORGED = "forged"
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+
+# Target status -> statuses it may be reached from
+SOURCES = {
+    QUEUED: (FORGED, COMPLETED, FAILED),
+    RUNNING: (QUEUED, FORGED),
+    COMPLETED: (RUNNING,),
+    FAILED: (QUEUED, RUNNING),
+}
+# Sources also accepted once the mission has sat in them past the stale timeout
+STALE_SOURCES = {QUEUED: (QUEUED, RUNNING)}
+
+class InvalidTransition(ValueError):
+    def __init__(self, current: str, target: str):
+        super().__init__(f"Mission is {current}; it cannot become {target}")
+        self.current = current
+        self.target = target
+
+async def ensure_indexes(db):
+    await db.mission_events.create_index([("mission", 1), ("_id", 1)])
+
+def _status_query(statuses) -> dict:
+    # Missions saved before the lifecycle existed have no status and count as forged
+    return {"$in": [*statuses, None]} if FORGED in statuses else {"$in": list(statuses)}
+
+async def record(db, mission_id: str, before: Optional[str], after: str, at: str, **details) -> dict:
+    event = {"_id": ObjectId(), "mission": mission_id, "from": before, "to": after, "at": at, **details}
+    await db.mission_events.insert_one(event)
+    return event
+
+async def transition(db, mission_id: ObjectId, target: str, stale_after: Optional[float] = None,
+                     fields: Optional[dict] = None, **details) -> dict:
+    """Move a mission to target; returns the event recorded.
+
+    fields are set on the mission along with the status, details go into the
+    event. Raises LookupError for an unknown mission and InvalidTransition
+    when its current status does not lead to target.
+    """
+    now = utc_timestamp()
+    allowed = _status_query(SOURCES[target])
+    query = {"_id": mission_id, "status": allowed}
+    if stale_after is not None and target in STALE_SOURCES:
+        cutoff = (datetime.now(timezone.utc) - timedelta(seconds=stale_after)).isoformat(timespec="microseconds")
+        query = {"_id": mission_id, "$or": [
+            {"status": allowed},
+            {"status": {"$in": list(STALE_SOURCES[target])}, "status_at": {"$lt": cutoff}},
+        ]}
+    before = await db.missions.find_one_and_update(
+        query,
+        {"$set": {"status": target, "status_at": now, **(fields or {})}},
+        projection={"status": 1},
+    )
+    if before is None:
+        # Only a refused transition pays for a second read, to say why
+        current = await db.missions.find_one({"_id": mission_id}, {"status": 1})
+        if current is None:
+            raise LookupError("Mission not found")
+        raise InvalidTransition(current.get("status") or FORGED, target)
+    return await record(db, str(mission_id), before.get("status") or FORGED, target, now, **details)
+
+def event_view(event: dict) -> dict:
+    return {k: (str(v) if isinstance(v, ObjectId) else v) for k, v in event.items()}
+
+async def history(db, mission_id: str) -> list:
+    return await db.mission_events.find({"mission": mission_id}).sort("_id", 1).to_list(None)
+
+async def watch_events(db, emit: Callable[[dict], Awaitable[None]], on_ready: Callable[[], None] = lambda: None,
+                       retry_sec: float = 5.0):
+    """Call emit for every event inserted from now on, resuming after errors.
+
+    Raises OperationFailure when the server cannot run change streams at all.
+    """
+    resume_token = None
+    while True:
+        try:
+            async with db.mission_events.watch([{"$match": {"operationType": "insert"}}],
+                                               resume_after=resume_token) as stream:
+                on_ready()
+                async for change in stream:
+                    resume_token = change["_id"]
+                    await emit(change["fullDocument"])
+        except OperationFailure as e:
+            # 40573: change streams need a replica set; 286: the resume point was lost
+            if e.code == 40573:
+                raise
+            if e.code == 286:
+                resume_token = None
+            print(f"[Lifecycle] Change stream failed, reopening: {e}")
+        except PyMongoError as e:
+            print(f"[Lifecycle] Change stream failed, reopening: {e}")
+        await asyncio.sleep(retry_sec)
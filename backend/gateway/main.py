@@ -1,10 +1,32 @@
 import os
-from datetime import datetime
-from fastapi import FastAPI, Request, HTTPException, Depends, status
+import asyncio
+from fastapi import FastAPI, Request, Response, HTTPException, Depends, Query, status
+from fastapi.responses import FileResponse, StreamingResponse
+from typing import List, Optional
 import httpx
 import motor.motor_asyncio
-from .models import ForgePayload, TelemetryPayload, Challenge
-from .mission_compiler import write_wbt
+from .serialization import MongoJSONResponse, dumps, mongo_json, utc_timestamp
+from .mission_cache import MissionCache, etag_matches
+from .models import CommentPayload, ForgePayload, SolutionPayload, TelemetryPayload, UploadPayload, Challenge
+from .mission_compiler import write_wbt, write_arena_wbt, pool_launch_cmd, pilot_names, webots_env, WB_WORLD_DIR
+from .wind_field import build_wind_field
+from .sim_pool import SimPool, PoolUnavailable
+from .lap_estimator import MODEL_VERSION, course_difficulty
+from .mission_stats import rollup_update, summarize, to_ms
+from .race_relay import RaceRelay
+from .admission import AdmissionController, ProcessLimit, RedisBuckets, RoutePolicy, Shed
+from .image_cache import DIGEST_RE, MEDIA_TYPE as IMAGE_MEDIA_TYPE, ImageCache, ImageRejected
+from . import dashboard
+from .comments import MAX_PAGE as COMMENTS_MAX_PAGE, add_comment, comment_page, parse_cursor
+from .comments import ensure_indexes as ensure_comment_indexes
+from . import uploads
+from .uploads import DiskStore, GridFSStore, UploadError
+from .solutions import MAX_PAGE as SOLUTIONS_MAX_PAGE, SORTS as SOLUTION_SORTS, add_solution, list_solutions
+from .solutions import ensure_indexes as ensure_solution_indexes, migrate_embedded as migrate_embedded_solutions
+from . import lifecycle
+from .lifecycle import COMPLETED, FAILED, FORGED, QUEUED, RUNNING, InvalidTransition
+from .profiling import LoopMonitor, ProfileMiddleware, ProfileStore, StackSampler
+from .export import KINDS as EXPORT_KINDS, FORMATS as EXPORT_FORMATS, export_query, export_stream
 import socketio
 import subprocess
 import platform
@@ -12,6 +34,7 @@ from dotenv import load_dotenv
 import json
 import time
 from bson import ObjectId
+from pymongo.errors import OperationFailure
 from pathlib import Path
 
 # Load environment variables from .env file
@@ -19,16 +42,76 @@ load_dotenv()
 
 # Get environment variables with defaults
 MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27018")
+MONGO_DB = os.getenv("MONGO_DB", "simforge")
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY", "sk-or-v1-8f16456ebb416567acf40669e244f156f8a1b5e669fe14b3156f8a1b5e669fe14b317524e0aa5f934b5")
-OPENROUTER_ENDPOINT = "https://openrouter.ai/api/v1/chat/completions"
+OPENROUTER_ENDPOINT = os.getenv("OPENROUTER_ENDPOINT", "https://openrouter.ai/api/v1/chat/completions")
+# What to do with laps faster than the course's physical lower bound: "flag" or "reject"
+TELEMETRY_PLAUSIBILITY = os.getenv("TELEMETRY_PLAUSIBILITY", "flag")
+# Warm simulator pool; 0 keeps the cold-start launch per /simulate
+SIM_POOL_SIZE = int(os.getenv("SIM_POOL_SIZE", "0"))
+SIM_POOL_MAX = int(os.getenv("SIM_POOL_MAX", str(max(SIM_POOL_SIZE, 1) * 2)))
+SIM_POOL_MAX_RUNS = int(os.getenv("SIM_POOL_MAX_RUNS", "20"))
+# Webots processes this worker may have running from cold launches (heats, or no
+# pool); each holds its place until the supervisor quits the simulation
+SIM_MAX_RUNNING = int(os.getenv("SIM_MAX_RUNNING", "2"))
+# Drones one simulation instance may race at once (/simulate?pilot=...&pilot=...)
+MAX_HEAT_SIZE = int(os.getenv("MAX_HEAT_SIZE", "8"))
+# Encoded GET /missions and /missions/{id} responses; 0 entries disables the cache
+MISSION_CACHE_SIZE = int(os.getenv("MISSION_CACHE_SIZE", "1024"))
+MISSION_CACHE_TTL = float(os.getenv("MISSION_CACHE_TTL", "30"))
+MISSION_CACHE_MAX_MB = int(os.getenv("MISSION_CACHE_MAX_MB", "64"))
+# Live race frames from simulators: position updates per mission room per second,
+# and a shared secret simulators must present when SIM_CHANNEL_TOKEN is set
+RACE_RELAY_HZ = float(os.getenv("RACE_RELAY_HZ", "10"))
+SIM_CHANNEL_TOKEN = os.getenv("SIM_CHANNEL_TOKEN")
+# Admission control for /forge and /simulate (admission.py): requests per minute
+# and burst per client, a concurrency cap on requests in flight shared by both with
+# a bounded wait queue, and an optional Redis so every worker shares the same buckets.
+# Running simulators are bounded by SIM_MAX_RUNNING and SIM_POOL_MAX, not by these
+FORGE_PER_MIN = float(os.getenv("FORGE_PER_MIN", "6"))
+FORGE_BURST = int(os.getenv("FORGE_BURST", "3"))
+SIMULATE_PER_MIN = float(os.getenv("SIMULATE_PER_MIN", "4"))
+SIMULATE_BURST = int(os.getenv("SIMULATE_BURST", "2"))
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "16"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "10"))
+ADMISSION_REDIS_URL = os.getenv("ADMISSION_REDIS_URL")
+# Take the client address from X-Forwarded-For; only behind a proxy that sets it
+ADMISSION_TRUST_PROXY = os.getenv("ADMISSION_TRUST_PROXY") == "1"
+# Forge reference images (image_cache.py): normalized copies on local disk, at most
+# IMAGE_MAX_EDGE px on the long side. With IMAGE_PUBLIC_URL (this gateway's public
+# base URL) the LLM gets a link to GET /images/{id}; otherwise the JPEG inline.
+IMAGE_CACHE_DIR = Path(os.getenv("IMAGE_CACHE_DIR", Path(__file__).resolve().parent / "image_cache"))
+IMAGE_CACHE_MAX_MB = int(os.getenv("IMAGE_CACHE_MAX_MB", "256"))
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "768"))
+IMAGE_MAX_SOURCE_MB = int(os.getenv("IMAGE_MAX_SOURCE_MB", "10"))
+IMAGE_PUBLIC_URL = os.getenv("IMAGE_PUBLIC_URL", "").rstrip("/")
+# Solution video uploads (uploads.py): "disk" keeps files under UPLOAD_DIR, "gridfs"
+# stores them in MongoDB. Clients PUT chunks of UPLOAD_CHUNK_MB; sessions left
+# incomplete for UPLOAD_EXPIRE_HOURS are dropped.
+UPLOAD_STORE = os.getenv("UPLOAD_STORE", "disk")
+UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", Path(__file__).resolve().parent / "uploads"))
+UPLOAD_MAX_MB = int(os.getenv("UPLOAD_MAX_MB", "2048"))
+UPLOAD_CHUNK_MB = int(os.getenv("UPLOAD_CHUNK_MB", "8"))
+UPLOAD_EXPIRE_HOURS = float(os.getenv("UPLOAD_EXPIRE_HOURS", "24"))
+# A mission queued or running for longer than this without a status report may be queued again
+MISSION_RUN_TIMEOUT_SEC = float(os.getenv("MISSION_RUN_TIMEOUT_SEC", "1800"))
+# Profiling (profiling.py), all off by default. PROFILING_ENABLED=1 turns on
+# POST /debug/profile and per-request profiles for whitelisted users sending
+# X-Profile-User; LOOP_LAG_MS > 0 logs whatever blocks the event loop for longer.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED") == "1"
+PROFILE_MAX_SEC = float(os.getenv("PROFILE_MAX_SEC", "60"))
+LOOP_LAG_MS = float(os.getenv("LOOP_LAG_MS", "0"))
+# Seconds between rebuilds of the dashboard rollup from the missions collection; 0 disables
+DASHBOARD_RECONCILE_SEC = float(os.getenv("DASHBOARD_RECONCILE_SEC", "900"))
 
 # Configure MongoDB client for local development
 try:
     mongo_client = motor.motor_asyncio.AsyncIOMotorClient(
-        "mongodb://localhost:27018",
+        MONGO_URL,
         serverSelectionTimeoutMS=5000
     )
-    db = mongo_client.simforge
+    db = mongo_client[MONGO_DB]
     print("Connected to MongoDB successfully")
 except Exception as e:
     print(f"Error connecting to MongoDB: {str(e)}")
@@ -44,6 +127,80 @@ async def get_whitelisted_user(user_id: str):
         )
     return whitelisted_user
 
+mission_cache = MissionCache(MISSION_CACHE_SIZE, MISSION_CACHE_TTL, MISSION_CACHE_MAX_MB << 20)
+
+async def cached_json(request: Request, key: tuple, load) -> Response:
+    """Serve key from mission_cache, awaiting load() for the content on a miss.
+
+    A matching If-None-Match is answered with 304 straight from the cache.
+    """
+    entry = mission_cache.get(key)
+    if entry is None:
+        generation = mission_cache.generation
+        entry = mission_cache.put(key, dumps(await load()), generation)
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+upload_store = GridFSStore(db) if UPLOAD_STORE == "gridfs" else DiskStore(UPLOAD_DIR)
+
+image_cache = ImageCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB << 20, IMAGE_MAX_EDGE,
+                         max_source_bytes=IMAGE_MAX_SOURCE_MB << 20)
+
+admission = AdmissionController(
+    {
+        "forge": RoutePolicy(FORGE_PER_MIN or None, FORGE_BURST),
+        "simulate": RoutePolicy(SIMULATE_PER_MIN or None, SIMULATE_BURST),
+    },
+    max_concurrent=ADMISSION_MAX_CONCURRENT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    max_wait=ADMISSION_MAX_WAIT,
+    buckets=RedisBuckets(ADMISSION_REDIS_URL) if ADMISSION_REDIS_URL else None,
+)
+
+sim_processes = ProcessLimit(SIM_MAX_RUNNING)
+
+def client_key(request: Request) -> str:
+    if ADMISSION_TRUST_PROXY and request.headers.get("x-forwarded-for"):
+        return request.headers["x-forwarded-for"].split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+def admit(route: str):
+    """Dependency holding an admission slot for the duration of the request, or answering 429."""
+    async def dependency(request: Request):
+        try:
+            admitted = await admission.admit(route, client_key(request))
+        except Shed as e:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"{route} is over capacity ({e.reason}); retry in {e.retry_after}s",
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        try:
+            yield
+        finally:
+            admission.done(admitted)
+    return dependency
+
+def reserve_simulator():
+    """A place for one more cold-launched Webots process, or answer 429."""
+    try:
+        return sim_processes.reserve()
+    except Shed as e:
+        admission.refused("simulate", e)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"simulate is over capacity ({e.reason}); retry in {e.retry_after}s",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
+def mission_filter(mission_key: str) -> dict:
+    """Match a mission by ObjectId string or by mission_name."""
+    if ObjectId.is_valid(mission_key):
+        return {"_id": ObjectId(mission_key)}
+    return {"mission_name": mission_key}
+
 # Initialize collections if they don't exist
 async def init_db():
     try:
@@ -52,15 +209,39 @@ async def init_db():
         await db.missions.create_index([("created", -1)])
         # Index for leaderboard sorting
         await db.missions.create_index([("scores.lap_time_sec", 1)])
+        # Index for ranking missions by difficulty
+        await db.missions.create_index([("meta.difficulty.score", -1)])
         # Index for whitelisted users
         await db.whitelisted_users.create_index([("user_id", 1)], unique=True)
+        await ensure_comment_indexes(db)
+        await lifecycle.ensure_indexes(db)
+        await uploads.ensure_indexes(db, upload_store)
+        await ensure_solution_indexes(db)
+        moved = await migrate_embedded_solutions(db)
+        if moved:
+            print(f"Moved {moved} embedded challenge solutions to the solutions collection")
         print("Database initialized successfully")
     except Exception as e:
         print(f"Error initializing database: {str(e)}")
         raise
 
 # Create FastAPI app
-app = FastAPI()
+# Documents go out through orjson; endpoints that return them build the
+# response themselves so FastAPI's jsonable_encoder pass is skipped
+app = FastAPI(default_response_class=MongoJSONResponse)
+
+async def may_profile(user_id: str) -> bool:
+    try:
+        await get_whitelisted_user(user_id)
+    except HTTPException:
+        return False
+    return True
+
+request_profiles = ProfileStore()
+if PROFILING_ENABLED:
+    app.add_middleware(ProfileMiddleware, authorize=may_profile, store=request_profiles)
+
+sim_pool = None
 
 # Initialize database on startup
 @app.on_event("startup")
@@ -71,16 +252,205 @@ async def startup_db_client():
         print(f"Failed to initialize database: {str(e)}")
         raise
 
-# Create SocketIO server
-sio = socketio.AsyncServer(async_mode="asgi", cors_allowed_origins="*")
+@app.on_event("startup")
+async def startup_sim_pool():
+    global sim_pool
+    if SIM_POOL_SIZE <= 0:
+        return
+    arena_world = write_arena_wbt()
+    sim_pool = SimPool(
+        lambda: pool_launch_cmd(arena_world),
+        min_size=SIM_POOL_SIZE,
+        max_size=SIM_POOL_MAX,
+        max_runs=SIM_POOL_MAX_RUNS,
+        env=webots_env(),
+    )
+    await sim_pool.start()
+    print(f"Simulator pool started with {SIM_POOL_SIZE} warm instances")
+
+@app.on_event("shutdown")
+async def shutdown_sim_pool():
+    if sim_pool:
+        await sim_pool.stop()
+
+async def reconcile_dashboard_forever():
+    while True:
+        try:
+            report = await dashboard.reconcile(db)
+            if report["drifted"]:
+                print(f"[Dashboard] Reconciled drift in: {', '.join(report['drifted'])}")
+        except Exception as e:
+            print(f"[Dashboard] Reconcile failed: {e}")
+        await asyncio.sleep(DASHBOARD_RECONCILE_SEC)
+
+dashboard_reconciler = None
+
+@app.on_event("startup")
+async def startup_dashboard_reconciler():
+    global dashboard_reconciler
+    if DASHBOARD_RECONCILE_SEC > 0:
+        dashboard_reconciler = asyncio.create_task(reconcile_dashboard_forever())
+
+@app.on_event("shutdown")
+async def shutdown_dashboard_reconciler():
+    if dashboard_reconciler:
+        dashboard_reconciler.cancel()
+
+async def expire_uploads_forever():
+    while True:
+        try:
+            expired = await uploads.expire_stale(db, upload_store, UPLOAD_EXPIRE_HOURS * 3600)
+            if expired:
+                print(f"[Uploads] Dropped {expired} abandoned upload sessions")
+        except Exception as e:
+            print(f"[Uploads] Expiry sweep failed: {e}")
+        await asyncio.sleep(3600)
+
+upload_expirer = None
+
+@app.on_event("startup")
+async def startup_upload_expirer():
+    global upload_expirer
+    if UPLOAD_EXPIRE_HOURS > 0:
+        upload_expirer = asyncio.create_task(expire_uploads_forever())
+
+@app.on_event("shutdown")
+async def shutdown_upload_expirer():
+    if upload_expirer:
+        upload_expirer.cancel()
+
+loop_monitor = None
+
+@app.on_event("startup")
+async def startup_loop_monitor():
+    global loop_monitor
+    if LOOP_LAG_MS > 0:
+        loop_monitor = LoopMonitor(LOOP_LAG_MS / 1000)
+        loop_monitor.start()
+
+@app.on_event("shutdown")
+async def shutdown_loop_monitor():
+    if loop_monitor:
+        loop_monitor.stop()
+
+# Create SocketIO server. With several uvicorn workers, set SIO_MESSAGE_QUEUE
+# (e.g. redis://localhost:6379/0) so a broadcast from one worker reaches
+# viewers connected to the others.
+SIO_MESSAGE_QUEUE = os.getenv("SIO_MESSAGE_QUEUE")
+sio = socketio.AsyncServer(
+    async_mode="asgi",
+    cors_allowed_origins="*",
+    client_manager=socketio.AsyncRedisManager(SIO_MESSAGE_QUEUE) if SIO_MESSAGE_QUEUE else None,
+)
+
+# Status events reach viewers from the change stream on db.mission_events when
+# the server supports one; otherwise (standalone MongoDB) the worker that made
+# the change emits it itself
+mission_events_watched = False
+
+async def push_mission_event(event: dict, local: bool = False):
+    # Every worker runs its own change stream, so those emits stay off the message queue
+    await sio.emit("mission_status", lifecycle.event_view(event), room=event["mission"], ignore_queue=local)
+
+async def watch_mission_events():
+    global mission_events_watched
+
+    def ready():
+        global mission_events_watched
+        mission_events_watched = True
+
+    try:
+        await lifecycle.watch_events(db, lambda event: push_mission_event(event, local=True), ready)
+    except OperationFailure as e:
+        print(f"[Lifecycle] No change streams ({e}); status events are emitted by the writing worker")
+    finally:
+        mission_events_watched = False
+
+mission_events_watcher = None
+
+@app.on_event("startup")
+async def startup_mission_events_watcher():
+    global mission_events_watcher
+    mission_events_watcher = asyncio.create_task(watch_mission_events())
+
+@app.on_event("shutdown")
+async def shutdown_mission_events_watcher():
+    if mission_events_watcher:
+        mission_events_watcher.cancel()
+
+async def move_mission(mission_id: str, target: str, repeat_ok: bool = False, stale_after: Optional[float] = None,
+                       fields: Optional[dict] = None, **details) -> Optional[dict]:
+    """Apply a lifecycle transition and what follows from it; returns its event.
+
+    With repeat_ok a mission already in target is left alone and None returned,
+    so a simulator retrying its report is not refused.
+    """
+    if not ObjectId.is_valid(mission_id):
+        raise HTTPException(status_code=400, detail="Invalid Mission ID format")
+    try:
+        event = await lifecycle.transition(db, ObjectId(mission_id), target, stale_after, fields, **details)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Mission not found")
+    except InvalidTransition as e:
+        if repeat_ok and e.current == target:
+            return None
+        raise HTTPException(status_code=409, detail=str(e))
+    mission_cache.invalidate(mission_id)
+    await dashboard.status_changed(db, event["from"], event["to"])
+    if not mission_events_watched:
+        await push_mission_event(event)
+    return event
 
 # Mount SocketIO app
 socket_app = socketio.ASGIApp(sio, other_asgi_app=app)
 
-@app.post("/forge")
+@sio.event
+async def join_room(sid, mission_id):
+    """Subscribe a viewer to a mission's score_update broadcasts (useLeaderboard.ts)."""
+    await sio.enter_room(sid, str(mission_id))
+    return True
+
+@sio.event
+async def leave_room(sid, mission_id):
+    await sio.leave_room(sid, str(mission_id))
+    return True
+
+race_relay = RaceRelay(sio.emit, RACE_RELAY_HZ)
+
+@sio.on("connect", namespace="/sim")
+async def sim_connect(sid, environ, auth=None):
+    """Simulator ingest channel (race_relay.py); viewers stay on the default namespace."""
+    if SIM_CHANNEL_TOKEN and (auth or {}).get("token") != SIM_CHANNEL_TOKEN:
+        raise socketio.exceptions.ConnectionRefusedError("invalid simulator token")
+
+@sio.on("frames", namespace="/sim")
+async def sim_frames(sid, frames):
+    """Relay a batch of race frames; the ack tells the simulator it may drop them."""
+    if not isinstance(frames, list):
+        return {"ok": False, "rejected": 0}
+    async with sio.session(sid, namespace="/sim") as session:
+        rejected = await race_relay.push(session, frames)
+    return {"ok": True, "rejected": rejected}
+
+def server_timing(response: Response, started: float):
+    """Report the Mongo write time to clients and load tools as a Server-Timing header."""
+    response.headers["Server-Timing"] = f"db;dur={(time.perf_counter() - started) * 1000:.2f}"
+
+@app.post("/forge", dependencies=[Depends(admit("forge"))])
 async def forge(payload: ForgePayload):
     thread_text = payload.thread_text
-    image_url = payload.image_url
+
+    # Reference image: fetched or uploaded once, sent to the LLM small
+    image = None
+    try:
+        if payload.image_id:
+            image = image_cache.get(payload.image_id)
+            if image is None:
+                raise HTTPException(status_code=404, detail="Unknown image_id; upload it again via POST /images")
+        elif payload.image_url:
+            image = await image_cache.fetch(payload.image_url)
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
 
     headers = {
         "Content-Type": "application/json",
@@ -99,8 +469,9 @@ async def forge(payload: ForgePayload):
         ]
     }
     # Add image to payload if provided
-    if image_url:
-         ai_payload["messages"].append({"role": "user", "content": [{"type": "image_url", "image_url": {"url": image_url}}]})
+    if image:
+        image_ref = f"{IMAGE_PUBLIC_URL}/images/{image.digest}" if IMAGE_PUBLIC_URL else image.data_url()
+        ai_payload["messages"].append({"role": "user", "content": [{"type": "image_url", "image_url": {"url": image_ref}}]})
 
     async with httpx.AsyncClient(timeout=90) as client:
         res = await client.post(OPENROUTER_ENDPOINT, json=ai_payload, headers=headers)
@@ -150,41 +521,122 @@ async def forge(payload: ForgePayload):
         "domain": payload.domain or ai_meta.get("domain", "Unknown"), # Use frontend domain
         "gates": payload.meta.get("gates", []) if payload.meta else [] # Include gates from meta
     }
+    # Lower-bound lap time and difficulty score for ranking and telemetry checks
+    mission_meta["difficulty"] = course_difficulty([mission_meta["gates"]])[0]
+
+    # Generate a unique mission name; the ObjectId counter suffix keeps two
+    # forges within the same second from colliding on the unique index
+    mission_id = ObjectId()
+    mission_name = f"mission_{int(time.time())}_{str(mission_id)[-6:]}"
 
-    # Generate a unique mission name (can still be based on time for uniqueness)
-    mission_name = f"mission_{int(time.time())}"
-    
     # Create the mission document in MongoDB
+    created = utc_timestamp()
     mission_doc = {
+        "_id": mission_id,
         "mission_name": mission_name,
         "meta": mission_meta,
-        "created": datetime.utcnow().isoformat(),
+        "created": created,
         "scores": [],
-        "upvotes": 0
+        "upvotes": 0,
+        "status": FORGED,
+        "status_at": created,
     }
     insert_result = await db.missions.insert_one(mission_doc)
+    await lifecycle.record(db, str(mission_id), None, FORGED, created)
     
     # Fetch the newly created document to return it with the _id
     new_mission = await db.missions.find_one({"_id": insert_result.inserted_id})
     
     if not new_mission:
         raise HTTPException(status_code=500, detail="Failed to retrieve newly created mission")
-
-    # Ensure _id is a string for the frontend
-    new_mission["_id"] = str(new_mission["_id"])
-
-    return new_mission
-
-@app.post("/simulate/{mission_id}")
-async def simulate(mission_id: str):
-
+    mission_cache.invalidate()
+    await dashboard.mission_created(db, new_mission)
+
+    return mongo_json(new_mission)
+
+@app.post("/images")
+async def upload_image(request: Request):
+    """Store a reference image sent as the raw request body; returns its image_id for /forge."""
+    media_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if not media_type.startswith("image/"):
+        raise HTTPException(status_code=415, detail="Send the image bytes with an image/* Content-Type")
+    if int(request.headers.get("content-length") or 0) > image_cache.max_source_bytes:
+        raise HTTPException(status_code=413, detail=f"image larger than {image_cache.max_source_bytes} bytes")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > image_cache.max_source_bytes:
+            raise HTTPException(status_code=413, detail=f"image larger than {image_cache.max_source_bytes} bytes")
+    try:
+        image = await image_cache.ingest(bytes(body))
+    except ImageRejected as e:
+        raise HTTPException(status_code=e.status, detail=str(e))
+    return image.info()
+
+@app.get("/images/cache/stats")
+async def image_cache_stats():
+    return image_cache.stats()
+
+@app.get("/images/{image_id}")
+async def get_image(image_id: str):
+    """A normalized reference image; its id is its source digest, so it never changes."""
+    image = image_cache.get(image_id) if DIGEST_RE.match(image_id) else None
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(image.path, media_type=IMAGE_MEDIA_TYPE,
+                        headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+@app.post("/simulate/{mission_id}", dependencies=[Depends(admit("simulate"))])
+async def simulate(mission_id: str, pilot: List[str] = Query(default=[])):
+    """Fly a mission, under ?pilot= if given; two or more pilots race it as one heat."""
     mission = await db.missions.find_one({"_id": ObjectId(mission_id)})
     if not mission:
         raise HTTPException(status_code=404, detail="Mission not found")
+    if len(pilot) > MAX_HEAT_SIZE:
+        raise HTTPException(status_code=400, detail=f"A heat takes at most {MAX_HEAT_SIZE} pilots")
+    try:
+        pilot = pilot_names(pilot)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Pool instances fly the one-drone arena; heats get a world of their own
+    pooled = sim_pool is not None and len(pilot) < 2
+    slot = None if pooled else reserve_simulator()
+    try:
+        # Refuses a mission that is already queued or running, unless that run went silent
+        await move_mission(mission_id, QUEUED, stale_after=MISSION_RUN_TIMEOUT_SEC, pilots=pilot or None)
+    except BaseException:
+        if slot is not None:
+            sim_processes.release(slot)
+        raise
+
+    if pooled:
+        try:
+            # The arena world has no wind baked in; hand the supervisor this mission's field
+            wind_path = await asyncio.to_thread(
+                build_wind_field, mission["mission_name"], mission.get("meta", {}), WB_WORLD_DIR)
+        except Exception as e:
+            await move_mission(mission_id, FAILED, fields={"failure_reason": "launch failed"}, reason="launch failed")
+            raise HTTPException(status_code=500, detail=f"simulate failed: {e}")
+        if wind_path:
+            mission["meta"] = mission["meta"] | {"wind_field": str(wind_path)}
+        try:
+            run = await sim_pool.run(mission, pilot=pilot[0] if pilot else None)
+        except (PoolUnavailable, asyncio.TimeoutError) as e:
+            await move_mission(mission_id, FAILED, fields={"failure_reason": "no simulator"}, reason="no simulator")
+            raise HTTPException(status_code=503, detail=f"No simulator available: {e}")
+        # The supervisor reports running as well; whichever comes second is a no-op
+        await move_mission(mission_id, RUNNING, repeat_ok=True, slot=run["slot"])
+        return {
+            "status":  "success",
+            "message": "Mission started on warm simulator",
+            "slot":    run["slot"],
+            "time_to_first_step_sec": run["time_to_first_step_sec"]
+        }
 
     try:
-        from mission_compiler import build_and_launch_wbt   # local import picks new code
-        world_path = build_and_launch_wbt(mission)
+        from .mission_compiler import build_and_launch_wbt
+        world_path, process = build_and_launch_wbt(mission, tuple(pilot))
+        sim_processes.bind(slot, process)
 
         return {
             "status":  "success",
@@ -192,51 +644,106 @@ async def simulate(mission_id: str):
             "world":   str(world_path)
         }
     except Exception as e:
+        sim_processes.release(slot)
+        await move_mission(mission_id, FAILED, fields={"failure_reason": "launch failed"}, reason="launch failed")
         raise HTTPException(status_code=500, detail=f"simulate failed: {e}")
 
+@app.get("/simulate/pool")
+async def simulate_pool_stats():
+    """Warm simulator pool occupancy and start-up latency."""
+    if not sim_pool:
+        raise HTTPException(status_code=404, detail="Simulator pool is disabled")
+    return sim_pool.stats()
+
+@app.get("/admission/stats")
+async def admission_stats():
+    """Queue depth, slots in use, shed requests per route and reason, and running simulators."""
+    return admission.stats() | {"simulators": sim_processes.stats()}
+
 @app.post("/telemetry")
-async def telemetry(data: TelemetryPayload):
-    await db.missions.update_one(
-        {"mission_name": data.mission},
-        {"$push": {"scores": {"pilot": data.pilot, "lap_time_sec": data.lap_time_sec}}}
-    )
-    # Emit score update to a room specific to the mission name
-    await sio.emit("score_update", data.model_dump(), room=data.mission)
+async def telemetry(data: TelemetryPayload, response: Response):
+    # The supervisor reports by mission id, older clients by mission name
+    query = mission_filter(data.mission)
+    mission = await db.missions.find_one(query, {"mission_name": 1, "meta.gates": 1, "meta.difficulty": 1})
+
+    score = {"pilot": data.pilot, "lap_time_sec": data.lap_time_sec, "at": utc_timestamp()}
+    if data.checkpoint_times_sec:
+        # Whole milliseconds are as precise as the supervisor's timestep and pack as int32
+        score["splits_ms"] = [to_ms(t) for t in data.checkpoint_times_sec]
+    if mission:
+        meta = mission.get("meta", {})
+        stored = meta.get("difficulty", {})
+        bound = stored.get("min_lap_time_sec")
+        if bound is None or stored.get("model") != MODEL_VERSION:
+            # Missing, or stored by an older, tighter estimator
+            bound = course_difficulty([meta.get("gates", [])])[0]["min_lap_time_sec"]
+        if data.lap_time_sec < bound:
+            if TELEMETRY_PLAUSIBILITY == "reject":
+                raise HTTPException(
+                    status_code=422,
+                    detail=f"Lap time {data.lap_time_sec:.3f}s is below the course minimum of {bound:.3f}s"
+                )
+            score["flagged"] = True
+
+    write_started = time.perf_counter()
+    await db.missions.update_one(query, {"$push": {"scores": score}})
+    server_timing(response, write_started)
+    if mission:
+        mission_cache.invalidate(mission["_id"])
+        await dashboard.lap_recorded(db, mission, score)
+    if score.get("flagged"):
+        # Implausible laps are kept for review but never reach live leaderboards or stats
+        return {"status": "flagged"}
+    if mission:
+        await db.mission_stats.update_one(
+            {"_id": mission["_id"]}, rollup_update(to_ms(data.lap_time_sec), score.get("splits_ms")), upsert=True)
+
+    # Viewers join by mission id, whichever key the supervisor reported with
+    await sio.emit("score_update", data.model_dump(), room=str(mission["_id"]) if mission else data.mission)
     return {"status": "ok"}
 
 @app.get("/missions")
-async def missions():
-    cursor = db.missions.find().sort("created", -1)
-    items = []
-    async for doc in cursor:
-        doc["_id"] = str(doc["_id"])
-        # Ensure scores field exists
-        if "scores" not in doc:
-            doc["scores"] = []
-        # Ensure meta field exists with default values
-        if "meta" not in doc:
-            doc["meta"] = {
-                "terrain": "Unknown",
-                "threats": [],
-                "wind_kts": 0,
-                "laps": 1,
-                "tags": [],
-                "trl": 1,
-                "urgency": "Low",
-                "domain": "Unknown"
-            }
-        # Ensure mission_name exists
-        if "mission_name" not in doc:
-            doc["mission_name"] = f"mission_{int(time.time())}"
-        items.append(doc)
-    return items
+async def missions(request: Request, sort: str = "created"):
+    async def load():
+        if sort == "difficulty":
+            # Hardest courses first
+            cursor = db.missions.find().sort("meta.difficulty.score", -1)
+        else:
+            cursor = db.missions.find().sort("created", -1)
+        items = []
+        async for doc in cursor:
+            # Ensure scores field exists
+            if "scores" not in doc:
+                doc["scores"] = []
+            # Ensure meta field exists with default values
+            if "meta" not in doc:
+                doc["meta"] = {
+                    "terrain": "Unknown",
+                    "threats": [],
+                    "wind_kts": 0,
+                    "laps": 1,
+                    "tags": [],
+                    "trl": 1,
+                    "urgency": "Low",
+                    "domain": "Unknown"
+                }
+            # Ensure mission_name exists
+            if "mission_name" not in doc:
+                doc["mission_name"] = f"mission_{int(time.time())}"
+            items.append(doc)
+        return items
+
+    key = "difficulty" if sort == "difficulty" else "created"
+    return await cached_json(request, ("missions", key), load)
 
 @app.post("/missions/{mission_name}/upvote")
 async def upvote_mission(mission_name: str):
     result = await db.missions.update_one({"mission_name": mission_name}, {"$inc": {"upvotes": 1}})
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Mission not found")
-    mission = await db.missions.find_one({"mission_name": mission_name})
+    mission = await db.missions.find_one({"mission_name": mission_name}, {"mission_name": 1, "upvotes": 1})
+    mission_cache.invalidate(mission["_id"])
+    await dashboard.mission_upvoted(db, mission)
     return {"upvotes": mission.get("upvotes", 0)}
 
 @app.get("/missions/{mission_name}/upvotes")
@@ -246,6 +753,29 @@ async def get_upvotes(mission_name: str):
         raise HTTPException(status_code=404, detail="Mission not found")
     return {"upvotes": mission.get("upvotes", 0)}
 
+@app.get("/missions/{mission_id}/comments")
+async def get_comments(mission_id: str, limit: int = Query(20, ge=1, le=COMMENTS_MAX_PAGE), before: Optional[str] = None):
+    """A page of comments, newest first; pass the returned next as before for older ones."""
+    if not ObjectId.is_valid(mission_id):
+        raise HTTPException(status_code=400, detail="Invalid Mission ID format")
+    try:
+        cursor = parse_cursor(before)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return mongo_json(await comment_page(db, mission_id, limit, cursor))
+
+@app.post("/missions/{mission_id}/comments", status_code=201)
+async def post_comment(mission_id: str, payload: CommentPayload):
+    """Append a comment and push it to viewers in the mission's room."""
+    if not ObjectId.is_valid(mission_id):
+        raise HTTPException(status_code=400, detail="Invalid Mission ID format")
+    if not await db.missions.find_one({"_id": ObjectId(mission_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Mission not found")
+    comment = await add_comment(db, mission_id, payload.author, payload.content)
+    comment["_id"] = str(comment["_id"])
+    await sio.emit("comment", {"mission": mission_id} | comment, room=mission_id)
+    return mongo_json(comment, status_code=201)
+
 @app.post("/challenges")
 async def create_challenge(challenge: Challenge):
     """Create a new challenge and save it to the database."""
@@ -254,9 +784,10 @@ async def create_challenge(challenge: Challenge):
 
     challenge_doc = challenge.model_dump()
     challenge_doc["author_uid"] = author_uid
-    challenge_doc["created"] = datetime.utcnow().isoformat()
+    challenge_doc["created"] = utc_timestamp()
     # State is already defaulted to "pending" in the Pydantic model, but we ensure it here.
     challenge_doc["state"] = "pending"
+    challenge_doc["solution_count"] = 0
 
     # Insert the new challenge into the database
     insert_result = await db.challenges.insert_one(challenge_doc)
@@ -267,12 +798,91 @@ async def create_challenge(challenge: Challenge):
     if not new_challenge:
         raise HTTPException(status_code=500, detail="Failed to retrieve newly created challenge")
 
-    # Ensure _id is a string for the frontend
-    new_challenge["_id"] = str(new_challenge["_id"])
-
     # Note: We are skipping the auto-moderation/Redis queue step for this initial scaffold
 
-    return new_challenge
+    return mongo_json(new_challenge)
+
+@app.get("/challenges/{challenge_id}/solutions")
+async def get_solutions(challenge_id: str, sort: str = "created",
+                        limit: int = Query(20, ge=1, le=SOLUTIONS_MAX_PAGE), skip: int = Query(0, ge=0)):
+    """A page of a challenge's solutions, newest or most upvoted first."""
+    if not ObjectId.is_valid(challenge_id):
+        raise HTTPException(status_code=400, detail="Invalid Challenge ID format")
+    if sort not in SOLUTION_SORTS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of: {', '.join(SOLUTION_SORTS)}")
+    return mongo_json(await list_solutions(db, challenge_id, sort, limit, skip))
+
+@app.post("/challenges/{challenge_id}/solutions", status_code=201)
+async def post_solution(challenge_id: str, payload: SolutionPayload):
+    """Submit a solution, optionally referencing a video uploaded through /uploads."""
+    if not ObjectId.is_valid(challenge_id):
+        raise HTTPException(status_code=400, detail="Invalid Challenge ID format")
+    if payload.video_id and not ObjectId.is_valid(payload.video_id):
+        raise HTTPException(status_code=400, detail="Invalid video ID format")
+    try:
+        solution = await add_solution(db, challenge_id, payload.model_dump())
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return mongo_json(solution, status_code=201)
+
+def upload_error(e: UploadError) -> HTTPException:
+    headers = {"Upload-Offset": str(e.offset)} if e.offset is not None else None
+    return HTTPException(status_code=e.status, detail=str(e), headers=headers)
+
+@app.post("/uploads", status_code=201)
+async def create_upload(payload: UploadPayload):
+    """Open a resumable upload session for a solution video."""
+    try:
+        session = await uploads.create_session(db, upload_store, payload.filename, payload.content_type,
+                                               payload.size, UPLOAD_CHUNK_MB << 20, UPLOAD_MAX_MB << 20,
+                                               payload.sha256)
+    except UploadError as e:
+        raise upload_error(e)
+    return uploads.session_view(session)
+
+@app.api_route("/uploads/{upload_id}", methods=["GET", "HEAD"])
+async def get_upload(upload_id: str):
+    """Session state; Upload-Offset is where the next chunk starts."""
+    try:
+        session = await uploads.get_session(db, uploads.parse_upload_id(upload_id))
+    except UploadError as e:
+        raise upload_error(e)
+    return mongo_json(uploads.session_view(session),
+                      headers={"Upload-Offset": str(session["received"]), "Cache-Control": "no-store"})
+
+@app.put("/uploads/{upload_id}")
+async def put_upload_chunk(upload_id: str, request: Request):
+    """Write one chunk (Content-Range, Content-Digest) streamed from the raw request body."""
+    try:
+        session = await uploads.receive_chunk(
+            db, upload_store, uploads.parse_upload_id(upload_id),
+            request.headers.get("content-range"), request.headers.get("content-digest"), request.stream())
+    except UploadError as e:
+        raise upload_error(e)
+    return mongo_json(uploads.session_view(session), headers={"Upload-Offset": str(session["received"])})
+
+@app.api_route("/videos/{video_id}", methods=["GET", "HEAD"])
+async def get_video(video_id: str, request: Request):
+    """A completed upload, with single-range requests for seeking."""
+    try:
+        video = await uploads.get_video(db, uploads.parse_upload_id(video_id))
+    except UploadError as e:
+        raise upload_error(e)
+    try:
+        span = uploads.parse_range(request.headers.get("range"), video["size"])
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=str(e), headers={"Content-Range": f"bytes */{video['size']}"})
+    first, last = span or (0, video["size"] - 1)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Length": str(last - first + 1),
+        "Cache-Control": "public, max-age=31536000, immutable",
+    }
+    if span:
+        headers["Content-Range"] = f"bytes {first}-{last}/{video['size']}"
+    body = upload_store.read(video["_id"], first, last) if request.method == "GET" else iter(())
+    return StreamingResponse(body, status_code=206 if span else 200, media_type=video["content_type"],
+                             headers=headers)
 
 @app.get("/missions/{mission_id}/leaderboard")
 async def get_leaderboard(mission_id: str, top: int = 10):
@@ -285,6 +895,7 @@ async def get_leaderboard(mission_id: str, top: int = 10):
     pipeline = [
       {"$match":{"_id": ObjectId(mission_id)}},
       {"$unwind":"$scores"},
+      {"$match":{"scores.flagged": {"$ne": True}}},
       {"$group":{
           "_id":"$scores.pilot",
           "fastest":{"$min":"$scores.lap_time_sec"}}},
@@ -308,7 +919,7 @@ async def get_leaderboard(mission_id: str, top: int = 10):
 
     # The pipeline already filters by mission_id, so if mission exists but pipeline returns empty,
     # it means there are no scores yet, which is valid.
-    return leaderboard_data
+    return mongo_json(leaderboard_data)
 
 @app.post("/challenges/{challenge_id}/state")
 async def update_challenge_state(challenge_id: str, state: str, user_id: str = Depends(get_whitelisted_user)):
@@ -334,69 +945,133 @@ async def update_challenge_state(challenge_id: str, state: str, user_id: str = D
     if not updated_challenge:
         raise HTTPException(status_code=500, detail="Failed to retrieve updated challenge")
 
-    # Convert ObjectId to string for JSON serialization
-    updated_challenge["_id"] = str(updated_challenge["_id"])
-    return updated_challenge
+    return mongo_json(updated_challenge)
+
+@app.get("/missions/cache/stats")
+async def mission_cache_stats():
+    """Hit rate and memory of the mission response cache."""
+    return mission_cache.stats()
 
 @app.get("/missions/{mission_id}")
-async def get_mission(mission_id: str):
+async def get_mission(mission_id: str, request: Request):
     """Get a single mission by its ID."""
     if not ObjectId.is_valid(mission_id):
         raise HTTPException(status_code=400, detail="Invalid Mission ID format")
 
-    mission = await db.missions.find_one({"_id": ObjectId(mission_id)})
-
-    if not mission:
-        raise HTTPException(status_code=404, detail="Mission not found")
-
-    # Convert ObjectId to string for JSON serialization
-    mission["_id"] = str(mission["_id"])
+    async def load():
+        mission = await db.missions.find_one({"_id": ObjectId(mission_id)})
+        if not mission:
+            raise HTTPException(status_code=404, detail="Mission not found")
+        return mission
 
-    return mission
+    return await cached_json(request, ("mission", mission_id), load)
 
-@app.post("/missions/{mission_id}/complete")
-async def complete_mission(mission_id: str):
-    """Mark a mission as completed."""
+@app.get("/missions/{mission_id}/stats")
+async def get_mission_stats(mission_id: str):
+    """Lap-time distribution and per-gate split histograms from the ingest rollup."""
     if not ObjectId.is_valid(mission_id):
         raise HTTPException(status_code=400, detail="Invalid Mission ID format")
+    rollup = await db.mission_stats.find_one({"_id": ObjectId(mission_id)})
+    if rollup is None and not await db.missions.find_one({"_id": ObjectId(mission_id)}, {"_id": 1}):
+        raise HTTPException(status_code=404, detail="Mission not found")
+    return mongo_json({"mission_id": mission_id} | summarize(rollup))
 
-    result = await db.missions.update_one(
-        {"_id": ObjectId(mission_id)},
-        {"$set": {"status": "completed", "completion_time": datetime.utcnow()}}
-    )
-
-    if result.modified_count == 0:
-        # Check if mission exists but status is already completed/failed
-        mission = await db.missions.find_one({"_id": ObjectId(mission_id)})
-        if mission:
-             # Mission found, but not modified means status was already final
-             return {"message": f"Mission {mission_id} status was already {mission.get('status', 'finalized')}"}
-        else:
-            raise HTTPException(status_code=404, detail="Mission not found")
+@app.post("/missions/{mission_id}/running")
+async def mission_running(mission_id: str):
+    """Reported by the supervisor once the simulation has started."""
+    event = await move_mission(mission_id, RUNNING, repeat_ok=True)
+    return {"status": RUNNING, "changed": event is not None}
 
-    return {"message": f"Mission {mission_id} marked as completed"}
+@app.post("/missions/{mission_id}/complete")
+async def complete_mission(mission_id: str, response: Response):
+    """Mark a running mission as completed."""
+    write_started = time.perf_counter()
+    event = await move_mission(mission_id, COMPLETED, repeat_ok=True,
+                               fields={"completion_time": utc_timestamp()})
+    server_timing(response, write_started)
+    return {"message": f"Mission {mission_id} marked as completed", "changed": event is not None}
 
 @app.post("/missions/{mission_id}/fail")
-async def fail_mission(mission_id: str, reason: str = "unknown"):
-    """Mark a mission as failed."""
+async def fail_mission(mission_id: str, response: Response, reason: str = "unknown"):
+    """Mark a queued or running mission as failed."""
+    write_started = time.perf_counter()
+    event = await move_mission(mission_id, FAILED, repeat_ok=True,
+                               fields={"failure_reason": reason, "completion_time": utc_timestamp()},
+                               reason=reason)
+    server_timing(response, write_started)
+    return {"message": f"Mission {mission_id} marked as failed with reason: {reason}", "changed": event is not None}
+
+@app.get("/missions/{mission_id}/events")
+async def mission_events(mission_id: str):
+    """The mission's status changes, oldest first."""
     if not ObjectId.is_valid(mission_id):
         raise HTTPException(status_code=400, detail="Invalid Mission ID format")
-
-    result = await db.missions.update_one(
-        {"_id": ObjectId(mission_id)},
-        {"$set": {"status": "failed", "failure_reason": reason, "completion_time": datetime.utcnow()}}
-    )
-
-    if result.modified_count == 0:
-        # Check if mission exists but status is already completed/failed
-        mission = await db.missions.find_one({"_id": ObjectId(mission_id)})
-        if mission:
-             # Mission found, but not modified means status was already final
-             return {"message": f"Mission {mission_id} status was already {mission.get('status', 'finalized')}"}
-        else:
-            raise HTTPException(status_code=404, detail="Mission not found")
-
-    return {"message": f"Mission {mission_id} marked as failed with reason: {reason}"}
+    return mongo_json(await lifecycle.history(db, mission_id))
+
+@app.get("/dashboard/summary")
+async def dashboard_summary():
+    """Mission counts, top missions and pilots, and recent laps from the rollup document."""
+    summary = await dashboard.summary(db)
+    if summary is None:
+        # First read on a fresh deployment: build the rollup now
+        await dashboard.reconcile(db)
+        summary = await dashboard.summary(db)
+    return summary
+
+@app.post("/dashboard/reconcile", dependencies=[Depends(get_whitelisted_user)])
+async def dashboard_reconcile():
+    """Rebuild the dashboard rollup now; reports which parts had drifted."""
+    return await dashboard.reconcile(db)
+
+def require_profiling():
+    if not PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiling is disabled (PROFILING_ENABLED=1)")
+
+profile_lock = asyncio.Lock()
+
+@app.post("/debug/profile", dependencies=[Depends(require_profiling), Depends(get_whitelisted_user)])
+async def profile_worker(seconds: float = Query(10, gt=0), interval_ms: float = Query(5, ge=1, le=100),
+                         all_threads: bool = False):
+    """Sample this worker for a while; returns collapsed stacks for flamegraph.pl or speedscope."""
+    if seconds > PROFILE_MAX_SEC:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {PROFILE_MAX_SEC}")
+    if profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile of this worker is already running")
+    async with profile_lock:
+        sampler = StackSampler(interval=interval_ms / 1000, all_threads=all_threads).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop()
+    profile = sampler.profile()
+    name = f"gateway-{os.getpid()}-{int(time.time())}.folded"
+    return Response(profile["folded"], media_type="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="{name}"',
+        "X-Profile-Samples": str(profile["samples"]),
+        "X-Profile-PID": str(os.getpid()),
+    })
+
+@app.get("/debug/profiles", dependencies=[Depends(require_profiling), Depends(get_whitelisted_user)])
+async def list_request_profiles():
+    """Recent per-request profiles of this worker, newest first."""
+    return request_profiles.index()
+
+@app.get("/debug/profiles/{profile_id}", dependencies=[Depends(require_profiling), Depends(get_whitelisted_user)])
+async def get_request_profile(profile_id: str):
+    profile = request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found (profiles are kept per worker)")
+    return Response(profile["folded"], media_type="text/plain", headers={
+        "Content-Disposition": f'attachment; filename="{profile_id}.folded"',
+        "X-Profile-Samples": str(profile["samples"]),
+    })
+
+@app.get("/debug/loop")
+async def loop_stats():
+    """Event-loop stall counts from the LOOP_LAG_MS monitor."""
+    if loop_monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled (LOOP_LAG_MS)")
+    return loop_monitor.stats()
 
 @app.post("/whitelisted-users/{user_id}")
 async def add_whitelisted_user(user_id: str):
@@ -429,5 +1104,23 @@ async def get_whitelisted_users():
         whitelisted_users.append(doc["user_id"])
     return whitelisted_users
 
+@app.get("/export/{kind}", dependencies=[Depends(get_whitelisted_user)])
+async def export(kind: str, format: str = "ndjson", created_from: Optional[str] = None,
+                 created_to: Optional[str] = None, state: Optional[str] = None, after: Optional[str] = None):
+    """Stream missions, scores or challenges as gzipped NDJSON/CSV (see export.py); whitelisted users only."""
+    if kind not in EXPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown export: {kind}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(EXPORT_FORMATS)}")
+    try:
+        query = export_query(kind, created_from, created_to, state, after)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(
+        export_stream(db, kind, format, query),
+        media_type="application/gzip",
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}.gz"'},
+    )
+
 # Export the SocketIO app for uvicorn
 application = socket_app
@@ -0,0 +1,101 @@
+"""Read-through cache of encoded mission responses, with strong ETags.
+
+GET /missions and GET /missions/{id} keep their encoded JSON body here, keyed
+by (route, argument). Entries expire after ttl seconds, and the least
+recently used ones are evicted past max_entries or max_bytes. Every write
+that changes a mission calls invalidate(), which drops that mission's detail
+entry and every list entry. The generation counter keeps a read that started
+before the write from storing what it read afterwards.
+
+The cache is per process; with several uvicorn workers the TTL bounds how
+long another worker can serve a copy that predates a write.
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+@dataclass(frozen=True)
+class CachedBody:
+    body: bytes
+    etag: str
+    expires: float
+
+def strong_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/"x" matches "x"."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+class MissionCache:
+    def __init__(self, max_entries: int = 1024, ttl: float = 30.0, max_bytes: int = 64 << 20,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.generation = 0
+        self._entries: "OrderedDict[Hashable, CachedBody]" = OrderedDict()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[CachedBody]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires <= self.clock():
+            self._drop(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: Hashable, body: bytes, generation: int) -> CachedBody:
+        """Store body unless a write invalidated the cache since generation was read."""
+        entry = CachedBody(body, strong_etag(body), self.clock() + self.ttl)
+        if self.max_entries <= 0 or generation != self.generation:
+            return entry
+        if key in self._entries:
+            self._drop(key)
+        if len(body) > self.max_bytes:
+            return entry
+        self._entries[key] = entry
+        self._bytes += len(body)
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        return entry
+
+    def invalidate(self, mission_id=None):
+        """Drop every list entry, and mission_id's detail entry when given."""
+        self.generation += 1
+        self.invalidations += 1
+        for key in [k for k in self._entries if k[0] == "missions"]:
+            self._drop(key)
+        if mission_id is not None and ("mission", str(mission_id)) in self._entries:
+            self._drop(("mission", str(mission_id)))
+
+    def _drop(self, key: Hashable):
+        self._bytes -= len(self._entries.pop(key).body)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_sec": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -1,13 +1,22 @@
 from textwrap import dedent
 from pathlib import Path
 from datetime import datetime
-import json, subprocess, os
+import json, math, re, subprocess, os
 
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 
+from .wind_field import build_wind_field
+
 ROOT              = Path(__file__).resolve().parents[2]      # ai-expo/
 WB_TPL_DIR        = ROOT / "webots" / "mission_templates"
 WB_WORLD_DIR      = ROOT / "webots" / "worlds"
+WB_PROTO_DIR      = ROOT / "webots" / "protos"
+WEBOTS_BIN        = Path(os.getenv("WEBOTS_BIN", "/Applications/Webots.app/Contents/MacOS/webots"))
+ARENA_WORLD_NAME  = "arena_base"
+# Heat start grid: two columns GRID_LANE_WIDTH apart, rows GRID_ROW_GAP apart,
+# the second column staggered half a row back (metres)
+GRID_LANE_WIDTH   = 1.0
+GRID_ROW_GAP      = 1.5
 WB_WORLD_DIR.mkdir(parents=True, exist_ok=True)
 
 env = Environment(
@@ -15,8 +24,52 @@ env = Environment(
     autoescape=select_autoescape()
 )
 
-def write_wbt(mission_name: str, meta: dict) -> Path:
-    """Render .wbt from template + mission meta, return absolute path"""
+def start_grid(n: int, gates: list) -> list:
+    """Staggered start positions (x, y, z) for n drones, pole first
+
+    The pole sits at the origin, where single-drone worlds put CF1, and the
+    grid extends backwards from it, away from the first gate.
+    """
+    fx, fy = (gates[0]["x"], gates[0]["y"]) if gates else (1.0, 0.0)
+    length = math.hypot(fx, fy)
+    ux, uy = (fx / length, fy / length) if length else (1.0, 0.0)
+    slots = []
+    for i in range(n):
+        row, col = divmod(i, 2)
+        back = row * GRID_ROW_GAP + col * GRID_ROW_GAP / 2
+        right = col * GRID_LANE_WIDTH
+        # + 0.0 turns -0.0 into 0.0 in the world file
+        slots.append((round(-ux * back + uy * right, 3) + 0.0, round(-uy * back - ux * right, 3) + 0.0, 0))
+    return slots
+
+def pilot_names(pilots) -> list:
+    """Pilot names as they can appear in a quoted controllerArgs string.
+
+    Raises ValueError when a name is left empty or two names become the same.
+    """
+    names = [re.sub(r"[^\w.@-]", "_", p) for p in pilots]
+    if not all(names):
+        raise ValueError("Pilot names must not be empty")
+    clashes = sorted({n for n in names if names.count(n) > 1})
+    if clashes:
+        raise ValueError(f"Pilot names must differ after replacing unsupported characters: {', '.join(clashes)}")
+    return names
+
+def _is_vector(value, n: int) -> bool:
+    """A list or tuple of n numbers, as the Gate PROTO size/color fields take."""
+    return (isinstance(value, (list, tuple)) and len(value) == n
+            and all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value))
+
+def write_wbt(mission_name: str, meta: dict, out_dir: Path = WB_WORLD_DIR, importable_gates: bool = False,
+              supervisor_args: tuple = (), pilots: tuple = ()) -> Path:
+    """Render .wbt from template + mission meta, return absolute path
+
+    supervisor_args are extra KEY=VALUE controllerArgs for mission_supervisor.
+    Missions with wind_kts > 0 get a gust field written next to the world and
+    passed on as WIND_FIELD, unless the caller already supplies one.
+    Two or more pilots make a heat: one drone per pilot (CF1..CFn) on a
+    staggered start grid. Pilot names, one or more, are passed on as PILOTS.
+    """
     tpl  = env.get_template("wb_base.wbt.j2")
 
     # Process gates to ensure all required fields exist
@@ -27,7 +80,22 @@ def write_wbt(mission_name: str, meta: dict) -> Path:
         if "y" not in gate: gate["y"] = 0
         if "z" not in gate: gate["z"] = 0
         if "yaw" not in gate: gate["yaw"] = 0
-    
+        # Optional Gate PROTO overrides: size [w, h] and color [r, g, b]
+        if "size" in gate and not _is_vector(gate["size"], 2): del gate["size"]
+        if "color" in gate and not _is_vector(gate["color"], 3): del gate["color"]
+
+    if not any(arg.startswith("WIND_FIELD=") for arg in supervisor_args):
+        wind_path = build_wind_field(mission_name, meta, out_dir)
+        if wind_path:
+            supervisor_args = (*supervisor_args, f"WIND_FIELD={wind_path}")
+
+    drones = [{"name": "CF1", "x": 0, "y": 0, "z": 0}]
+    if len(pilots) > 1:
+        drones = [{"name": f"CF{i + 1}", "x": x, "y": y, "z": z}
+                  for i, (x, y, z) in enumerate(start_grid(len(pilots), gates))]
+    if pilots:
+        supervisor_args = (*supervisor_args, "PILOTS=" + ",".join(pilot_names(pilots)))
+
     # very naive camera: 12 m behind first gate or origin
     g0 = gates[0] if gates else {"x": 0, "y": 0, "z": 0}
     cam = dict(cam_x=g0["x"], cam_y=5, cam_z=g0["z"] + 12)
@@ -37,26 +105,39 @@ def write_wbt(mission_name: str, meta: dict) -> Path:
         mission_id   = meta["mission_id"],
         background_tex = "textures/stadium.jpg",
         gates        = gates,
+        drones       = drones,
+        importable_gates = importable_gates,
+        supervisor_args = supervisor_args,
         **cam
     )
 
-    out_path = WB_WORLD_DIR / f"{mission_name}.wbt"
+    out_path = out_dir / f"{mission_name}.wbt"
     out_path.write_text(world_txt)
     return out_path
 
+def write_arena_wbt(out_dir: Path = WB_WORLD_DIR) -> Path:
+    """Gate-less base world for the warm pool; the supervisor imports gates at runtime"""
+    return write_wbt(ARENA_WORLD_NAME, {"mission_id": "pool", "gates": []}, out_dir, importable_gates=True)
+
+def webots_env() -> dict:
+    # Set WEBOTS_EXTRA_PROTO_PATH to point to our protos directory
+    return os.environ | {"WEBOTS_EXTRA_PROTO_PATH": str(WB_PROTO_DIR)}
+
+def pool_launch_cmd(world_path: Path) -> list:
+    """Command line for one warm-pool instance: headless, no window"""
+    if not WEBOTS_BIN.exists():
+        raise RuntimeError("Webots not found at expected location")
+    return [str(WEBOTS_BIN), "--batch", "--minimize", "--no-rendering", "--mode=realtime", str(world_path)]
+
 def launch_webots(world_path: Path):
-    webots_dir = Path("/Applications/Webots.app/Contents/MacOS/webots")
-    if not webots_dir.exists():
+    if not WEBOTS_BIN.exists():
         raise RuntimeError("Webots not found at expected location")
 
-    # Set WEBOTS_EXTRA_PROTO_PATH to point to our protos directory
-    os.environ["WEBOTS_EXTRA_PROTO_PATH"] = str(Path(__file__).resolve().parents[2] / "webots" / "protos")
-    
     # Launch Webots with the absolute path to the world file
-    subprocess.Popen([str(webots_dir), str(world_path)])
+    return subprocess.Popen([str(WEBOTS_BIN), str(world_path)], env=webots_env())
 
 # helper used by FastAPI endpoint
-def build_and_launch_wbt(mission_doc: dict):
-    world_path = write_wbt(mission_doc["mission_name"], mission_doc["meta"] | {"mission_id": mission_doc["_id"]})
-    launch_webots(world_path)
-    return world_path
+def build_and_launch_wbt(mission_doc: dict, pilots: tuple = ()):
+    world_path = write_wbt(mission_doc["mission_name"], mission_doc["meta"] | {"mission_id": mission_doc["_id"]},
+                           pilots=pilots)
+    return world_path, launch_webots(world_path)
@@ -0,0 +1,99 @@
+"""Per-mission lap and checkpoint-split rollups, maintained at ingest.
+
+Each mission has one document in db.mission_stats, keyed by the mission's
+_id. Every accepted lap updates it with a single upsert: $inc on counts,
+sums and histogram buckets, plus $min/$max on the extremes. Reading the stats
+never touches the mission's scores, and the work does not grow with the
+number of laps.
+
+Histograms are log-bucketed sketches: bucket i covers (GAMMA**(i-1), GAMMA**i]
+milliseconds, so any quantile read back from them is within RELATIVE_ACCURACY
+of the exact value, and a lap or split from 1 ms to an hour lands in one of
+about 400 buckets.
+
+    {"_id": ObjectId, "laps": {"count", "sum_ms", "sum_sq_ms", "best_ms",
+     "worst_ms", "buckets": {"<i>": n}}, "splits": {"<gate>": {... same ...}}}
+"""
+import math
+from typing import Dict, Iterable, List, Optional
+
+RELATIVE_ACCURACY = 0.02
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+QUANTILES = (0.5, 0.9, 0.99)
+
+def to_ms(seconds: float) -> int:
+    """Stored resolution for lap times and splits; at least 1 ms."""
+    return max(int(round(seconds * 1000)), 1)
+
+def bucket_index(ms: int) -> int:
+    return math.ceil(math.log(ms) / _LOG_GAMMA)
+
+def bucket_bounds(index: int):
+    return GAMMA ** (index - 1), GAMMA ** index
+
+def _series_update(prefix: str, ms: int, inc: dict, lo: dict, hi: dict):
+    inc[f"{prefix}.count"] = 1
+    inc[f"{prefix}.sum_ms"] = ms
+    inc[f"{prefix}.sum_sq_ms"] = ms * ms
+    inc[f"{prefix}.buckets.{bucket_index(ms)}"] = 1
+    lo[f"{prefix}.best_ms"] = ms
+    hi[f"{prefix}.worst_ms"] = ms
+
+def rollup_update(lap_ms: int, splits_ms: Optional[Iterable[int]] = None) -> dict:
+    """Update document adding one lap (and its per-gate splits) to the rollup."""
+    inc, lo, hi = {}, {}, {}
+    _series_update("laps", lap_ms, inc, lo, hi)
+    for gate, ms in enumerate(splits_ms or ()):
+        _series_update(f"splits.{gate}", ms, inc, lo, hi)
+    return {"$inc": inc, "$min": lo, "$max": hi}
+
+def quantile(buckets: Dict[str, int], count: int, q: float) -> Optional[float]:
+    """Estimated q-quantile in ms, within RELATIVE_ACCURACY of the exact value."""
+    if not count:
+        return None
+    rank = q * (count - 1)
+    seen = 0
+    for index in sorted(int(i) for i in buckets):
+        seen += buckets[str(index)]
+        if seen > rank:
+            return 2 * GAMMA ** index / (GAMMA + 1)
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+def summarize_series(series: Optional[dict]) -> dict:
+    """Counts, moments, quantiles and histogram of one series, in seconds."""
+    series = series or {}
+    count = series.get("count", 0)
+    if not count:
+        return {"count": 0, "mean_sec": None, "stdev_sec": None, "best_sec": None, "worst_sec": None,
+                "quantiles_sec": {}, "histogram": []}
+    mean = series["sum_ms"] / count
+    variance = max(series["sum_sq_ms"] / count - mean * mean, 0.0)
+    best, worst = series["best_ms"], series["worst_ms"]
+    buckets = series.get("buckets", {})
+    quantiles = {}
+    for q in QUANTILES:
+        # The sketch's midpoint can fall outside the observed range at the tails
+        value = min(max(quantile(buckets, count, q), best), worst)
+        quantiles[f"p{round(q * 100)}"] = round(value / 1000, 3)
+    histogram = []
+    for index in sorted(int(i) for i in buckets):
+        lo, hi = bucket_bounds(index)
+        histogram.append({"lo_sec": round(lo / 1000, 4), "hi_sec": round(hi / 1000, 4),
+                          "count": buckets[str(index)]})
+    return {
+        "count": count,
+        "mean_sec": round(mean / 1000, 3),
+        "stdev_sec": round(math.sqrt(variance) / 1000, 3),
+        "best_sec": best / 1000,
+        "worst_sec": worst / 1000,
+        "quantiles_sec": quantiles,
+        "histogram": histogram,
+    }
+
+def summarize(doc: Optional[dict]) -> dict:
+    """GET /missions/{id}/stats body from a mission_stats document (or None)."""
+    doc = doc or {}
+    splits = doc.get("splits", {})
+    gates: List[dict] = [dict(summarize_series(splits[g]), gate=int(g)) for g in sorted(splits, key=int)]
+    return {"laps": summarize_series(doc.get("laps")), "splits": gates}
@@ -1,10 +1,11 @@
 from datetime import datetime
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
 class ForgePayload(BaseModel):
     thread_text: str
     image_url: Optional[str] = None
+    image_id: Optional[str] = None     # from POST /images; takes precedence over image_url
     environment: str = "stadium"
     tags: Optional[List[str]] = None
     trl: Optional[int] = None
@@ -12,6 +13,28 @@ class ForgePayload(BaseModel):
     domain: Optional[str] = None
     meta: Optional[Dict[str, Any]] = None
 
+class CommentPayload(BaseModel):
+    author: str = Field(min_length=1, max_length=100)
+    content: str = Field(min_length=1, max_length=2000)
+
+class UploadPayload(BaseModel):
+    filename: str = Field(min_length=1, max_length=255)
+    content_type: str
+    size: int
+    sha256: Optional[str] = None      # hex digest of the whole file, checked once the last chunk is in
+
+class SolutionPayload(BaseModel):
+    provider_id: str
+    provider_name: Optional[str] = None
+    provider_type: str = "industry"    # academia | startup | industry | government
+    provider_details: Dict[str, Any] = {}
+    content: str = Field(min_length=10, max_length=20000)
+    trl: int = 1
+    video_id: Optional[str] = None     # a completed upload from /uploads
+    video_url: Optional[str] = None    # or an external link
+    attachments: List[str] = []
+    is_anonymous: bool = False
+
 class MissionMeta(BaseModel):
     terrain: str
     threats: List[str] = []
@@ -26,6 +49,8 @@ class TelemetryPayload(BaseModel):
     mission: str
     pilot: str
     lap_time_sec: float
+    checkpoint_times_sec: Optional[List[float]] = None  # per-gate splits, in gate order
+    status: Optional[str] = None
 
 class MissionEntry(BaseModel):
     mission_name: str
@@ -51,7 +76,6 @@ class Challenge(BaseModel):
     updated: str
     upvotes: int = 0
     video_url: Optional[str] = None
-    solutions: List[dict] = []
     moderators: List[str] = []
     review_notes: Optional[str] = None
     classification_level: str = "unclassified"  # unclassified | confidential | secret | top_secret
@@ -0,0 +1,219 @@
+"""Opt-in profiling of a live gateway worker.
+
+- StackSampler: a daemon thread that reads the event loop thread's stack from
+  sys._current_frames() every few milliseconds and counts collapsed stacks
+  ("outer;inner;leaf 12" per line), the input of flamegraph.pl, speedscope
+  and inferno. Nothing is hooked into the interpreter, so a running worker
+  can be sampled without a restart, an extra dependency or ptrace rights,
+  and nothing runs at all while no profile is being taken.
+- ProfileMiddleware: profiles a single request that asks for it with an
+  X-Profile-User header naming an authorized user. Only samples taken while
+  that request's task holds the loop are counted, so concurrent requests do
+  not show up in its profile. The result is kept in a ProfileStore and its id
+  returned in X-Profile-Id.
+- LoopMonitor: a heartbeat task and a watchdog thread. When the heartbeat
+  stops for longer than the threshold, the watchdog logs the task that is
+  holding the loop and its stack, while it is still blocking.
+"""
+import asyncio
+import collections
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Counter, Optional
+
+# Which task each loop is running; a private asyncio table, so per-request
+# profiles fall back to every sample on interpreters without it
+_current_tasks = getattr(asyncio.tasks, "_current_tasks", None)
+
+def frame_label(frame) -> str:
+    code = frame.f_code
+    path = Path(code.co_filename)
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({path.parent.name}/{path.name}:{code.co_firstlineno})"
+
+def collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(frame_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+def folded(stacks: Counter) -> str:
+    """Collapsed-stack text, most sampled first."""
+    return "".join(f"{stack} {n}\n" for stack, n in stacks.most_common())
+
+def running_task(loop) -> Optional[asyncio.Task]:
+    return _current_tasks.get(loop) if _current_tasks is not None else None
+
+class StackSampler:
+    """Samples one thread's stack (or every thread's) until stopped."""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005, all_threads: bool = False,
+                 loop=None, task: Optional[asyncio.Task] = None):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.all_threads = all_threads
+        # With a task, only samples taken while loop is running it count
+        self.loop = loop
+        self.task = task if _current_tasks is not None else None
+        self.stacks: Counter = collections.Counter()
+        self.samples = 0
+        self.started = self.stopped = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        self.stopped = time.perf_counter()
+        return self.stacks
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            if self.task is not None and running_task(self.loop) is not self.task:
+                continue
+            frames = sys._current_frames()
+            if self.all_threads:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                for tid, frame in frames.items():
+                    if tid != me:
+                        self.stacks[f"{names.get(tid, tid)};{collapse(frame)}"] += 1
+            elif self.thread_id in frames:
+                self.stacks[collapse(frames[self.thread_id])] += 1
+            self.samples += 1
+
+    def profile(self) -> dict:
+        return {
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(((self.stopped or time.perf_counter()) - self.started) * 1000, 1),
+            "folded": folded(self.stacks),
+        }
+
+class ProfileStore:
+    """The most recent per-request profiles, by id."""
+
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._profiles: "collections.OrderedDict[str, dict]" = collections.OrderedDict()
+
+    def add(self, profile: dict) -> str:
+        profile_id = uuid.uuid4().hex[:16]
+        self._profiles[profile_id] = {"id": profile_id, **profile}
+        while len(self._profiles) > self.max_entries:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        return self._profiles.get(profile_id)
+
+    def index(self) -> list:
+        return [{k: v for k, v in p.items() if k != "folded"} for p in reversed(self._profiles.values())]
+
+class ProfileMiddleware:
+    """ASGI middleware sampling requests whose X-Profile-User passes authorize()."""
+
+    def __init__(self, app, authorize: Callable[[str], Awaitable[bool]], store: ProfileStore,
+                 interval: float = 0.001):
+        self.app = app
+        self.authorize = authorize
+        self.store = store
+        self.interval = interval
+
+    async def __call__(self, scope, receive, send):
+        user = None
+        if scope["type"] == "http":
+            user = next((v.decode() for k, v in scope["headers"] if k == b"x-profile-user"), None)
+        if not user or not await self.authorize(user):
+            await self.app(scope, receive, send)
+            return
+
+        sampler = StackSampler(interval=self.interval, loop=asyncio.get_running_loop(),
+                               task=asyncio.current_task())
+        profile_id = None
+
+        async def send_with_id(message):
+            nonlocal profile_id
+            if message["type"] == "http.response.start":
+                # The profile covers the request up to its response headers
+                sampler.stop()
+                profile_id = self.store.add({"method": scope["method"], "path": scope["path"], "user": user,
+                                             **sampler.profile()})
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if profile_id is None:
+                sampler.stop()
+
+class LoopMonitor:
+    """Logs what blocks the event loop for longer than threshold seconds."""
+
+    def __init__(self, threshold: float, log: Callable[[str], None] = print):
+        self.threshold = threshold
+        self.interval = threshold / 4
+        self.log = log
+        self.stalls = 0
+        self.worst = 0.0
+        self.max_lag = 0.0
+        self._beat = 0.0
+        self._stop = threading.Event()
+        self._task = None
+
+    def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._heartbeat())
+        threading.Thread(target=self._watch, name="loop-monitor", daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+
+    async def _heartbeat(self):
+        while True:
+            before = time.monotonic()
+            self._beat = before
+            await asyncio.sleep(self.interval)
+            self.max_lag = max(self.max_lag, time.monotonic() - before - self.interval)
+
+    def _watch(self):
+        stalled = None     # beat of the stall being reported
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked > self.threshold and stalled != beat:
+                stalled = beat
+                self.stalls += 1
+                task = running_task(self.loop)
+                frame = sys._current_frames().get(self.thread_id)
+                stack = "\n".join(f"    {label}" for label in collapse(frame).split(";")[-12:]) if frame else ""
+                self.log(f"[LoopMonitor] Event loop blocked for {blocked * 1000:.0f} ms by "
+                         f"{task.get_name() if task else 'a callback'}"
+                         f"{f' ({task.get_coro().__qualname__})' if task else ''}:\n{stack}")
+            elif stalled is not None and stalled != beat:
+                stall = beat - stalled - self.interval
+                self.log(f"[LoopMonitor] Event loop resumed after {stall * 1000:.0f} ms")
+                self.worst = max(self.worst, stall)
+                stalled = None
+
+    def stats(self) -> dict:
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "stalls": self.stalls,
+            "worst_stall_ms": round(self.worst * 1000, 1),
+            "max_lag_ms": round(self.max_lag * 1000, 1),
+        }
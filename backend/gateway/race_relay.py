@@ -0,0 +1,105 @@
+"""Live race frames from simulators, relayed to a mission's viewers.
+
+Simulators connect to the /sim Socket.IO namespace and send batches of
+compact frames (see race_channel.py in the supervisor), each a list that
+starts with a one-letter type:
+
+    ["a", mission_id, pilot]         attach: following frames belong to this run
+    ["p", t, x, y, z]                position sample
+    ["c", t, gate, split_sec]        checkpoint passed
+    ["l", t, lap, lap_time_sec]      lap completed
+    ["s", t, status, reason]         final status
+
+Checkpoint, lap and status frames go to the mission's room straight away as
+"race_event". Positions are coalesced: each room gets at most max_hz
+"race_positions" messages, carrying the latest sample per pilot, however fast
+simulators send them.
+"""
+import asyncio
+import math
+import time
+from typing import Awaitable, Callable, Dict
+
+ATTACH, POSITION = "a", "p"
+EVENTS = {
+    "c": ("checkpoint", ("gate", "split_sec")),
+    "l": ("lap", ("lap", "lap_time_sec")),
+    "s": ("status", ("status", "reason")),
+}
+
+class RaceRelay:
+    def __init__(self, emit: Callable[..., Awaitable], max_hz: float = 10.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.emit = emit
+        self.interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.clock = clock
+        self._latest: Dict[str, dict] = {}        # room -> {pilot: [t, x, y, z]}
+        self._last_flush: Dict[str, float] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self.frames_in = self.positions_in = self.position_messages = self.events_out = self.rejected = 0
+
+    async def push(self, session: dict, frames: list) -> int:
+        """Relay a batch for the run in session, updated by attach frames; returns frames rejected."""
+        rejected = 0
+        touched = set()
+        for frame in frames:
+            self.frames_in += 1
+            kind = frame[0] if isinstance(frame, list) and frame else None
+            room = session.get("mission")
+            if kind == ATTACH and len(frame) >= 2:
+                session["mission"] = str(frame[1])
+                session["pilot"] = str(frame[2]) if len(frame) > 2 else session.get("pilot")
+            elif room is None:
+                rejected += 1
+            elif kind == POSITION and len(frame) == 5:
+                self._latest.setdefault(room, {})[session.get("pilot")] = frame[1:]
+                self.positions_in += 1
+                touched.add(room)
+            elif kind in EVENTS and len(frame) == 2 + len(EVENTS[kind][1]):
+                name, fields = EVENTS[kind]
+                event = {"type": name, "mission": room, "pilot": session.get("pilot"), "t": frame[1]}
+                event.update(zip(fields, frame[2:]))
+                if kind == "s":
+                    # Final positions go out before the result, then the room's state is dropped
+                    touched.discard(room)
+                    await self._flush(room)
+                    self._last_flush.pop(room, None)
+                await self.emit("race_event", event, room=room)
+                self.events_out += 1
+            else:
+                rejected += 1
+        for room in touched:
+            await self._schedule(room)
+        self.rejected += rejected
+        return rejected
+
+    async def _schedule(self, room: str):
+        due = self._last_flush.get(room, -math.inf) + self.interval
+        now = self.clock()
+        if now >= due:
+            await self._flush(room)
+        elif room not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[room] = loop.call_later(due - now, lambda: loop.create_task(self._flush(room)))
+
+    async def _flush(self, room: str):
+        timer = self._timers.pop(room, None)
+        if timer:
+            timer.cancel()
+        latest = self._latest.pop(room, None)
+        if not latest:
+            return
+        self._last_flush[room] = self.clock()
+        positions = [{"pilot": pilot, "t": f[0], "pos": f[1:]} for pilot, f in latest.items()]
+        await self.emit("race_positions", {"mission": room, "positions": positions}, room=room)
+        self.position_messages += 1
+
+    def stats(self) -> dict:
+        return {
+            "frames_in": self.frames_in,
+            "positions_in": self.positions_in,
+            "position_messages": self.position_messages,
+            "events_out": self.events_out,
+            "rejected": self.rejected,
+            "rooms_pending": len(self._latest),
+        }
@@ -0,0 +1,41 @@
+"""One-pass JSON responses for Mongo documents, and the stored timestamp format.
+
+Endpoints that return documents hand them to mongo_json() as they come out of
+motor: orjson converts ObjectId (via default) and datetime (natively, naive
+values taken as UTC) while it encodes, so there is no per-field _id fix-up
+and no jsonable_encoder walk over nested meta/scores before encoding.
+
+Every collection stores timestamps as ISO-8601 strings in UTC with an
+explicit offset, from utc_timestamp(); they sort correctly as strings and
+match the datetimes older documents may still hold once encoded.
+"""
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+
+_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+def utc_timestamp() -> str:
+    """Current time as stored in every collection, e.g. 2025-05-01T12:00:00.000000+00:00."""
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+class MongoJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+def mongo_json(content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> MongoJSONResponse:
+    """Return this from an endpoint to skip FastAPI's jsonable_encoder pass."""
+    return MongoJSONResponse(content, status_code=status_code, headers=headers)
@@ -0,0 +1,263 @@
+"""Warm pool of pre-started simulator instances.
+
+Each instance is a Webots process on the gate-less arena world whose
+supervisor connects back to the pool over a local TCP socket and waits.
+A mission is handed to an idle instance as one JSON line; the supervisor
+imports the gates, resets the simulation and answers "started" after the
+first step, so /simulate skips the cold start and world load entirely.
+
+Wire protocol (newline-delimited JSON, supervisor <-> pool):
+    -> {"type": "hello", "slot": "3"}
+    <- {"type": "run", "mission": {...}}
+    -> {"type": "started", "setup_sec": 0.12}
+    -> {"type": "finished", "exit_code": 0, "reason": "completed"}
+    <- {"type": "quit"}
+"""
+import asyncio
+import collections
+import json
+import os
+import statistics
+import time
+from typing import Callable, Dict, List, Optional
+
+class PoolUnavailable(Exception):
+    """No instance became available within the wait budget."""
+
+class SimInstance:
+    def __init__(self, slot: str, process: asyncio.subprocess.Process):
+        self.slot = slot
+        self.process = process
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.state = "starting"          # starting | idle | busy | stopping
+        self.runs = 0
+        self.spawned_at = time.monotonic()
+        self.idle_since = self.spawned_at
+        self.started: Optional[asyncio.Future] = None
+
+    async def send(self, message: dict):
+        self.writer.write((json.dumps(message, default=str) + "\n").encode())
+        await self.writer.drain()
+
+class SimPool:
+    def __init__(
+        self,
+        launch_cmd: Callable[[], List[str]],
+        min_size: int = 1,
+        max_size: int = 4,
+        max_runs: int = 20,
+        idle_timeout: float = 300.0,
+        start_timeout: float = 120.0,
+        env: Optional[Dict[str, str]] = None,
+    ):
+        self.launch_cmd = launch_cmd
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_runs = max_runs            # recycle an instance after this many missions
+        self.idle_timeout = idle_timeout    # stop idle instances above min_size after this long
+        self.start_timeout = start_timeout
+        self.env = env if env is not None else dict(os.environ)
+
+        self.instances: Dict[str, SimInstance] = {}
+        self._available = asyncio.Condition()
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._reaper: Optional[asyncio.Task] = None
+        self._next_slot = 0
+        self._launch_error: Optional[str] = None
+        self._closing = False
+        self.address = ""
+        # Latency samples keep the last 1000 runs and starts
+        self.metrics = {"dispatched": 0, "recycled": 0, "crashed": 0,
+                        "time_to_first_step_sec": collections.deque(maxlen=1000),
+                        "cold_start_sec": collections.deque(maxlen=1000)}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, "127.0.0.1", 0)
+        host, port = self._server.sockets[0].getsockname()[:2]
+        self.address = f"{host}:{port}"
+        for _ in range(self.min_size):
+            self._spawn()
+        self._reaper = asyncio.create_task(self._reap_idle())
+
+    async def stop(self):
+        self._closing = True
+        if self._reaper:
+            self._reaper.cancel()
+        for instance in list(self.instances.values()):
+            await self._stop_instance(instance)
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def run(self, mission: dict, timeout: Optional[float] = None, pilot: Optional[str] = None) -> dict:
+        """Hand a mission to an idle instance; return once its first step ran.
+
+        pilot names the drone's laps; the supervisor's own default otherwise.
+        """
+        timeout = self.start_timeout if timeout is None else timeout
+        dispatched = time.monotonic()
+        instance = await asyncio.wait_for(self._acquire(), timeout)
+
+        instance.started = asyncio.get_running_loop().create_future()
+        try:
+            # The supervisor may have dropped the socket while it sat idle
+            await instance.send({"type": "run", "mission": mission, "pilot": pilot})
+            remaining = max(timeout - (time.monotonic() - dispatched), 0.001)
+            setup_sec = await asyncio.wait_for(instance.started, remaining)
+        except (asyncio.TimeoutError, ConnectionError):
+            await self._stop_instance(instance)
+            self._ensure_min_size()
+            raise PoolUnavailable(f"Simulator slot {instance.slot} did not start the mission")
+
+        ttfs = time.monotonic() - dispatched
+        self.metrics["dispatched"] += 1
+        self.metrics["time_to_first_step_sec"].append(ttfs)
+        return {"slot": instance.slot, "time_to_first_step_sec": ttfs, "setup_sec": setup_sec}
+
+    def stats(self) -> dict:
+        states = [i.state for i in self.instances.values()]
+        ttfs = self.metrics["time_to_first_step_sec"]
+        cold = self.metrics["cold_start_sec"]
+        return {
+            "size": len(states),
+            "idle": states.count("idle"),
+            "busy": states.count("busy"),
+            "starting": states.count("starting"),
+            "dispatched": self.metrics["dispatched"],
+            "recycled": self.metrics["recycled"],
+            "crashed": self.metrics["crashed"],
+            "time_to_first_step_p50_sec": statistics.median(ttfs) if ttfs else None,
+            "time_to_first_step_max_sec": max(ttfs) if ttfs else None,
+            "cold_start_p50_sec": statistics.median(cold) if cold else None,
+        }
+
+    # ------------  internals  ------------
+
+    async def _acquire(self) -> SimInstance:
+        async with self._available:
+            while True:
+                idle = [i for i in self.instances.values() if i.state == "idle"]
+                if idle:
+                    # Prefer the instance with the fewest runs so recycling spreads out
+                    instance = min(idle, key=lambda i: i.runs)
+                    instance.state = "busy"
+                    return instance
+                if self._launch_error and not self.instances:
+                    raise PoolUnavailable(f"Simulator failed to launch: {self._launch_error}")
+                # Scale up with demand when nothing is warming up already
+                starting = sum(1 for i in self.instances.values() if i.state == "starting")
+                if starting == 0 and len(self.instances) < self.max_size:
+                    self._spawn()
+                await self._available.wait()
+
+    def _spawn(self) -> SimInstance:
+        slot = str(self._next_slot)
+        self._next_slot += 1
+        env = self.env | {"SIMFORGE_POOL_ADDR": self.address, "SIMFORGE_POOL_SLOT": slot}
+        # Register before the process exists so concurrent acquirers see it as "starting"
+        instance = SimInstance(slot, None)
+        self.instances[slot] = instance
+        asyncio.create_task(self._launch(instance, env))
+        return instance
+
+    async def _launch(self, instance: SimInstance, env: dict):
+        try:
+            instance.process = await asyncio.create_subprocess_exec(
+                *self.launch_cmd(), env=env,
+                stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL,
+            )
+        except Exception as e:
+            print(f"[SimPool] Failed to launch simulator slot {instance.slot}: {e}")
+            self._launch_error = str(e)
+            self.instances.pop(instance.slot, None)
+            async with self._available:
+                self._available.notify_all()
+            return
+        if instance.state == "stopping":
+            # Pool shut down while the process was being created
+            instance.process.kill()
+        await self._watch_exit(instance)
+
+    async def _watch_exit(self, instance: SimInstance):
+        await instance.process.wait()
+        if instance.state != "stopping":
+            print(f"[SimPool] Simulator slot {instance.slot} exited unexpectedly ({instance.process.returncode})")
+            self.metrics["crashed"] += 1
+        if instance.started and not instance.started.done():
+            instance.started.set_exception(ConnectionError("simulator exited"))
+        self.instances.pop(instance.slot, None)
+        async with self._available:
+            self._ensure_min_size()
+            self._available.notify_all()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        instance = None
+        try:
+            async for line in reader:
+                message = json.loads(line)
+                kind = message.get("type")
+                if kind == "hello":
+                    instance = self.instances.get(str(message.get("slot")))
+                    if instance is None:
+                        writer.close()
+                        return
+                    instance.writer = writer
+                    self._launch_error = None
+                    self.metrics["cold_start_sec"].append(time.monotonic() - instance.spawned_at)
+                    await self._release(instance)
+                elif kind == "started" and instance and instance.started and not instance.started.done():
+                    instance.started.set_result(message.get("setup_sec"))
+                elif kind == "finished" and instance:
+                    instance.runs += 1
+                    if instance.runs >= self.max_runs:
+                        self.metrics["recycled"] += 1
+                        await self._stop_instance(instance)
+                        async with self._available:
+                            self._ensure_min_size()
+                    else:
+                        await self._release(instance)
+        except (ConnectionError, json.JSONDecodeError):
+            pass
+
+    async def _release(self, instance: SimInstance):
+        async with self._available:
+            instance.state = "idle"
+            instance.idle_since = time.monotonic()
+            instance.started = None
+            self._available.notify_all()
+
+    async def _stop_instance(self, instance: SimInstance):
+        instance.state = "stopping"
+        if instance.writer:
+            try:
+                await instance.send({"type": "quit"})
+            except ConnectionError:
+                pass
+        process = instance.process
+        if process and process.returncode is None:
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        self.instances.pop(instance.slot, None)
+
+    def _ensure_min_size(self):
+        if self._closing:
+            return
+        live = [i for i in self.instances.values() if i.state != "stopping"]
+        for _ in range(self.min_size - len(live)):
+            self._spawn()
+
+    async def _reap_idle(self):
+        while True:
+            await asyncio.sleep(min(self.idle_timeout, 5.0))
+            now = time.monotonic()
+            idle = sorted(
+                (i for i in self.instances.values() if i.state == "idle"),
+                key=lambda i: i.idle_since,
+            )
+            surplus = len(self.instances) - self.min_size
+            for instance in idle[:max(surplus, 0)]:
+                if now - instance.idle_since > self.idle_timeout:
+                    await self._stop_instance(instance)
@@ -0,0 +1,68 @@
+"""Challenge solutions, one document each in db.solutions.
+
+Solutions used to be embedded in their challenge, which grew with every
+submission and was read whole on each challenge view. Now a challenge only
+keeps a solution_count, and solutions are listed per challenge through the
+(challenge_id, created) and (challenge_id, upvotes) indexes. A solution video
+is a completed upload (uploads.py), referenced by video_id and served from
+video_url.
+"""
+from bson import ObjectId
+
+from .serialization import utc_timestamp
+from .uploads import COMPLETE
+
+MAX_PAGE = 100
+SORTS = {"created": [("created", -1), ("_id", -1)], "upvotes": [("upvotes", -1), ("created", -1)]}
+
+async def ensure_indexes(db):
+    await db.solutions.create_index([("challenge_id", 1), ("created", -1)])
+    await db.solutions.create_index([("challenge_id", 1), ("upvotes", -1)])
+    await db.solutions.create_index([("provider_id", 1), ("created", -1)])
+
+async def migrate_embedded(db) -> int:
+    """Move solutions still embedded in challenges into db.solutions; returns how many moved."""
+    moved = 0
+    async for challenge in db.challenges.find({"solutions.0": {"$exists": True}}, {"solutions": 1}):
+        for solution in challenge["solutions"]:
+            doc = {**solution, "_id": solution.get("_id") or ObjectId(), "challenge_id": str(challenge["_id"])}
+            await db.solutions.replace_one({"_id": doc["_id"]}, doc, upsert=True)
+        await db.challenges.update_one(
+            {"_id": challenge["_id"]},
+            {"$unset": {"solutions": ""}, "$inc": {"solution_count": len(challenge["solutions"])}},
+        )
+        moved += len(challenge["solutions"])
+    return moved
+
+async def add_solution(db, challenge_id: str, payload: dict) -> dict:
+    """Store a solution; raises LookupError if the challenge or its video does not exist."""
+    challenge = await db.challenges.find_one_and_update(
+        {"_id": ObjectId(challenge_id)}, {"$inc": {"solution_count": 1}}, projection={"_id": 1})
+    if challenge is None:
+        raise LookupError("Challenge not found")
+    video_id = payload.pop("video_id", None)
+    video_url = payload.pop("video_url", None)
+    if video_id:
+        video = await db.uploads.find_one({"_id": ObjectId(video_id), "status": COMPLETE}, {"_id": 1})
+        if video is None:
+            await db.challenges.update_one({"_id": challenge["_id"]}, {"$inc": {"solution_count": -1}})
+            raise LookupError("Video not found or not fully uploaded")
+        video_id, video_url = video["_id"], f"/videos/{video['_id']}"
+    now = utc_timestamp()
+    solution = {
+        **payload,
+        "_id": ObjectId(),
+        "challenge_id": challenge_id,
+        "video_id": video_id,
+        "video_url": video_url,
+        "created": now,
+        "updated": now,
+        "upvotes": 0,
+        "status": "pending_review",
+    }
+    await db.solutions.insert_one(solution)
+    return solution
+
+async def list_solutions(db, challenge_id: str, sort: str = "created", limit: int = 20, skip: int = 0) -> list:
+    cursor = db.solutions.find({"challenge_id": challenge_id}).sort(SORTS[sort]).skip(skip).limit(limit)
+    return await cursor.to_list(None)
@@ -0,0 +1,212 @@
+"""Parallel parameter sweeps over headless mission runs.
+
+    python -m backend.gateway.sweep_runner MISSION \\
+        --grid STUCK_THRESHOLD=3,5,8 --grid wind_kts=0,10,20 \\
+        --workers 4 --out sweeps/stuck_vs_wind.csv
+
+MISSION is a mission JSON file or a mission id fetched from the gateway.
+Supervisor tunables (see SUPERVISOR_PARAMS) are passed through controllerArgs
+the same way MISSION_ID is; every other grid key overrides the mission meta.
+Each finished cell is appended to the CSV straight away, so re-running the
+same command resumes an interrupted sweep and only runs the missing cells.
+A CSV written for a grid with other keys is refused rather than appended to.
+A cell that could not be run at all (no Webots binary, an unreadable result)
+is still written, with exit_status "error" and the exception as its reason.
+"""
+import argparse
+import csv
+import hashlib
+import itertools
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, List, Sequence
+
+from .mission_compiler import write_wbt, webots_env, WEBOTS_BIN
+
+SUPERVISOR_PARAMS = ("VELOCITY_CHANGE_THRESHOLD", "STUCK_THRESHOLD", "GATE_TRIGGER_MARGIN", "CHECK_EVERY")
+RESULT_COLUMNS = [
+    "exit_status", "reason", "laps_completed", "best_lap_sec", "mean_lap_sec",
+    "lap_times_sec", "sim_time_sec", "wall_time_sec",
+]
+
+def parse_grid(specs: Sequence[str]) -> Dict[str, list]:
+    """Turn ["KEY=1,2,3", ...] into {"KEY": [1, 2, 3]}, numbers parsed as floats/ints."""
+    grid = {}
+    for spec in specs:
+        key, sep, values = spec.partition("=")
+        if not sep or not values:
+            raise ValueError(f"Bad grid spec {spec!r}, expected KEY=v1,v2,...")
+        grid[key] = [_parse_value(v) for v in values.split(",")]
+    return grid
+
+def _parse_value(text: str):
+    for cast in (int, float):
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+def expand_cells(grid: Dict[str, list], repeats: int = 1) -> List[dict]:
+    """Cartesian product of the grid; each cell gets a stable id for resuming."""
+    keys = sorted(grid)
+    cells = []
+    for values in itertools.product(*(grid[k] for k in keys)):
+        params = dict(zip(keys, values))
+        for repeat in range(repeats):
+            key = json.dumps({"params": params, "repeat": repeat}, sort_keys=True)
+            cell_id = hashlib.sha1(key.encode()).hexdigest()[:12]
+            cells.append({"cell_id": cell_id, "repeat": repeat, "params": params})
+    return cells
+
+def sweep_columns(grid: Dict[str, list]) -> List[str]:
+    return ["cell_id", "repeat", *sorted(grid), *RESULT_COLUMNS]
+
+def finished_cells(out_path: Path, columns: Sequence[str]) -> set:
+    """Cell ids already in out_path; raises ValueError when its header is not columns."""
+    if not out_path.exists():
+        return set()
+    with out_path.open(newline="") as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is not None and reader.fieldnames != list(columns):
+            raise ValueError(f"{out_path} holds a sweep over other parameters "
+                             f"({', '.join(reader.fieldnames)}); write this one to a new --out")
+        return {row["cell_id"] for row in reader}
+
+def webots_cmd(world_path: Path) -> List[str]:
+    """Headless, as fast as physics allows; the result path is baked into the world."""
+    return [str(WEBOTS_BIN), "--batch", "--mode=fast", "--no-rendering", "--minimize",
+            "--stdout", "--stderr", str(world_path)]
+
+def run_cell(mission: dict, cell: dict, work_dir: Path, timeout: float,
+             launch_cmd: Callable[[Path], List[str]] = webots_cmd) -> dict:
+    """Run one headless simulation for a grid cell and summarise it."""
+    cell_dir = work_dir / cell["cell_id"]
+    cell_dir.mkdir(parents=True, exist_ok=True)
+    mission_path = cell_dir / "mission.json"
+    result_path = cell_dir / "result.json"
+    result_path.unlink(missing_ok=True)
+
+    params = cell["params"]
+    meta = dict(mission.get("meta", {}))
+    meta.update({k: v for k, v in params.items() if k not in SUPERVISOR_PARAMS})
+    # Same gusts for every cell of a given repeat, so wind cells stay comparable
+    meta.setdefault("wind_seed", cell["repeat"])
+    mission_path.write_text(json.dumps(mission | {"meta": meta}, default=str))
+
+    supervisor_args = [f"MISSION_FILE={mission_path}", f"RESULT_FILE={result_path}"]
+    supervisor_args += [f"{k}={v}" for k, v in params.items() if k in SUPERVISOR_PARAMS]
+    world_path = write_wbt(
+        f"sweep_{cell['cell_id']}",
+        meta | {"mission_id": str(mission.get("_id", "sweep"))},
+        supervisor_args=tuple(supervisor_args),
+    )
+
+    started = time.perf_counter()
+    try:
+        with (cell_dir / "webots.log").open("w") as log:
+            proc = subprocess.run(launch_cmd(world_path), env=webots_env(),
+                                  stdout=log, stderr=subprocess.STDOUT, timeout=timeout)
+        exit_status = proc.returncode
+    except subprocess.TimeoutExpired:
+        exit_status = "timeout"
+    finally:
+        world_path.unlink(missing_ok=True)
+        for wind_file in world_path.parent.glob(f"{world_path.stem}_wind.*"):
+            wind_file.unlink(missing_ok=True)
+    wall = time.perf_counter() - started
+
+    outcome = json.loads(result_path.read_text()) if result_path.exists() else {}
+    laps = outcome.get("lap_times_sec", [])
+    return {
+        "cell_id": cell["cell_id"],
+        "repeat": cell["repeat"],
+        **params,
+        "exit_status": exit_status,
+        "reason": outcome.get("reason", "no_result"),
+        "laps_completed": outcome.get("laps_completed", 0),
+        "best_lap_sec": min(laps) if laps else "",
+        "mean_lap_sec": statistics.fmean(laps) if laps else "",
+        "lap_times_sec": ";".join(f"{t:.3f}" for t in laps),
+        "sim_time_sec": outcome.get("sim_time_sec", ""),
+        "wall_time_sec": round(wall, 3),
+    }
+
+def run_sweep(mission: dict, grid: Dict[str, list], out_path: Path, workers: int = 2,
+              repeats: int = 1, timeout: float = 900.0, work_dir: Path = None,
+              launch_cmd: Callable[[Path], List[str]] = webots_cmd) -> int:
+    """Run every missing cell of the sweep; returns how many cells were run.
+
+    Raises ValueError when out_path already holds a sweep with other columns.
+    """
+    cells = expand_cells(grid, repeats)
+    columns = sweep_columns(grid)
+    done = finished_cells(out_path, columns)
+    pending = [c for c in cells if c["cell_id"] not in done]
+    print(f"[Sweep] {len(cells)} cells, {len(done)} already done, running {len(pending)} on {workers} workers")
+    if not pending:
+        return 0
+
+    work_dir = work_dir or Path(tempfile.mkdtemp(prefix="simforge_sweep_"))
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_header = not out_path.exists() or out_path.stat().st_size == 0
+
+    # Each worker thread just babysits one Webots process; rows are written by
+    # this thread only, one flush per finished cell.
+    with out_path.open("a", newline="") as f, ThreadPoolExecutor(max_workers=workers) as pool:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        if write_header:
+            writer.writeheader()
+        futures = {pool.submit(run_cell, mission, c, work_dir, timeout, launch_cmd): c for c in pending}
+        for n, future in enumerate(as_completed(futures), 1):
+            try:
+                row = future.result()
+            except Exception as e:
+                cell = futures[future]
+                row = {"cell_id": cell["cell_id"], "repeat": cell["repeat"], **cell["params"],
+                       "exit_status": "error", "reason": f"{type(e).__name__}: {e}", "laps_completed": 0}
+            writer.writerow(row)
+            f.flush()
+            print(f"[Sweep] {n}/{len(pending)} cell {row['cell_id']}: {row['reason']} ({row['laps_completed']} laps)")
+    return len(pending)
+
+def load_mission(source: str, api_url: str) -> dict:
+    path = Path(source)
+    if path.exists():
+        return json.loads(path.read_text())
+    import httpx
+    res = httpx.get(f"{api_url}/missions/{source}", timeout=30)
+    res.raise_for_status()
+    return res.json()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a parameter sweep of headless mission simulations.")
+    parser.add_argument("mission", help="mission JSON file or mission id")
+    parser.add_argument("--grid", action="append", default=[], metavar="KEY=v1,v2",
+                        help="parameter values to sweep; repeat for more dimensions")
+    parser.add_argument("--out", type=Path, required=True, help="results CSV (appended, used for resume)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--repeats", type=int, default=1, help="runs per grid cell")
+    parser.add_argument("--timeout", type=float, default=900.0, help="wall-clock seconds per run")
+    parser.add_argument("--api", default=os.getenv("SIMFORGE_API", "http://localhost:8000"))
+    args = parser.parse_args(argv)
+
+    try:
+        grid = parse_grid(args.grid)
+    except ValueError as e:
+        parser.error(str(e))
+    mission = load_mission(args.mission, args.api)
+    try:
+        run_sweep(mission, grid, args.out, workers=args.workers, repeats=args.repeats, timeout=args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import asyncio
+import os
+
+import pytest
+
+from .admission import (AdmissionController, ConcurrencyGate, MemoryBuckets, ProcessLimit, RedisBuckets, RoutePolicy,
+                        Shed)
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_token_bucket_refills_at_rate():
+    clock = Clock()
+    buckets = MemoryBuckets(clock)
+
+    async def takes(n):
+        return [await buckets.take("forge:1.2.3.4", 60, 2) for _ in range(n)]
+
+    assert asyncio.run(takes(3)) == [0, 0, pytest.approx(1.0)]
+    clock.now = 0.5
+    assert asyncio.run(takes(1)) == [pytest.approx(0.5)]
+    clock.now = 2.0
+    assert asyncio.run(takes(3)) == [0, 0, pytest.approx(1.0)]     # refilled to the burst of 2
+
+async def _gate_scenarios():
+    gate = ConcurrencyGate(limit=1, max_queue=2, max_wait=0.2)
+    await gate.acquire(1)                                   # holder
+    waiter = asyncio.create_task(gate.acquire(1))
+    abandoned = asyncio.create_task(gate.acquire(1))
+    await asyncio.sleep(0)
+    with pytest.raises(Shed) as full:
+        await gate.acquire(3)
+    abandoned.cancel()                                      # client went away while queued
+    await asyncio.sleep(0)
+    gate.release()                                          # slot passes to the waiter
+    await waiter
+    with pytest.raises(Shed) as timed_out:
+        await gate.acquire(2)
+    gate.release()
+    return gate, full.value, timed_out.value
+
+def test_gate_queues_hands_over_and_sheds():
+    gate, full, timed_out = asyncio.run(_gate_scenarios())
+    assert (full.reason, full.retry_after) == ("queue_full", 3)
+    assert timed_out.reason == "wait_timeout"
+    assert gate.active == 0 and gate.queued == 0 and gate.peak_queue == 2
+
+async def _forge_under_admission():
+    from . import main
+    from .bench.stubs import StubLLM, gateway_client, memory_db
+
+    body = {"thread_text": "Admission", "meta": {"gates": []}}
+    async with StubLLM(latency=0.3) as llm, gateway_client(memory_db(), llm.url) as client:
+        main.admission = AdmissionController({"forge": RoutePolicy(client_per_min=60, client_burst=2)},
+                                             max_concurrent=1, max_queue=0, max_wait=1)
+        # Two at once: one runs, the other finds no slot and no queue
+        concurrent = await asyncio.gather(*(client.post("/forge", json=body) for _ in range(2)))
+        # The per-client bucket (burst 2) is now empty
+        limited = await client.post("/forge", json=body)
+        stats = (await client.get("/admission/stats")).json()
+    return concurrent, limited, stats
+
+def test_forge_sheds_with_retry_after():
+    pytest.importorskip("mongomock_motor")
+    concurrent, limited, stats = asyncio.run(_forge_under_admission())
+    assert sorted(r.status_code for r in concurrent) == [200, 429]
+    shed = next(r for r in concurrent if r.status_code == 429)
+    assert int(shed.headers["retry-after"]) >= 1 and "queue_full" in shed.json()["detail"]
+    assert limited.status_code == 429 and limited.headers["retry-after"] == "1"
+    forge = stats["routes"]["forge"]
+    assert forge["admitted"] == 1 and forge["shed"]["queue_full"] == 1 and forge["shed"]["client_rate"] == 1
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+class FakeProcess:
+    def __init__(self):
+        self.returncode = None
+
+    def poll(self):
+        return self.returncode
+
+def test_process_limit_holds_places_until_processes_exit():
+    clock = Clock()
+    limit = ProcessLimit(2, clock)
+    first = limit.reserve()
+    launching = limit.reserve()
+    with pytest.raises(Shed) as e:
+        limit.reserve()
+    assert e.value.reason == "simulators_busy"
+    limit.release(launching)                    # its launch failed
+    process = FakeProcess()
+    limit.bind(first, process)
+    limit.bind(limit.reserve(), FakeProcess())
+    clock.now = 40.0
+    with pytest.raises(Shed) as e:
+        limit.reserve()
+    assert e.value.retry_after == 20            # the average run is assumed to last a minute
+    process.returncode = 0
+    limit.reserve()
+    assert limit.stats() == {"running": 2, "max_running": 2, "started": 2, "refused": 2, "run_sec_ewma": 56.0}
+
+async def _simulate_until_busy(monkeypatch):
+    from . import main, mission_compiler
+    from .bench.stubs import gateway_client, memory_db
+
+    launched = []
+
+    def launch(mission, pilots):
+        launched.append(FakeProcess())
+        return "world.wbt", launched[-1]
+
+    monkeypatch.setattr(mission_compiler, "build_and_launch_wbt", launch)
+    db = memory_db()
+    ids = [str(i) for i in (await db.missions.insert_many(
+        [{"mission_name": f"m{n}", "meta": {}, "scores": []} for n in range(3)])).inserted_ids]
+    async with gateway_client(db) as client:
+        main.sim_processes.limit = 1
+        replies = [await client.post(f"/simulate/{ids[0]}"), await client.post(f"/simulate/{ids[1]}")]
+        launched[0].returncode = 0              # the supervisor quit Webots
+        replies.append(await client.post(f"/simulate/{ids[2]}"))
+        stats = (await client.get("/admission/stats")).json()
+        refused = await client.get(f"/missions/{ids[1]}")
+    return replies, stats, refused.json()
+
+def test_cold_launches_are_bounded_by_running_simulators(monkeypatch):
+    pytest.importorskip("mongomock_motor")
+    replies, stats, refused = asyncio.run(_simulate_until_busy(monkeypatch))
+    assert [r.status_code for r in replies] == [200, 429, 200]
+    assert "simulators_busy" in replies[1].json()["detail"] and int(replies[1].headers["retry-after"]) >= 1
+    # The refused mission was never queued
+    assert refused.get("status", "forged") == "forged"
+    assert stats["simulators"]["running"] == 1 and stats["simulators"]["refused"] == 1
+    assert stats["routes"]["simulate"]["shed"]["simulators_busy"] == 1
+
+@pytest.mark.skipif(not os.getenv("ADMISSION_TEST_REDIS_URL"), reason="set ADMISSION_TEST_REDIS_URL to a scratch Redis")
+def test_redis_buckets_shared_across_instances():
+    pytest.importorskip("redis")
+    url = os.environ["ADMISSION_TEST_REDIS_URL"]
+
+    async def takes():
+        first, second = RedisBuckets(url), RedisBuckets(url)
+        key = f"test:{os.getpid()}"
+        return [await first.take(key, 60, 1), await second.take(key, 60, 1)]
+
+    granted, refused = asyncio.run(takes())
+    assert granted == 0 and 0 < refused <= 1
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mongomock_motor")
+
+from .bench.datasets import DatasetSpec
+from .bench.gateway import CASES, compare, run_benchmarks
+
+def test_every_endpoint_on_a_small_dataset():
+    spec = DatasetSpec("tiny", missions=30, deep_missions=2, deep_scores=60, pilots=20)
+    report = asyncio.run(run_benchmarks([spec], list(CASES), requests=5, max_seconds=5.0,
+                                        alloc_samples=2, log=lambda *_: None))
+    rows = {r["endpoint"]: r for r in report["results"]}
+    assert set(rows) == set(CASES)
+    for row in rows.values():
+        assert row["requests"] == 5
+        assert 0 < row["p50_ms"] <= row["p95_ms"] <= row["p99_ms"] <= row["max_ms"]
+        assert row["alloc_peak_kb"] > 0
+    assert report["environment"]["database"] == "mongomock"
+
+    faster = {"results": [dict(r, p50_ms=r["p50_ms"] / 2, p95_ms=r["p95_ms"] / 2) for r in report["results"]]}
+    lines = compare(faster, report)
+    assert len(lines) == len(CASES) and all("(-50%)" in line for line in lines)
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+
+pytest.importorskip("mongomock_motor")
+
+from .bench.stubs import gateway_client, memory_db
+from .comments import BUCKET_SIZE, add_comment, comment_page
+
+def _read_all(db, mission, limit):
+    async def pages():
+        seen, cursor, calls = [], None, 0
+        while True:
+            page = await comment_page(db, mission, limit, cursor)
+            calls += 1
+            seen += [c["content"] for c in page["comments"]]
+            if page["next"] is None:
+                return seen, calls
+            cursor = ObjectId(page["next"])
+    return asyncio.run(pages())
+
+def test_comments_fill_fixed_buckets_and_page_newest_first():
+    db = memory_db()
+
+    async def post(n):
+        for i in range(n):
+            await add_comment(db, "m1", "ann", f"c{i}")
+        await add_comment(db, "m2", "bob", "elsewhere")
+        return await db.comment_buckets.find({"mission": "m1"}).sort("first", 1).to_list(None)
+
+    buckets = asyncio.run(post(2 * BUCKET_SIZE + 30))
+    assert [b["count"] for b in buckets] == [BUCKET_SIZE, BUCKET_SIZE, 30]
+    assert all(len(b["comments"]) == b["count"] for b in buckets)
+    seen, calls = _read_all(db, "m1", 40)
+    assert seen == [f"c{i}" for i in reversed(range(2 * BUCKET_SIZE + 30))]
+    assert calls == 4
+
+def test_overlapping_open_buckets_still_page_in_order():
+    db = memory_db()
+    ids = sorted(ObjectId() for _ in range(8))
+    # Two appends that raced: both created a bucket, and later comments landed in either
+    for half in (ids[0::2], ids[1::2]):
+        asyncio.run(db.comment_buckets.insert_one({
+            "mission": "m1", "count": len(half), "first": half[0], "last": half[-1],
+            "comments": [{"_id": i, "author": "a", "content": str(ids.index(i)), "created": ""} for i in half],
+        }))
+    seen, _ = _read_all(db, "m1", 3)
+    assert seen == [str(i) for i in reversed(range(8))]
+
+async def _through_gateway():
+    db = memory_db()
+    mission_id = str((await db.missions.insert_one({"mission_name": "m", "meta": {}, "scores": []})).inserted_id)
+    async with gateway_client(db) as client:
+        posted = [await client.post(f"/missions/{mission_id}/comments", json={"author": "ann", "content": f"hi {i}"})
+                  for i in range(3)]
+        first = await client.get(f"/missions/{mission_id}/comments", params={"limit": 2})
+        rest = await client.get(f"/missions/{mission_id}/comments", params={"before": first.json()["next"]})
+        missing = await client.post(f"/missions/{ObjectId()}/comments", json={"author": "ann", "content": "x"})
+        empty = await client.post(f"/missions/{mission_id}/comments", json={"author": "ann", "content": ""})
+        bad_cursor = await client.get(f"/missions/{mission_id}/comments", params={"before": "nope"})
+    return posted, first, rest, missing, empty, bad_cursor
+
+def test_comment_endpoints():
+    posted, first, rest, missing, empty, bad_cursor = asyncio.run(_through_gateway())
+    assert [r.status_code for r in posted] == [201] * 3
+    assert [c["content"] for c in first.json()["comments"]] == ["hi 2", "hi 1"]
+    assert first.json()["comments"][0]["_id"] == posted[2].json()["_id"]
+    assert [c["content"] for c in rest.json()["comments"]] == ["hi 0"] and rest.json()["next"] is None
+    assert missing.status_code == 404 and empty.status_code == 422 and bad_cursor.status_code == 400
+
+async def _live_comment():
+    import httpx
+    import socketio
+    from .bench.load import in_process_gateway
+
+    db = memory_db()
+    mission_id = str((await db.missions.insert_one({"mission_name": "m", "meta": {}, "scores": []})).inserted_id)
+    received = []
+    async with in_process_gateway(db) as url:
+        viewer = socketio.AsyncClient(reconnection=False)
+        viewer.on("comment", received.append)
+        await viewer.connect(url, transports=["websocket"])
+        await viewer.call("join_room", mission_id)
+        async with httpx.AsyncClient(base_url=url) as client:
+            await client.post(f"/missions/{mission_id}/comments", json={"author": "bob", "content": "live"})
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.02)
+        await viewer.disconnect()
+    return mission_id, received
+
+def test_new_comments_reach_the_mission_room():
+    pytest.importorskip("aiohttp")   # Socket.IO client transport
+    mission_id, received = asyncio.run(_live_comment())
+    assert len(received) == 1
+    assert received[0]["mission"] == mission_id and received[0]["content"] == "live"
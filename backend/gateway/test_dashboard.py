@@ -0,0 +1,91 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+pytest.importorskip("mongomock_motor")
+
+from . import dashboard
+from .bench.stubs import StubLLM, gateway_client, memory_db
+
+async def _activity():
+    db = memory_db()
+    async with StubLLM() as llm, gateway_client(db, llm.url) as client:
+        empty = (await client.get("/dashboard/summary")).json()
+        missions = []
+        gates = [{"x": 0, "y": 0, "z": 2}, {"x": 20, "y": 0, "z": 4}]
+        for domain in ("Search", "Search", "Mapping"):
+            res = await client.post("/forge", json={"thread_text": "Dashboard", "domain": domain,
+                                                     "meta": {"gates": gates}})
+            missions.append(res.json())
+        for mission, votes in zip(missions, (1, 3, 2)):
+            for _ in range(votes):
+                await client.post(f"/missions/{mission['mission_name']}/upvote")
+        for pilot, lap in (("ann", 30.0), ("bob", 31.0), ("ann", 29.5), ("cy", 0.001)):
+            await client.post("/telemetry", json={"mission": missions[0]["_id"], "pilot": pilot, "lap_time_sec": lap})
+        for mission in missions[:2]:
+            await client.post(f"/missions/{mission['_id']}/running")
+        await client.post(f"/missions/{missions[0]['_id']}/complete")
+        await client.post(f"/missions/{missions[1]['_id']}/fail", params={"reason": "crash"})
+        await client.post(f"/missions/{missions[1]['_id']}/fail", params={"reason": "crash"})
+        live = (await client.get("/dashboard/summary")).json()
+
+        # A write the rollup never saw, then the scheduled repair
+        await db.missions.update_one({"_id": ObjectId(missions[2]["_id"])}, {"$set": {"upvotes": 7, "status": "completed"}})
+        anonymous = await client.post("/dashboard/reconcile")
+        await db.whitelisted_users.insert_one({"user_id": "ops"})
+        report = (await client.post("/dashboard/reconcile", params={"user_id": "ops"})).json()
+        repaired = (await client.get("/dashboard/summary")).json()
+        clean = await dashboard.reconcile(db)
+    return empty, missions, live, anonymous, report, repaired, clean
+
+def test_rollup_tracks_writes_and_reconcile_repairs_drift():
+    empty, missions, live, anonymous, report, repaired, clean = asyncio.run(_activity())
+    assert empty["missions"]["total"] == 0 and empty["reconciled"]
+
+    assert live["missions"]["total"] == 3
+    assert live["missions"]["domain"] == {"Search": 2, "Mapping": 1}
+    assert live["missions"]["status"] == {"forged": 1, "completed": 1, "failed": 1}
+    assert [m["upvotes"] for m in live["top_upvoted"]] == [3, 2, 1]
+    assert live["top_upvoted"][0]["mission_name"] == missions[1]["mission_name"]
+    assert live["laps"] == {"total": 3, "flagged": 1}
+    assert live["top_pilots"] == [{"pilot": "ann", "laps": 2}, {"pilot": "bob", "laps": 1}]
+    assert [lap["lap_time_sec"] for lap in live["recent_laps"]] == [29.5, 31.0, 30.0]
+
+    assert anonymous.status_code == 422
+    assert sorted(report["drifted"]) == ["missions", "top_upvoted"]
+    assert repaired["missions"]["status"] == {"completed": 2, "failed": 1}
+    assert repaired["top_upvoted"][0]["upvotes"] == 7
+    # Everything else the incremental path kept matched the rebuild
+    assert repaired["top_pilots"] == live["top_pilots"] and repaired["recent_laps"] == live["recent_laps"]
+    assert clean["drifted"] == []
+
+class _RoundTrips:
+    """Collection whose calls yield to the loop first, as a real round trip does."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def __getattr__(self, name):
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            await asyncio.sleep(0)
+            return await method(*args, **kwargs)
+        return call
+
+async def _racing_writes():
+    store = memory_db()
+    db = SimpleNamespace(dashboard=_RoundTrips(store.dashboard), dashboard_pilots=_RoundTrips(store.dashboard_pilots))
+    mission = {"_id": ObjectId(), "mission_name": "m", "upvotes": 0}
+    await dashboard.mission_created(db, mission)
+    laps = [{"pilot": "ann", "lap_time_sec": 30.0 + i, "at": f"t{i}"} for i in range(3)]
+    await asyncio.gather(*(dashboard.lap_recorded(db, mission, lap) for lap in laps))
+    await asyncio.gather(*(dashboard.mission_upvoted(db, mission | {"upvotes": n}) for n in (1, 2, 3)))
+    return await dashboard.summary(db)
+
+def test_racing_writes_keep_one_top_entry():
+    summary = asyncio.run(_racing_writes())
+    assert summary["top_pilots"] == [{"pilot": "ann", "laps": 3}]
+    assert [m["upvotes"] for m in summary["top_upvoted"]] == [3]
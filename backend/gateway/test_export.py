@@ -0,0 +1,126 @@
+import asyncio
+import contextlib
+import gzip
+import json
+
+import httpx
+import pytest
+from bson import ObjectId
+
+pytest.importorskip("mongomock_motor")
+
+from .bench.stubs import gateway_client, memory_db
+from .export import export_to_file
+
+async def _seed(db, name="m{}"):
+    missions = [{"_id": ObjectId(), "mission_name": name.format(i), "meta": {"gates": [], "wind_kts": i},
+                 "created": f"2025-0{1 + i % 3}-01T00:00:00.000000+00:00",
+                 "status": "completed" if i % 2 else "running",
+                 "scores": [{"pilot": f"p{j}", "lap_time_sec": 30.0 + j, "splits_ms": [15000, 15000 + j]}
+                            for j in range(i % 4)]}
+                for i in range(12)]
+    await db.missions.insert_many(missions)
+    await db.challenges.insert_many([{"title": f"c{i}", "state": "pending" if i else "whitelisted",
+                                      "created": "2025-01-01T00:00:00.000000+00:00", "tags": ["a"],
+                                      "author_uid": f"u{i}", "author_name": "Ada", "review_notes": "call back",
+                                      "moderators": ["ops"], "redactions": [], "classification_level": 2}
+                                     for i in range(3)])
+    await db.whitelisted_users.insert_one({"user_id": "ops"})
+    return missions
+
+def _lines(body: bytes):
+    return gzip.decompress(body).decode().splitlines()
+
+class _Cut:
+    """Response whose body breaks off after the owner's remaining byte budget."""
+
+    def __init__(self, res, owner):
+        self.res, self.owner = res, owner
+
+    def raise_for_status(self):
+        self.res.raise_for_status()
+
+    async def aiter_raw(self):
+        async for chunk in self.res.aiter_raw():
+            for i in range(0, len(chunk), 32):
+                if self.owner.budget <= 0:
+                    raise httpx.ReadError("connection dropped")
+                self.owner.budget -= 32
+                yield chunk[i:i + 32]
+
+class FlakyClient:
+    def __init__(self, client, cuts):
+        self.client, self.cuts, self.budget = client, list(cuts), 0
+
+    @contextlib.asynccontextmanager
+    async def stream(self, *args, **kwargs):
+        self.budget = self.cuts.pop(0) if self.cuts else float("inf")
+        async with self.client.stream(*args, **kwargs) as res:
+            yield _Cut(res, self)
+
+async def _endpoint_exports():
+    db = memory_db()
+    missions = await _seed(db)
+    async with gateway_client(db) as client:
+        everything = await client.get("/export/missions", params={"user_id": "ops"})
+        filtered = await client.get("/export/missions", params={
+            "user_id": "ops", "state": "completed", "created_from": "2025-02-01", "created_to": "2025-03-01"})
+        resumed = await client.get("/export/missions", params={"user_id": "ops", "after": str(missions[8]["_id"])})
+        scores = await client.get("/export/scores", params={"user_id": "ops", "format": "csv"})
+        challenges = await client.get("/export/challenges", params={"user_id": "ops", "state": "pending"})
+        bad = await client.get("/export/missions", params={"user_id": "ops", "after": "nope"})
+        unknown = await client.get("/export/pilots", params={"user_id": "ops"})
+        anonymous = await client.get("/export/challenges")
+        stranger = await client.get("/export/challenges", params={"user_id": "eve"})
+    return missions, everything, filtered, resumed, scores, challenges, bad, unknown, anonymous, stranger
+
+def test_export_endpoint_filters_and_formats():
+    (missions, everything, filtered, resumed, scores, challenges, bad, unknown,
+     anonymous, stranger) = asyncio.run(_endpoint_exports())
+    assert everything.headers["content-type"] == "application/gzip"
+    rows = [json.loads(line) for line in _lines(everything.content)]
+    assert [r["_id"] for r in rows] == [str(m["_id"]) for m in missions]
+    assert "scores" not in rows[0]
+    assert [json.loads(line)["mission_name"] for line in _lines(filtered.content)] == ["m1", "m7"]
+    assert [json.loads(line)["mission_name"] for line in _lines(resumed.content)] == ["m9", "m10", "m11"]
+    lines = _lines(scores.content)
+    assert lines[0] == "mission_id,mission_name,seq,pilot,lap_time_sec,flagged,splits_ms"
+    assert len(lines) - 1 == sum(i % 4 for i in range(12))
+    assert lines[1].startswith(f"{missions[1]['_id']},m1,0,p0,30.0,False,")
+    rows = [json.loads(line) for line in _lines(challenges.content)]
+    assert [r["title"] for r in rows] == ["c1", "c2"]
+    for hidden in ("author_uid", "author_name", "review_notes", "moderators", "redactions", "classification_level"):
+        assert hidden not in rows[0]
+    assert bad.status_code == 400 and unknown.status_code == 404
+    assert anonymous.status_code == 422 and stranger.status_code == 403
+
+async def _cli_export(tmp_path, cuts, fmt, name="m{}"):
+    db = memory_db()
+    await _seed(db, name)
+    out = tmp_path / f"scores.{fmt}.gz"
+    async with gateway_client(db) as client:
+        flaky = FlakyClient(client, cuts)
+        with pytest.raises(httpx.ReadError):
+            # Killed run: the first cut exceeds the retry budget
+            await export_to_file(flaky, "scores", out, fmt, retries=0, flush_bytes=1, log=lambda *_: None,
+                                 user_id="ops")
+        assert out.with_name(out.name + ".resume").exists()
+        # The rerun resumes from the resume file and survives one more drop
+        logged = []
+        await export_to_file(flaky, "scores", out, fmt, retries=2, flush_bytes=1, backoff=0, log=logged.append,
+                             user_id="ops")
+        reference = await client.get("/export/scores", params={"user_id": "ops", "format": fmt})
+    return out, reference, logged
+
+@pytest.mark.parametrize("fmt", ["ndjson", "csv"])
+def test_cli_resumes_without_gaps_or_duplicates(tmp_path, fmt):
+    out, reference, logged = asyncio.run(_cli_export(tmp_path, [96, 64], fmt))
+    assert "resuming" in logged[0] and "retrying" in logged[1]
+    assert gzip.decompress(out.read_bytes()) == gzip.decompress(reference.content)
+    assert not out.with_name(out.name + ".resume").exists()
+
+def test_cli_resumes_csv_rows_with_quoted_newlines(tmp_path):
+    # A user-entered name spanning lines is one quoted CSV cell, not two rows
+    out, reference, logged = asyncio.run(_cli_export(tmp_path, [192, 64], "csv", 'm{}\nthe "long", way'))
+    assert "resuming" in logged[0] and "retrying" in logged[1]
+    assert gzip.decompress(out.read_bytes()) == gzip.decompress(reference.content)
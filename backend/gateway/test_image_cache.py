@@ -0,0 +1,127 @@
+import asyncio
+import base64
+import io
+
+import pytest
+from PIL import Image
+
+from .bench.stubs import ImageHost, StubLLM, gateway_client, memory_db
+from .image_cache import ImageCache, ImageRejected
+
+def _png(width, height, alpha=True):
+    out = io.BytesIO()
+    Image.new("RGBA" if alpha else "RGB", (width, height), (200, 40, 40, 128)).save(out, "PNG")
+    return out.getvalue()
+
+async def _fetch_scenarios(root):
+    big = _png(2400, 1200)
+    files = {
+        "/course.png": ("image/png", big),
+        "/mirror.png": ("image/png", big),
+        "/page.html": ("text/html", b"<html></html>"),
+        "/fake.png": ("image/png", b"\x89PNG not really"),
+        "/huge.png": ("image/png", b"\0" * 4096),
+    }
+    async with ImageHost(files) as host:
+        cache = ImageCache(root, max_source_bytes=2048 + len(big), allow_private=True)
+        first = await cache.fetch(host.url + "/course.png")
+        again = await cache.fetch(host.url + "/course.png")      # no download
+        mirror = await cache.fetch(host.url + "/mirror.png")     # downloaded, not re-encoded
+        errors = {}
+        for path in ("/page.html", "/fake.png", "/missing.png"):
+            with pytest.raises(ImageRejected) as e:
+                await cache.fetch(host.url + path)
+            errors[path] = e.value.status
+        cache.max_source_bytes = 1024
+        with pytest.raises(ImageRejected) as e:
+            await cache.fetch(host.url + "/huge.png")
+        errors["/huge.png"] = e.value.status
+        return host.requests, cache, first, again, mirror, errors
+
+def test_fetch_normalizes_once_and_rejects_non_images(tmp_path):
+    requests, cache, first, again, mirror, errors = asyncio.run(_fetch_scenarios(tmp_path))
+    assert (first.width, first.height) == (768, 384)
+    with Image.open(first.path) as im:
+        assert im.format == "JPEG" and im.mode == "RGB"
+    assert first.size < 20_000
+    assert again == first and mirror.digest == first.digest
+    assert requests == 2 + 4
+    assert errors == {"/page.html": 415, "/fake.png": 415, "/missing.png": 502, "/huge.png": 413}
+    # Decoded twice: the course image and the fake PNG
+    assert cache.stats()["misses"] == 2 and cache.stats()["fetches"] == 6
+
+def test_lru_eviction_survives_restart(tmp_path):
+    async def fill():
+        cache = ImageCache(tmp_path, max_bytes=10_000, max_edge=64)
+        stored = [await cache.ingest(_png(200 + i, 100, alpha=False)) for i in range(3)]
+        cache.get(stored[0].digest)                               # now the most recently used
+        size = stored[0].size
+        cache.max_bytes = 2 * size + size // 2
+        extra = await cache.ingest(_png(300, 100, alpha=False))
+        return cache, stored, extra
+
+    cache, stored, extra = asyncio.run(fill())
+    assert cache.evictions == 2
+    assert cache.get(stored[1].digest) is None and not stored[1].path.exists()
+    assert cache.get(stored[2].digest) is None
+    reopened = ImageCache(tmp_path, max_edge=64)
+    assert set(reopened._files) == {stored[0].digest, extra.digest}
+    assert reopened.get(extra.digest).width == 64
+async def _private_scenarios(root):
+    files = {"/course.png": ("image/png", _png(32, 32)),
+             "/hop": ("redirect", b"http://169.254.169.254/latest/meta-data/")}
+    async with ImageHost(files) as host:
+        cache = ImageCache(root)
+        checked = []
+        check = cache._check_host
+
+        async def trust_first_hop(url):
+            # Stands in for a public host that redirects inwards
+            checked.append(str(url))
+            if len(checked) > 1:
+                await check(url)
+
+        errors = {}
+        for url in (host.url + "/course.png", "http://localhost:8000/images", "http://[::1]/"):
+            with pytest.raises(ImageRejected) as e:
+                await cache.fetch(url)
+            errors[url] = e.value.status
+        cache._check_host = trust_first_hop
+        with pytest.raises(ImageRejected) as e:
+            await cache.fetch(host.url + "/hop")
+        return host.requests, errors, e.value, checked
+
+def test_fetch_refuses_private_addresses_on_every_hop(tmp_path):
+    requests, errors, redirected, checked = asyncio.run(_private_scenarios(tmp_path))
+    assert list(errors.values()) == [403, 403, 403]
+    assert requests == 1 and checked[1] == "http://169.254.169.254/latest/meta-data/"
+    assert redirected.status == 403 and "169.254.169.254" in str(redirected)
+
+async def _forge_with_images():
+    photo = _png(1600, 900)
+    async with ImageHost({"/ref.png": ("image/png", photo)}) as host, StubLLM() as llm, \
+            gateway_client(memory_db(), llm.url) as client:
+        body = {"thread_text": "Canyon run", "image_url": host.url + "/ref.png"}
+        linked = await client.post("/forge", json=body)
+        sent = llm.last_request["messages"][-1]["content"][0]["image_url"]["url"]
+        await client.post("/forge", json=body)
+        uploaded = await client.post("/images", content=photo, headers={"Content-Type": "image/png"})
+        image_id = uploaded.json()["image_id"]
+        by_id = await client.post("/forge", json={"thread_text": "Canyon run", "image_id": image_id})
+        served = await client.get(f"/images/{image_id}")
+        refused = await client.post("/images", content=b"hello", headers={"Content-Type": "text/plain"})
+        unknown = await client.post("/forge", json={"thread_text": "x", "image_id": "0" * 32})
+        return host.requests, linked, sent, uploaded, by_id, served, refused, unknown
+
+def test_forge_sends_a_small_inline_copy():
+    pytest.importorskip("mongomock_motor")
+    fetched, linked, sent, uploaded, by_id, served, refused, unknown = asyncio.run(_forge_with_images())
+    assert linked.status_code == 200 and by_id.status_code == 200
+    assert fetched == 1
+    prefix = "data:image/jpeg;base64,"
+    assert sent.startswith(prefix)
+    assert Image.open(io.BytesIO(base64.b64decode(sent[len(prefix):]))).size == (768, 432)
+    assert uploaded.json()["width"] == 768
+    assert served.status_code == 200 and served.headers["content-type"] == "image/jpeg"
+    assert "immutable" in served.headers["cache-control"]
+    assert refused.status_code == 415 and unknown.status_code == 404
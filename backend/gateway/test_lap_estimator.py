@@ -0,0 +1,57 @@
+import math
+
+import numpy as np
+
+from .lap_estimator import DroneLimits, min_lap_times, course_difficulty, rank_courses
+
+SQUARE = [{"x": 0, "z": 0}, {"x": 50, "z": 0}, {"x": 50, "z": 50}, {"x": 0, "z": 50}]
+LINE = [{"x": 0}, {"x": 50}, {"x": 100}, {"x": 150}]
+RING = [{"x": 40 * math.cos(math.pi * i / 6), "z": 40 * math.sin(math.pi * i / 6)} for i in range(12)]
+
+def test_straight_path_at_top_speed():
+    """An open straight path is flown flat out between the trigger zones."""
+    limits = DroneLimits(trigger_radius=1.0)
+    t = min_lap_times([[{"x": 0}, {"x": 100}]], limits, closed=False)[0]
+    assert math.isclose(t, 98 / limits.max_speed)
+
+def test_hairpin_loop_stops_at_each_gate():
+    """Two gates as a loop means a full stop and restart at both ends."""
+    limits = DroneLimits(max_speed=1e3, max_accel=10, trigger_radius=0)
+    t = min_lap_times([[{"x": 0}, {"x": 100}]], limits)[0]
+    assert math.isclose(t, 2 * 2 * math.sqrt(100 / 10))
+
+def test_wide_arc_through_the_trigger_zone_is_not_beaten():
+    """A 30 degree corner flown flat out on the widest arc that touches the zone."""
+    r, acc, leg = 1.0, 10.0, 30.0
+    half = math.radians(15)
+    radius = r / (1 / math.cos(half) - 1)
+    speed = math.sqrt(acc * radius)
+    limits = DroneLimits(max_speed=speed, max_accel=acc, max_turn_rate=1e3, trigger_radius=r)
+    gates = [{"x": 0}, {"x": leg}, {"x": leg + leg * math.cos(2 * half), "z": leg * math.sin(2 * half)}]
+    # Straight from the first zone to the arc, the arc, then on to the last zone
+    tangent = radius * math.tan(half)
+    flown = (2 * (leg - tangent - r) + radius * 2 * half) / speed
+    assert min_lap_times([gates], limits, closed=False)[0] <= flown
+
+def test_batch_matches_single_course():
+    rng = np.random.default_rng(0)
+    courses = [
+        [{"x": x, "y": y, "z": z} for x, y, z in rng.uniform(-30, 30, (n, 3))]
+        for n in rng.integers(2, 15, 50)
+    ]
+    batch = min_lap_times(courses)
+    single = [min_lap_times([c])[0] for c in courses]
+    assert np.allclose(batch, single)
+    assert (batch > 0).all()
+
+def test_degenerate_courses():
+    difficulty = course_difficulty([[], [{"x": 3}]])
+    assert [d["min_lap_time_sec"] for d in difficulty] == [0.0, 0.0]
+    assert [d["score"] for d in difficulty] == [1.0, 1.0]
+
+def test_sharper_course_ranks_harder():
+    # As a loop, LINE turns back on itself at both ends
+    assert rank_courses([RING, SQUARE, LINE]) == [2, 1, 0]
+    difficulty = course_difficulty([SQUARE])[0]
+    assert difficulty["score"] > 1.0
+    assert difficulty["course_length_m"] == 200.0
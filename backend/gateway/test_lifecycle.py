@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+import pytest
+from bson import ObjectId
+
+from . import lifecycle
+from .bench.stubs import memory_db
+from .lifecycle import COMPLETED, FAILED, FORGED, QUEUED, RUNNING, InvalidTransition
+
+async def _run_through(db):
+    mission_id = (await db.missions.insert_one({"mission_name": "m", "status": FORGED})).inserted_id
+    legacy_id = (await db.missions.insert_one({"mission_name": "old"})).inserted_id
+    refused = []
+    steps = [(COMPLETED, {}), (RUNNING, {}), (FAILED, {"reason": "crash"}), (COMPLETED, {}), (RUNNING, {}),
+             (QUEUED, {}),
+             # Sitting in queued is only taken over once the run is stale
+             (QUEUED, {"stale_after": 3600}), (QUEUED, {"stale_after": 0})]
+    for target, kwargs in steps:
+        try:
+            await lifecycle.transition(db, mission_id, target, **kwargs)
+        except InvalidTransition as e:
+            refused.append((e.current, e.target))
+    await lifecycle.transition(db, legacy_id, QUEUED)
+    with pytest.raises(LookupError):
+        await lifecycle.transition(db, ObjectId(), QUEUED)
+    events = await lifecycle.history(db, str(mission_id))
+    return refused, events, await db.missions.find_one({"_id": mission_id}), await lifecycle.history(db, str(legacy_id))
+
+def test_transitions_are_guarded_and_logged():
+    pytest.importorskip("mongomock_motor")
+    refused, events, mission, legacy = asyncio.run(_run_through(memory_db()))
+    # A forged mission cannot complete, a failed one cannot be completed or run
+    # again without being queued, and a queued one is not queued again while its run is fresh
+    assert refused == [(FORGED, COMPLETED), (FAILED, COMPLETED), (FAILED, RUNNING), (QUEUED, QUEUED)]
+    assert [(e["from"], e["to"]) for e in events] == [
+        (FORGED, RUNNING), (RUNNING, FAILED), (FAILED, QUEUED), (QUEUED, QUEUED)]
+    assert events[1]["reason"] == "crash"
+    assert mission["status"] == QUEUED and mission["status_at"] == events[-1]["at"]
+    assert [(e["from"], e["to"]) for e in legacy] == [(FORGED, QUEUED)]
+
+async def _live_status():
+    import httpx
+    import socketio
+    from .bench.load import in_process_gateway
+
+    db = memory_db()
+    mission_id = str((await db.missions.insert_one({"mission_name": "m", "meta": {}, "scores": []})).inserted_id)
+    received = []
+    async with in_process_gateway(db) as url:
+        viewer = socketio.AsyncClient(reconnection=False)
+        viewer.on("mission_status", received.append)
+        await viewer.connect(url, transports=["websocket"])
+        await viewer.call("join_room", mission_id)
+        async with httpx.AsyncClient(base_url=url) as client:
+            replies = [
+                await client.post(f"/missions/{mission_id}/running"),
+                await client.post(f"/missions/{mission_id}/complete"),
+                await client.post(f"/missions/{mission_id}/complete"),      # a retried report
+                await client.post(f"/missions/{mission_id}/fail", params={"reason": "late"}),
+            ]
+            history = (await client.get(f"/missions/{mission_id}/events")).json()
+            mission = (await client.get(f"/missions/{mission_id}")).json()
+        for _ in range(100):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.02)
+        await viewer.disconnect()
+    return mission_id, replies, history, mission, received
+
+def test_status_changes_reach_the_mission_room():
+    pytest.importorskip("mongomock_motor")
+    pytest.importorskip("aiohttp")   # Socket.IO client transport
+    mission_id, replies, history, mission, received = asyncio.run(_live_status())
+    assert [r.status_code for r in replies] == [200, 200, 200, 409]
+    assert replies[1].json()["changed"] and not replies[2].json()["changed"]
+    assert "completed" in replies[3].json()["detail"]
+    assert mission["status"] == COMPLETED
+    assert [e["to"] for e in history] == [RUNNING, COMPLETED]
+    assert [(e["mission"], e["to"]) for e in received] == [(mission_id, RUNNING), (mission_id, COMPLETED)]
+    assert [e["_id"] for e in received] == [e["_id"] for e in history]
+
+@pytest.mark.skipif(not os.getenv("LIFECYCLE_TEST_REPLSET_URL"),
+                    reason="set LIFECYCLE_TEST_REPLSET_URL to a scratch single-node replica set")
+def test_change_stream_delivers_events_from_any_writer():
+    db = memory_db(os.environ["LIFECYCLE_TEST_REPLSET_URL"], f"simforge_lifecycle_{os.getpid()}")
+
+    async def scenario():
+        ready, received = asyncio.Event(), []
+
+        async def emit(event):
+            received.append(event)
+
+        watcher = asyncio.create_task(lifecycle.watch_events(db, emit, ready.set))
+        try:
+            await asyncio.wait_for(ready.wait(), 10)
+            mission_id = (await db.missions.insert_one({"mission_name": "m", "status": FORGED})).inserted_id
+            for target in (QUEUED, RUNNING, COMPLETED):
+                await lifecycle.transition(db, mission_id, target)
+            for _ in range(250):
+                if len(received) == 3:
+                    break
+                await asyncio.sleep(0.02)
+            return mission_id, received
+        finally:
+            watcher.cancel()
+            await db.client.drop_database(db.name)
+
+    mission_id, received = asyncio.run(scenario())
+    assert [(e["mission"], e["to"]) for e in received] == [(str(mission_id), t) for t in (QUEUED, RUNNING, COMPLETED)]
@@ -0,0 +1,20 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("mongomock_motor")
+pytest.importorskip("aiohttp")   # Socket.IO client transport
+
+from .bench.load import LoadConfig, run_load
+
+def test_supervisors_and_viewers_in_process():
+    cfg = LoadConfig(viewers=8, stage_seconds=1.5, time_scale=200, fail_ratio=0.2)
+    report = asyncio.run(run_load([4], cfg, missions=5, log=lambda *_: None))
+    stage = report["stages"][0]
+    assert stage["errors"] == {}
+    assert stage["telemetry"]["count"] > 0
+    assert stage["db_write"]["count"] >= stage["telemetry"]["count"]
+    # Every lap reaches every viewer in its mission room
+    assert stage["broadcast"]["count"] > 0
+    assert stage["delivery_ratio"] == 1.0
+    assert report["saturation"]["first_saturated_supervisors"] in (None, 4)
@@ -1,48 +1,20 @@
-from mission_compiler import write_mission
+from .mission_compiler import write_wbt
 
-def test_mission():
-    """Generate and launch a test mission in SkyDive."""
-    mission_name = "Test Mission"
+def test_mission(tmp_path):
+    """Compile a five-gate test course into a Webots world."""
+    mission_name = "Test_Mission"
     gates = [
-        {
-            "type": "gate",
-            "x": 0,
-            "y": 0,
-            "z": 10,
-            "yaw": 0
-        },
-        {
-            "type": "gate",
-            "x": 20,
-            "y": 0,
-            "z": 15,
-            "yaw": 45
-        },
-        {
-            "type": "gate",
-            "x": 40,
-            "y": 0,
-            "z": 20,
-            "yaw": 90
-        },
-        {
-            "type": "gate",
-            "x": 60,
-            "y": 0,
-            "z": 15,
-            "yaw": 135
-        },
-        {
-            "type": "gate",
-            "x": 80,
-            "y": 0,
-            "z": 10,
-            "yaw": 180
-        }
+        {"type": "gate", "x": 0, "y": 0, "z": 10, "yaw": 0},
+        {"type": "gate", "x": 20, "y": 0, "z": 15, "yaw": 45},
+        {"type": "gate", "x": 40, "y": 0, "z": 20, "yaw": 90},
+        {"type": "gate", "x": 60, "y": 0, "z": 15, "yaw": 135},
+        {"type": "gate", "x": 80, "y": 0, "z": 10, "yaw": 180},
     ]
-    
-    result = write_mission(mission_name, gates, laps=3, terrain="city")
-    print(f"Mission compilation result: {result}")
 
-if __name__ == "__main__":
-    test_mission() 
\ No newline at end of file
+    world = write_wbt(mission_name, {"mission_id": "test", "gates": gates, "laps": 3, "terrain": "city"},
+                      out_dir=tmp_path)
+    text = world.read_text()
+    assert world == tmp_path / f"{mission_name}.wbt"
+    assert '"MISSION_ID=test"' in text
+    for i in range(1, len(gates) + 1):
+        assert f"DEF Gate_{i} Gate" in text
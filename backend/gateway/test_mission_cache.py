@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from .mission_cache import MissionCache, etag_matches, strong_etag
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_ttl_and_byte_bounds():
+    clock = Clock()
+    cache = MissionCache(max_entries=2, ttl=10, max_bytes=10, clock=clock)
+    cache.put(("mission", "a"), b"aaa", cache.generation)
+    cache.put(("mission", "b"), b"bbb", cache.generation)
+    assert cache.get(("mission", "a")).body == b"aaa"     # a is now most recent
+    cache.put(("mission", "c"), b"ccc", cache.generation)
+    assert cache.get(("mission", "b")) is None
+    cache.put(("missions", "created"), b"x" * 8, cache.generation)
+    assert cache.stats()["bytes"] <= 10 and cache.stats()["entries"] == 1
+    cache.put(("missions", "created"), b"x" * 11, cache.generation)   # larger than the cache
+    assert cache.get(("missions", "created")) is None
+    cache.put(("mission", "a"), b"aaa", cache.generation)
+    clock.now = 10
+    assert cache.get(("mission", "a")) is None
+    stats = cache.stats()
+    assert stats["evictions"] == 3 and stats["hits"] == 1 and stats["bytes"] == 0
+
+def test_invalidation_and_racing_reads():
+    cache = MissionCache()
+    cache.put(("mission", "a"), b"a", cache.generation)
+    cache.put(("mission", "b"), b"b", cache.generation)
+    cache.put(("missions", "created"), b"[]", cache.generation)
+    started = cache.generation
+    cache.invalidate("a")
+    assert cache.get(("mission", "a")) is None and cache.get(("missions", "created")) is None
+    assert cache.get(("mission", "b")) is not None
+    # A read that began before the write must not repopulate the cache
+    entry = cache.put(("mission", "a"), b"stale", started)
+    assert entry.etag == strong_etag(b"stale") and cache.get(("mission", "a")) is None
+
+def test_if_none_match():
+    etag = strong_etag(b"body")
+    assert etag_matches(etag, etag)
+    assert etag_matches(f'"other", W/{etag}', etag)
+    assert etag_matches("*", etag)
+    assert not etag_matches(None, etag) and not etag_matches('"other"', etag)
+
+async def _conditional_gets():
+    from .bench.stubs import gateway_client, memory_db
+    db = memory_db()
+    mission_id = (await db.missions.insert_one(
+        {"mission_name": "cached", "meta": {"gates": []}, "scores": []})).inserted_id
+    async with gateway_client(db) as client:
+        first = await client.get(f"/missions/{mission_id}")
+        listed = await client.get("/missions")
+        # Changes made behind the gateway's back stay invisible until a write invalidates
+        await db.missions.update_one({"_id": mission_id}, {"$set": {"upvotes": 99}})
+        revalidated = await client.get(f"/missions/{mission_id}", headers={"If-None-Match": first.headers["etag"]})
+        await client.post("/telemetry", json={"mission": str(mission_id), "pilot": "p", "lap_time_sec": 60.0})
+        after_write = await client.get(f"/missions/{mission_id}", headers={"If-None-Match": first.headers["etag"]})
+        relisted = await client.get("/missions")
+        stats = (await client.get("/missions/cache/stats")).json()
+    return first, listed, revalidated, after_write, relisted, stats
+
+def test_endpoints_revalidate_and_invalidate_on_writes():
+    pytest.importorskip("mongomock_motor")
+    first, listed, revalidated, after_write, relisted, stats = asyncio.run(_conditional_gets())
+    assert first.status_code == 200 and first.headers["etag"].startswith('"')
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert after_write.status_code == 200 and after_write.headers["etag"] != first.headers["etag"]
+    mission = after_write.json()
+    assert mission["upvotes"] == 99 and mission["scores"][0]["pilot"] == "p"
+    assert relisted.json()[0]["scores"] and not listed.json()[0]["scores"]
+    assert stats["hits"] == 1 and stats["misses"] == 4 and stats["invalidations"] == 1
+    assert stats["entries"] == 2 and stats["bytes"] > 0
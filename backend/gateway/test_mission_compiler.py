@@ -0,0 +1,86 @@
+import math
+import time
+
+import pytest
+
+from .mission_compiler import pilot_names, start_grid, write_wbt, write_arena_wbt
+
+def _course(n):
+    return [{"x": i * 3.0, "y": 1.0, "z": (i % 7) * 2.0, "yaw": 0.1 * i} for i in range(n)]
+
+def test_gates_are_one_line_proto_instances(tmp_path):
+    gates = _course(3)
+    gates[1]["size"] = [3, 2]
+    gates[2]["color"] = [0, 1, 0]
+    text = write_wbt("mission_test", {"mission_id": "abc", "gates": gates}, out_dir=tmp_path).read_text()
+
+    assert 'EXTERNPROTO "../protos/Gate.proto"' in text
+    lines = [line for line in text.splitlines() if line.startswith("DEF Gate_")]
+    assert lines == [
+        "DEF Gate_1 Gate { translation 0.0 1.0 0.0 rotation 0 1 0 0.0 number 1 }",
+        "DEF Gate_2 Gate { translation 3.0 1.0 2.0 rotation 0 1 0 0.1 number 2 size 3 2 }",
+        "DEF Gate_3 Gate { translation 6.0 1.0 4.0 rotation 0 1 0 0.2 number 3 color 0 1 0 }",
+    ]
+
+def test_malformed_gate_overrides_are_dropped(tmp_path):
+    gates = _course(4)
+    gates[0]["size"] = 2
+    gates[1]["color"] = "red"
+    gates[2]["size"] = [3, "2"]
+    gates[3]["color"] = [1, 0]
+    text = write_wbt("mission_test", {"mission_id": "abc", "gates": gates}, out_dir=tmp_path).read_text()
+    assert [line for line in text.splitlines() if line.startswith("DEF Gate_")] == [
+        f"DEF Gate_{i + 1} Gate {{ translation {g['x']} 1.0 {g['z']} rotation 0 1 0 {g['yaw']} number {i + 1} }}"
+        for i, g in enumerate(_course(4))]
+
+def test_large_course_world_size_and_render_time(tmp_path):
+    """World size grows by one short line per gate, even for 100+ gate courses."""
+    base = write_wbt("mission_empty", {"mission_id": "abc", "gates": []}, out_dir=tmp_path)
+    base_lines = len(base.read_text().splitlines())
+    base_bytes = base.stat().st_size
+
+    for n in (100, 250):
+        start = time.perf_counter()
+        path = write_wbt(f"mission_{n}", {"mission_id": "abc", "gates": _course(n)}, out_dir=tmp_path)
+        elapsed = time.perf_counter() - start
+
+        size = path.stat().st_size
+        per_gate = (size - base_bytes) / n
+        print(f"{n} gates: {size} bytes ({per_gate:.0f} B/gate), rendered in {elapsed * 1e3:.1f} ms")
+        assert len(path.read_text().splitlines()) == base_lines + n
+        # The inline Transform/Shape tree this replaced cost ~1.7 KB per gate
+        assert per_gate < 120
+        assert elapsed < 1.0
+
+def test_arena_world_allows_runtime_gate_import(tmp_path):
+    text = write_arena_wbt(out_dir=tmp_path).read_text()
+    assert 'IMPORTABLE EXTERNPROTO "../protos/Gate.proto"' in text
+    assert "DEF Gate_" not in text
+
+def test_heat_places_one_drone_per_pilot_on_a_staggered_grid(tmp_path):
+    gates = [{"x": 0.0, "y": 10.0, "z": 1.5}]
+    text = write_wbt("mission_heat", {"mission_id": "abc", "gates": gates}, out_dir=tmp_path,
+                     pilots=("ann", "bob", "cy d", "dee")).read_text()
+
+    assert [line for line in text.splitlines() if line.startswith("DEF CF")] == [
+        f"DEF CF{i} Crazyflie {{" for i in range(1, 5)]
+    assert '"PILOTS=ann,bob,cy_d,dee"' in text
+    slots = start_grid(4, gates)
+    # Pole at the origin, the rest behind it (away from the first gate), none closer than a lane
+    assert slots[0] == (0.0, 0.0, 0)
+    assert all(y < 0 for _, y, _ in slots[1:])
+    assert min(math.dist(a, b) for i, a in enumerate(slots) for b in slots[i + 1:]) >= 1.0
+    assert f"translation {slots[3][0]} {slots[3][1]} 0" in text
+
+    single = write_wbt("mission_solo", {"mission_id": "abc", "gates": gates}, out_dir=tmp_path).read_text()
+    assert "DEF CF2" not in single and "PILOTS=" not in single
+    # A lone pilot flies the one drone under their own name
+    solo = write_wbt("mission_solo", {"mission_id": "abc", "gates": gates}, out_dir=tmp_path,
+                     pilots=("al ice",)).read_text()
+    assert "DEF CF2" not in solo and '"PILOTS=al_ice"' in solo
+
+def test_pilot_names_must_stay_distinct():
+    with pytest.raises(ValueError, match="cy_d"):
+        pilot_names(["ann", "cy d", "cy_d"])
+    with pytest.raises(ValueError):
+        pilot_names(["ann", ""])
@@ -0,0 +1,80 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from .mission_stats import RELATIVE_ACCURACY, bucket_bounds, bucket_index, quantile, rollup_update, summarize, to_ms
+
+def _apply(doc: dict, update: dict):
+    """Enough of Mongo's $inc/$min/$max on dotted paths to fold updates locally."""
+    for op, fields in update.items():
+        for path, value in fields.items():
+            node = doc
+            *parents, leaf = path.split(".")
+            for key in parents:
+                node = node.setdefault(key, {})
+            if op == "$inc":
+                node[leaf] = node.get(leaf, 0) + value
+            elif op == "$min":
+                node[leaf] = min(node.get(leaf, value), value)
+            else:
+                node[leaf] = max(node.get(leaf, value), value)
+
+def test_buckets_bound_relative_error():
+    for ms in (1, 7, 999, 45_000, 3_600_000):
+        lo, hi = bucket_bounds(bucket_index(ms))
+        assert lo < ms <= hi * (1 + 1e-12)
+    rng = np.random.default_rng(0)
+    laps = np.maximum(rng.lognormal(np.log(40_000), 0.3, 5_000).astype(int), 1)
+    buckets = {}
+    for ms in laps:
+        key = str(bucket_index(int(ms)))
+        buckets[key] = buckets.get(key, 0) + 1
+    assert len(buckets) < 100
+    for q in (0.5, 0.9, 0.99):
+        exact = np.quantile(laps, q, method="lower")
+        assert abs(quantile(buckets, len(laps), q) - exact) <= RELATIVE_ACCURACY * exact + 1
+
+def test_rollup_folds_laps_and_splits():
+    doc = {}
+    for lap, splits in ((30.0, [10.0, 20.0]), (25.0, [9.0, 16.0]), (35.5, [12.5, 23.0])):
+        _apply(doc, rollup_update(to_ms(lap), [to_ms(s) for s in splits]))
+    stats = summarize(doc)
+    laps = stats["laps"]
+    assert laps["count"] == 3 and laps["best_sec"] == 25.0 and laps["worst_sec"] == 35.5
+    assert laps["mean_sec"] == pytest.approx(30.167, abs=1e-3)
+    assert laps["stdev_sec"] == pytest.approx(np.std([30.0, 25.0, 35.5]), abs=1e-3)
+    assert laps["quantiles_sec"]["p50"] == pytest.approx(30.0, rel=RELATIVE_ACCURACY)
+    assert sum(b["count"] for b in laps["histogram"]) == 3
+    assert [g["gate"] for g in stats["splits"]] == [0, 1]
+    assert stats["splits"][0]["best_sec"] == 9.0 and stats["splits"][1]["worst_sec"] == 23.0
+    assert summarize(None)["laps"]["count"] == 0
+
+async def _ingest_and_read():
+    from .bench.stubs import gateway_client, memory_db
+    db = memory_db()
+    gates = [{"x": 0, "y": 0, "z": 2}, {"x": 10, "y": 0, "z": 2}]
+    mission_id = (await db.missions.insert_one(
+        {"mission_name": "stats", "meta": {"gates": gates}, "scores": []})).inserted_id
+    async with gateway_client(db) as client:
+        for lap, splits in ((40.0, [18.0, 22.0]), (36.0, [17.0, 19.0])):
+            res = await client.post("/telemetry", json={
+                "mission": str(mission_id), "pilot": "p", "lap_time_sec": lap,
+                "checkpoint_times_sec": splits, "status": "running"})
+            assert res.status_code == 200
+        # Below the course's physical bound: stored for review, kept out of the stats
+        await client.post("/telemetry", json={"mission": str(mission_id), "pilot": "cheat", "lap_time_sec": 0.1})
+        stats = (await client.get(f"/missions/{mission_id}/stats")).json()
+        empty = await client.get(f"/missions/{'0' * 24}/stats")
+    mission = await db.missions.find_one({"_id": mission_id})
+    return mission, stats, empty
+
+def test_telemetry_stores_splits_and_updates_stats():
+    pytest.importorskip("mongomock_motor")
+    mission, stats, empty = asyncio.run(_ingest_and_read())
+    assert mission["scores"][0]["splits_ms"] == [18000, 22000]
+    assert mission["scores"][2].get("flagged") and "splits_ms" not in mission["scores"][2]
+    assert stats["laps"]["count"] == 2 and stats["laps"]["best_sec"] == 36.0
+    assert [g["count"] for g in stats["splits"]] == [2, 2]
+    assert stats["splits"][1]["best_sec"] == 19.0
+    assert empty.status_code == 404
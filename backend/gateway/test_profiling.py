@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from .profiling import LoopMonitor, ProfileMiddleware, ProfileStore, StackSampler
+
+def _spin(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+async def _busy_endpoint(scope, receive, send):
+    _spin(0.05 if scope["path"] == "/busy" else 0)
+    await asyncio.sleep(0.05)
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+def test_sampler_collapses_the_loop_thread_stack():
+    async def sample():
+        sampler = StackSampler(interval=0.001).start()
+        _spin(0.1)
+        sampler.stop()
+        return sampler.profile()
+
+    profile = asyncio.run(sample())
+    # A spinning loop thread hands the GIL over only every switch interval (5 ms)
+    assert profile["samples"] >= 10
+    top = profile["folded"].splitlines()[0]
+    stack, count = top.rsplit(" ", 1)
+    assert stack.split(";")[-1].startswith("_spin (gateway/test_profiling.py:")
+    assert "sample (gateway/test_profiling.py:" in stack and int(count) >= 10
+
+def test_request_profile_only_counts_its_own_task():
+    store = ProfileStore()
+
+    async def authorize(user):
+        return user == "ops"
+
+    app = ProfileMiddleware(_busy_endpoint, authorize, store)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://gateway") as client:
+            anonymous = await client.get("/busy", headers={"X-Profile-User": "mallory"})
+            # The profiled request only waits while another one spins the loop
+            idle = client.get("/idle", headers={"X-Profile-User": "ops"})
+            busy = client.get("/busy")
+            profiled, _ = await asyncio.gather(idle, busy)
+            return anonymous, profiled
+
+    anonymous, profiled = asyncio.run(scenario())
+    assert "x-profile-id" not in anonymous.headers
+    profile = store.get(profiled.headers["x-profile-id"])
+    assert profile["path"] == "/idle" and profile["user"] == "ops"
+    assert "_spin" not in profile["folded"]
+    assert [p["id"] for p in store.index()] == [profile["id"]] and "folded" not in store.index()[0]
+
+def test_loop_monitor_names_the_blocking_task():
+    logged = []
+
+    async def blocker():
+        time.sleep(0.3)
+
+    async def scenario():
+        monitor = LoopMonitor(0.05, logged.append)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(blocker(), name="slow-handler")
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["stalls"] == 1 and stats["worst_stall_ms"] >= 150 and stats["max_lag_ms"] >= 150
+    assert "by slow-handler (" in logged[0] and ".blocker (gateway/test_profiling.py:" in logged[0]
+    assert logged[1].startswith("[LoopMonitor] Event loop resumed")
+
+def test_profile_endpoint_is_off_by_default_and_whitelisted(monkeypatch):
+    pytest.importorskip("mongomock_motor")
+    from . import main
+    from .bench.stubs import gateway_client, memory_db
+
+    db = memory_db()
+
+    async def scenario():
+        async with gateway_client(db) as client:
+            await db.whitelisted_users.insert_one({"user_id": "ops"})
+            disabled = await client.post("/debug/profile", params={"user_id": "ops", "seconds": 0.05})
+            monkeypatch.setattr(main, "PROFILING_ENABLED", True)
+            stranger = await client.post("/debug/profile", params={"user_id": "eve", "seconds": 0.05})
+            allowed = await client.post("/debug/profile", params={"user_id": "ops", "seconds": 0.1,
+                                                                  "interval_ms": 2})
+            return disabled, stranger, allowed
+
+    disabled, stranger, allowed = asyncio.run(scenario())
+    assert disabled.status_code == 404 and stranger.status_code == 403
+    assert allowed.status_code == 200 and allowed.headers["content-disposition"].endswith('.folded"')
+    assert int(allowed.headers["x-profile-samples"]) > 10
+    # The worker sat idle while it was sampled
+    assert "BaseEventLoop._run_once (asyncio/base_events.py:" in allowed.text
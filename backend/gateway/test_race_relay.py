@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from .race_relay import RaceRelay
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+async def _relay_batches():
+    sent = []
+
+    async def emit(event, data, room):
+        sent.append((event, room, data))
+
+    clock = Clock()
+    relay = RaceRelay(emit, max_hz=20, clock=clock)
+    session = {}
+    rejected = await relay.push(session, [["p", 0.0, 0, 0, 1]])       # not attached yet
+    await relay.push(session, [["a", "m1", "ann"], ["p", 0.1, 1, 0, 1], ["c", 0.2, 0, 0.2]])
+    # Within the 50 ms window: coalesced to the latest sample and sent once the window ends
+    await relay.push(session, [["p", 0.2, 2, 0, 1], ["p", 0.3, 3, 0, 1], ["bogus"]])
+    await asyncio.sleep(0.08)
+    clock.now += 1.0
+    await relay.push(session, [["p", 0.4, 4, 0, 1], ["l", 0.5, 1, 0.5], ["s", 0.6, "completed", "completed"]])
+    return rejected, sent, relay
+
+def test_positions_are_throttled_and_events_pass_through():
+    rejected, sent, relay = asyncio.run(_relay_batches())
+    assert rejected == 1
+    assert all(room == "m1" for _, room, _ in sent)
+    kinds = [(event, data.get("type")) for event, _, data in sent]
+    # Events go out as they arrive; a batch's positions follow it, and always precede the final status
+    assert kinds == [("race_event", "checkpoint"), ("race_positions", None), ("race_positions", None),
+                     ("race_event", "lap"), ("race_positions", None), ("race_event", "status")]
+    positions = [data["positions"][0] for event, _, data in sent if event == "race_positions"]
+    assert [p["pos"] for p in positions] == [[1, 0, 1], [3, 0, 1], [4, 0, 1]]
+    assert positions[0]["pilot"] == "ann"
+    assert sent[0][2] == {"type": "checkpoint", "mission": "m1", "pilot": "ann", "t": 0.2, "gate": 0, "split_sec": 0.2}
+    stats = relay.stats()
+    assert stats["positions_in"] == 4 and stats["position_messages"] == 3 and stats["rejected"] == 2
+    assert stats["rooms_pending"] == 0
+
+async def _live_round_trip():
+    import socketio
+    from .bench.load import in_process_gateway
+    from .bench.stubs import memory_db
+
+    received = []
+    async with in_process_gateway(memory_db()) as url:
+        viewer = socketio.AsyncClient(reconnection=False)
+        viewer.on("race_event", lambda data: received.append(("event", data)))
+        viewer.on("race_positions", lambda data: received.append(("positions", data)))
+        await viewer.connect(url, transports=["websocket"])
+        await viewer.call("join_room", "m42")
+        sim = socketio.AsyncClient(reconnection=False)
+        await sim.connect(url, namespaces=["/sim"], transports=["websocket"])
+        ack = await sim.call("frames", [["a", "m42", "sim"], ["p", 0.0, 1, 2, 3], ["c", 0.4, 0, 0.4]],
+                             namespace="/sim")
+        await sim.call("frames", [["s", 1.0, "failed", "crash"]], namespace="/sim")
+        for _ in range(100):
+            if len(received) >= 3:
+                break
+            await asyncio.sleep(0.02)
+        await sim.disconnect()
+        await viewer.disconnect()
+    return ack, received
+
+def test_simulator_frames_reach_mission_room():
+    pytest.importorskip("mongomock_motor")
+    pytest.importorskip("aiohttp")   # Socket.IO client transport
+    ack, received = asyncio.run(_live_round_trip())
+    assert ack == {"ok": True, "rejected": 0}
+    assert [kind for kind, _ in received] == ["event", "positions", "event"]
+    assert received[1][1]["positions"][0] == {"pilot": "sim", "t": 0.0, "pos": [1, 2, 3]}
+    assert received[2][1]["status"] == "failed" and received[2][1]["reason"] == "crash"
+
+async def _live_scores():
+    import httpx
+    import socketio
+    from .bench.load import in_process_gateway
+    from .bench.stubs import memory_db
+
+    db = memory_db()
+    mission_id = str((await db.missions.insert_one({"mission_name": "by-name", "meta": {}, "scores": []})).inserted_id)
+    received = []
+    async with in_process_gateway(db) as url:
+        viewer = socketio.AsyncClient(reconnection=False)
+        viewer.on("score_update", received.append)
+        await viewer.connect(url, transports=["websocket"])
+        await viewer.call("join_room", mission_id)
+        async with httpx.AsyncClient(base_url=url) as client:
+            for key in ("by-name", mission_id):
+                await client.post("/telemetry", json={"mission": key, "pilot": "p", "lap_time_sec": 30.0})
+        for _ in range(100):
+            if len(received) == 2:
+                break
+            await asyncio.sleep(0.02)
+        await viewer.disconnect()
+    return received
+
+def test_laps_reported_by_name_reach_viewers_of_the_id():
+    pytest.importorskip("mongomock_motor")
+    pytest.importorskip("aiohttp")   # Socket.IO client transport
+    received = asyncio.run(_live_scores())
+    assert len(received) == 2 and received[0]["mission"] == "by-name"
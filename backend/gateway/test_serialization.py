@@ -0,0 +1,59 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+from bson import ObjectId
+
+from .bench.datasets import DatasetSpec
+from .bench.serialization import fast_render, legacy_render, payloads, run
+from .serialization import dumps, utc_timestamp
+
+def test_mongo_types_encode_in_one_pass():
+    oid = ObjectId()
+    doc = {"_id": oid, "meta": {"owner": oid}, "scores": [{"at": datetime(2025, 5, 1, 12, 0, 0)}],
+           "completion_time": datetime(2025, 5, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)}
+    decoded = json.loads(dumps(doc))
+    assert decoded["_id"] == decoded["meta"]["owner"] == str(oid)
+    # Naive datetimes from older documents are UTC, same as stored strings
+    assert decoded["scores"][0]["at"] == "2025-05-01T12:00:00+00:00"
+    assert decoded["completion_time"] == "2025-05-01T12:00:00.250000+00:00"
+    with pytest.raises(TypeError):
+        dumps({"blob": object()})
+
+def test_utc_timestamp_is_aware_and_sortable():
+    first, second = utc_timestamp(), utc_timestamp()
+    assert datetime.fromisoformat(first).utcoffset().total_seconds() == 0
+    assert first <= second
+
+def test_fast_path_matches_legacy_output():
+    spec = DatasetSpec("tiny", missions=12, deep_missions=1, deep_scores=40, pilots=5)
+    for payload in payloads(spec).values():
+        assert json.loads(fast_render(payload)) == json.loads(legacy_render(payload))
+
+def test_benchmark_report():
+    spec = DatasetSpec("tiny", missions=20, deep_missions=1, deep_scores=200, pilots=5)
+    report = run([spec], repeats=3, max_seconds=1.0, log=lambda *_: None)
+    assert {r["payload"] for r in report["results"]} == {"missions", "mission_deep", "leaderboard"}
+    for row in report["results"]:
+        assert row["legacy"]["bytes"] == row["fast"]["bytes"]
+        assert row["fast"]["p50_ms"] > 0
+
+async def _complete_and_fetch():
+    from .bench.stubs import gateway_client, memory_db
+    db = memory_db()
+    mission_id = (await db.missions.insert_one({"mission_name": "m", "meta": {}, "scores": []})).inserted_id
+    async with gateway_client(db) as client:
+        await client.post(f"/missions/{mission_id}/running")
+        completed = await client.post(f"/missions/{mission_id}/complete")
+        fetched = await client.get(f"/missions/{mission_id}")
+    return completed, fetched
+
+def test_endpoints_store_and_return_string_timestamps():
+    pytest.importorskip("mongomock_motor")
+    completed, fetched = asyncio.run(_complete_and_fetch())
+    assert completed.status_code == 200 and "Server-Timing" in completed.headers
+    mission = fetched.json()
+    assert fetched.headers["content-type"] == "application/json"
+    assert mission["status"] == "completed"
+    assert datetime.fromisoformat(mission["completion_time"]).tzinfo is not None
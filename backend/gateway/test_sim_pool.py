@@ -0,0 +1,145 @@
+import asyncio
+import sys
+import textwrap
+
+import pytest
+
+from .sim_pool import SimPool, PoolUnavailable
+
+# Speaks the supervisor side of the pool protocol without Webots
+STUB_SIMULATOR = textwrap.dedent("""
+    import json, os, socket, sys, time
+    host, port = os.environ["SIMFORGE_POOL_ADDR"].rsplit(":", 1)
+    stream = socket.create_connection((host, int(port))).makefile("rw")
+    def send(message):
+        stream.write(json.dumps(message) + "\\n")
+        stream.flush()
+    send({"type": "hello", "slot": os.environ["SIMFORGE_POOL_SLOT"]})
+    for line in stream:
+        message = json.loads(line)
+        if message["type"] == "quit":
+            break
+        meta = message["mission"]["meta"]
+        if meta.get("crash"):
+            sys.exit(3)
+        send({"type": "started", "setup_sec": 0.001})
+        time.sleep(meta.get("duration", 0))
+        send({"type": "finished", "exit_code": 0, "reason": "completed"})
+""")
+
+def _pool(tmp_path, **kwargs):
+    stub = tmp_path / "stub_simulator.py"
+    stub.write_text(STUB_SIMULATOR)
+    return SimPool(lambda: [sys.executable, str(stub)], start_timeout=10, **kwargs)
+
+def _mission(**meta):
+    return {"_id": "abc", "mission_name": "mission_1", "meta": {"gates": []} | meta}
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+def test_dispatch_to_warm_instance(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, min_size=1, max_size=1)
+        await pool.start()
+        try:
+            await _wait_for(lambda: pool.stats()["idle"] == 1)
+            result = await pool.run(_mission())
+            assert result["slot"] == "0"
+            assert result["time_to_first_step_sec"] < 1.0
+            await _wait_for(lambda: pool.stats()["idle"] == 1)
+            stats = pool.stats()
+            assert stats["dispatched"] == 1
+            assert stats["cold_start_p50_sec"] is not None
+        finally:
+            await pool.stop()
+        assert pool.instances == {}
+    asyncio.run(scenario())
+
+def test_scales_up_with_demand(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, min_size=1, max_size=3)
+        await pool.start()
+        try:
+            results = await asyncio.gather(*(pool.run(_mission(duration=0.5)) for _ in range(3)))
+            assert {r["slot"] for r in results} == {"0", "1", "2"}
+            assert pool.stats()["size"] == 3
+        finally:
+            await pool.stop()
+    asyncio.run(scenario())
+
+def test_recycles_after_max_runs(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, min_size=1, max_size=1, max_runs=2)
+        await pool.start()
+        try:
+            slots = []
+            for _ in range(3):
+                slots.append((await pool.run(_mission()))["slot"])
+                await _wait_for(lambda: pool.stats()["idle"] == 1)
+            assert slots == ["0", "0", "1"]
+            assert pool.stats()["recycled"] == 1
+        finally:
+            await pool.stop()
+    asyncio.run(scenario())
+
+def test_crashed_instance_is_replaced(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, min_size=1, max_size=1)
+        await pool.start()
+        try:
+            with pytest.raises(PoolUnavailable):
+                await pool.run(_mission(crash=True))
+            result = await pool.run(_mission())
+            assert result["slot"] == "1"
+            assert pool.stats()["crashed"] == 1
+        finally:
+            await pool.stop()
+    asyncio.run(scenario())
+
+def test_dropped_connection_is_replaced(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, min_size=1, max_size=1)
+        await pool.start()
+        try:
+            await _wait_for(lambda: pool.stats()["idle"] == 1)
+
+            instance = pool.instances["0"]
+            send = instance.send
+
+            async def dropped(message):
+                if message["type"] == "run":
+                    raise ConnectionResetError("supervisor went away")
+                await send(message)
+            instance.send = dropped
+            with pytest.raises(PoolUnavailable):
+                await pool.run(_mission())
+            result = await pool.run(_mission())
+            assert result["slot"] == "1"
+        finally:
+            await pool.stop()
+    asyncio.run(scenario())
+
+async def _simulate_unreadable_wind(monkeypatch, tmp_path):
+    from . import main
+    from .bench.stubs import gateway_client, memory_db
+
+    db = memory_db()
+    mission_id = str((await db.missions.insert_one(
+        {"mission_name": "gusty", "meta": {"gates": [], "wind_kts": "strong"}, "scores": []})).inserted_id)
+    monkeypatch.setattr(main, "WB_WORLD_DIR", tmp_path)
+    async with gateway_client(db) as client:
+        # Never reached: the field is built before dispatch
+        monkeypatch.setattr(main, "sim_pool", object())
+        reply = await client.post(f"/simulate/{mission_id}")
+        mission = (await client.get(f"/missions/{mission_id}")).json()
+    return reply, mission
+
+def test_unbuildable_wind_field_fails_the_mission(monkeypatch, tmp_path):
+    pytest.importorskip("mongomock_motor")
+    reply, mission = asyncio.run(_simulate_unreadable_wind(monkeypatch, tmp_path))
+    assert reply.status_code == 500
+    assert mission["status"] == "failed" and mission["failure_reason"] == "launch failed"
@@ -0,0 +1,86 @@
+import csv
+import json
+import re
+import sys
+import textwrap
+
+import pytest
+
+from .sweep_runner import parse_grid, expand_cells, run_sweep
+
+# Reads the controllerArgs the runner baked into the world and writes a result
+# whose lap time encodes the parameters, standing in for a headless Webots run
+STUB_SIMULATOR = textwrap.dedent("""
+    import json, re, sys
+    args = dict(a.split("=", 1) for a in re.findall(r'"([A-Z_]+=[^"]*)"', open(sys.argv[1]).read()))
+    mission = json.load(open(args["MISSION_FILE"]))
+    lap = mission["meta"]["wind_kts"] + float(args["STUCK_THRESHOLD"])
+    with open(args["RESULT_FILE"], "w") as result:
+        if lap < 0:
+            result.write("{truncated")
+        else:
+            json.dump({"reason": "completed", "laps_completed": 1, "lap_times_sec": [lap], "sim_time_sec": lap},
+                      result)
+""")
+
+MISSION = {"_id": "abc", "mission_name": "mission_1", "meta": {"gates": [{"x": 1}], "laps": 1, "wind_kts": 0}}
+
+def _launcher(tmp_path):
+    stub = tmp_path / "stub_webots.py"
+    stub.write_text(STUB_SIMULATOR)
+    return lambda world: [sys.executable, str(stub), str(world)]
+
+def _rows(path):
+    with path.open(newline="") as f:
+        return list(csv.DictReader(f))
+
+def test_grid_expansion():
+    grid = parse_grid(["STUCK_THRESHOLD=3,5", "wind_kts=0,10.5,20"])
+    assert grid == {"STUCK_THRESHOLD": [3, 5], "wind_kts": [0, 10.5, 20]}
+    cells = expand_cells(grid, repeats=2)
+    assert len(cells) == 12
+    assert len({c["cell_id"] for c in cells}) == 12
+    assert expand_cells(grid, repeats=2) == cells
+    with pytest.raises(ValueError):
+        parse_grid(["STUCK_THRESHOLD"])
+
+def test_sweep_runs_cells_and_resumes(tmp_path):
+    out = tmp_path / "results.csv"
+    grid = parse_grid(["STUCK_THRESHOLD=3,5", "wind_kts=0,10"])
+    launch = _launcher(tmp_path)
+
+    assert run_sweep(MISSION, grid, out, workers=2, work_dir=tmp_path / "cells", launch_cmd=launch) == 4
+    rows = _rows(out)
+    assert sorted(float(r["best_lap_sec"]) for r in rows) == [3.0, 5.0, 13.0, 15.0]
+    assert {r["exit_status"] for r in rows} == {"0"}
+    for r in rows:
+        assert float(r["best_lap_sec"]) == float(r["wind_kts"]) + float(r["STUCK_THRESHOLD"])
+
+    # Nothing left to do
+    assert run_sweep(MISSION, grid, out, workers=2, work_dir=tmp_path / "cells", launch_cmd=launch) == 0
+
+    # Simulate an interrupted sweep: only the missing cell is re-run
+    out.write_text("".join(out.read_text().splitlines(keepends=True)[:-1]))
+    assert run_sweep(MISSION, grid, out, workers=2, work_dir=tmp_path / "cells", launch_cmd=launch) == 1
+    assert len(_rows(out)) == 4
+
+    # More values along the same keys extend the sweep; other keys do not fit its columns
+    wider = parse_grid(["STUCK_THRESHOLD=3,5,8", "wind_kts=0,10"])
+    assert run_sweep(MISSION, wider, out, workers=2, work_dir=tmp_path / "cells", launch_cmd=launch) == 2
+    before = out.read_text()
+    with pytest.raises(ValueError, match="other parameters"):
+        run_sweep(MISSION, parse_grid(["STUCK_THRESHOLD=3,5"]), out, launch_cmd=launch)
+    assert out.read_text() == before
+
+def test_cells_that_cannot_run_are_recorded(tmp_path):
+    out = tmp_path / "results.csv"
+    grid = parse_grid(["STUCK_THRESHOLD=3", "wind_kts=-10,0"])
+    assert run_sweep(MISSION, grid, out, workers=2, work_dir=tmp_path / "cells", launch_cmd=_launcher(tmp_path)) == 2
+    rows = {r["wind_kts"]: r for r in _rows(out)}
+    assert rows["0"]["reason"] == "completed"
+    assert rows["-10"]["exit_status"] == "error" and rows["-10"]["reason"].startswith("JSONDecodeError")
+
+    missing = tmp_path / "missing.csv"
+    assert run_sweep(MISSION, grid, missing, work_dir=tmp_path / "cells",
+                     launch_cmd=lambda world: [str(tmp_path / "no_webots")]) == 2
+    assert {r["reason"].split(":")[0] for r in _rows(missing)} == {"FileNotFoundError"}
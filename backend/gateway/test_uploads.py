@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import hashlib
+import os
+
+import pytest
+from bson import ObjectId
+
+pytest.importorskip("mongomock_motor")
+
+from . import uploads
+from .bench.stubs import gateway_client, memory_db
+from .solutions import migrate_embedded
+from .uploads import COMPLETE, DiskStore, GridFSStore, UploadError, create_session, get_session, receive_chunk
+
+def _digest(data):
+    return "sha-256=:" + base64.b64encode(hashlib.sha256(data).digest()).decode() + ":"
+
+async def _body(data, parts=3, fail_after=None):
+    step = max(len(data) // parts, 1)
+    for i in range(0, len(data), step):
+        if fail_after is not None and i >= fail_after:
+            raise ConnectionError("client went away")
+        yield data[i:i + step]
+
+async def _put(db, store, session, data, first, last, digest=None, **body):
+    return await receive_chunk(db, store, session["_id"], f"bytes {first}-{last}/{session['size']}",
+                               digest or _digest(data[first:last + 1]), _body(data[first:last + 1], **body))
+
+async def _read(store, upload_id, first, last):
+    return b"".join([block async for block in store.read(upload_id, first, last)])
+
+def _stores(tmp_path):
+    return {"disk": lambda db: DiskStore(tmp_path), "gridfs": lambda db: GridFSStore(db, block=1024)}
+
+@pytest.mark.parametrize("kind", ["disk", "gridfs"])
+def test_chunks_resume_after_interruption_and_reject_bad_digests(tmp_path, kind):
+    db = memory_db()
+    store = _stores(tmp_path)[kind](db)
+    data = os.urandom(10_000)
+
+    async def scenario():
+        session = await create_session(db, store, "run.mp4", "video/mp4", len(data), 4096, 1 << 20,
+                                       hashlib.sha256(data).hexdigest())
+        assert session["chunk_size"] == 4096
+        await _put(db, store, session, data, 0, 4095)
+        errors = {}
+        # The connection drops halfway through the second chunk
+        with pytest.raises(ConnectionError):
+            await _put(db, store, session, data, 4096, 8191, parts=4, fail_after=2048)
+        for name, call in {
+            "digest": _put(db, store, session, data, 4096, 8191, digest=_digest(b"other")),
+            "order": _put(db, store, session, data, 8192, 9999),
+            "replay": _put(db, store, session, data, 0, 4095),
+            "short": _put(db, store, session, data, 4096, 6000),
+        }.items():
+            with pytest.raises(UploadError) as e:
+                await call
+            errors[name] = (e.value.status, e.value.offset)
+        resumed = await get_session(db, session["_id"])
+        assert await _read(store, session["_id"], 0, 9999) == data[:4096]
+        await _put(db, store, session, data, 4096, 8191)
+        done = await _put(db, store, session, data, 8192, 9999)
+        return resumed, errors, done
+
+    resumed, errors, done = asyncio.run(scenario())
+    assert resumed["received"] == 4096 and resumed["lease"] == 0.0
+    assert errors == {"digest": (422, 4096), "order": (409, 4096), "replay": (409, 4096), "short": (400, None)}
+    assert done["status"] == COMPLETE and done["received"] == len(data)
+    assert asyncio.run(_read(store, done["_id"], 0, 9999)) == data
+    assert asyncio.run(_read(store, done["_id"], 1000, 5000)) == data[1000:5001]
+    if kind == "gridfs":
+        file = asyncio.run(db["fs.files"].find_one({"_id": done["_id"]}))
+        assert file["length"] == len(data) and file["chunkSize"] == 1024
+
+@pytest.mark.parametrize("kind", ["disk", "gridfs"])
+def test_writer_that_lost_its_lease_leaves_the_upload_alone(tmp_path, monkeypatch, kind):
+    db = memory_db()
+    store = _stores(tmp_path)[kind](db)
+    data = os.urandom(6000)
+    monkeypatch.setattr(uploads, "LEASE_SEC", 0.05)
+
+    async def scenario():
+        session = await create_session(db, store, "run.mp4", "video/mp4", len(data), 4096, 1 << 20)
+        resume = asyncio.Event()
+
+        async def stalled():
+            yield data[:2048]
+            await resume.wait()
+            yield data[2048:4096]
+
+        stale = asyncio.create_task(receive_chunk(db, store, session["_id"], f"bytes 0-4095/{len(data)}",
+                                                  _digest(data[:4096]), stalled()))
+        await asyncio.sleep(0.1)
+        # The client gave up on the stalled request and retried the same chunk
+        await _put(db, store, session, data, 0, 4095)
+        resume.set()
+        with pytest.raises(UploadError) as e:
+            await stale
+        done = await _put(db, store, session, data, 4096, 5999)
+        return e.value, done, await _read(store, session["_id"], 0, len(data) - 1)
+
+    error, done, stored = asyncio.run(scenario())
+    # Its chunk was fine, but it had lost the lease: refused, without cutting the retry's bytes
+    assert (error.status, error.offset) == (409, 4096)
+    assert done["status"] == COMPLETE and stored == data
+    if kind == "disk":
+        assert not list(tmp_path.glob("*.part"))
+    else:
+        assert asyncio.run(db["fs.chunks"].count_documents({"upload": {"$exists": True}})) == 0
+
+def test_whole_file_digest_mismatch_restarts_the_upload(tmp_path):
+    db = memory_db()
+    store = DiskStore(tmp_path)
+    data = os.urandom(3000)
+
+    async def scenario():
+        session = await create_session(db, store, "run.mp4", "video/mp4", len(data), 2048, 1 << 20, "0" * 64)
+        await _put(db, store, session, data, 0, 2047)
+        with pytest.raises(UploadError) as e:
+            await _put(db, store, session, data, 2048, 2999)
+        return e.value, await get_session(db, session["_id"])
+
+    error, session = asyncio.run(scenario())
+    assert (error.status, error.offset) == (422, 0)
+    assert session["received"] == 0 and session["status"] != COMPLETE
+    assert store.path(session["_id"]).stat().st_size == 0
+
+def test_gateway_upload_playback_and_solution():
+    db = memory_db()
+    data = os.urandom(50_000)
+
+    async def scenario():
+        async with gateway_client(db) as client:
+            rejected = await client.post("/uploads", json={"filename": "a.txt", "content_type": "text/plain", "size": 5})
+            res = await client.post("/uploads", json={"filename": "run.mp4", "content_type": "video/mp4",
+                                                      "size": len(data)})
+            upload = res.json()
+            url = f"/uploads/{upload['upload_id']}"
+            head = await client.head(url)
+            put = await client.put(url, content=data, headers={
+                "Content-Range": f"bytes 0-{len(data) - 1}/{len(data)}", "Content-Digest": _digest(data)})
+            video = put.json()["video_url"]
+            full = await client.get(video)
+            part = await client.get(video, headers={"Range": "bytes=100-199"})
+            tail = await client.get(video, headers={"Range": "bytes=-10"})
+            beyond = await client.get(video, headers={"Range": "bytes=60000-"})
+            unfinished = await client.post("/uploads", json={"filename": "b.mp4", "content_type": "video/mp4",
+                                                             "size": 10})
+
+            challenge = (await client.post("/challenges", json={
+                "title": "Gusty gate", "body_md": "Fly it", "author_uid": "u1", "created": "", "updated": ""})).json()
+            solutions = f"/challenges/{challenge['_id']}/solutions"
+            content = "Hold altitude with a feed-forward term"
+            posted = await client.post(solutions, json={"provider_id": "p1", "content": content,
+                                                        "video_id": upload["upload_id"]})
+            missing = await client.post(solutions, json={"provider_id": "p1", "content": content,
+                                                         "video_id": unfinished.json()["upload_id"]})
+            listed = (await client.get(solutions)).json()
+            count = (await db.challenges.find_one({"_id": ObjectId(challenge["_id"])}))["solution_count"]
+            return rejected, upload, head, put, full, part, tail, beyond, posted, missing, listed, count
+
+    rejected, upload, head, put, full, part, tail, beyond, posted, missing, listed, count = asyncio.run(scenario())
+    assert rejected.status_code == 415
+    assert upload["received"] == 0 and head.headers["upload-offset"] == "0"
+    assert put.status_code == 200 and put.headers["upload-offset"] == str(len(data))
+    assert full.status_code == 200 and full.content == data and full.headers["accept-ranges"] == "bytes"
+    assert part.status_code == 206 and part.content == data[100:200]
+    assert part.headers["content-range"] == f"bytes 100-199/{len(data)}"
+    assert tail.status_code == 206 and tail.content == data[-10:]
+    assert beyond.status_code == 416 and beyond.headers["content-range"] == f"bytes */{len(data)}"
+    assert posted.status_code == 201 and posted.json()["video_url"] == put.json()["video_url"]
+    assert missing.status_code == 404
+    assert [s["_id"] for s in listed] == [posted.json()["_id"]] and count == 1
+
+def test_embedded_solutions_move_to_their_collection():
+    db = memory_db()
+
+    async def scenario():
+        ids = (await db.challenges.insert_many([
+            {"title": "a", "solutions": [{"content": "one"}, {"content": "two"}]},
+            {"title": "b", "solutions": []},
+        ])).inserted_ids
+        moved = await migrate_embedded(db), await migrate_embedded(db)
+        challenge = await db.challenges.find_one({"_id": ids[0]})
+        return moved, challenge, await db.solutions.find().to_list(None), str(ids[0])
+
+    moved, challenge, solutions, first = asyncio.run(scenario())
+    assert moved == (2, 0)
+    assert "solutions" not in challenge and challenge["solution_count"] == 2
+    assert sorted(s["content"] for s in solutions) == ["one", "two"]
+    assert {s["challenge_id"] for s in solutions} == {first}
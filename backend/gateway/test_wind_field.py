@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+
+from .mission_compiler import write_wbt
+from .wind_field import KNOTS_TO_MS, GUST_RATIO, build_wind_field, generate
+
+GATES = [{"x": 0, "y": 0, "z": 2}, {"x": 30, "y": 0, "z": 4}, {"x": 30, "y": 20, "z": 2}]
+
+def test_same_seed_same_field():
+    a, meta_a = generate(GATES, 15, seed=7)
+    b, meta_b = generate(GATES, 15, seed=7)
+    c, _ = generate(GATES, 15, seed=8)
+    assert a.dtype == np.float32 and a.shape == (*meta_a["shape"], 3)
+    assert meta_a == meta_b
+    assert a.tobytes() == b.tobytes()
+    assert not np.array_equal(a, c)
+
+def test_mean_wind_and_correlated_gusts():
+    field, meta = generate(GATES, 20, seed=1)
+    mean_speed = 20 * KNOTS_TO_MS
+    heading = meta["heading_rad"]
+    mean = field.reshape(-1, 3).mean(axis=0)
+    assert np.allclose(mean[:2], [mean_speed * np.cos(heading), mean_speed * np.sin(heading)], atol=0.01)
+    assert abs(field[..., 0].std() - GUST_RATIO * mean_speed) < 0.05 * mean_speed
+
+    # Neighbouring grid points and frames are strongly correlated, far ones are not
+    gust = field[..., 0] - field[..., 0].mean()
+    def corr(a, b):
+        return float((a * b).mean() / np.sqrt((a * a).mean() * (b * b).mean()))
+    assert corr(gust[:, :-1], gust[:, 1:]) > 0.8
+    assert corr(gust[:-1], gust[1:]) > 0.8
+    half = gust.shape[1] // 2
+    assert abs(corr(gust[:, :half], gust[:, half:2 * half])) < 0.3
+
+def test_compiled_world_gets_field(tmp_path):
+    meta = {"mission_id": "abc", "gates": [dict(g) for g in GATES], "wind_kts": 12}
+    text = write_wbt("windy", meta, out_dir=tmp_path).read_text()
+    grid = json.loads((tmp_path / "windy_wind.json").read_text())
+    data = tmp_path / grid["data"]
+    assert f'"WIND_FIELD={tmp_path / "windy_wind.json"}"' in text
+    assert data.stat().st_size == 4 * 3 * np.prod(grid["shape"])
+
+    # A rebuild swaps in fresh files, so a supervisor mapping the old one keeps reading it whole
+    mapped = np.memmap(data, dtype="<f4", mode="r")
+    before = mapped.copy()
+    build_wind_field("windy", meta, tmp_path)
+    assert np.array_equal(mapped, before) and data.read_bytes() == before.tobytes()
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # Calm missions compile without a field
+    assert build_wind_field("calm", {"gates": GATES, "wind_kts": 0}, tmp_path) is None
+    assert "WIND_FIELD" not in write_wbt("calm", {"mission_id": "abc", "gates": []}, out_dir=tmp_path).read_text()
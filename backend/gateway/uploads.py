@@ -0,0 +1,413 @@
+"""Resumable, chunked video uploads for challenge solutions.
+
+A client opens a session with POST /uploads (file size, content type and,
+optionally, the SHA-256 of the whole file), then PUTs the bytes in order:
+
+    PUT /uploads/{id}
+    Content-Range: bytes 0-8388607/52428800
+    Content-Digest: sha-256=:<base64 SHA-256 of this chunk>:
+
+Each body is streamed into a staging area of the store as it arrives and
+hashed on the way. Only a chunk whose length and digest match is promoted
+into the upload; anything else is discarded, so everything below the
+session's received offset is verified. HEAD /uploads/{id} reports
+that offset (Upload-Offset), and a client whose connection dropped resumes
+from there. Every chunk but the last must be a multiple of chunk_size.
+
+While a chunk is being written the session holds a short lease, taken and
+released with conditional updates. A writer whose lease ran out may still be
+streaming when another request takes the same offset over; it only ever
+touches its own staging, and promotion first renews the lease, so the upload
+itself is only written by the current lease holder. When the last byte is in, the file is checked
+against the whole-file digest if one was given, and it becomes a video that
+GET /videos/{id} serves with range requests.
+
+Sessions live in db.uploads:
+
+    {"_id": ObjectId, "filename", "content_type", "size", "chunk_size", "sha256",
+     "received": offset, "status": "uploading" | "complete", "store", "lease", "created", "updated"}
+
+The bytes go to one of two stores: DiskStore keeps a file per upload in a
+directory; GridFSStore writes standard GridFS fs.files / fs.chunks documents,
+so drivers and mongofiles can read the videos as well.
+"""
+import asyncio
+import base64
+import binascii
+import hashlib
+import re
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional, Tuple
+
+from bson import ObjectId
+
+from .serialization import utc_timestamp
+
+UPLOADING = "uploading"
+COMPLETE = "complete"
+READ_BLOCK = 256 << 10
+LEASE_SEC = 120.0      # longest a single chunk PUT may take before another may retry it
+
+CONTENT_RANGE_RE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+class UploadError(ValueError):
+    """A request the upload protocol refuses; status is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400, offset: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset      # the session's received offset, when the client needs it to resume
+
+class DiskStore:
+    """One file per upload, named by its id."""
+    name = "disk"
+    block = 1
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path(self, upload_id: ObjectId) -> Path:
+        return self.root / f"{upload_id}.bin"
+
+    async def create(self, upload_id: ObjectId):
+        await asyncio.to_thread(self.path(upload_id).touch)
+
+    def part(self, upload_id: ObjectId, attempt: ObjectId) -> Path:
+        return self.root / f"{upload_id}.{attempt}.part"
+
+    async def write(self, upload_id: ObjectId, attempt: ObjectId, offset: int, chunks: AsyncIterator[bytes]):
+        f = await asyncio.to_thread(open, self.part(upload_id, attempt), "wb")
+        try:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def promote(self, upload_id: ObjectId, attempt: ObjectId, offset: int):
+        def append():
+            part = self.part(upload_id, attempt)
+            # Anything past offset is left over from an attempt that was not committed
+            with open(self.path(upload_id), "r+b") as f, open(part, "rb") as src:
+                f.truncate(offset)
+                f.seek(offset)
+                shutil.copyfileobj(src, f, READ_BLOCK)
+            part.unlink()
+        await asyncio.to_thread(append)
+
+    async def discard(self, upload_id: ObjectId, attempt: ObjectId):
+        await asyncio.to_thread(self.part(upload_id, attempt).unlink, missing_ok=True)
+
+    async def truncate(self, upload_id: ObjectId, offset: int):
+        def cut():
+            with open(self.path(upload_id), "r+b") as f:
+                f.truncate(offset)
+        await asyncio.to_thread(cut)
+
+    async def finalize(self, session: dict):
+        pass
+
+    async def read(self, upload_id: ObjectId, start: int, end: int) -> AsyncIterator[bytes]:
+        """Bytes start..end inclusive, in blocks."""
+        f = await asyncio.to_thread(open, self.path(upload_id), "rb")
+        try:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = await asyncio.to_thread(f.read, min(READ_BLOCK, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def delete(self, upload_id: ObjectId):
+        def remove():
+            for part in self.root.glob(f"{upload_id}.*.part"):
+                part.unlink(missing_ok=True)
+            self.path(upload_id).unlink(missing_ok=True)
+        await asyncio.to_thread(remove)
+
+class GridFSStore:
+    """GridFS layout written chunk by chunk: fs.chunks as bytes arrive, fs.files once complete."""
+    name = "gridfs"
+
+    def __init__(self, db, bucket: str = "fs", block: int = 1 << 20):
+        self.db = db
+        self.files = db[f"{bucket}.files"]
+        self.chunks = db[f"{bucket}.chunks"]
+        self.block = block       # GridFS chunkSize; session chunk sizes are multiples of it
+
+    async def ensure_indexes(self):
+        await self.chunks.create_index([("files_id", 1), ("n", 1)], unique=True)
+        # Staged chunks left behind by a worker that died mid-chunk
+        await self.chunks.create_index("upload", sparse=True)
+
+    async def create(self, upload_id: ObjectId):
+        pass
+
+    async def write(self, upload_id: ObjectId, attempt: ObjectId, offset: int, chunks: AsyncIterator[bytes]):
+        # Staged under the attempt's id until promoted
+        n = offset // self.block
+        pending = bytearray()
+        async for chunk in chunks:
+            pending += chunk
+            while len(pending) >= self.block:
+                await self.chunks.insert_one({"files_id": attempt, "upload": upload_id, "n": n,
+                                              "data": bytes(pending[:self.block])})
+                del pending[:self.block]
+                n += 1
+        if pending:
+            # Only the file's last chunk may be short; the caller discards anything else
+            await self.chunks.insert_one({"files_id": attempt, "upload": upload_id, "n": n, "data": bytes(pending)})
+
+    async def promote(self, upload_id: ObjectId, attempt: ObjectId, offset: int):
+        await self.chunks.delete_many({"files_id": upload_id, "n": {"$gte": offset // self.block}})
+        await self.chunks.update_many({"files_id": attempt},
+                                      {"$set": {"files_id": upload_id}, "$unset": {"upload": ""}})
+
+    async def discard(self, upload_id: ObjectId, attempt: ObjectId):
+        await self.chunks.delete_many({"files_id": attempt})
+
+    async def truncate(self, upload_id: ObjectId, offset: int):
+        await self.chunks.delete_many({"files_id": upload_id, "n": {"$gte": offset // self.block}})
+
+    async def finalize(self, session: dict):
+        await self.files.replace_one({"_id": session["_id"]}, {
+            "_id": session["_id"],
+            "length": session["size"],
+            "chunkSize": self.block,
+            "uploadDate": datetime.now(timezone.utc),
+            "filename": session["filename"],
+            "metadata": {"contentType": session["content_type"], "sha256": session.get("sha256")},
+        }, upsert=True)
+
+    async def read(self, upload_id: ObjectId, start: int, end: int) -> AsyncIterator[bytes]:
+        first, last = start // self.block, end // self.block
+        cursor = self.chunks.find({"files_id": upload_id, "n": {"$gte": first, "$lte": last}}).sort("n", 1)
+        async for doc in cursor:
+            base = doc["n"] * self.block
+            yield bytes(doc["data"][max(start - base, 0):end - base + 1])
+
+    async def delete(self, upload_id: ObjectId):
+        await self.chunks.delete_many({"files_id": upload_id})
+        await self.chunks.delete_many({"upload": upload_id})
+        await self.files.delete_one({"_id": upload_id})
+
+async def ensure_indexes(db, store):
+    # Expiry sweeps over abandoned sessions
+    await db.uploads.create_index([("status", 1), ("updated", 1)])
+    if isinstance(store, GridFSStore):
+        await store.ensure_indexes()
+
+def parse_upload_id(upload_id: str) -> ObjectId:
+    if not ObjectId.is_valid(upload_id):
+        raise UploadError("Invalid upload ID format")
+    return ObjectId(upload_id)
+
+def parse_content_range(header: Optional[str]) -> Tuple[int, int, int]:
+    """(first, last, total) from "bytes first-last/total"."""
+    match = CONTENT_RANGE_RE.match((header or "").strip())
+    if not match:
+        raise UploadError("Content-Range must be 'bytes first-last/total'")
+    first, last, total = map(int, match.groups())
+    if last < first or last >= total:
+        raise UploadError("Content-Range is out of order or past the total")
+    return first, last, total
+
+def parse_content_digest(header: Optional[str]) -> bytes:
+    """The SHA-256 from an RFC 9530 Content-Digest header ("sha-256=:<base64>:")."""
+    for item in (header or "").split(","):
+        algorithm, _, value = item.strip().partition("=")
+        if algorithm.strip().lower() != "sha-256":
+            continue
+        try:
+            digest = base64.b64decode(value.strip().strip(":"), validate=True)
+        except binascii.Error:
+            break
+        if len(digest) == 32:
+            return digest
+        break
+    raise UploadError("Content-Digest with a sha-256 value is required")
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(first, last) for a single-range Range header; None to send the whole file.
+
+    Raises UploadError 416 when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: the last n bytes
+        n = int(last)
+        if n == 0:
+            raise UploadError("Range not satisfiable", 416)
+        return max(size - n, 0), size - 1
+    first = int(first)
+    last = min(int(last), size - 1) if last else size - 1
+    if first >= size or last < first:
+        raise UploadError("Range not satisfiable", 416)
+    return first, last
+
+def session_view(session: dict) -> dict:
+    view = {
+        "upload_id": str(session["_id"]),
+        "filename": session["filename"],
+        "content_type": session["content_type"],
+        "size": session["size"],
+        "chunk_size": session["chunk_size"],
+        "received": session["received"],
+        "status": session["status"],
+    }
+    if session["status"] == COMPLETE:
+        view["video_url"] = f"/videos/{session['_id']}"
+    return view
+
+async def create_session(db, store, filename: str, content_type: str, size: int, chunk_size: int,
+                         max_bytes: int, sha256: Optional[str] = None) -> dict:
+    content_type = content_type.split(";")[0].strip().lower()
+    if not content_type.startswith("video/"):
+        raise UploadError("content_type must be video/*", 415)
+    if size <= 0:
+        raise UploadError("size must be positive")
+    if size > max_bytes:
+        raise UploadError(f"video larger than {max_bytes} bytes", 413)
+    if sha256 is not None and not SHA256_RE.match(sha256.lower()):
+        raise UploadError("sha256 must be 64 hex digits")
+    # Chunk boundaries have to fall on store block boundaries
+    chunk_size = max(chunk_size // store.block, 1) * store.block
+    now = utc_timestamp()
+    session = {
+        "_id": ObjectId(),
+        "filename": filename,
+        "content_type": content_type,
+        "size": size,
+        "chunk_size": chunk_size,
+        "sha256": sha256.lower() if sha256 else None,
+        "received": 0,
+        "status": UPLOADING,
+        "store": store.name,
+        "lease": 0.0,
+        "created": now,
+        "updated": now,
+    }
+    await store.create(session["_id"])
+    await db.uploads.insert_one(session)
+    return session
+
+async def get_session(db, upload_id: ObjectId) -> dict:
+    session = await db.uploads.find_one({"_id": upload_id})
+    if not session:
+        raise UploadError("Upload not found", 404)
+    return session
+
+async def receive_chunk(db, store, upload_id: ObjectId, content_range: Optional[str],
+                        content_digest: Optional[str], body: AsyncIterator[bytes]) -> dict:
+    """Stream one ranged PUT body into the store; returns the session after it."""
+    first, last, total = parse_content_range(content_range)
+    expected = parse_content_digest(content_digest)
+    session = await get_session(db, upload_id)
+    if session["status"] == COMPLETE:
+        raise UploadError("Upload already complete", 409, session["size"])
+    if total != session["size"]:
+        raise UploadError(f"Content-Range total must be {session['size']}")
+    if first != session["received"]:
+        raise UploadError(f"Expected the chunk starting at {session['received']}", 409, session["received"])
+    length = last - first + 1
+    if last != total - 1 and length % session["chunk_size"]:
+        raise UploadError(f"Chunks before the last must be a multiple of {session['chunk_size']} bytes")
+
+    lease = time.time() + LEASE_SEC
+    claimed = await db.uploads.update_one(
+        {"_id": upload_id, "status": UPLOADING, "received": first, "lease": {"$lt": time.time()}},
+        {"$set": {"lease": lease}},
+    )
+    if not claimed.matched_count:
+        session = await get_session(db, upload_id)
+        raise UploadError("Another chunk of this upload is in progress", 409, session["received"])
+
+    hasher, seen = hashlib.sha256(), 0
+
+    async def verified():
+        nonlocal seen
+        async for chunk in body:
+            seen += len(chunk)
+            if seen > length:
+                raise UploadError(f"Body longer than the {length} bytes in Content-Range")
+            hasher.update(chunk)
+            yield chunk
+
+    attempt = ObjectId()
+    committed = False
+    try:
+        await store.write(upload_id, attempt, first, verified())
+        if seen != length:
+            raise UploadError(f"Body has {seen} of the {length} bytes in Content-Range")
+        if hasher.digest() != expected:
+            raise UploadError("Chunk does not match its Content-Digest", 422, first)
+        # Renew the lease before touching the upload: a writer that lost it leaves the upload alone
+        renewed = time.time() + LEASE_SEC
+        held = await db.uploads.update_one({"_id": upload_id, "lease": lease}, {"$set": {"lease": renewed}})
+        if not held.matched_count:
+            session = await get_session(db, upload_id)
+            raise UploadError("Upload lease expired while the chunk was written", 409, session["received"])
+        lease = renewed
+        await store.promote(upload_id, attempt, first)
+        session = await db.uploads.find_one_and_update(
+            {"_id": upload_id, "lease": lease},
+            {"$set": {"received": last + 1, "lease": 0.0, "updated": utc_timestamp()}},
+            return_document=True,
+        )
+        committed = session is not None
+        if not committed:
+            raise UploadError("Upload lease expired while the chunk was promoted", 409)
+    finally:
+        if not committed:
+            await store.discard(upload_id, attempt)
+            await db.uploads.update_one({"_id": upload_id, "lease": lease}, {"$set": {"lease": 0.0}})
+
+    if session["received"] == session["size"]:
+        session = await _complete(db, store, session)
+    return session
+
+async def _complete(db, store, session: dict) -> dict:
+    if session.get("sha256"):
+        hasher = hashlib.sha256()
+        async for block in store.read(session["_id"], 0, session["size"] - 1):
+            hasher.update(block)
+        if hasher.hexdigest() != session["sha256"]:
+            # Every chunk matched its own digest, so the client hashed a different file:
+            # start over rather than serve it
+            await store.truncate(session["_id"], 0)
+            await db.uploads.update_one({"_id": session["_id"]}, {"$set": {"received": 0, "updated": utc_timestamp()}})
+            raise UploadError("Upload does not match its sha256; it was reset to offset 0", 422, 0)
+    await store.finalize(session)
+    return await db.uploads.find_one_and_update(
+        {"_id": session["_id"]},
+        {"$set": {"status": COMPLETE, "updated": utc_timestamp()}},
+        return_document=True,
+    )
+
+async def get_video(db, upload_id: ObjectId) -> dict:
+    session = await db.uploads.find_one({"_id": upload_id, "status": COMPLETE})
+    if not session:
+        raise UploadError("Video not found", 404)
+    return session
+
+async def expire_stale(db, store, max_age_sec: float) -> int:
+    """Drop sessions left incomplete for max_age_sec; returns how many."""
+    cutoff = (datetime.now(timezone.utc) - timedelta(seconds=max_age_sec)).isoformat(timespec="microseconds")
+    expired = 0
+    async for session in db.uploads.find({"status": UPLOADING, "updated": {"$lt": cutoff}}, {"_id": 1}):
+        await store.delete(session["_id"])
+        await db.uploads.delete_one({"_id": session["_id"], "status": UPLOADING})
+        expired += 1
+    return expired
@@ -0,0 +1,120 @@
+"""Precomputed gust fields for missions with wind.
+
+At compile time the mission volume (gate bounding box plus a margin) is
+covered by a coarse grid, and a looping sequence of wind frames is generated
+over it: a steady mean wind of ``wind_kts`` from a seeded direction, plus
+gusts made by low-pass filtering white noise in space and time. The field is
+written as raw little-endian float32 in (frame, x, y, z, component) order,
+with a JSON sidecar describing the grid, so the supervisor can memory-map it
+and look up any point with a fixed number of reads.
+
+The same seed and meta always give byte-identical files.
+"""
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+import json
+import os
+import tempfile
+import zlib
+
+import numpy as np
+
+from .lap_estimator import gate_points
+
+KNOTS_TO_MS = 0.514444
+FIELD_VERSION = 1
+
+# Grid resolution and size limits; spacing grows on big courses so files stay small
+DEFAULT_SPACING = 2.0       # m
+MAX_POINTS_PER_AXIS = 40
+FRAMES = 32
+FRAME_DT = 0.5              # s between frames; the sequence loops every FRAMES * FRAME_DT
+MARGIN = 6.0                # m around the gates
+CEILING = 4.0               # m above the highest gate
+
+GUST_RATIO = 0.35           # horizontal gust std as a fraction of the mean wind
+VERTICAL_RATIO = 0.4        # vertical gust std relative to horizontal
+LENGTH_SCALE = 8.0          # m, spatial correlation length
+TIME_SCALE = 2.0            # s, temporal correlation time
+
+def mission_seed(mission_name: str, meta: dict) -> int:
+    """meta["wind_seed"] when set, otherwise a stable hash of the mission name."""
+    if meta.get("wind_seed") is not None:
+        return int(meta["wind_seed"])
+    return zlib.crc32(mission_name.encode())
+
+def mission_volume(gates: Sequence[dict], margin: float = MARGIN) -> Tuple[np.ndarray, np.ndarray]:
+    """(lower, upper) corners of the box the drone can reasonably reach."""
+    points = gate_points(gates)
+    if not len(points):
+        points = np.zeros((1, 3))
+    lower = points.min(axis=0) - margin
+    upper = points.max(axis=0) + margin
+    lower[2] = max(lower[2], 0.0)              # nothing flies below the ground
+    upper[2] = max(upper[2], points[:, 2].max() + CEILING)
+    return lower, upper
+
+def _filtered_noise(rng: np.random.Generator, shape: tuple, spacing: float) -> np.ndarray:
+    """Zero-mean, unit-variance noise with Gaussian space/time correlation, periodic in every axis."""
+    noise = rng.standard_normal(shape, dtype=np.float64)
+    freqs = [np.fft.fftfreq(shape[0], d=FRAME_DT)] + [np.fft.fftfreq(n, d=spacing) for n in shape[1:]]
+    ft, fx, fy, fz = np.meshgrid(*freqs, indexing="ij", sparse=True)
+    k2 = fx ** 2 + fy ** 2 + fz ** 2
+    spectrum = np.exp(-2 * np.pi ** 2 * (k2 * LENGTH_SCALE ** 2 + ft ** 2 * TIME_SCALE ** 2))
+    spectrum[0, 0, 0, 0] = 0.0                 # gusts average out; the mean wind is added separately
+    field = np.fft.ifftn(np.fft.fftn(noise) * spectrum).real
+    std = field.std()
+    return field / std if std > 0 else field
+
+def generate(gates: Sequence[dict], wind_kts: float, seed: int,
+             spacing: float = DEFAULT_SPACING, frames: int = FRAMES) -> Tuple[np.ndarray, dict]:
+    """Return the (frames, nx, ny, nz, 3) float32 field in m/s and its grid description."""
+    lower, upper = mission_volume(gates)
+    spacing = max(spacing, float((upper - lower).max()) / (MAX_POINTS_PER_AXIS - 1))
+    counts = np.maximum(np.ceil((upper - lower) / spacing).astype(int) + 1, 2)
+    shape = (frames, *counts.tolist())
+
+    rng = np.random.default_rng(seed)
+    mean_speed = float(wind_kts) * KNOTS_TO_MS
+    heading = rng.uniform(0, 2 * np.pi)
+    mean = np.array([np.cos(heading), np.sin(heading), 0.0]) * mean_speed
+    gust = GUST_RATIO * mean_speed
+    field = np.empty((*shape, 3), dtype=np.float32)
+    for c, scale in enumerate((gust, gust, gust * VERTICAL_RATIO)):
+        field[..., c] = mean[c] + scale * _filtered_noise(rng, shape, spacing)
+
+    meta = {
+        "version": FIELD_VERSION,
+        "seed": int(seed),
+        "wind_kts": float(wind_kts),
+        "heading_rad": round(float(heading), 6),
+        "origin": [round(float(v), 6) for v in lower],
+        "spacing": round(float(spacing), 6),
+        "shape": list(shape),
+        "frame_dt": FRAME_DT,
+    }
+    return field, meta
+
+def _replace(path: Path, body: bytes):
+    # A supervisor may have the old file mapped; the rename leaves it whole
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+def write_field(base_path: Path, field: np.ndarray, meta: dict) -> Path:
+    """Write <base>.f32 and <base>.json; return the JSON path the supervisor is given."""
+    data_path = base_path.with_suffix(".f32")
+    _replace(data_path, field.astype("<f4", copy=False).tobytes())
+    json_path = base_path.with_suffix(".json")
+    _replace(json_path, json.dumps(meta | {"data": data_path.name}, indent=2).encode())
+    return json_path
+
+def build_wind_field(mission_name: str, meta: dict, out_dir: Path) -> Optional[Path]:
+    """Generate the mission's field under out_dir, or None when there is no wind."""
+    wind_kts = float(meta.get("wind_kts") or 0)
+    if wind_kts <= 0:
+        return None
+    out_dir.mkdir(parents=True, exist_ok=True)
+    field, grid = generate(meta.get("gates", []), wind_kts, mission_seed(mission_name, meta))
+    return write_field(out_dir / f"{mission_name}_wind", field, grid)
@@ -0,0 +1,55 @@
+import { NextResponse } from "next/server";
+import { getAuth } from "@clerk/nextjs/server";
+
+// Solutions live in the gateway's solutions collection (backend/gateway/solutions.py)
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
+
+export async function GET(
+  request: Request,
+  { params }: { params: { id: string } }
+) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const query = new URLSearchParams();
+    for (const key of ["sort", "limit", "skip"]) {
+      const value = searchParams.get(key);
+      if (value) query.set(key, value);
+    }
+    const response = await fetch(`${BACKEND_URL}/challenges/${params.id}/solutions?${query}`, { cache: "no-store" });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error("Error fetching solutions:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch solutions" },
+      { status: 500 }
+    );
+  }
+}
+
+export async function POST(
+  request: Request,
+  { params }: { params: { id: string } }
+) {
+  try {
+    const { userId } = getAuth(request);
+    if (!userId) {
+      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+    }
+
+    const solution = await request.json();
+    const response = await fetch(`${BACKEND_URL}/challenges/${params.id}/solutions`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ ...solution, provider_id: userId }),
+    });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error("Error submitting solution:", error);
+    return NextResponse.json(
+      { error: "Failed to submit solution" },
+      { status: 500 }
+    );
+  }
+}
@@ -20,7 +20,7 @@ export async function POST(request: Request) {
       updated: new Date().toISOString(),
       state: "draft",
       upvotes: 0,
-      solutions: [],
+      solution_count: 0,
       redactions: [],
       moderators: [],
       verification_required: data.classification_level !== "unclassified",
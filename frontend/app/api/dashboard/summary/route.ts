@@ -0,0 +1,18 @@
+import { NextResponse } from "next/server";
+
+export async function GET() {
+  try {
+    const response = await fetch("http://localhost:8001/dashboard/summary", { cache: "no-store" });
+    if (!response.ok) {
+      throw new Error("Failed to fetch dashboard summary");
+    }
+    const data = await response.json();
+    return NextResponse.json(data);
+  } catch (error) {
+    console.error("Error fetching dashboard summary:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch dashboard summary" },
+      { status: 500 }
+    );
+  }
+}
@@ -1,23 +1,23 @@
 import { NextResponse } from "next/server";
 import { getAuth } from "@clerk/nextjs/server";
-import { connectToDatabase } from "@/lib/mongodb";
+
+// Comments are stored and paginated by the gateway (backend/gateway/comments.py)
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
 
 export async function GET(
   request: Request,
   { params }: { params: { id: string } }
 ) {
   try {
-    const { db } = await connectToDatabase();
-    const mission = await db.collection("missions").findOne(
-      { _id: params.id },
-      { projection: { comments: 1 } }
-    );
-
-    if (!mission) {
-      return NextResponse.json({ error: "Mission not found" }, { status: 404 });
+    const { searchParams } = new URL(request.url);
+    const query = new URLSearchParams();
+    for (const key of ["limit", "before"]) {
+      const value = searchParams.get(key);
+      if (value) query.set(key, value);
     }
-
-    return NextResponse.json(mission.comments || []);
+    const response = await fetch(`${BACKEND_URL}/missions/${params.id}/comments?${query}`, { cache: "no-store" });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
   } catch (error) {
     console.error("Error fetching comments:", error);
     return NextResponse.json(
@@ -42,23 +42,13 @@ export async function POST(
       return NextResponse.json({ error: "Content is required" }, { status: 400 });
     }
 
-    const { db } = await connectToDatabase();
-    const comment = {
-      content,
-      user_id: userId,
-      created_at: new Date(),
-    };
-
-    const result = await db.collection("missions").updateOne(
-      { _id: params.id },
-      { $push: { comments: comment } }
-    );
-
-    if (result.matchedCount === 0) {
-      return NextResponse.json({ error: "Mission not found" }, { status: 404 });
-    }
-
-    return NextResponse.json(comment);
+    const response = await fetch(`${BACKEND_URL}/missions/${params.id}/comments`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ author: userId, content }),
+    });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
   } catch (error) {
     console.error("Error adding comment:", error);
     return NextResponse.json(
@@ -66,4 +56,4 @@ export async function POST(
       { status: 500 }
     );
   }
-} 
\ No newline at end of file
+}
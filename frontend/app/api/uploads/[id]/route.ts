@@ -0,0 +1,55 @@
+import { NextResponse } from "next/server";
+
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
+
+function withOffset(data: unknown, response: Response) {
+  const headers = new Headers();
+  const offset = response.headers.get("upload-offset");
+  if (offset) headers.set("Upload-Offset", offset);
+  return NextResponse.json(data, { status: response.status, headers });
+}
+
+// Upload state; Upload-Offset is where the next chunk has to start
+export async function GET(
+  request: Request,
+  { params }: { params: { id: string } }
+) {
+  try {
+    const response = await fetch(`${BACKEND_URL}/uploads/${params.id}`, { cache: "no-store" });
+    return withOffset(await response.json(), response);
+  } catch (error) {
+    console.error("Error fetching upload:", error);
+    return NextResponse.json(
+      { error: "Failed to fetch upload" },
+      { status: 500 }
+    );
+  }
+}
+
+// One chunk, streamed through to the gateway rather than buffered here
+export async function PUT(
+  request: Request,
+  { params }: { params: { id: string } }
+) {
+  try {
+    const headers: Record<string, string> = {};
+    for (const name of ["content-range", "content-digest", "content-length"]) {
+      const value = request.headers.get(name);
+      if (value) headers[name] = value;
+    }
+    const response = await fetch(`${BACKEND_URL}/uploads/${params.id}`, {
+      method: "PUT",
+      headers,
+      body: request.body,
+      // Required by Node's fetch to send a streaming request body
+      duplex: "half",
+    } as RequestInit);
+    return withOffset(await response.json(), response);
+  } catch (error) {
+    console.error("Error uploading chunk:", error);
+    return NextResponse.json(
+      { error: "Failed to upload chunk" },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,28 @@
+import { NextResponse } from "next/server";
+import { getAuth } from "@clerk/nextjs/server";
+
+// Resumable video uploads are handled by the gateway (backend/gateway/uploads.py)
+const BACKEND_URL = process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000";
+
+export async function POST(request: Request) {
+  try {
+    const { userId } = getAuth(request);
+    if (!userId) {
+      return NextResponse.json({ error: "Unauthorized" }, { status: 401 });
+    }
+
+    const response = await fetch(`${BACKEND_URL}/uploads`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: await request.text(),
+    });
+    const data = await response.json();
+    return NextResponse.json(data, { status: response.status });
+  } catch (error) {
+    console.error("Error creating upload:", error);
+    return NextResponse.json(
+      { error: "Failed to create upload" },
+      { status: 500 }
+    );
+  }
+}
@@ -2,13 +2,13 @@
 
 import { useState, useEffect } from "react";
 import { useParams } from "next/navigation";
-import { Challenge } from "@/lib/types";
+import { Challenge, Solution } from "@/lib/types";
 import { ChallengeCard } from "@/components/challenge/challenge-card";
 import { SolutionForm } from "@/components/challenge/solution-form";
 import { SolutionList } from "@/components/challenge/solution-list";
 import { ChallengeModerator } from "@/components/challenge/challenge-moderator";
 import { SimilarChallenges } from "@/components/challenge/similar-challenges";
-import { getChallenge } from "@/lib/challenge-service";
+import { getChallenge, getSolutions } from "@/lib/challenge-service";
 import { useToast } from "@/components/ui/use-toast";
 import { Loader2 } from "lucide-react";
 import { useUser } from "@clerk/nextjs";
@@ -16,6 +16,7 @@ import { useUser } from "@clerk/nextjs";
 export default function ChallengePage() {
   const { id } = useParams();
   const [challenge, setChallenge] = useState<Challenge | null>(null);
+  const [solutions, setSolutions] = useState<Solution[]>([]);
   const [loading, setLoading] = useState(true);
   const { toast } = useToast();
   const { user, isLoaded: isUserLoaded } = useUser();
@@ -24,8 +25,12 @@ export default function ChallengePage() {
     const fetchChallenge = async () => {
       try {
         setLoading(true);
-        const data = await getChallenge(id as string);
+        const [data, solutionPage] = await Promise.all([
+          getChallenge(id as string),
+          getSolutions(id as string),
+        ]);
         setChallenge(data);
+        setSolutions(solutionPage);
       } catch (error) {
         toast({
           title: "Error",
@@ -43,9 +48,9 @@ export default function ChallengePage() {
   }, [id]);
 
   const handleSolutionSubmit = () => {
-    // Refresh the challenge data to show the new solution
+    // Refresh the solutions to show the new one
     if (id) {
-      getChallenge(id as string).then(setChallenge);
+      getSolutions(id as string).then(setSolutions);
     }
   };
 
@@ -105,9 +110,9 @@ export default function ChallengePage() {
               </div>
             )}
 
-            {challenge.solutions && challenge.solutions.length > 0 ? (
+            {solutions.length > 0 ? (
               <SolutionList
-                solutions={challenge.solutions}
+                solutions={solutions}
                 onUpvote={handleSolutionSubmit}
               />
             ) : (
@@ -3,9 +3,10 @@
 import { useState, useEffect } from "react";
 import { MissionForm, formSchema } from "@/components/mission/mission-form";
 import { MissionCard } from "@/components/mission/mission-card";
-import { Mission } from "@/lib/types";
+import { DashboardSummary, Mission } from "@/lib/types";
 import { useToast } from "@/components/ui/use-toast";
 import { Button } from "@/components/ui/button";
+import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Plus } from "lucide-react";
 import { z } from "zod";
 import { ChallengeForm } from "@/components/challenge/challenge-form";
@@ -16,6 +17,7 @@ import type { ChallengeFormData } from "@/lib/types";
 export default function Dashboard() {
   const [missions, setMissions] = useState<Mission[]>([]);
   const [challenges, setChallenges] = useState<Challenge[]>([]);
+  const [summary, setSummary] = useState<DashboardSummary | null>(null);
   const [isLoadingMission, setIsLoadingMission] = useState(false);
   const [isLoadingChallenge, setIsLoadingChallenge] = useState(false);
   const [showMissionForm, setShowMissionForm] = useState(false);
@@ -25,8 +27,22 @@ export default function Dashboard() {
   useEffect(() => {
     fetchMissions();
     fetchChallenges();
+    fetchSummary();
   }, []);
 
+  // Counts, top missions and pilots come pre-aggregated from the gateway
+  const fetchSummary = async () => {
+    try {
+      const response = await fetch("/api/dashboard/summary");
+      if (!response.ok) {
+        throw new Error("Failed to fetch dashboard summary");
+      }
+      setSummary(await response.json());
+    } catch (error) {
+      console.error("Error fetching dashboard summary:", error);
+    }
+  };
+
   const fetchMissions = async () => {
     try {
       const response = await fetch("/api/missions");
@@ -207,6 +223,43 @@ export default function Dashboard() {
         </div>
       </div>
 
+      {summary && (
+        <div className="grid gap-4 md:grid-cols-3">
+          <Card>
+            <CardHeader>
+              <CardTitle>Missions</CardTitle>
+            </CardHeader>
+            <CardContent className="space-y-1 text-sm">
+              <p className="text-2xl font-bold">{summary.missions.total}</p>
+              {Object.entries(summary.missions.status).map(([status, count]) => (
+                <p key={status}>{status}: {count}</p>
+              ))}
+              <p>{summary.laps.total} laps flown</p>
+            </CardContent>
+          </Card>
+          <Card>
+            <CardHeader>
+              <CardTitle>Top Missions</CardTitle>
+            </CardHeader>
+            <CardContent className="space-y-1 text-sm">
+              {summary.top_upvoted.slice(0, 5).map((mission) => (
+                <p key={mission.mission}>{mission.mission_name} ({mission.upvotes})</p>
+              ))}
+            </CardContent>
+          </Card>
+          <Card>
+            <CardHeader>
+              <CardTitle>Most Active Pilots</CardTitle>
+            </CardHeader>
+            <CardContent className="space-y-1 text-sm">
+              {summary.top_pilots.slice(0, 5).map((pilot) => (
+                <p key={pilot.pilot}>{pilot.pilot}: {pilot.laps} laps</p>
+              ))}
+            </CardContent>
+          </Card>
+        </div>
+      )}
+
       {showMissionForm && (
         <div className="max-w-2xl mx-auto">
           <MissionForm onSubmit={handleMissionSubmit} isLoading={isLoadingMission} />
@@ -103,7 +103,7 @@ export function ChallengeCard({ challenge, onUpvote, onView }: ChallengeCardProp
           </div>
           <div className="flex items-center gap-1">
             <MessageSquare className="h-4 w-4" />
-            <span>{challenge.solutions?.length || 0} solutions</span>
+            <span>{challenge.solution_count || 0} solutions</span>
           </div>
         </div>
       </CardContent>
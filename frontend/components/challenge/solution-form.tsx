@@ -17,7 +17,7 @@ import {
 import { Input } from "@/components/ui/input";
 import { Textarea } from "@/components/ui/textarea";
 import { useToast } from "@/components/ui/use-toast";
-import { submitSolution } from "@/lib/challenge-service";
+import { submitSolution, uploadVideo } from "@/lib/challenge-service";
 import { Loader2, Upload } from "lucide-react";
 
 const formSchema = z.object({
@@ -36,6 +36,8 @@ interface SolutionFormProps {
 export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [files, setFiles] = useState<File[]>([]);
+  const [video, setVideo] = useState<File | null>(null);
+  const [uploadProgress, setUploadProgress] = useState<number | null>(null);
   const { toast } = useToast();
 
   const form = useForm<z.infer<typeof formSchema>>({
@@ -58,8 +60,16 @@ export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
   const onSubmit = async (values: z.infer<typeof formSchema>) => {
     try {
       setIsSubmitting(true);
+      let video_id: string | undefined;
+      if (video) {
+        setUploadProgress(0);
+        video_id = (await uploadVideo(video, setUploadProgress)).video_id;
+      }
       await submitSolution(challengeId, {
-        ...values,
+        content: values.content,
+        provider_type: values.provider_type,
+        video_id,
+        video_url: values.video_url || undefined,
         attachments: files.map(file => file.name), // In a real app, you'd upload these files
       });
       
@@ -70,6 +80,7 @@ export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
       
       form.reset();
       setFiles([]);
+      setVideo(null);
       onSuccess?.();
     } catch (error) {
       toast({
@@ -79,6 +90,7 @@ export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
       });
     } finally {
       setIsSubmitting(false);
+      setUploadProgress(null);
     }
   };
 
@@ -173,6 +185,20 @@ export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
           )}
         />
 
+        <div className="space-y-2">
+          <FormLabel>Upload Video (Optional)</FormLabel>
+          <Input
+            type="file"
+            accept="video/*"
+            onChange={(e) => setVideo(e.target.files?.[0] ?? null)}
+          />
+          {uploadProgress !== null && (
+            <p className="text-sm text-muted-foreground">
+              Uploading video: {Math.round(uploadProgress * 100)}%
+            </p>
+          )}
+        </div>
+
         <div className="space-y-2">
           <FormLabel>Attachments (Optional)</FormLabel>
           <div className="flex items-center gap-2">
@@ -186,7 +212,7 @@ export function SolutionForm({ challengeId, onSuccess }: SolutionFormProps) {
               type="button"
               variant="outline"
               size="icon"
-              onClick={() => document.querySelector('input[type="file"]')?.click()}
+              onClick={() => document.querySelector<HTMLInputElement>('input[type="file"][multiple]')?.click()}
             >
               <Upload className="h-4 w-4" />
             </Button>
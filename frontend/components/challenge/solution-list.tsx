@@ -2,6 +2,7 @@
 
 import { useState } from "react";
 import { Solution } from "@/lib/types";
+import { videoSrc } from "@/lib/challenge-service";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Avatar, AvatarFallback, AvatarImage } from "@/components/ui/avatar";
 import { Badge } from "@/components/ui/badge";
@@ -106,7 +107,7 @@ export function SolutionList({ solutions, onUpvote }: SolutionListProps) {
                   asChild
                 >
                   <a
-                    href={solution.video_url}
+                    href={videoSrc(solution.video_url)}
                     target="_blank"
                     rel="noopener noreferrer"
                   >
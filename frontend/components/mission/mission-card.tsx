@@ -45,13 +45,27 @@ const trlColors = {
   9: "bg-green-500/10 text-green-500 hover:bg-green-500/20",
 };
 
+const statusColors = {
+  forged: "bg-gray-500/10 text-gray-500 hover:bg-gray-500/20",
+  queued: "bg-yellow-500/10 text-yellow-500 hover:bg-yellow-500/20",
+  running: "bg-blue-500/10 text-blue-500 hover:bg-blue-500/20",
+  completed: "bg-green-500/10 text-green-500 hover:bg-green-500/20",
+  failed: "bg-red-500/10 text-red-500 hover:bg-red-500/20",
+};
+
 export function MissionCard({ mission, onUpvote }: MissionCardProps) {
   const [expanded, setExpanded] = useState(false);
   const [isSimulating, setIsSimulating] = useState(false);
   const [isUpvoting, setIsUpvoting] = useState(false);
   const { toast } = useToast();
   
-  const { leaderboard, isLoading: isLoadingLeaderboard, error: leaderboardError } = useLeaderboard(mission._id);
+  const {
+    leaderboard,
+    status = "forged",
+    isLoading: isLoadingLeaderboard,
+    error: leaderboardError,
+  } = useLeaderboard(mission._id, mission.status);
+  const isFlying = status === "queued" || status === "running";
   
   const formatLapTime = (time: number): string => {
     const minutes = Math.floor(time / 60);
@@ -136,6 +150,9 @@ export function MissionCard({ mission, onUpvote }: MissionCardProps) {
                 <Rocket className="h-3 w-3" />
                 TRL {mission.meta?.trl || 1}
               </Badge>
+              <Badge variant="outline" className={statusColors[status]}>
+                {status}
+              </Badge>
             </div>
             <CardDescription>
               Created {mission.created ? format(new Date(mission.created), "MMM d, yyyy") : "Unknown date"}
@@ -166,7 +183,7 @@ export function MissionCard({ mission, onUpvote }: MissionCardProps) {
                 e.stopPropagation();
                 handleSimulate();
               }}
-              disabled={isSimulating}
+              disabled={isSimulating || isFlying}
             >
               {isSimulating ? (
                 <Loader2 className="h-4 w-4 animate-spin" />
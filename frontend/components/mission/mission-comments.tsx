@@ -1,6 +1,7 @@
 "use client";
 
-import { useState } from "react";
+import { useEffect, useState } from "react";
+import io from "socket.io-client";
 import { format } from "date-fns";
 import { MessageSquare, Send } from "lucide-react";
 import { Button } from "@/components/ui/button";
@@ -19,19 +20,32 @@ interface MissionCommentsProps {
   missionId: string;
 }
 
+const PAGE_SIZE = 20;
+
+// Newest first, without the duplicate a live push makes of our own posts
+function mergeComments(current: Comment[], incoming: Comment[]) {
+  const seen = new Set(current.map((comment) => comment._id));
+  return [...current, ...incoming.filter((comment) => !seen.has(comment._id))]
+    .sort((a, b) => (a._id < b._id ? 1 : -1));
+}
+
 export function MissionComments({ missionId }: MissionCommentsProps) {
   const [comments, setComments] = useState<Comment[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [newComment, setNewComment] = useState("");
   const [isLoading, setIsLoading] = useState(false);
   const { toast } = useToast();
   const { user } = useUser();
 
-  const fetchComments = async () => {
+  const fetchComments = async (before?: string) => {
     try {
-      const response = await fetch(`/api/missions/${missionId}/comments`);
+      const query = new URLSearchParams({ limit: String(PAGE_SIZE) });
+      if (before) query.set("before", before);
+      const response = await fetch(`/api/missions/${missionId}/comments?${query}`);
       if (!response.ok) throw new Error("Failed to fetch comments");
-      const data = await response.json();
-      setComments(data);
+      const data: { comments: Comment[]; next: string | null } = await response.json();
+      setComments((prev) => mergeComments(before ? prev : [], data.comments));
+      setNextCursor(data.next);
     } catch (error) {
       console.error("Error fetching comments:", error);
       toast({
@@ -42,6 +56,23 @@ export function MissionComments({ missionId }: MissionCommentsProps) {
     }
   };
 
+  useEffect(() => {
+    fetchComments();
+
+    // New comments are pushed to the mission's room as they are posted
+    const socket = io(process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000");
+    socket.on("connect", () => socket.emit("join_room", missionId));
+    socket.on("comment", (comment: Comment & { mission: string }) => {
+      if (comment.mission === missionId) {
+        setComments((prev) => mergeComments(prev, [comment]));
+      }
+    });
+    return () => {
+      socket.emit("leave_room", missionId);
+      socket.disconnect();
+    };
+  }, [missionId]);
+
   const handleSubmitComment = async (e: React.FormEvent) => {
     e.preventDefault();
     if (!user) {
@@ -64,7 +95,7 @@ export function MissionComments({ missionId }: MissionCommentsProps) {
       if (!response.ok) throw new Error("Failed to post comment");
       
       const comment = await response.json();
-      setComments((prev) => [comment, ...prev]);
+      setComments((prev) => mergeComments(prev, [comment]));
       setNewComment("");
       toast({
         title: "Success",
@@ -113,6 +144,11 @@ export function MissionComments({ missionId }: MissionCommentsProps) {
             <p className="mt-2 text-sm">{comment.content}</p>
           </div>
         ))}
+        {nextCursor && (
+          <Button variant="outline" className="w-full" onClick={() => fetchComments(nextCursor)}>
+            Load older comments
+          </Button>
+        )}
       </div>
     </div>
   );
@@ -1,6 +1,7 @@
 import useSWR from 'swr';
 import { useEffect, useState } from 'react';
 import io from 'socket.io-client';
+import { MissionStatus } from '@/lib/types';
 
 // Define the structure of a leaderboard entry
 interface LeaderboardEntry {
@@ -8,11 +9,21 @@ interface LeaderboardEntry {
   fastest_lap_time_sec: number;
 }
 
+// A lifecycle event pushed to the mission room when its status changes
+interface MissionStatusEvent {
+  mission: string;
+  from: MissionStatus;
+  to: MissionStatus;
+  at: string;
+  reason?: string;
+}
+
 // Fetcher function for SWR
 const fetcher = (url: string) => fetch(url).then(res => res.json());
 
-export const useLeaderboard = (missionId: string | null) => {
+export const useLeaderboard = (missionId: string | null, initialStatus?: MissionStatus) => {
   const [leaderboard, setLeaderboard] = useState<LeaderboardEntry[]>([]);
+  const [status, setStatus] = useState<MissionStatus | undefined>(initialStatus);
   const [socket, setSocket] = useState<SocketIOClient.Socket | null>(null);
 
   // Fetch initial data using SWR
@@ -64,6 +75,13 @@ export const useLeaderboard = (missionId: string | null) => {
       });
     });
 
+    // Status changes arrive on the same room, so the mission is never polled
+    newSocket.on('mission_status', (event: MissionStatusEvent) => {
+      if (event.mission === missionId) {
+        setStatus(event.to);
+      }
+    });
+
     newSocket.on('disconnect', () => {
       console.log(`Socket.IO disconnected for mission ${missionId}`);
     });
@@ -77,5 +95,5 @@ export const useLeaderboard = (missionId: string | null) => {
     };
   }, [missionId]); // Re-run effect if missionId changes
 
-  return { leaderboard, error, isLoading: !data && !error };
+  return { leaderboard, status, error, isLoading: !data && !error };
 }; 
\ No newline at end of file
@@ -69,11 +69,15 @@ export async function createChallenge(data: ChallengeFormData): Promise<Challeng
 
 // API function to submit a solution
 export async function submitSolution(challengeId: string, solution: {
-  title: string;
-  description: string;
-  code?: string;
+  content: string;
+  provider_type: Solution['provider_type'];
+  provider_name?: string;
+  trl?: number;
+  video_id?: string;
+  video_url?: string;
   attachments?: string[];
-}): Promise<void> {
+  is_anonymous?: boolean;
+}): Promise<Solution> {
   try {
     const response = await fetch(`${API_BASE_URL}/challenges/${challengeId}/solutions`, {
       method: "POST",
@@ -86,12 +90,36 @@ export async function submitSolution(challengeId: string, solution: {
     if (!response.ok) {
       throw new Error("Failed to submit solution");
     }
+    return response.json();
   } catch (error) {
     console.error("Error submitting solution:", error);
     throw error;
   }
 }
 
+// API function to get a page of a challenge's solutions
+export async function getSolutions(challengeId: string, options?: {
+  sort?: 'created' | 'upvotes';
+  limit?: number;
+  skip?: number;
+}): Promise<Solution[]> {
+  try {
+    const queryParams = new URLSearchParams();
+    if (options?.sort) queryParams.append("sort", options.sort);
+    if (options?.limit) queryParams.append("limit", String(options.limit));
+    if (options?.skip) queryParams.append("skip", String(options.skip));
+
+    const response = await fetch(`${API_BASE_URL}/challenges/${challengeId}/solutions?${queryParams.toString()}`);
+    if (!response.ok) {
+      throw new Error("Failed to fetch solutions");
+    }
+    return response.json();
+  } catch (error) {
+    console.error("Error fetching solutions:", error);
+    throw error;
+  }
+}
+
 // API function to upvote a challenge
 export async function upvoteChallenge(id: string): Promise<Challenge> {
   try {
@@ -155,25 +183,85 @@ export async function getSimilarChallenges(id: string): Promise<Challenge[]> {
   }
 }
 
-// API function to upload a video
-export async function uploadVideo(file: File): Promise<{ url: string }> {
-  try {
-    const formData = new FormData();
-    formData.append('video', file);
+const UPLOAD_RETRIES = 5;
 
-    const response = await fetch('/api/upload/video', {
-      method: 'POST',
-      body: formData,
-    });
+async function chunkDigest(chunk: Blob): Promise<string> {
+  const digest = new Uint8Array(await crypto.subtle.digest("SHA-256", await chunk.arrayBuffer()));
+  return `sha-256=:${btoa(String.fromCharCode(...digest))}:`;
+}
 
-    if (!response.ok) {
-      throw new Error(`Failed to upload video: ${response.statusText}`);
+// Where the gateway wants the next chunk to start
+async function uploadOffset(uploadId: string): Promise<number> {
+  const response = await fetch(`${API_BASE_URL}/uploads/${uploadId}`, { cache: "no-store" });
+  if (!response.ok) {
+    throw new Error(`Failed to resume upload: ${response.statusText}`);
+  }
+  return Number(response.headers.get("Upload-Offset") ?? (await response.json()).received);
+}
+
+// API function to upload a video: opens a resumable upload on the gateway and
+// sends the file in checksummed chunks, resuming from the gateway's offset
+// after a dropped connection. Returns the id to reference from a solution.
+export async function uploadVideo(
+  file: File,
+  onProgress?: (fraction: number) => void
+): Promise<{ url: string; video_id: string }> {
+  try {
+    const created = await fetch(`${API_BASE_URL}/uploads`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ filename: file.name, content_type: file.type || "video/mp4", size: file.size }),
+    });
+    if (!created.ok) {
+      throw new Error(`Failed to upload video: ${created.statusText}`);
     }
+    const session = await created.json();
 
-    const result = await response.json();
-    return result;
+    let offset = 0;
+    let failures = 0;
+    while (offset < file.size) {
+      const chunk = file.slice(offset, Math.min(offset + session.chunk_size, file.size));
+      try {
+        const response = await fetch(`${API_BASE_URL}/uploads/${session.upload_id}`, {
+          method: "PUT",
+          headers: {
+            "Content-Range": `bytes ${offset}-${offset + chunk.size - 1}/${file.size}`,
+            "Content-Digest": await chunkDigest(chunk),
+          },
+          body: chunk,
+        });
+        if (response.status === 409 || response.status === 422) {
+          // Out of step with the gateway, or corrupted on the way: carry on from its offset
+          throw new Error(`Chunk at ${offset} refused: ${response.statusText}`);
+        }
+        if (!response.ok) {
+          throw new Error(`Failed to upload video: ${response.statusText}`);
+        }
+        const state = await response.json();
+        offset = state.received;
+        failures = 0;
+        onProgress?.(offset / file.size);
+        if (state.status === "complete") {
+          return { url: state.video_url, video_id: state.upload_id };
+        }
+      } catch (error) {
+        if (++failures > UPLOAD_RETRIES) {
+          throw error;
+        }
+        await new Promise(resolve => setTimeout(resolve, 500 * 2 ** failures));
+        offset = await uploadOffset(session.upload_id);
+      }
+    }
+    throw new Error("Upload ended without completing");
   } catch (error) {
     console.error('Error uploading video:', error);
     throw error;
   }
-} 
\ No newline at end of file
+}
+
+// Gateway-served videos (/videos/{id}) as a playable URL; external links pass through
+export function videoSrc(url: string): string {
+  return url.startsWith("/videos/")
+    ? `${process.env.NEXT_PUBLIC_BACKEND_URL || "http://localhost:8000"}${url}`
+    : url;
+}
@@ -1,5 +1,7 @@
 import { z } from 'zod';
 
+export type MissionStatus = "forged" | "queued" | "running" | "completed" | "failed";
+
 export interface Mission {
   _id: string;
   mission_name: string;
@@ -23,6 +25,24 @@ export interface Mission {
     lap_time_sec: number;
   }>;
   upvotes: number;
+  status?: MissionStatus;
+  status_at?: string;
+  failure_reason?: string;
+}
+
+export interface DashboardSummary {
+  missions: {
+    total: number;
+    terrain: Record<string, number>;
+    domain: Record<string, number>;
+    status: Record<string, number>;
+  };
+  laps: { total: number; flagged: number };
+  top_upvoted: Array<{ mission: string; mission_name: string; upvotes: number }>;
+  top_pilots: Array<{ pilot: string; laps: number }>;
+  recent_laps: Array<{ mission: string; mission_name: string; pilot: string; lap_time_sec: number; at: string }>;
+  updated: string | null;
+  reconciled: string | null;
 }
 
 export interface Simulation {
@@ -69,7 +89,7 @@ export interface Challenge {
   updated: string;
   upvotes: number;
   video_url?: string;
-  solutions: Solution[];
+  solution_count?: number;
   moderators: string[];
   review_notes?: string;
   classification_level?: 'unclassified' | 'confidential' | 'secret' | 'top_secret';
@@ -93,6 +113,7 @@ export interface Solution {
   };
   content: string;
   trl: number;
+  video_id?: string;
   video_url?: string;
   attachments: string[];
   created: string;
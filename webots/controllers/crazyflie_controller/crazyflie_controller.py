@@ -1,9 +1,40 @@
 from controller import Robot, Motor
+import json
 import sys
 
+from flight_control import FlightController, GateFollower, MOTOR_SPIN
+
+# Gates come from controllerArgs ("GATES=[[x, y, z], ...]") or, once the
+# supervisor has located the gate nodes, from this robot's customData. The
+# customData is re-read every COURSE_POLL_STEPS so warm-pool course swaps
+# are picked up without restarting the controller.
+COURSE_POLL_STEPS = 32
+MAX_SPEED = 3.0 # meters/second
+CAPTURE_RADIUS = 0.6 # meters - waypoint counts as reached inside this
+
+def parse_gates(text):
+    """JSON list of [x, y, z] gate centres; empty on anything malformed."""
+    try:
+        gates = json.loads(text) if text else []
+        return [(float(g[0]), float(g[1]), float(g[2])) for g in gates]
+    except (ValueError, TypeError, IndexError, KeyError):
+        print(f"[Pilot] Ignoring malformed gate list: {text[:80]!r}")
+        return []
+
+gates = []
+for arg in sys.argv[1:]:
+    key, _, value = arg.partition("=")
+    if key == "GATES":
+        gates = parse_gates(value)
+    elif key == "MAX_SPEED":
+        MAX_SPEED = float(value)
+    elif key == "CAPTURE_RADIUS":
+        CAPTURE_RADIUS = float(value)
+
 # Get robot instance
 robot = Robot()
 timestep = int(robot.getBasicTimeStep())
+dt = timestep / 1000.0
 
 # Get motor devices
 motors = []
@@ -17,13 +48,47 @@ for name in motor_names:
     motor.setVelocity(0.0)
     motors.append(motor)
 
-print("Crazyflie controller started.")
+imu = robot.getDevice("imu")
+gps = robot.getDevice("gps")
+gyro = robot.getDevice("gyro")
+for sensor in (imu, gps, gyro):
+    sensor.enable(timestep)
+
+controller = FlightController(max_speed=MAX_SPEED)
+follower = GateFollower(gates, capture_radius=CAPTURE_RADIUS)
+custom_data = None
+
+print(f"Crazyflie controller started with {len(gates)} gates.")
+
+# Cached bound methods keep attribute lookups out of the control loop
+step, get_custom_data = robot.step, robot.getCustomData
+get_position, get_speed = gps.getValues, gps.getSpeedVector
+get_attitude, get_rates = imu.getRollPitchYaw, gyro.getValues
+update, target = controller.update, follower.target
+set_m1, set_m2, set_m3, set_m4 = (m.setVelocity for m in motors)
+s1, s2, s3, s4 = MOTOR_SPIN
+steps = 0
 
 # Main loop:
-while robot.step(timestep) != -1:
-    # Simple example: make the motors spin (this won't make it fly yet)
-    for motor in motors:
-        motor.setVelocity(10.0)
+while step(timestep) != -1:
+    if steps % COURSE_POLL_STEPS == 0:
+        data = get_custom_data()
+        if data and data != custom_data:
+            custom_data = data
+            follower.set_gates(parse_gates(data))
+            print(f"[Pilot] Course updated: {len(follower.gates)} gates.")
+    steps += 1
+
+    x, y, z = get_position()
+    vx, vy, vz = get_speed()
+    roll, pitch, yaw = get_attitude()
+    p, q, r = get_rates()
+    if x != x:  # GPS reads NaN on the very first step
+        continue
 
-    # TODO: Implement flight control logic here
-    pass 
\ No newline at end of file
+    tx, ty, tz = target(x, y, z)
+    w = update(dt, x, y, z, vx, vy, vz, roll, pitch, yaw, p, q, r, tx, ty, tz)
+    set_m1(s1 * w[0])
+    set_m2(s2 * w[1])
+    set_m3(s3 * w[2])
+    set_m4(s4 * w[3])
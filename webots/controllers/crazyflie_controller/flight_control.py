@@ -0,0 +1,163 @@
+"""Cascaded flight controller and gate follower for the Crazyflie.
+
+Position -> velocity -> acceleration/attitude -> body torques -> motor
+speeds, with the thrust/torque allocation inverted for the X-frame motor
+layout. The frame is ENU (z up), angles are roll/pitch/yaw in radians.
+Nothing here imports Webots so the math can be checked against a plain
+rigid-body model; all state is preallocated floats so update() does not
+allocate in the control loop.
+"""
+import math
+
+GRAVITY = 9.81
+
+# Crazyflie 2.x, matching Crazyflie.proto and the stock Webots propellers
+MASS = 0.027                       # kg
+INERTIA = (1.66e-5, 1.66e-5, 2.93e-5)
+ARM = 0.031                        # m, motor offset along body x and y
+THRUST_CONSTANT = 4e-5             # N / (rad/s)^2
+TORQUE_CONSTANT = 2.4e-6           # N m / (rad/s)^2
+MAX_MOTOR_SPEED = 100.0            # rad/s, Motor.proto maxVelocity
+
+# Motor order m1..m4: front-right, back-right, back-left, front-left.
+# Spin direction sign per motor (yaw reaction), applied to setVelocity().
+MOTOR_SPIN = (-1.0, 1.0, -1.0, 1.0)
+
+def _clamp(value, limit):
+    return -limit if value < -limit else limit if value > limit else value
+
+class PID:
+    __slots__ = ("kp", "ki", "kd", "i_limit", "integral", "prev_error", "primed")
+
+    def __init__(self, kp, ki=0.0, kd=0.0, i_limit=1.0):
+        self.kp, self.ki, self.kd, self.i_limit = kp, ki, kd, i_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.prev_error = 0.0
+        self.primed = False
+
+    def update(self, error, dt, rate=None):
+        """PID on error; pass rate to use a measured derivative instead of differencing."""
+        if self.ki:
+            self.integral = _clamp(self.integral + error * dt, self.i_limit)
+        if rate is None:
+            rate = (error - self.prev_error) / dt if self.primed else 0.0
+            self.prev_error, self.primed = error, True
+        else:
+            rate = -rate
+        return self.kp * error + self.ki * self.integral + self.kd * rate
+
+class FlightController:
+    """Cascaded position/velocity/attitude controller producing motor speeds."""
+
+    def __init__(self, max_speed=3.0, max_tilt=0.5, max_climb=1.5):
+        self.max_speed = max_speed
+        self.max_tilt = max_tilt
+        self.max_climb = max_climb
+        self.pos_xy = 1.2                      # 1/s, position error -> velocity
+        self.pos_z = 1.5
+        self.vel_x = PID(2.5, 0.4, 0.0, i_limit=1.0)
+        self.vel_y = PID(2.5, 0.4, 0.0, i_limit=1.0)
+        self.vel_z = PID(4.0, 2.0, 0.0, i_limit=1.0)
+        self.roll = PID(0.9, 0.0, 0.12)         # rad -> rad/s^2 (scaled by inertia below)
+        self.pitch = PID(0.9, 0.0, 0.12)
+        self.yaw = PID(0.4, 0.0, 0.08)
+        self.attitude_gain = 600.0
+        self.motor_speeds = [0.0, 0.0, 0.0, 0.0]
+        self.max_motor_thrust = THRUST_CONSTANT * MAX_MOTOR_SPEED ** 2
+
+    def reset(self):
+        for pid in (self.vel_x, self.vel_y, self.vel_z, self.roll, self.pitch, self.yaw):
+            pid.reset()
+
+    def update(self, dt, x, y, z, vx, vy, vz, roll, pitch, yaw, p, q, r, tx, ty, tz, target_yaw=0.0):
+        """One control step towards target (tx, ty, tz); returns the shared motor_speeds list."""
+        # Position loop -> velocity setpoint, limited in speed
+        svx = self.pos_xy * (tx - x)
+        svy = self.pos_xy * (ty - y)
+        horizontal = math.sqrt(svx * svx + svy * svy)
+        if horizontal > self.max_speed:
+            scale = self.max_speed / horizontal
+            svx *= scale
+            svy *= scale
+        svz = _clamp(self.pos_z * (tz - z), self.max_climb)
+
+        # Velocity loop -> world acceleration demand
+        ax = self.vel_x.update(svx - vx, dt)
+        ay = self.vel_y.update(svy - vy, dt)
+        az = self.vel_z.update(svz - vz, dt) + GRAVITY
+
+        # Acceleration -> tilt setpoints in the yaw-rotated frame (small-angle)
+        cy, sy = math.cos(yaw), math.sin(yaw)
+        pitch_sp = _clamp((ax * cy + ay * sy) / GRAVITY, self.max_tilt)
+        roll_sp = _clamp((ax * sy - ay * cy) / GRAVITY, self.max_tilt)
+        tilt = math.cos(roll) * math.cos(pitch)
+        thrust = MASS * max(az, 0.0) / max(tilt, 0.5)
+
+        # Attitude loop -> body torques, using gyro rates for damping
+        g = self.attitude_gain
+        tau_x = INERTIA[0] * g * self.roll.update(roll_sp - roll, dt, p)
+        tau_y = INERTIA[1] * g * self.pitch.update(pitch_sp - pitch, dt, q)
+        yaw_error = math.atan2(math.sin(target_yaw - yaw), math.cos(target_yaw - yaw))
+        tau_z = INERTIA[2] * g * self.yaw.update(yaw_error, dt, r)
+
+        return self.allocate(thrust, tau_x, tau_y, tau_z)
+
+    def allocate(self, thrust, tau_x, tau_y, tau_z):
+        """Invert the X-frame mixer: collective thrust and torques -> motor speeds."""
+        a = tau_x / ARM
+        b = tau_y / ARM
+        c = tau_z * THRUST_CONSTANT / TORQUE_CONSTANT
+        limit = self.max_motor_thrust
+        speeds = self.motor_speeds
+        f = (thrust - a - b - c) * 0.25
+        speeds[0] = math.sqrt((0.0 if f < 0.0 else limit if f > limit else f) / THRUST_CONSTANT)
+        f = (thrust - a + b + c) * 0.25
+        speeds[1] = math.sqrt((0.0 if f < 0.0 else limit if f > limit else f) / THRUST_CONSTANT)
+        f = (thrust + a + b - c) * 0.25
+        speeds[2] = math.sqrt((0.0 if f < 0.0 else limit if f > limit else f) / THRUST_CONSTANT)
+        f = (thrust + a - b + c) * 0.25
+        speeds[3] = math.sqrt((0.0 if f < 0.0 else limit if f > limit else f) / THRUST_CONSTANT)
+        return speeds
+
+def motor_forces(speeds):
+    """Forward model of allocate(): motor speeds -> (thrust, tau_x, tau_y, tau_z)."""
+    f1, f2, f3, f4 = (THRUST_CONSTANT * w * w for w in speeds)
+    k = TORQUE_CONSTANT / THRUST_CONSTANT
+    return (
+        f1 + f2 + f3 + f4,
+        ARM * (-f1 - f2 + f3 + f4),
+        ARM * (-f1 + f2 + f3 - f4),
+        k * (-f1 + f2 - f3 + f4),
+    )
+
+class GateFollower:
+    """Steps through gate positions, looping laps, with a takeoff waypoint first."""
+
+    def __init__(self, gates=(), capture_radius=0.6, min_altitude=0.5, takeoff_altitude=1.0):
+        self.capture_radius_sq = capture_radius * capture_radius
+        self.min_altitude = min_altitude
+        self.takeoff_altitude = takeoff_altitude
+        self.set_gates(gates)
+
+    def set_gates(self, gates):
+        self.gates = [(float(x), float(y), max(float(z), self.min_altitude)) for x, y, z in gates]
+        self.index = -1                # -1 = takeoff
+        self.passed = 0
+
+    def target(self, x, y, z):
+        """Current waypoint, advancing once the drone is within capture_radius of it."""
+        if self.index < 0:
+            tx, ty, tz = x, y, self.takeoff_altitude
+            if z < self.takeoff_altitude - 0.2 or not self.gates:
+                return tx, ty, tz
+            self.index = 0
+        tx, ty, tz = self.gates[self.index]
+        dx, dy, dz = tx - x, ty - y, tz - z
+        if dx * dx + dy * dy + dz * dz < self.capture_radius_sq:
+            self.passed += 1
+            self.index = (self.index + 1) % len(self.gates)
+            tx, ty, tz = self.gates[self.index]
+        return tx, ty, tz
@@ -0,0 +1,122 @@
+import math
+import time
+import tracemalloc
+
+from flight_control import (
+    ARM, GRAVITY, INERTIA, MASS, FlightController, GateFollower, motor_forces,
+)
+
+DT = 0.016      # controller step, the world's basicTimeStep
+SUBSTEPS = 8    # rigid-body integration steps per controller step
+
+class RigidBody:
+    """Quadrotor as one rigid body: motor thrusts along body z, Euler's equations for rotation."""
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.pos = [x, y, z]
+        self.vel = [0.0, 0.0, 0.0]
+        self.att = [0.0, 0.0, 0.0]     # roll, pitch, yaw
+        self.rates = [0.0, 0.0, 0.0]   # body p, q, r
+
+    def advance(self, speeds, dt):
+        thrust, tx, ty, tz = motor_forces(speeds)
+        h = dt / SUBSTEPS
+        for _ in range(SUBSTEPS):
+            roll, pitch, yaw = self.att
+            p, q, r = self.rates
+            # Body z axis in the world frame for R = Rz(yaw) Ry(pitch) Rx(roll)
+            cr, sr = math.cos(roll), math.sin(roll)
+            cp, sp = math.cos(pitch), math.sin(pitch)
+            cy, sy = math.cos(yaw), math.sin(yaw)
+            bx = cr * sp * cy + sr * sy
+            by = cr * sp * sy - sr * cy
+            bz = cr * cp
+            acc = (thrust * bx / MASS, thrust * by / MASS, thrust * bz / MASS - GRAVITY)
+            for i in range(3):
+                self.vel[i] += acc[i] * h
+                self.pos[i] += self.vel[i] * h
+            if self.pos[2] < 0.0:  # ground
+                self.pos[2] = 0.0
+                self.vel = [0.0, 0.0, max(self.vel[2], 0.0)]
+            ix, iy, iz = INERTIA
+            dp = (tx - (iz - iy) * q * r) / ix
+            dq = (ty - (ix - iz) * p * r) / iy
+            dr = (tz - (iy - ix) * p * q) / iz
+            self.rates = [p + dp * h, q + dq * h, r + dr * h]
+            # Body rates -> Euler angle rates
+            tp = math.tan(pitch)
+            self.att = [
+                roll + (p + (q * sr + r * cr) * tp) * h,
+                pitch + (q * cr - r * sr) * h,
+                yaw + (q * sr + r * cr) / cp * h,
+            ]
+
+def _fly(body, controller, follower, seconds):
+    track = []
+    for _ in range(int(seconds / DT)):
+        x, y, z = body.pos
+        tx, ty, tz = follower.target(x, y, z)
+        speeds = controller.update(DT, x, y, z, *body.vel, *body.att, *body.rates, tx, ty, tz)
+        body.advance(speeds, DT)
+        track.append(tuple(body.pos))
+    return track
+
+def test_allocation_round_trip():
+    controller = FlightController()
+    hover = MASS * GRAVITY
+    torques = (2e-4, -1e-4, 5e-6)
+    thrust, *back = motor_forces(controller.allocate(hover, *torques))
+    assert math.isclose(thrust, hover, rel_tol=1e-9)
+    for got, want in zip(back, torques):
+        assert math.isclose(got, want, rel_tol=1e-6)
+    # Motors saturate at zero rather than reversing
+    assert min(controller.allocate(0.0, 0.01 * ARM, 0.0, 0.0)) == 0.0
+
+def test_takeoff_and_hover():
+    body, controller = RigidBody(), FlightController()
+    follower = GateFollower([], takeoff_altitude=1.0)
+    track = _fly(body, controller, follower, 6.0)
+    settled = track[-int(2.0 / DT):]
+    assert all(abs(z - 1.0) < 0.05 for _, _, z in settled)
+    assert all(abs(x) < 0.05 and abs(y) < 0.05 for x, y, _ in settled)
+    assert max(abs(a) for a in body.att) < 0.05
+
+def test_flies_gate_course():
+    gates = [(6, 0, 1.5), (6, 6, 2.5), (0, 6, 1.5), (0, 0, 1.0)]
+    body, controller = RigidBody(), FlightController(max_speed=3.0)
+    follower = GateFollower(gates)
+    track = _fly(body, controller, follower, 60.0)
+    # Two full laps, never touching the ground after takeoff
+    assert follower.passed >= 2 * len(gates)
+    airborne = track[int(2.0 / DT):]
+    assert min(z for _, _, z in airborne) > 0.3
+    # Every gate centre is passed within the capture radius
+    for gx, gy, gz in gates:
+        closest = min((x - gx) ** 2 + (y - gy) ** 2 + (z - gz) ** 2 for x, y, z in track)
+        assert closest < 0.6 ** 2
+
+def test_course_update_restarts_from_takeoff():
+    follower = GateFollower([(5, 0, 2)])
+    assert follower.target(0, 0, 0) == (0, 0, 1.0)
+    assert follower.target(0, 0, 1.0) == (5.0, 0.0, 2.0)
+    follower.set_gates([(1, 1, 0.0)])
+    assert follower.index == -1
+    assert follower.target(0, 0, 1.0) == (1.0, 1.0, 0.5)   # clamped to min_altitude
+
+def test_control_step_is_cheap_and_allocation_free():
+    controller = FlightController()
+    update = controller.update
+    steps = 20_000
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    for i in range(steps):
+        update(DT, 0.1, 0.2, 1.0, 0.5, 0.0, 0.1, 0.01, -0.02, 0.3, 0.1, 0.0, 0.0, 5.0, 5.0, 2.0)
+    per_step_us = (time.perf_counter() - start) / steps * 1e6
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"flight control: {per_step_us:.2f} us/step")
+    # Three orders of magnitude inside the 16 ms step
+    assert per_step_us < 100
+    assert growth < 1024
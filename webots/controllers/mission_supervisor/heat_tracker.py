@@ -0,0 +1,89 @@
+"""Gate, crash and stuck checks for every drone of a heat in one pass.
+
+Same rules as LapTracker, with the per-drone state held in arrays indexed by
+drone: each step the supervisor fills an (N, 3) position array and every
+check is one vectorized comparison over all drones instead of N calls.
+Drones that have finished or dropped out are retired and ignored from then
+on, so one pilot's crash does not end the heat for the others.
+"""
+import numpy as np
+
+from lap_tracker import NO_EVENT, CHECKPOINT, LAP
+
+class HeatTracker:
+    def __init__(self, n_drones, gate_positions, gate_half_extent, velocity_change_threshold,
+                 altitude_threshold, stuck_threshold, stuck_distance=0.05, start_time=0.0):
+        centres = np.asarray(gate_positions, dtype=float).reshape(-1, 3)
+        self.lo = centres - gate_half_extent        # (gates, 3) trigger box corners
+        self.hi = centres + gate_half_extent
+        self.n_drones = n_drones
+        self.n_gates = len(centres)
+        self.velocity_change_sq = velocity_change_threshold * velocity_change_threshold
+        self.altitude_threshold = altitude_threshold
+        self.stuck_threshold = stuck_threshold
+        self.stuck_distance_sq = stuck_distance * stuck_distance
+
+        self.active = np.ones(n_drones, dtype=bool)
+        self.next_gate = np.zeros(n_drones, dtype=np.intp)
+        # NaN previous position: nothing is "already inside" on the first step
+        self.prev = np.full((n_drones, 3), np.nan)
+        self.lap_start = np.full(n_drones, float(start_time))
+        self.last_checkpoint = np.full(n_drones, float(start_time))
+        self.splits = np.zeros((n_drones, self.n_gates))
+        self.last_lap_time = np.zeros(n_drones)
+        self.anchor = np.full((n_drones, 3), np.nan)
+        self.last_movement = np.full(n_drones, float(start_time))
+
+    def retire(self, drone):
+        """Stop scoring a drone that has finished or dropped out."""
+        self.active[drone] = False
+
+    def gate_step(self, positions, t):
+        """Register gate entries for all drones at sim time t.
+
+        Returns None when no drone entered its next gate (the usual case),
+        else an array of NO_EVENT, CHECKPOINT or LAP per drone.
+        """
+        if not self.n_gates:
+            return None
+        lo, hi = self.lo[self.next_gate], self.hi[self.next_gate]
+        inside = ((positions > lo) & (positions < hi)).all(axis=1)
+        was_inside = ((self.prev > lo) & (self.prev < hi)).all(axis=1)
+        self.prev[:] = positions
+        entered = np.flatnonzero(inside & ~was_inside & self.active)
+        if not entered.size:
+            return None
+
+        gate = self.next_gate[entered]
+        self.splits[entered, gate] = t - self.last_checkpoint[entered]
+        self.last_checkpoint[entered] = t
+        gate += 1
+        lapped = gate == self.n_gates
+        done = entered[lapped]
+        self.last_lap_time[done] = t - self.lap_start[done]
+        self.lap_start[done] = t
+        gate[lapped] = 0
+        self.next_gate[entered] = gate
+
+        events = np.full(self.n_drones, NO_EVENT, dtype=np.int8)
+        events[entered] = np.where(lapped, LAP, CHECKPOINT)
+        return events
+
+    def crashed(self, velocities, previous_velocities, altitudes):
+        """Per active drone: sudden velocity change between consecutive steps, or below the ground."""
+        change = velocities - previous_velocities
+        return (((change * change).sum(axis=1) > self.velocity_change_sq)
+                | (altitudes < self.altitude_threshold)) & self.active
+
+    def stuck(self, positions, t):
+        """Per active drone: stayed within stuck_distance of one spot for stuck_threshold s."""
+        offset = positions - self.anchor
+        # NaN anchors (first call) compare False and are re-anchored
+        moved = ~((offset * offset).sum(axis=1) <= self.stuck_distance_sq)
+        self.anchor[moved] = positions[moved]
+        self.last_movement[moved] = t
+        return ~moved & (t - self.last_movement > self.stuck_threshold) & self.active
+
+    def timed_out(self, t, timeout):
+        """Per active drone: current lap running longer than timeout."""
+        return (t - self.lap_start > timeout) & self.active
@@ -0,0 +1,90 @@
+"""Per-step gate, crash and stuck checks for the mission supervisor.
+
+Kept free of the Webots API so it can be tested and timed on its own. The
+hot-path methods take coordinates as plain floats, compare squared
+magnitudes instead of calling sqrt, and only touch preallocated attributes,
+so a step does not allocate.
+"""
+
+# gate_step() results
+NO_EVENT = 0
+CHECKPOINT = 1
+LAP = 2
+
+class LapTracker:
+    __slots__ = (
+        "bounds", "n_gates", "next_gate",
+        "xmin", "xmax", "ymin", "ymax", "zmin", "zmax",
+        "px", "py", "pz", "has_prev",
+        "lap_start", "last_checkpoint", "splits", "last_lap_time",
+        "velocity_change_sq", "altitude_threshold",
+        "stuck_threshold", "stuck_distance_sq", "ax", "ay", "az", "last_movement",
+    )
+
+    def __init__(self, gate_positions, gate_half_extent, velocity_change_threshold,
+                 altitude_threshold, stuck_threshold, stuck_distance=0.05, start_time=0.0):
+        h = gate_half_extent
+        self.bounds = [(x - h, x + h, y - h, y + h, z - h, z + h) for x, y, z in gate_positions]
+        self.n_gates = len(self.bounds)
+        self.splits = [0.0] * self.n_gates
+        self.velocity_change_sq = velocity_change_threshold * velocity_change_threshold
+        self.altitude_threshold = altitude_threshold
+        self.stuck_threshold = stuck_threshold
+        self.stuck_distance_sq = stuck_distance * stuck_distance
+        self.last_lap_time = 0.0
+        self.reset(start_time)
+
+    def reset(self, t):
+        """Start a fresh lap at sim time t."""
+        self.next_gate = 0
+        self._load_next_bounds()
+        self.has_prev = False
+        self.px = self.py = self.pz = 0.0
+        self.lap_start = self.last_checkpoint = t
+        self.last_movement = t
+        self.ax = self.ay = self.az = float("nan")
+
+    def _load_next_bounds(self):
+        if self.n_gates:
+            (self.xmin, self.xmax, self.ymin, self.ymax,
+             self.zmin, self.zmax) = self.bounds[self.next_gate]
+
+    def gate_step(self, x, y, z, t):
+        """Register entry into the next gate's trigger box; returns NO_EVENT, CHECKPOINT or LAP."""
+        if not self.n_gates:
+            return NO_EVENT
+        inside = (self.xmin < x < self.xmax and self.ymin < y < self.ymax
+                  and self.zmin < z < self.zmax)
+        was_inside = (self.has_prev and self.xmin < self.px < self.xmax
+                      and self.ymin < self.py < self.ymax and self.zmin < self.pz < self.zmax)
+        self.px, self.py, self.pz, self.has_prev = x, y, z, True
+        if not inside or was_inside:
+            return NO_EVENT
+
+        self.splits[self.next_gate] = t - self.last_checkpoint
+        self.last_checkpoint = t
+        self.next_gate += 1
+        if self.next_gate < self.n_gates:
+            self._load_next_bounds()
+            return CHECKPOINT
+
+        self.last_lap_time = t - self.lap_start
+        self.lap_start = t
+        self.next_gate = 0
+        self._load_next_bounds()
+        return LAP
+
+    def crashed(self, vx, vy, vz, pvx, pvy, pvz, z):
+        """Sudden velocity change between two consecutive steps, or below the ground."""
+        dx, dy, dz = vx - pvx, vy - pvy, vz - pvz
+        return dx * dx + dy * dy + dz * dz > self.velocity_change_sq or z < self.altitude_threshold
+
+    def stuck(self, x, y, z, t):
+        """True once the drone has stayed within stuck_distance of one spot for stuck_threshold s."""
+        dx, dy, dz = x - self.ax, y - self.ay, z - self.az
+        # NaN anchor (first call) compares False and falls through to re-anchoring
+        if not dx * dx + dy * dy + dz * dz <= self.stuck_distance_sq:
+            self.ax, self.ay, self.az = x, y, z
+            self.last_movement = t
+            return False
+        return t - self.last_movement > self.stuck_threshold
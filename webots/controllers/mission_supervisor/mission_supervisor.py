@@ -1,231 +1,592 @@
 from controller import Supervisor
 import os, requests, json
+import socket
 import sys
 import time
 
+from lap_tracker import LapTracker, LAP
+from step_profiler import StepProfiler
+from wind_lookup import WindField, DRAG_AREA
+from race_channel import RaceChannel
+
 # Configuration
 BACKEND_URL = os.getenv("SIMFORGE_API", "http://localhost:8000")
 TELEMETRY_URL = f"{BACKEND_URL}/telemetry"
 MISSION_DETAIL_URL_TEMPLATE = f"{BACKEND_URL}/missions/{{}}"
+MISSION_RUNNING_URL_TEMPLATE = f"{BACKEND_URL}/missions/{{}}/running"
 MISSION_COMPLETION_URL_TEMPLATE = f"{BACKEND_URL}/missions/{{}}/complete"
 MISSION_FAILURE_URL_TEMPLATE = f"{BACKEND_URL}/missions/{{}}/fail"
 
+# Set by the gateway's warm pool; when present the supervisor stays alive and
+# flies every mission the pool sends instead of the one in controllerArgs.
+POOL_ADDR = os.getenv("SIMFORGE_POOL_ADDR")
+POOL_SLOT = os.getenv("SIMFORGE_POOL_SLOT", "0")
+
 MISSION_ID = "local_mission"
 PILOT = os.getenv("USERNAME", "local")
+# Heat mode: worlds with drones CF1..CFn race n pilots at once, named in
+# order by PILOTS=a,b,c (the mission compiler writes both); a one-drone world
+# with a single name in PILOTS flies under that name instead of PILOT
+PILOTS = []
 
-# Parse MISSION_ID from controller arguments
-# Expected format: controllerArgs "MISSION_ID=your_mission_id"
-if len(sys.argv) > 1:
-    for arg in sys.argv[1:]:
-        if arg.startswith("MISSION_ID="):
-            MISSION_ID = arg.split("=", 1)[1]
-            break
+STUCK_THRESHOLD = 5 # seconds
+VELOCITY_CHANGE_THRESHOLD = 10.0 # meters/second - tune this based on expected speeds
+ALTITUDE_THRESHOLD = -0.1 # meters - assuming ground is at z=0, allow a small margin below
+# Define a margin around the gate for the trigger zone
+GATE_TRIGGER_MARGIN = 1.0 # meters
+
+# Offline runs (parameter sweeps): mission JSON read from disk, nothing posted
+# to the backend, and a result summary written to RESULT_FILE at the end.
+MISSION_FILE = None
+RESULT_FILE = None
+
+# Performance mode: crash/stuck/timeout checks every CHECK_EVERY steps (gate
+# checks still run every step) and per-section timing printed at exit.
+# PERF_MODE=1 is shorthand for CHECK_EVERY=4 PROFILE=1.
+CHECK_EVERY = 1
+PROFILE = False
+SECTION_NAMES = ("step", "read", "wind", "gates", "events", "checks")
+SEC_STEP, SEC_READ, SEC_WIND, SEC_GATES, SEC_EVENTS, SEC_CHECKS = range(len(SECTION_NAMES))
+
+# Gust field written by the mission compiler; pool missions carry theirs in
+# meta["wind_field"] instead.
+WIND_FIELD = None
+
+# Live race view: position samples per second (simulation time) streamed to the
+# gateway's /sim channel along with checkpoints, laps and the result; 0 disables.
+LIVE_HZ = 10.0
+SIM_CHANNEL_TOKEN = os.getenv("SIM_CHANNEL_TOKEN")
+live_channels = {}   # pilot -> RaceChannel
+
+# Parse KEY=VALUE controller arguments
+# Expected format: controllerArgs [ "MISSION_ID=your_mission_id" "STUCK_THRESHOLD=3" ]
+TUNABLES = ("STUCK_THRESHOLD", "VELOCITY_CHANGE_THRESHOLD", "GATE_TRIGGER_MARGIN", "DRAG_AREA", "LIVE_HZ")
+for arg in sys.argv[1:]:
+    key, _, value = arg.partition("=")
+    if key == "MISSION_ID":
+        MISSION_ID = value
+    elif key == "MISSION_FILE":
+        MISSION_FILE = value
+    elif key == "RESULT_FILE":
+        RESULT_FILE = value
+    elif key == "WIND_FIELD":
+        WIND_FIELD = value
+    elif key == "PILOTS":
+        PILOTS = [name for name in value.split(",") if name]
+    elif key in TUNABLES:
+        globals()[key] = float(value)
+    elif key == "PERF_MODE" and value == "1":
+        CHECK_EVERY, PROFILE = 4, True
+    elif key == "CHECK_EVERY":
+        CHECK_EVERY = max(int(value), 1)
+    elif key == "PROFILE":
+        PROFILE = value == "1"
 
 # Initialize Supervisor
 sup = Supervisor()
 dt = int(sup.getBasicTimeStep())
 
-drone = sup.getFromDef("CF1")  # assumes Crazyflie robot in world
-if drone is None:
+# CF1, CF2, ... as the mission compiler names them; more than one is a heat
+drones = []
+while (node := sup.getFromDef(f"CF{len(drones) + 1}")) is not None:
+    drones.append(node)
+if not drones:
     print("Error: CF1 drone not found in world. Exiting supervisor.")
     sup.simulationQuit(1)
     sys.exit()
+drone = drones[0]
 
-# Fetch mission details from backend
-mission_details = None
-if MISSION_ID and MISSION_ID != "local_mission":
+def fetch_mission_details(mission_id):
+    """Fetch mission details from backend, None if unavailable"""
     try:
-        response = requests.get(MISSION_DETAIL_URL_TEMPLATE.format(MISSION_ID))
+        response = requests.get(MISSION_DETAIL_URL_TEMPLATE.format(mission_id))
         response.raise_for_status() # Raise an exception for bad status codes
-        mission_details = response.json()
-        print(f"[Supervisor] Fetched mission details for {MISSION_ID}")
+        print(f"[Supervisor] Fetched mission details for {mission_id}")
+        return response.json()
     except requests.exceptions.RequestException as e:
-        print(f"[Supervisor] Error fetching mission details for {MISSION_ID}: {e}")
+        print(f"[Supervisor] Error fetching mission details for {mission_id}: {e}")
         # Continue with default behavior or exit if mission details are crucial
-        mission_details = None # Ensure it's None if fetching fails
-
-# Mission parameters (use fetched details or defaults)
-gates = mission_details.get("meta", {}).get("gates", []) if mission_details else []
-laps_required = mission_details.get("meta", {}).get("laps", 1) if mission_details else 1
-
-print(f"[Supervisor] Mission has {len(gates)} gates and requires {laps_required} laps.")
-
-# Gate tracking variables
-current_checkpoint_index = 0
-laps_completed = 0
-checkpoint_times = []
-lap_start_time = sup.getTime()
-last_checkpoint_time = lap_start_time
-last_drone_position = None # To detect if the drone is stuck or for entry detection
-STUCK_THRESHOLD = 5 # seconds
-last_movement_time = sup.getTime()
-MISSION_TIMEOUT = mission_details.get("meta", {}).get("timeout_sec", 600) if mission_details else 600 # Default to 10 minutes
-current_lap_invalid = False # Flag to indicate if the current lap is invalid
+        return None
+
+def signal_running(mission_id):
+    if mission_id and mission_id != "local_mission":
+        try:
+            requests.post(MISSION_RUNNING_URL_TEMPLATE.format(mission_id))
+            print("[Supervisor] Mission start signaled to backend.")
+        except requests.exceptions.RequestException as e:
+            print(f"[Supervisor] Error signaling mission start: {e}")
+
+def signal_failure(mission_id, reason):
+    if mission_id and mission_id != "local_mission":
+        try:
+            requests.post(MISSION_FAILURE_URL_TEMPLATE.format(mission_id), params={"reason": reason})
+            print(f"[Supervisor] Mission failure ({reason}) signaled to backend.")
+        except requests.exceptions.RequestException as e:
+            print(f"[Supervisor] Error signaling mission failure: {e}")
+
+def open_live_channel(mission_id, pilot=PILOT):
+    """The pilot's race channel, attached to mission_id; None for offline runs"""
+    if not mission_id or mission_id == "local_mission" or LIVE_HZ <= 0:
+        return None
+    if pilot not in live_channels:
+        if not RaceChannel.available():
+            print("[Supervisor] python-socketio not installed; live race view disabled.")
+            return None
+        live_channels[pilot] = RaceChannel(BACKEND_URL, pilot, LIVE_HZ, SIM_CHANNEL_TOKEN)
+    live_channels[pilot].attach(mission_id)
+    return live_channels[pilot]
+
+def close_live_channels():
+    for channel in live_channels.values():
+        channel.close()
+
+def send_lap_telemetry(mission_id, pilot, lap_time, splits):
+    if mission_id and mission_id != "local_mission":
+        try:
+            requests.post(TELEMETRY_URL, json={
+                "mission": mission_id,
+                "pilot": pilot,
+                "lap_time_sec": lap_time,
+                "checkpoint_times_sec": [float(split) for split in splits],
+                "status": "running" # Indicate simulation is still running
+            })
+            print("[Supervisor] Telemetry sent.")
+        except requests.exceptions.RequestException as e:
+            print(f"[Supervisor] Error sending telemetry: {e}")
+
+def signal_completion(mission_id):
+    if mission_id and mission_id != "local_mission":
+        try:
+            requests.post(MISSION_COMPLETION_URL_TEMPLATE.format(mission_id))
+            print("[Supervisor] Mission completion signaled to backend.")
+        except requests.exceptions.RequestException as e:
+            print(f"[Supervisor] Error signaling mission completion: {e}")
+
+def locate_gates(gates, nodes):
+    """Gate positions from the world; the course is handed to each autopilot through its customData"""
+    gate_positions = []
+    for i, gate in enumerate(gates):
+        gate_node = sup.getFromDef(f"Gate_{i+1}")
+        if gate_node:
+            gate_positions.append(gate_node.getPosition())
+        else:
+            print(f"[Supervisor] Warning: Gate_{i+1} not found in world.")
+            # Handle missing gates
+            # For now, we'll continue, but this should be improved.
+    course = json.dumps([[round(c, 3) for c in p] for p in gate_positions])
+    for node in nodes:
+        node.getField("customData").setSFString(course)
+    return gate_positions
+
+def load_wind(mission_details):
+    """Memory-mapped gust field, if the mission has wind"""
+    wind_path = (mission_details or {}).get("meta", {}).get("wind_field") or WIND_FIELD
+    if wind_path:
+        try:
+            wind = WindField(wind_path, DRAG_AREA)
+            print(f"[Supervisor] Wind field {wind_path}: {wind.meta['wind_kts']} kts, grid {wind.meta['shape']}")
+            return wind
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[Supervisor] Ignoring wind field {wind_path}: {e}")
+    return None
+
+def run_mission(mission_id, mission_details, pilot=None):
+    """Track laps until the mission completes or fails; return a result summary"""
+    pilot = pilot or PILOT
+    # Mission parameters (use fetched details or defaults)
+    gates = mission_details.get("meta", {}).get("gates", []) if mission_details else []
+    laps_required = mission_details.get("meta", {}).get("laps", 1) if mission_details else 1
+    MISSION_TIMEOUT = mission_details.get("meta", {}).get("timeout_sec", 600) if mission_details else 600 # Default to 10 minutes
+
+    print(f"[Supervisor] Mission has {len(gates)} gates and requires {laps_required} laps.")
+
+    # Find gate nodes; their trigger boxes are fixed for the whole mission
+    gate_positions = locate_gates(gates, [drone])
+    signal_running(mission_id)
+
+    # Trigger box: 0.5 m gate core plus GATE_TRIGGER_MARGIN on every side
+    tracker = LapTracker(gate_positions, 0.25 + GATE_TRIGGER_MARGIN, VELOCITY_CHANGE_THRESHOLD,
+                         ALTITUDE_THRESHOLD, STUCK_THRESHOLD, start_time=sup.getTime())
+    n_gates = tracker.n_gates
+    laps_completed = 0
+    lap_times = []
+    profiler = StepProfiler(SECTION_NAMES, enabled=PROFILE)
+    live = open_live_channel(mission_id, pilot)
+    wall_start = time.perf_counter()
+
+    def result(exit_code, reason):
+        if live:
+            live.status(sup.getTime(), "completed" if exit_code == 0 else "failed", reason)
+        outcome = {
+            "exit_code": exit_code,
+            "reason": reason,
+            "laps_completed": laps_completed,
+            "lap_times_sec": lap_times,
+            "sim_time_sec": sup.getTime(),
+            "wall_time_sec": time.perf_counter() - wall_start,
+        }
+        if profiler.enabled:
+            print(profiler.format_summary(SEC_STEP))
+            outcome["profile"] = profiler.summary(SEC_STEP)
+        if wind:
+            wind.close()
+        return outcome
+
+    wind = load_wind(mission_details)
+
+    # Cached bound methods keep attribute lookups out of the step loop
+    step, get_time = sup.step, sup.getTime
+    wind_force = wind.force if wind else None
+    add_force = drone.addForce
+    get_position, get_velocity = drone.getPosition, drone.getVelocity
+    gate_step, crashed, stuck = tracker.gate_step, tracker.crashed, tracker.stuck
+    mark, end_step = profiler.mark, profiler.end_step
+    live_position = live.position if live else None
+    profiling = profiler.enabled
+    check_every = CHECK_EVERY
+    pre_check = check_every - 1
+    pvx = pvy = pvz = 0.0
+    n = 0
+    if profiling:
+        profiler.begin(get_time())
+
+    # Simulation loop: gate checks every step, crash/stuck/timeout every CHECK_EVERY steps
+    while step(dt) != -1:
+        if profiling:
+            mark(SEC_STEP)
+        current_time = get_time()
+        x, y, z = get_position()
+        if live_position:
+            live_position(current_time, x, y, z)
+        n += 1
+        phase = n % check_every
+        # getVelocity() is [vx, vy, vz, wx, wy, wz]; only the linear part is used
+        if phase == 0:
+            vx, vy, vz = get_velocity()[:3]
+        elif phase == pre_check:
+            # Sampled on the step before each check so the crash test always
+            # compares consecutive steps, whatever the decimation
+            pvx, pvy, pvz = get_velocity()[:3]
+        if profiling:
+            mark(SEC_READ)
+
+        if wind_force:
+            # addForce only lasts one physics step, so it is applied every step
+            wvx, wvy, wvz = get_velocity()[:3]
+            add_force(wind_force(x, y, z, current_time, wvx, wvy, wvz), False)
+            if profiling:
+                mark(SEC_WIND)
+
+        event = gate_step(x, y, z, current_time)
+        if profiling:
+            mark(SEC_GATES)
+
+        if event:
+            print(f"[Supervisor] Passed Checkpoint {tracker.next_gate or n_gates}!")
+            if live:
+                passed = (tracker.next_gate - 1) % n_gates
+                live.checkpoint(current_time, passed, tracker.splits[passed])
+            if event == LAP:
+                lap_time = tracker.last_lap_time
+                print(f"[Supervisor] Lap {laps_completed + 1} completed in {lap_time:.2f} seconds!")
+                if live:
+                    live.lap(current_time, laps_completed + 1, lap_time)
+                # Send lap time telemetry
+                send_lap_telemetry(mission_id, pilot, lap_time, tracker.splits)
+
+                laps_completed += 1
+                lap_times.append(lap_time)
+                print(f"[Supervisor] Valid laps completed: {laps_completed}/{laps_required}")
+
+                # Check for mission completion
+                if laps_completed >= laps_required:
+                    print(f"[Supervisor] Mission {mission_id} completed!\nTotal time: {current_time:.2f} seconds")
+                    # Signal backend about mission completion
+                    signal_completion(mission_id)
+
+                    return result(0, "completed")
+            if profiling:
+                mark(SEC_EVENTS)
+
+        if phase == 0:
+            # Crash detection
+            # Check for sudden large velocity change or hitting the ground
+            if crashed(vx, vy, vz, pvx, pvy, pvz, z):
+                print("[Supervisor] Crash detected! Ending simulation.")
+                # Signal backend about mission failure due to crash
+                signal_failure(mission_id, "crash")
+                return result(1, "crash")
+            pvx, pvy, pvz = vx, vy, vz
+
+            # Basic stuck detection: if drone hasn't moved significantly for a while
+            if stuck(x, y, z, current_time):
+                print("[Supervisor] Drone appears to be stuck. Ending simulation.")
+                # Signal backend about mission failure due to being stuck
+                signal_failure(mission_id, "stuck")
+                return result(1, "stuck")
+
+            # Mission timeout check
+            if current_time - tracker.lap_start > MISSION_TIMEOUT:
+                print(f"[Supervisor] Simulation time limit ({MISSION_TIMEOUT} seconds) reached. Ending simulation.")
+                # Signal backend about mission failure due to timeout
+                signal_failure(mission_id, "timeout")
+                return result(1, "timeout")
+            if profiling:
+                mark(SEC_CHECKS)
+
+        if profiling:
+            end_step(current_time)
+
+        # TODO: Add logic for other mission objectives or failure conditions (e.g., going out of bounds if a mission area is defined)
+
+    # Webots is shutting down
+    return result(1, "terminated")
+
+# ------------  HEAT MODE  ------------
+
+def run_heat(mission_id, mission_details, pilots):
+    """Race every drone in the world at once; return a result summary with one entry per pilot"""
+    # numpy is only needed for heats, so single-drone runs work without it
+    import numpy as np
+    from heat_tracker import HeatTracker
+
+    meta = (mission_details or {}).get("meta", {})
+    gates = meta.get("gates", [])
+    laps_required = meta.get("laps", 1)
+    MISSION_TIMEOUT = meta.get("timeout_sec", 600)
+    n_drones = len(drones)
+    print(f"[Supervisor] Heat of {n_drones} ({', '.join(pilots)}): {len(gates)} gates, {laps_required} laps.")
+
+    gate_positions = locate_gates(gates, drones)
+    signal_running(mission_id)
+    tracker = HeatTracker(n_drones, gate_positions, 0.25 + GATE_TRIGGER_MARGIN, VELOCITY_CHANGE_THRESHOLD,
+                          ALTITUDE_THRESHOLD, STUCK_THRESHOLD, start_time=sup.getTime())
+    n_gates = tracker.n_gates
+    standings = [{"pilot": pilot, "exit_code": None, "reason": None, "laps_completed": 0,
+                  "lap_times_sec": [], "finish_time_sec": None} for pilot in pilots]
+    lives = [open_live_channel(mission_id, pilot) for pilot in pilots]
+    profiler = StepProfiler(SECTION_NAMES, enabled=PROFILE)
+    wind = load_wind(mission_details)
+    wall_start = time.perf_counter()
+
+    def finish(i, exit_code, reason):
+        """Take drone i out of the heat; the others race on"""
+        if not tracker.active[i]:
+            return
+        tracker.retire(i)
+        standing = standings[i]
+        standing["exit_code"], standing["reason"] = exit_code, reason
+        standing["finish_time_sec"] = sup.getTime()
+        print(f"[Supervisor] {standing['pilot']} is out: {reason} after {standing['laps_completed']} laps.")
+        if lives[i]:
+            lives[i].status(sup.getTime(), "completed" if exit_code == 0 else "failed", reason)
+
+    def result():
+        completed = [s for s in standings if s["exit_code"] == 0]
+        # Nobody finished: the heat failed the way its last drone out did
+        reason = "completed" if completed else max(standings, key=lambda s: s["finish_time_sec"])["reason"]
+        if completed:
+            signal_completion(mission_id)
+        elif reason != "terminated":
+            signal_failure(mission_id, reason)
+        for place, s in enumerate(sorted(completed, key=lambda s: s["finish_time_sec"]), 1):
+            print(f"[Supervisor] {place}. {s['pilot']} in {sum(s['lap_times_sec']):.2f} seconds")
+        outcome = {
+            "exit_code": 0 if completed else 1,
+            "reason": reason,
+            "pilots": standings,
+            "sim_time_sec": sup.getTime(),
+            "wall_time_sec": time.perf_counter() - wall_start,
+        }
+        if profiler.enabled:
+            print(profiler.format_summary(SEC_STEP))
+            outcome["profile"] = profiler.summary(SEC_STEP)
+        if wind:
+            wind.close()
+        return outcome
+
+    # Per-drone state lives in arrays indexed like drones; the checks run over all of them at once
+    positions = np.zeros((n_drones, 3))
+    velocities = np.zeros((n_drones, 3))
+    previous = np.zeros((n_drones, 3))
+    active = tracker.active
+    indices = range(n_drones)
+
+    # Cached bound methods keep attribute lookups out of the step loop
+    step, get_time = sup.step, sup.getTime
+    wind_force = wind.force if wind else None
+    add_forces = [node.addForce for node in drones]
+    get_positions = [node.getPosition for node in drones]
+    get_velocities = [node.getVelocity for node in drones]
+    gate_step, crashed, stuck, timed_out = tracker.gate_step, tracker.crashed, tracker.stuck, tracker.timed_out
+    mark, end_step = profiler.mark, profiler.end_step
+    live_positions = [(i, live.position) for i, live in enumerate(lives) if live]
+    profiling = profiler.enabled
+    check_every = CHECK_EVERY
+    pre_check = check_every - 1
+    n = 0
+    if profiling:
+        profiler.begin(get_time())
+
+    while step(dt) != -1:
+        if profiling:
+            mark(SEC_STEP)
+        current_time = get_time()
+        for i in indices:
+            positions[i] = get_positions[i]()
+        for i, live_position in live_positions:
+            if active[i]:
+                x, y, z = positions[i].tolist()
+                live_position(current_time, x, y, z)
+        n += 1
+        phase = n % check_every
+        if phase == 0:
+            for i in indices:
+                velocities[i] = get_velocities[i]()[:3]
+        elif phase == pre_check:
+            for i in indices:
+                previous[i] = get_velocities[i]()[:3]
+        if profiling:
+            mark(SEC_READ)
+
+        if wind_force:
+            for i in indices:
+                x, y, z = positions[i].tolist()
+                wvx, wvy, wvz = get_velocities[i]()[:3]
+                add_forces[i](wind_force(x, y, z, current_time, wvx, wvy, wvz), False)
+            if profiling:
+                mark(SEC_WIND)
+
+        events = gate_step(positions, current_time)
+        if profiling:
+            mark(SEC_GATES)
+
+        if events is not None:
+            for i in np.flatnonzero(events):
+                standing = standings[i]
+                passed = int(tracker.next_gate[i] - 1) % n_gates
+                print(f"[Supervisor] {standing['pilot']} passed Checkpoint {passed + 1}!")
+                if lives[i]:
+                    lives[i].checkpoint(current_time, passed, float(tracker.splits[i, passed]))
+                if events[i] == LAP:
+                    lap_time = float(tracker.last_lap_time[i])
+                    standing["laps_completed"] += 1
+                    standing["lap_times_sec"].append(lap_time)
+                    print(f"[Supervisor] {standing['pilot']}: lap {standing['laps_completed']}/{laps_required} "
+                          f"in {lap_time:.2f} seconds")
+                    if lives[i]:
+                        lives[i].lap(current_time, standing["laps_completed"], lap_time)
+                    send_lap_telemetry(mission_id, standing["pilot"], lap_time, tracker.splits[i])
+                    if standing["laps_completed"] >= laps_required:
+                        finish(i, 0, "completed")
+            if profiling:
+                mark(SEC_EVENTS)
+
+        if phase == 0:
+            # Crash, stuck and timeout for every drone still racing, each one vectorized pass
+            for reason, out in (("crash", crashed(velocities, previous, positions[:, 2])),
+                                ("stuck", stuck(positions, current_time)),
+                                ("timeout", timed_out(current_time, MISSION_TIMEOUT))):
+                for i in np.flatnonzero(out):
+                    finish(i, 1, reason)
+            previous[:] = velocities
+            if profiling:
+                mark(SEC_CHECKS)
+
+        if not active.any():
+            return result()
+
+        if profiling:
+            end_step(current_time)
+
+    # Webots is shutting down
+    for i in np.flatnonzero(active):
+        finish(i, 1, "terminated")
+    return result()
+
+# ------------  WARM POOL MODE  ------------
+
+def gate_node_string(number, gate):
+    """Same one-line Gate instance the mission compiler writes into .wbt files"""
+    node = (f"DEF Gate_{number} Gate {{ translation {gate.get('x', 0)} {gate.get('y', 0)} {gate.get('z', 0)} "
+            f"rotation 0 1 0 {gate.get('yaw', 0)} number {number}")
+    if len(gate.get("size", [])) == 2:
+        node += " size " + " ".join(str(v) for v in gate["size"])
+    if len(gate.get("color", [])) == 3:
+        node += " color " + " ".join(str(v) for v in gate["color"])
+    return node + " }"
+
+def load_course(gates, previous_count):
+    """Swap the arena's gates for a new course and reset the drone"""
+    for i in range(previous_count):
+        node = sup.getFromDef(f"Gate_{i+1}")
+        if node:
+            node.remove()
+    sup.simulationReset()
+    sup.step(dt)
+    children = sup.getRoot().getField("children")
+    for i, gate in enumerate(gates):
+        children.importMFNodeFromString(-1, gate_node_string(i + 1, gate))
+
+def serve_pool():
+    """Fly missions sent by the gateway pool until told to quit"""
+    host, port = POOL_ADDR.rsplit(":", 1)
+    conn = socket.create_connection((host, int(port)))
+    stream = conn.makefile("rw", encoding="utf-8", newline="\n")
+
+    def send(message):
+        stream.write(json.dumps(message) + "\n")
+        stream.flush()
+
+    send({"type": "hello", "slot": POOL_SLOT})
+    print(f"[Supervisor] Pool slot {POOL_SLOT} idle, waiting for missions.")
+    loaded_gates = 0
+    # Blocking here keeps the idle instance at zero CPU between missions
+    for line in stream:
+        message = json.loads(line)
+        if message.get("type") == "quit":
+            break
+        if message.get("type") != "run":
+            continue
+
+        received = time.perf_counter()
+        mission = message["mission"]
+        gates = mission.get("meta", {}).get("gates", [])
+        load_course(gates, loaded_gates)
+        loaded_gates = len(gates)
+        if sup.step(dt) == -1:
+            break
+        send({"type": "started", "setup_sec": time.perf_counter() - received})
 
-# Crash detection variables
-last_velocity = [0, 0, 0]
-VELOCITY_CHANGE_THRESHOLD = 10.0 # meters/second - tune this based on expected speeds
-ALTITUDE_THRESHOLD = -0.1 # meters - assuming ground is at z=0, allow a small margin below
+        outcome = run_mission(str(mission["_id"]), mission, message.get("pilot"))
+        send({"type": "finished"} | outcome)
+        if outcome["reason"] == "terminated":
+            break
+    conn.close()
 
-# Find gate nodes and calculate bounding boxes
-gate_nodes = []
-gate_bounds = []
-# Define a margin around the gate for the trigger zone
-GATE_TRIGGER_MARGIN = 1.0 # meters
+if POOL_ADDR:
+    serve_pool()
+    close_live_channels()
+    sup.simulationQuit(0)
+    sys.exit()
 
-for i, gate in enumerate(gates):
-    gate_node = sup.getFromDef(f"Gate_{i+1}")
-    if gate_node:
-        gate_nodes.append(gate_node)
-        # Calculate a simple bounding box around the gate
-        # This assumes gates are oriented upright and roughly cubic/spherical
-        # A more accurate approach would involve getting the node's actual bounding box
-        position = gate_node.getPosition()
-        # Using a fixed size for simplicity; ideally, get this from the gate node's geometry
-        size = [0.5, 0.5, 0.5] # Assuming a gate size of 0.5m in all dimensions from the template
-        min_bound = [p - s/2.0 - GATE_TRIGGER_MARGIN for p, s in zip(position, size)]
-        max_bound = [p + s/2.0 + GATE_TRIGGER_MARGIN for p, s in zip(position, size)]
-        gate_bounds.append((min_bound, max_bound))
-
-    else:
-        print(f"[Supervisor] Warning: Gate_{i+1} not found in world.")
-        # Handle missing gates
-        # For now, we'll continue, but this should be improved.
-
-
-# Function to check if drone position is within a bounding box
-def is_within_bounds(position, bounds):
-    min_bound, max_bound = bounds
-    return (position[0] > min_bound[0] and position[0] < max_bound[0] and
-            position[1] > min_bound[1] and position[1] < max_bound[1] and
-            position[2] > min_bound[2] and position[2] < max_bound[2])
-
-# Simulation loop
-while sup.step(dt) != -1:
-    current_time = sup.getTime()
-
-    if not gate_nodes:
-        # No gates defined
-        pass # Keep simulation running if no gates
-
-    drone_position = drone.getPosition()
-    current_velocity = drone.getVelocity() # Assuming the drone node has getVelocity method
-
-    # Crash detection
-    # Check for sudden large velocity change or hitting the ground
-    velocity_change_magnitude = sum([(current_velocity[i] - last_velocity[i])**2 for i in range(3)])**0.5
-    if velocity_change_magnitude > VELOCITY_CHANGE_THRESHOLD or drone_position[2] < ALTITUDE_THRESHOLD:
-        print("[Supervisor] Crash detected! Ending simulation.")
-        # Signal backend about mission failure due to crash
-        if MISSION_ID and MISSION_ID != "local_mission":
-            try:
-                requests.post(MISSION_FAILURE_URL_TEMPLATE.format(MISSION_ID), json={"reason": "crash"})
-                print("[Supervisor] Mission failure (crash) signaled to backend.")
-            except requests.exceptions.RequestException as e:
-                print(f"[Supervisor] Error signaling mission failure: {e}")
-        sup.simulationQuit(1)
-        sys.exit()
-    last_velocity = current_velocity
-
-    # Checkpoint detection using bounding boxes and sequence
-    if current_checkpoint_index < len(gate_nodes):
-        next_gate_bounds = gate_bounds[current_checkpoint_index]
-
-        # Refined checkpoint detection: check for entry into the bounding box in the correct sequence
-        was_outside = last_drone_position is None or not is_within_bounds(last_drone_position, next_gate_bounds)
-        is_inside = is_within_bounds(drone_position, next_gate_bounds)
-
-        if was_outside and is_inside:
-            # Check if this is the correct gate in the sequence
-            if current_checkpoint_index < len(gate_nodes):
-                print(f"[Supervisor] Passed Checkpoint {current_checkpoint_index + 1}!")
-                checkpoint_time = current_time - last_checkpoint_time
-                checkpoint_times.append(checkpoint_time)
-                last_checkpoint_time = current_time
-                current_checkpoint_index += 1
-
-                # If all checkpoints for a lap are passed
-                if current_checkpoint_index == len(gate_nodes):
-                    lap_time = current_time - lap_start_time
-                    print(f"[Supervisor] Lap {laps_completed + 1} completed in {lap_time:.2f} seconds!")
-
-                    # Only register a valid lap if not marked invalid
-                    if not current_lap_invalid:
-                        # Send lap time telemetry
-                        if MISSION_ID and MISSION_ID != "local_mission":
-                            try:
-                                requests.post(TELEMETRY_URL, json={
-                                    "mission": MISSION_ID,
-                                    "pilot": PILOT,
-                                    "lap_time_sec": lap_time,
-                                    "checkpoint_times_sec": checkpoint_times[-len(gate_nodes):],
-                                    "status": "running" # Indicate simulation is still running
-                                })
-                                print("[Supervisor] Telemetry sent.")
-                            except requests.exceptions.RequestException as e:
-                                print(f"[Supervisor] Error sending telemetry: {e}")
-
-                        laps_completed += 1
-                        print(f"[Supervisor] Valid laps completed: {laps_completed}/{laps_required}")
-                    else:
-                        print("[Supervisor] Lap invalidated due to out-of-sequence gate.")
-                        # TODO: Consider sending telemetry about invalidated lap or penalty
-
-                    # Reset for next lap
-                    current_checkpoint_index = 0
-                    lap_start_time = current_time
-                    last_checkpoint_time = current_time # Reset last checkpoint time for the new lap
-                    current_lap_invalid = False # Reset lap invalid flag
-                    # Clear checkpoint times for the completed lap
-                    checkpoint_times = [] # This clears all previous times, might need adjustment if tracking overall times
-
-                    # Check for mission completion
-                    if laps_completed >= laps_required:
-                        print(f"[Supervisor] Mission {MISSION_ID} completed!\nTotal time: {current_time:.2f} seconds")
-                        # Signal backend about mission completion
-                        if MISSION_ID and MISSION_ID != "local_mission":
-                            try:
-                                requests.post(MISSION_COMPLETION_URL_TEMPLATE.format(MISSION_ID))
-                                print("[Supervisor] Mission completion signaled to backend.")
-                            except requests.exceptions.RequestException as e:
-                                print(f"[Supervisor] Error signaling mission completion: {e}")
-
-                        sup.simulationQuit(0)
-                        sys.exit()
-            else:
-                # Passed a gate out of sequence - check if it's any gate beyond the current expected one
-                # A more robust check would involve checking against all gates *after* the current_checkpoint_index
-                # For simplicity now, we'll just mark the lap as invalid if *any* gate is hit out of order.
-                # This simple check needs refinement for complex courses.
-                is_any_gate_bounds = False
-                for i, bounds in enumerate(gate_bounds):
-                    if i != current_checkpoint_index and is_within_bounds(drone_position, bounds):
-                        is_any_gate_bounds = True
-                        break
-
-                if is_any_gate_bounds:
-                    print(f"[Supervisor] Passed a gate out of sequence. Marking current lap as invalid.")
-                    current_lap_invalid = True
-                    # No change to current_checkpoint_index, still waiting for the correct one.
-
-    # Update last_drone_position at the end of the loop iteration
-    last_drone_position = drone_position
-
-    # Mission timeout check
-    if current_time - lap_start_time > MISSION_TIMEOUT:
-        print(f"[Supervisor] Simulation time limit ({MISSION_TIMEOUT} seconds) reached. Ending simulation.")
-        # Signal backend about mission failure due to timeout
-        if MISSION_ID and MISSION_ID != "local_mission":
-            try:
-                requests.post(MISSION_FAILURE_URL_TEMPLATE.format(MISSION_ID), json={"reason": "timeout"})
-                print("[Supervisor] Mission failure (timeout) signaled to backend.")
-            except requests.exceptions.RequestException as e:
-                print(f"[Supervisor] Error signaling mission failure: {e}")
-        sup.simulationQuit(1) # Exit with non-zero code for failure
-        sys.exit()
-
-    # TODO: Add logic for other mission objectives or failure conditions (e.g., going out of bounds if a mission area is defined)
-
-# End of simulation loop
-
- 
\ No newline at end of file
+# Fetch mission details from backend, or from disk for offline runs
+mission_details = None
+if MISSION_FILE:
+    with open(MISSION_FILE) as f:
+        mission_details = json.load(f)
+    MISSION_ID = "local_mission"
+elif MISSION_ID and MISSION_ID != "local_mission":
+    mission_details = fetch_mission_details(MISSION_ID)
+
+if len(drones) > 1:
+    pilots = [PILOTS[i] if i < len(PILOTS) else f"{PILOT}_{i + 1}" for i in range(len(drones))]
+    outcome = run_heat(MISSION_ID, mission_details, pilots)
+else:
+    outcome = run_mission(MISSION_ID, mission_details, PILOTS[0] if PILOTS else None)
+close_live_channels()
+if RESULT_FILE:
+    with open(RESULT_FILE, "w") as f:
+        json.dump(outcome, f)
+sup.simulationQuit(outcome["exit_code"]) # Exit with non-zero code for failure
+sys.exit()
@@ -0,0 +1,124 @@
+"""Live race frames from the supervisor to the gateway's /sim Socket.IO namespace.
+
+The step loop only appends compact frames (see backend/gateway/race_relay.py)
+to a queue; a background thread keeps one connection open and sends them in
+acknowledged batches. When the gateway is unreachable the thread reconnects
+with backoff and the queue buffers up to max_buffer frames; past that new
+position samples are dropped, while checkpoint, lap and status frames are
+always kept. Batches are only removed from the queue once the gateway acks
+them, so a reconnect never loses frames, though it may repeat one batch.
+
+Lap results are still posted over HTTP by the supervisor; this channel is the
+best-effort live view for spectators.
+"""
+import collections
+import threading
+import time
+
+try:
+    import socketio
+except ImportError:  # python-socketio[client] is optional in the Webots Python
+    socketio = None
+
+NAMESPACE = "/sim"
+BATCH = 256
+
+class RaceChannel:
+    def __init__(self, url, pilot, rate_hz=10.0, token=None, max_buffer=4096, client_factory=None):
+        self.url = url
+        self.pilot = pilot
+        self.period = 1.0 / rate_hz if rate_hz > 0 else None
+        self.auth = {"token": token} if token else None
+        self.max_buffer = max_buffer
+        self.client_factory = client_factory or (lambda: socketio.Client(reconnection=False))
+        self.next_sample = 0.0
+        self.sent = self.dropped = self.reconnects = 0
+        self._queue = collections.deque()
+        self._wake = threading.Event()
+        self._closing = False
+        self._attached = None    # mission of the last attach frame the gateway acked
+        self._thread = threading.Thread(target=self._run, name="race-channel", daemon=True)
+        self._thread.start()
+
+    @staticmethod
+    def available():
+        return socketio is not None
+
+    # ---- called from the step loop ----
+
+    def attach(self, mission_id):
+        self._put(["a", mission_id, self.pilot])
+        self.next_sample = 0.0
+
+    def position(self, t, x, y, z):
+        """Queue a sample if one is due at the configured rate (simulation time)."""
+        if self.period is None or t < self.next_sample:
+            return
+        self.next_sample = t + self.period
+        if len(self._queue) >= self.max_buffer:
+            self.dropped += 1
+            return
+        self._put(["p", round(t, 3), round(x, 3), round(y, 3), round(z, 3)])
+
+    def checkpoint(self, t, gate, split_sec):
+        self._put(["c", round(t, 3), gate, round(split_sec, 3)])
+
+    def lap(self, t, lap, lap_time_sec):
+        self._put(["l", round(t, 3), lap, round(lap_time_sec, 3)])
+
+    def status(self, t, status, reason):
+        self._put(["s", round(t, 3), status, reason])
+
+    def _put(self, frame):
+        self._queue.append(frame)
+        self._wake.set()
+
+    def close(self, timeout=2.0):
+        """Give the sender up to timeout seconds to deliver what is queued."""
+        self._closing = True
+        self._wake.set()
+        self._thread.join(timeout)
+
+    # ---- sender thread ----
+
+    def _run(self):
+        client = None
+        backoff = 0.25
+        while True:
+            if not self._queue:
+                if self._closing:
+                    break
+                self._wake.wait(0.5)
+                self._wake.clear()
+                continue
+            try:
+                if client is None:
+                    client = self.client_factory()
+                    client.connect(self.url, namespaces=[NAMESPACE], auth=self.auth, wait_timeout=5)
+                    if self._attached is not None and self._queue[0][0] != "a":
+                        # Fresh connection, fresh session: re-announce the run in progress
+                        self._queue.appendleft(["a", self._attached, self.pilot])
+                    backoff = 0.25
+                batch = [self._queue[i] for i in range(min(BATCH, len(self._queue)))]
+                client.call("frames", batch, namespace=NAMESPACE, timeout=5)
+            except Exception as e:
+                print(f"[Supervisor] Race channel: {e}; reconnecting in {backoff:.1f}s")
+                if client is not None:
+                    try:
+                        client.disconnect()
+                    except Exception:
+                        pass
+                    client = None
+                    self.reconnects += 1
+                if self._closing:
+                    break
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 5.0)
+                continue
+            for frame in batch:
+                self._queue.popleft()
+                if frame[0] == "a":
+                    self._attached = frame[1]
+            self.sent += len(batch)
+        if client is not None:
+            client.disconnect()
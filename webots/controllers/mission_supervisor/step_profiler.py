@@ -0,0 +1,72 @@
+"""Cheap per-section timing for the supervisor step loop.
+
+Sections are addressed by index into preallocated lists, so marking one
+costs a perf_counter() call and two list stores. The time spent inside
+sup.step() is recorded as its own section, which gives the supervisor's
+share of the wall-clock budget and the real-time factor directly.
+"""
+import time
+
+class StepProfiler:
+    def __init__(self, sections, enabled=True):
+        self.names = list(sections)
+        self.enabled = enabled
+        self.totals = [0.0] * len(self.names)
+        self.maxima = [0.0] * len(self.names)
+        self.steps = 0
+        self.wall_start = 0.0
+        self.sim_start = 0.0
+        self.sim_end = 0.0
+        self._mark = 0.0
+
+    def begin(self, sim_time):
+        self.wall_start = self._mark = time.perf_counter()
+        self.sim_start = self.sim_end = sim_time
+
+    def mark(self, section):
+        """Charge the time since the previous mark to section."""
+        now = time.perf_counter()
+        elapsed = now - self._mark
+        self._mark = now
+        self.totals[section] += elapsed
+        if elapsed > self.maxima[section]:
+            self.maxima[section] = elapsed
+
+    def end_step(self, sim_time):
+        self.steps += 1
+        self.sim_end = sim_time
+
+    def summary(self, step_section=0):
+        """Totals per section plus supervisor overhead per step and real-time factor."""
+        wall = time.perf_counter() - self.wall_start
+        steps = max(self.steps, 1)
+        sections = {
+            name: {
+                "total_sec": round(total, 6),
+                "mean_us": round(total / steps * 1e6, 2),
+                "max_us": round(peak * 1e6, 2),
+            }
+            for name, total, peak in zip(self.names, self.totals, self.maxima)
+        }
+        overhead = sum(self.totals) - self.totals[step_section]
+        sim = self.sim_end - self.sim_start
+        return {
+            "steps": self.steps,
+            "wall_sec": round(wall, 6),
+            "sim_sec": round(sim, 6),
+            "real_time_factor": round(sim / wall, 3) if wall > 0 else None,
+            "supervisor_us_per_step": round(overhead / steps * 1e6, 2),
+            "supervisor_share": round(overhead / wall, 4) if wall > 0 else None,
+            "sections": sections,
+        }
+
+    def format_summary(self, step_section=0):
+        s = self.summary(step_section)
+        lines = [
+            f"[Supervisor] {s['steps']} steps, {s['sim_sec']:.1f} s simulated in {s['wall_sec']:.1f} s "
+            f"(RTF {s['real_time_factor']}), supervisor {s['supervisor_us_per_step']} us/step "
+            f"({(s['supervisor_share'] or 0) * 100:.1f}% of wall time)"
+        ]
+        for name, stats in s["sections"].items():
+            lines.append(f"[Supervisor]   {name:<10} mean {stats['mean_us']:>9.2f} us   max {stats['max_us']:>9.2f} us")
+        return "\n".join(lines)
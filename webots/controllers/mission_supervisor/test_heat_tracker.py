@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+
+from heat_tracker import HeatTracker
+from lap_tracker import LapTracker, NO_EVENT, CHECKPOINT, LAP
+
+DT = 0.016
+PARAMS = dict(gate_half_extent=1.25, velocity_change_threshold=10.0, altitude_threshold=-0.1, stuck_threshold=5.0)
+
+def _path(waypoints, speed):
+    """Position at time t flying straight legs between waypoints at constant speed."""
+    legs = []
+    for a, b in zip(waypoints, waypoints[1:]):
+        legs.append((a, b, math.dist(a, b) / speed))
+
+    def at(t):
+        for a, b, duration in legs:
+            if t <= duration:
+                f = t / duration
+                return tuple(a[k] + (b[k] - a[k]) * f for k in range(3))
+            t -= duration
+        return waypoints[-1]
+    return at
+
+def test_matches_one_lap_tracker_per_drone():
+    gates = [(10, 1, 0), (10, 1, 10), (0, 1, 10)]
+    loop = [(0, 1, 0), *gates, (0, 1, 0)]
+    paths = [_path(loop * 3, speed) for speed in (4.0, 5.0, 6.5)]
+    singles = [LapTracker(gates, **PARAMS) for _ in paths]
+    heat = HeatTracker(len(paths), gates, **PARAMS)
+    positions = np.zeros((len(paths), 3))
+
+    for step in range(1, 1500):
+        t = step * DT
+        for i, path in enumerate(paths):
+            positions[i] = path(t)
+        events = heat.gate_step(positions, t)
+        expected = [single.gate_step(*positions[i], t) for i, single in enumerate(singles)]
+        if events is None:
+            assert expected == [NO_EVENT] * len(paths)
+        else:
+            assert list(events) == expected
+    assert all(single.last_lap_time > 0 for single in singles)
+    for i, single in enumerate(singles):
+        assert heat.last_lap_time[i] == single.last_lap_time
+        assert list(heat.splits[i]) == single.splits
+        assert heat.next_gate[i] == single.next_gate
+
+def test_retired_drones_are_ignored():
+    heat = HeatTracker(2, [(0, 0, 1), (10, 0, 1)], **PARAMS)
+    heat.gate_step(np.array([[-5.0, 0, 1], [-5.0, 0, 1]]), DT)
+    heat.retire(1)
+    events = heat.gate_step(np.array([[0.0, 0, 1], [0.0, 0, 1]]), 2 * DT)
+    assert list(events) == [CHECKPOINT, NO_EVENT]
+    assert list(heat.next_gate) == [1, 0]
+
+    still = np.zeros((2, 3))
+    assert not heat.crashed(still, still, np.array([-1.0, -1.0]))[1]
+    heat.stuck(still, 0.0)
+    assert list(heat.stuck(still, 6.0)) == [True, False]
+    assert list(heat.timed_out(700.0, 600)) == [True, False]
+
+def test_crash_and_stuck_per_drone():
+    heat = HeatTracker(3, [], **PARAMS)
+    assert heat.gate_step(np.zeros((3, 3)), DT) is None
+    velocities = np.array([[5.0, 0, 0], [8.0, 8.0, 0], [0, 0, 0]])
+    crashed = heat.crashed(velocities, np.zeros((3, 3)), np.array([1.0, 1.0, -0.5]))
+    assert list(crashed) == [False, True, True]
+
+    # Drone 0 creeps forward, drone 1 hovers in place, drone 2 flies fast
+    t = 0.0
+    for i in range(400):
+        t += DT
+        positions = np.array([[i * 0.01, 1, 1], [20, 1, 1], [i * 0.1, 0, 1]])
+        stuck = heat.stuck(positions, t)
+        assert not stuck[0] and not stuck[2]
+        assert stuck[1] == (t - DT > 5.0)
+
+def test_lap_event_carries_lap_time():
+    heat = HeatTracker(2, [(5, 0, 1)], **PARAMS)
+    heat.gate_step(np.array([[0.0, 0, 1], [0.0, 0, 1]]), 0.0)
+    events = heat.gate_step(np.array([[5.0, 0, 1], [0.0, 0, 1]]), 3.0)
+    assert list(events) == [LAP, NO_EVENT]
+    assert heat.last_lap_time[0] == 3.0 and heat.lap_start[0] == 3.0
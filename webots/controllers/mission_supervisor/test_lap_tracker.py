@@ -0,0 +1,102 @@
+import time
+import tracemalloc
+
+from lap_tracker import LapTracker, NO_EVENT, CHECKPOINT, LAP
+from step_profiler import StepProfiler
+
+DT = 0.016
+
+def _tracker(gates, **kwargs):
+    params = dict(gate_half_extent=1.25, velocity_change_threshold=10.0,
+                  altitude_threshold=-0.1, stuck_threshold=5.0)
+    return LapTracker(gates, **(params | kwargs))
+
+def _fly(tracker, waypoints, speed=5.0):
+    """Fly straight legs between waypoints at constant speed, collecting events."""
+    events, t = [], 0.0
+    for (x0, y0, z0), (x1, y1, z1) in zip(waypoints, waypoints[1:]):
+        length = ((x1 - x0) ** 2 + (y1 - y0) ** 2 + (z1 - z0) ** 2) ** 0.5
+        steps = max(int(length / (speed * DT)), 1)
+        for i in range(1, steps + 1):
+            f = i / steps
+            t += DT
+            event = tracker.gate_step(x0 + (x1 - x0) * f, y0 + (y1 - y0) * f, z0 + (z1 - z0) * f, t)
+            if event:
+                events.append((event, round(t, 3)))
+    return events
+
+def test_laps_and_splits():
+    gates = [(10, 1, 0), (10, 1, 10), (0, 1, 10)]
+    tracker = _tracker(gates)
+    loop = [(0, 1, 0), *gates, (0, 1, 0)]
+    events = _fly(tracker, loop + loop[1:])
+    assert [e for e, _ in events] == [CHECKPOINT, CHECKPOINT, LAP] * 2
+    assert tracker.last_lap_time > 0
+    assert abs(sum(tracker.splits) - tracker.last_lap_time) < 1e-9
+
+def test_gate_needs_entry_from_outside():
+    tracker = _tracker([(0, 0, 0), (2, 0, 0), (20, 0, 0)])
+    assert tracker.gate_step(-5, 0, 0, DT) == NO_EVENT
+    # Passing gate 1 where its box overlaps gate 2's
+    assert tracker.gate_step(1.0, 0, 0, 2 * DT) == CHECKPOINT
+    # Already inside gate 2's box on the previous step: no entry, no event
+    assert tracker.gate_step(1.1, 0, 0, 3 * DT) == NO_EVENT
+    assert tracker.gate_step(5, 0, 0, 4 * DT) == NO_EVENT
+    assert tracker.gate_step(2.5, 0, 0, 5 * DT) == CHECKPOINT
+
+def test_crash_and_stuck():
+    tracker = _tracker([])
+    assert not tracker.crashed(5, 0, 0, 0, 0, 0, 1.0)
+    assert tracker.crashed(8, 8, 0, 0, 0, 0, 1.0)
+    assert tracker.crashed(0, 0, 0, 0, 0, 0, -0.5)
+
+    # Slow but steady flight is not "stuck"; hovering in place is
+    t = 0.0
+    for i in range(1000):
+        t += DT
+        assert not tracker.stuck(i * 0.01, 1, 0, t)
+    start = t
+    while t - start <= 5.0:
+        assert not tracker.stuck(20, 1, 0, t)
+        t += DT
+    assert tracker.stuck(20, 1, 0, t + DT)
+
+def test_step_is_cheap_and_allocation_free():
+    gates = [(10 * i, 1, (i % 3) * 5) for i in range(50)]
+    tracker = _tracker(gates)
+    gate_step, crashed, stuck = tracker.gate_step, tracker.crashed, tracker.stuck
+    steps = 50_000
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    t = 0.0
+    for i in range(steps):
+        t += DT
+        x = (i % 5000) * 0.1
+        gate_step(x, 1.0, 0.0, t)
+        if i % 4 == 0:
+            crashed(1.0, 0.0, 0.0, 1.0, 0.0, 0.0, 1.0)
+            stuck(x, 1.0, 0.0, t)
+    per_step_us = (time.perf_counter() - start) / steps * 1e6
+    growth = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    print(f"tracker: {per_step_us:.2f} us/step")
+    # A 16 ms step leaves plenty of room; this keeps the supervisor well under 1%
+    assert per_step_us < 50
+    assert growth < 1024
+
+def test_profiler_summary():
+    profiler = StepProfiler(("step", "gates"))
+    profiler.begin(0.0)
+    for i in range(10):
+        profiler.mark(0)
+        profiler.mark(1)
+        profiler.end_step((i + 1) * DT)
+    summary = profiler.summary(step_section=0)
+    assert summary["steps"] == 10
+    assert summary["sim_sec"] == round(10 * DT, 6)
+    assert set(summary["sections"]) == {"step", "gates"}
+    assert summary["real_time_factor"] > 0
+    assert "us/step" in profiler.format_summary()
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from race_channel import RaceChannel
+
+class FlakyClient:
+    """socketio.Client stand-in: the first connect and the second call fail."""
+    attempts = 0
+    calls = 0
+
+    def __init__(self, log):
+        self.log = log
+
+    def connect(self, url, namespaces, auth, wait_timeout):
+        FlakyClient.attempts += 1
+        if FlakyClient.attempts == 1:
+            raise ConnectionError("gateway down")
+
+    def call(self, event, batch, namespace, timeout):
+        FlakyClient.calls += 1
+        if FlakyClient.calls == 2:
+            self.log.append("lost")
+            raise TimeoutError("no ack")
+        self.log.append(list(batch))
+
+    def disconnect(self):
+        pass
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return predicate()
+
+def test_buffers_through_reconnects_and_reattaches():
+    FlakyClient.attempts = FlakyClient.calls = 0
+    batches = []
+    channel = RaceChannel("http://gateway", "pilot", rate_hz=4, client_factory=lambda: FlakyClient(batches))
+    channel.attach("m1")
+    expected = []
+    for step in range(16):                       # 2 s of 125 ms steps, sampled at 4 Hz
+        channel.position(step * 0.125, 1.0, 2.0, 3.0)
+        if step % 2 == 0:
+            expected.append(["p", step * 0.125, 1.0, 2.0, 3.0])
+        if step == 8:
+            assert _wait(lambda: batches)        # the second batch sent is lost once
+        time.sleep(0.01)
+    channel.lap(2.0, 1, 2.0)
+    channel.status(2.0, "completed", "completed")
+    channel.close()
+    expected += [["l", 2.0, 1, 2.0], ["s", 2.0, "completed", "completed"]]
+    assert "lost" in batches
+    delivered = [b for b in batches if b != "lost"]
+    # Nothing lost or repeated, and every connection starts by naming the run
+    assert [f for b in delivered for f in b if f[0] != "a"] == expected
+    assert delivered[0][0] == ["a", "m1", "pilot"]
+    assert batches[batches.index("lost") + 1][0] == ["a", "m1", "pilot"]
+    assert channel.reconnects == 2                # the refused connect and the lost call
+
+def test_full_buffer_drops_positions_not_events():
+    gate = threading.Event()
+
+    class Offline(FlakyClient):
+        def connect(self, *args, **kwargs):
+            if not gate.is_set():
+                raise ConnectionError("gateway down")
+
+        def call(self, event, batch, namespace, timeout):
+            self.log.append(list(batch))
+
+    batches = []
+    channel = RaceChannel("http://gateway", "pilot", rate_hz=4, max_buffer=5,
+                          client_factory=lambda: Offline(batches))
+    channel.attach("m1")
+    for step in range(20):
+        channel.position(step * 0.25, 0.0, 0.0, 1.0)
+    channel.checkpoint(5.0, 0, 5.0)
+    gate.set()
+    channel.close(timeout=3.0)
+    frames = [frame for batch in batches for frame in batch]
+    assert channel.dropped == 16
+    assert [f[0] for f in frames] == ["a", "p", "p", "p", "p", "c"]
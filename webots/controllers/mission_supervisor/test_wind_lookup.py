@@ -0,0 +1,64 @@
+import json
+import time
+from array import array
+
+from wind_lookup import WindField
+
+def _write_field(tmp_path, shape, value, origin=(-2.0, -2.0, 0.0), spacing=1.0, frame_dt=0.5):
+    """Field file whose value at grid point (t, i, j, k, c) is value(...)."""
+    frames, nx, ny, nz = shape
+    data = array("f", (value(t, i, j, k, c) for t in range(frames) for i in range(nx)
+                       for j in range(ny) for k in range(nz) for c in range(3)))
+    (tmp_path / "f.f32").write_bytes(data.tobytes())
+    meta = {"shape": list(shape), "origin": list(origin), "spacing": spacing,
+            "frame_dt": frame_dt, "wind_kts": 1.0, "data": "f.f32"}
+    path = tmp_path / "f.json"
+    path.write_text(json.dumps(meta))
+    return path
+
+def _linear(t, i, j, k, c):
+    return (1.0 * i + 2.0 * j + 3.0 * k + 10.0 * t) * (c + 1)
+
+def test_trilinear_is_exact_on_linear_field(tmp_path):
+    field = WindField(_write_field(tmp_path, (4, 5, 6, 7), _linear))
+    # Grid coordinates i = x + 2, j = y + 2, k = z; t = 0.25 s is halfway to frame 1
+    wx, wy, wz = field.sample(0.3, -1.2, 2.5, 0.25)
+    expected = 1.0 * 2.3 + 2.0 * 0.8 + 3.0 * 2.5 + 10.0 * 0.5
+    assert abs(wx - expected) < 1e-4
+    assert abs(wy - 2 * expected) < 1e-4
+    assert abs(wz - 3 * expected) < 1e-4
+    field.close()
+
+def test_clamps_to_grid_and_loops_in_time(tmp_path):
+    field = WindField(_write_field(tmp_path, (4, 3, 3, 3), _linear))
+    assert field.sample(-50, -50, -50, 0.0)[0] == 0.0
+    assert abs(field.sample(50, 50, 50, 0.0)[0] - (2 + 4 + 6)) < 1e-5
+    # Four frames of 0.5 s: t = 2.0 is frame 0 again, t = 1.75 blends frame 3 into frame 0
+    assert field.sample(-2, -2, 0, 2.0)[0] == field.sample(-2, -2, 0, 0.0)[0]
+    assert abs(field.sample(-2, -2, 0, 1.75)[0] - 15.0) < 1e-5
+    field.close()
+
+def test_drag_opposes_relative_motion(tmp_path):
+    field = WindField(_write_field(tmp_path, (2, 2, 2, 2), lambda t, i, j, k, c: 5.0 if c == 0 else 0.0))
+    fx, fy, fz = field.force(0, 0, 0, 0, 0, 0, 0)
+    assert fx > 0 and fy == 0 and fz == 0
+    # Flying with the wind at wind speed feels nothing
+    assert field.force(0, 0, 0, 0, 5, 0, 0) == (0.0, 0.0, 0.0)
+    field.close()
+
+def test_lookup_cost_does_not_depend_on_field_size(tmp_path):
+    def per_sample_us(shape):
+        field = WindField(_write_field(tmp_path, shape, lambda *a: 1.0))
+        sample = field.sample
+        start = time.perf_counter()
+        for n in range(20_000):
+            sample(n * 0.001, 0.5, 1.0, n * 0.016)
+        elapsed = (time.perf_counter() - start) / 20_000 * 1e6
+        field.close()
+        return elapsed
+
+    small = per_sample_us((2, 2, 2, 2))
+    large = per_sample_us((8, 40, 40, 20))
+    print(f"wind lookup: {small:.2f} us small field, {large:.2f} us large field")
+    assert large < 100
+    assert large < 3 * small
@@ -0,0 +1,104 @@
+"""Per-step wind force from a precomputed gust field.
+
+The gateway writes the field as raw float32 (frame, x, y, z, component) with
+a JSON sidecar (see backend/gateway/wind_field.py). Here it is memory-mapped
+and sampled with trilinear interpolation in space and linear interpolation
+between frames: 16 grid points per component whatever the field size, and
+only the pages the drone actually flies through are ever read from disk.
+"""
+import json
+import mmap
+import os
+import sys
+
+AIR_DENSITY = 1.225     # kg/m^3
+# Effective drag area (Cd * A) of a Crazyflie with prop guards, m^2
+DRAG_AREA = 0.004
+
+class WindField:
+    __slots__ = (
+        "frames", "nx", "ny", "nz", "ox", "oy", "oz", "inv_spacing", "inv_frame_dt",
+        "sx", "sy", "sz", "st", "data", "_mmap", "drag", "meta",
+    )
+
+    def __init__(self, json_path, drag_area=DRAG_AREA):
+        with open(json_path) as f:
+            meta = json.load(f)
+        self.meta = meta
+        self.frames, self.nx, self.ny, self.nz = meta["shape"]
+        self.ox, self.oy, self.oz = meta["origin"]
+        self.inv_spacing = 1.0 / meta["spacing"]
+        self.inv_frame_dt = 1.0 / meta["frame_dt"]
+        self.sz = 3
+        self.sy = self.nz * 3
+        self.sx = self.ny * self.sy
+        self.st = self.nx * self.sx
+        self.drag = 0.5 * AIR_DENSITY * drag_area
+
+        if sys.byteorder != "little":
+            raise ValueError("Wind fields are little-endian float32")
+        data_path = os.path.join(os.path.dirname(os.path.abspath(json_path)), meta["data"])
+        with open(data_path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self._mmap).cast("f")
+        if len(self.data) != self.frames * self.st:
+            self.close()
+            raise ValueError(f"{data_path} does not match shape {meta['shape']}")
+
+    def close(self):
+        self.data.release()
+        self._mmap.close()
+
+    def _cell(self, value, origin, n):
+        """Lower grid index and fraction along one axis, clamped to the grid."""
+        f = (value - origin) * self.inv_spacing
+        if f <= 0.0:
+            return 0, 0.0
+        if f >= n - 1:
+            return n - 2, 1.0
+        i = int(f)
+        return i, f - i
+
+    def sample(self, x, y, z, t):
+        """Wind velocity (m/s) at world point (x, y, z) and sim time t."""
+        i, u = self._cell(x, self.ox, self.nx)
+        j, v = self._cell(y, self.oy, self.ny)
+        k, w = self._cell(z, self.oz, self.nz)
+        ft = t * self.inv_frame_dt
+        frame = int(ft)
+        s = ft - frame
+        frame %= self.frames
+        nxt = frame + 1 if frame + 1 < self.frames else 0
+
+        sx, sy, sz, d = self.sx, self.sy, self.sz, self.data
+        u0, v0, w0 = 1.0 - u, 1.0 - v, 1.0 - w
+        c00, c01, c10, c11 = u0 * v0, u0 * v, u * v0, u * v
+        # Weights of the 8 cell corners, each split between the two frames
+        a, b = 1.0 - s, s
+        w000, w001, w010, w011 = c00 * w0, c00 * w, c01 * w0, c01 * w
+        w100, w101, w110, w111 = c10 * w0, c10 * w, c11 * w0, c11 * w
+
+        p = i * sx + j * sy + k * sz
+        p0 = frame * self.st + p
+        p1 = nxt * self.st + p
+        out0 = out1 = out2 = 0.0
+        for frame_base, weight in ((p0, a), (p1, b)):
+            for c in range(3):
+                q = frame_base + c
+                value = (w000 * d[q] + w001 * d[q + sz] + w010 * d[q + sy] + w011 * d[q + sy + sz]
+                         + w100 * d[q + sx] + w101 * d[q + sx + sz] + w110 * d[q + sx + sy]
+                         + w111 * d[q + sx + sy + sz]) * weight
+                if c == 0:
+                    out0 += value
+                elif c == 1:
+                    out1 += value
+                else:
+                    out2 += value
+        return out0, out1, out2
+
+    def force(self, x, y, z, t, vx, vy, vz):
+        """Quadratic drag force (N, world frame) of the local wind on a drone moving at (vx, vy, vz)."""
+        wx, wy, wz = self.sample(x, y, z, t)
+        rx, ry, rz = wx - vx, wy - vy, wz - vz
+        scale = self.drag * (rx * rx + ry * ry + rz * rz) ** 0.5
+        return rx * scale, ry * scale, rz * scale